@@ -0,0 +1,139 @@
+"""
+列式响应工具
+
+K线、历史数据、选股等大结果集默认按行返回（每行一个 dict，经 FastAPI 默认 JSON 编码），
+行数多时序列化开销占主导。客户端可通过 ?format= 或 Accept 头选择列式返回：
+- rows（默认）: 原有按行格式
+- columns: 统一响应包，data.columns 为 {列名: 数组}，用 orjson 直接序列化 numpy 数组
+- arrow: Apache Arrow IPC 流（Accept: application/vnd.apache.arrow.stream），
+  附加字段（code/period/source 等）写入 schema metadata 的 "meta" 键
+"""
+import json
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from app.core.response import ok
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+FORMAT_ROWS = "rows"
+FORMAT_COLUMNS = "columns"
+FORMAT_ARROW = "arrow"
+FORMATS = (FORMAT_ROWS, FORMAT_COLUMNS, FORMAT_ARROW)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+
+FORMAT_QUERY_DESCRIPTION = "返回格式：rows（默认，按行）/columns（列式 JSON）/arrow（Arrow IPC 流）"
+
+
+def negotiate_format(request: Request, fmt: Optional[str] = None) -> str:
+    """
+    确定响应格式：显式的 format 参数优先，其次按 Accept 头识别 Arrow
+
+    Raises:
+        HTTPException: 不支持的格式（400）；请求 Arrow 但服务端未安装 pyarrow（406）
+    """
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支持的format: {fmt}，可选: {', '.join(FORMATS)}")
+    else:
+        accept = request.headers.get("accept", "")
+        fmt = FORMAT_ARROW if (ARROW_STREAM_MEDIA_TYPE in accept or ARROW_FILE_MEDIA_TYPE in accept) else FORMAT_ROWS
+
+    if fmt == FORMAT_ARROW and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=406, detail="服务端未安装 pyarrow，无法返回 Arrow 格式")
+    return fmt
+
+
+def records_frame(records: Iterable[Dict[str, Any]], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """按行记录（如 MongoDB 文档）转 DataFrame，去掉 _id"""
+    df = pd.DataFrame(list(records), columns=list(columns) if columns else None)
+    return df.drop(columns=["_id"], errors="ignore")
+
+
+def frame_records(df: pd.DataFrame) -> list:
+    """DataFrame 转按行记录，NaN 转为 None（保证是合法 JSON）"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _column_values(series: pd.Series) -> Any:
+    """单列转为可直接序列化的值：数值/布尔列保留 numpy 数组（orjson 原生序列化），其余转 list"""
+    if ORJSON_AVAILABLE and series.dtype.kind in "biuf":
+        return np.ascontiguousarray(series.to_numpy())
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(v) else v.isoformat() for v in series]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def column_arrays(df: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame 转 {列名: 数组}"""
+    return {str(column): _column_values(df[column]) for column in df.columns}
+
+
+def _dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _arrow_array(series: pd.Series):
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 混合类型的对象列（如 ObjectId、嵌套结构）退化为字符串
+        return pa.array([None if v is None or (isinstance(v, float) and np.isnan(v)) else str(v) for v in series])
+
+
+def arrow_ipc_bytes(df: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """DataFrame 按列写出 Arrow IPC 流"""
+    table = pa.Table.from_arrays(
+        [_arrow_array(df[column]) for column in df.columns],
+        names=[str(column) for column in df.columns],
+    )
+    if meta:
+        table = table.replace_schema_metadata({"meta": _dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def columnar_response(
+    df: pd.DataFrame,
+    fmt: str,
+    meta: Optional[Dict[str, Any]] = None,
+    message: str = "ok",
+) -> Response:
+    """
+    按列式格式构建响应
+
+    Args:
+        df: 结果数据
+        fmt: columns / arrow
+        meta: 随数据返回的附加字段（columns 格式并入 data，arrow 格式写入 schema metadata）
+        message: 响应消息
+    """
+    meta = dict(meta or {})
+    if fmt == FORMAT_ARROW:
+        return Response(content=arrow_ipc_bytes(df, meta), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+    data = {**meta, "format": FORMAT_COLUMNS, "count": len(df), "columns": column_arrays(df)}
+    return Response(content=_dumps(ok(data, message)), media_type="application/json")
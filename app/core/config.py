@@ -92,6 +92,20 @@ class Settings(BaseSettings):
     GLOBAL_CONCURRENT_LIMIT: int = Field(default=50)
     DEFAULT_DAILY_QUOTA: int = Field(default=1000)
 
+    # 分析执行引擎（SimpleAnalysisService）
+    ANALYSIS_MAX_WORKERS: int = Field(default=3, ge=1, description="同时执行的分析任务数（线程数）")
+    ANALYSIS_MAX_QUEUED: int = Field(default=20, ge=0, description="等待执行的分析任务上限，超过时拒绝新提交")
+    ANALYSIS_PROVIDER_CONCURRENCY: str = Field(
+        default="",
+        description="按LLM供应商限制并发分析数，如 'dashscope=4,deepseek=8'；模型配置 performance_metrics.max_concurrency 优先"
+    )
+    ANALYSIS_PROVIDER_DEFAULT_CONCURRENCY: int = Field(default=0, ge=0, description="未单独配置的供应商的并发上限，0 表示只受总并发限制")
+    ANALYSIS_ASYNC_GRAPH: bool = Field(
+        default=True,
+        description="分析图在事件循环上以 apropagate 异步执行（准备/收尾步骤仍在执行线程中）；关闭时整个分析在线程中同步执行",
+    )
+    BATCH_ANALYSIS_MAX_SIZE: int = Field(default=10, ge=1, description="单次批量分析最多包含的股票数；同市场同日期的任务共享市场级上下文")
+
     # 速率限制
     RATE_LIMIT_ENABLED: bool = Field(default=True)
     DEFAULT_RATE_LIMIT: int = Field(default=100)  # 每分钟请求数
@@ -101,6 +115,10 @@ class Settings(BaseSettings):
     LOG_FORMAT: str = Field(default="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     LOG_FILE: str = Field(default="logs/tradingagents.log")
 
+    # 操作日志批量写入（后台线程按数量/时间阈值 insert_many，请求路径不再等待写库）
+    OPLOG_BATCH_SIZE: int = Field(default=100, ge=1, description="操作日志批量写入条数阈值")
+    OPLOG_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0, gt=0, description="操作日志最长写入间隔（秒）")
+
     # 代理配置
     # 用于配置需要绕过代理的域名（国内数据源）
     # 多个域名用逗号分隔
@@ -139,6 +157,8 @@ class Settings(BaseSettings):
 
     # 监控配置
     METRICS_ENABLED: bool = Field(default=True)
+    # /metrics 抓取令牌（Authorization: Bearer <token>）；未配置时只允许本机访问
+    METRICS_TOKEN: str = Field(default="")
     HEALTH_CHECK_INTERVAL: int = Field(default=60)  # 60秒
 
 
@@ -167,6 +187,35 @@ class Settings(BaseSettings):
     # 休市期/启动兜底补数（填充上一笔快照）
     QUOTES_BACKFILL_ON_STARTUP: bool = Field(default=True)
     QUOTES_BACKFILL_ON_OFFHOURS: bool = Field(default=True)
+    # 全市场实时估值快照（每次行情入库后批量重算动态 PE/PB/市值）
+    REALTIME_VALUATION_ENABLED: bool = Field(default=True, description="行情入库后刷新全市场实时估值快照")
+
+    # 交易日历（CN/HK/US），从 Tushare trade_cal 刷新到本地文件（TRADING_CALENDAR_FILE）
+    TRADING_CALENDAR_REFRESH_ENABLED: bool = Field(default=True, description="定期从 Tushare 刷新交易日历")
+    TRADING_CALENDAR_REFRESH_CRON: str = Field(default="0 5 * * 1", description="交易日历刷新CRON表达式")
+
+    # 进程共享的股票目录（代码→名称/市场、前缀搜索），由基础信息同步任务刷新
+    SYMBOL_DIRECTORY_FILE: str = Field(default="./data/symbol_directory.tsv", description="股票目录快照文件")
+    SYMBOL_DIRECTORY_RELOAD_SECONDS: float = Field(default=30.0, ge=0, description="检查快照文件更新的间隔（秒）")
+
+    # 物化筛选表（替代 stock_screening_view 的实时 $lookup 关联）
+    SCREENING_TABLE_ENABLED: bool = Field(default=True, description="启用物化筛选表 stock_screening_table")
+    SCREENING_TABLE_REFRESH_INTERVAL_SECONDS: int = Field(
+        default=300, ge=10,
+        description="筛选表增量刷新间隔（秒），按 updated_at 水位重算有变化的基础信息/财务数据"
+    )
+
+    # 分析任务状态存储：redis（多进程共享，带用户/状态/开始时间索引）或 memory（进程内）
+    TASK_STATE_BACKEND: str = Field(default="redis", description="任务状态存储后端: redis / memory")
+    TASK_STATE_CACHE_TTL_SECONDS: float = Field(default=1.0, ge=0, description="任务状态本地读缓存时间（秒）")
+    TASK_STATE_RETENTION_HOURS: int = Field(default=24, ge=1, description="已结束任务在共享存储中的保留时间（小时）")
+
+    # 分析报告列表（游标分页 + 摘要投影 + 前缀词元索引）
+    REPORT_LIST_COUNT_CACHE_SECONDS: int = Field(default=30, ge=0, description="带筛选条件的报告总数缓存时间（秒）")
+    REPORT_INDEX_BACKFILL_INTERVAL_SECONDS: int = Field(
+        default=600, ge=30,
+        description="为缺少搜索词元/大小字段的历史报告补齐索引字段的间隔（秒）"
+    )
 
     # 实时行情接口轮换配置
     QUOTES_ROTATION_ENABLED: bool = Field(
@@ -250,6 +299,9 @@ class Settings(BaseSettings):
     BAOSTOCK_INIT_BATCH_SIZE: int = Field(default=50, ge=10, le=500, description="初始化批处理大小")
     BAOSTOCK_INIT_AUTO_START: bool = Field(default=False, description="应用启动时自动检查并初始化数据")
 
+    # 多周期同步配置（日线只拉取一次，周线/月线本地聚合）
+    MULTI_PERIOD_SYNC_CONCURRENCY: int = Field(default=8, ge=1, le=64, description="多周期同步时每个数据源并发同步的股票数（BaoStock 固定为1）")
+
     # 数据目录配置
     TRADINGAGENTS_DATA_DIR: str = Field(default="./data")
 
@@ -270,6 +322,10 @@ class Settings(BaseSettings):
     US_DATA_CACHE_HOURS: int = Field(default=24, ge=1, le=168, description="美股数据缓存时长（小时）")
     US_DEFAULT_DATA_SOURCE: str = Field(default="yfinance", description="美股默认数据源（yfinance/finnhub）")
 
+    # 港股/美股批量同步（基础信息与行情）
+    FOREIGN_SYNC_CONCURRENCY: int = Field(default=8, ge=1, le=64, description="港股/美股同步时逐只请求（如 yfinance 基础信息）的并发线程数")
+    FOREIGN_SYNC_YF_BATCH_SIZE: int = Field(default=100, ge=1, le=500, description="yfinance 批量下载行情时每次请求的股票数")
+
     # ===== 新闻数据同步服务配置 =====
     NEWS_SYNC_ENABLED: bool = Field(default=True)
     NEWS_SYNC_CRON: str = Field(default="0 */2 * * *")  # 每2小时
@@ -229,6 +229,105 @@ async def init_database_views_and_indexes():
         # 不抛出异常，允许应用继续启动
 
 
+def stock_screening_pipeline() -> list:
+    """
+    股票筛选数据的聚合管道：将 stock_basic_info、market_quotes 和 stock_financial_data（最新一期）关联
+
+    同时用于 stock_screening_view 视图和物化筛选表（见 app/services/screening_table_service.py）
+    """
+    return [
+        # 第一步：关联实时行情数据 (market_quotes)
+        {
+            "$lookup": {
+                "from": "market_quotes",
+                "localField": "code",
+                "foreignField": "code",
+                "as": "quote_data"
+            }
+        },
+        # 第二步：展开 quote_data 数组
+        {
+            "$unwind": {
+                "path": "$quote_data",
+                "preserveNullAndEmptyArrays": True
+            }
+        },
+        # 第三步：关联财务数据 (stock_financial_data)
+        {
+            "$lookup": {
+                "from": "stock_financial_data",
+                "let": {"stock_code": "$code", "stock_source": "$source"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$and": [
+                                    {"$eq": ["$code", "$$stock_code"]},
+                                    {"$eq": ["$data_source", "$$stock_source"]}
+                                ]
+                            }
+                        }
+                    },
+                    {"$sort": {"report_period": -1}},
+                    {"$limit": 1}
+                ],
+                "as": "financial_data"
+            }
+        },
+        # 第四步：展开 financial_data 数组
+        {
+            "$unwind": {
+                "path": "$financial_data",
+                "preserveNullAndEmptyArrays": True
+            }
+        },
+        # 第五步：重新组织字段结构
+        {
+            "$project": {
+                # 基础信息字段
+                "code": 1,
+                "name": 1,
+                "industry": 1,
+                "area": 1,
+                "market": 1,
+                "list_date": 1,
+                "source": 1,
+                # 市值信息
+                "total_mv": 1,
+                "circ_mv": 1,
+                # 估值指标
+                "pe": 1,
+                "pb": 1,
+                "pe_ttm": 1,
+                "pb_mrq": 1,
+                # 财务指标
+                "roe": "$financial_data.roe",
+                "roa": "$financial_data.roa",
+                "netprofit_margin": "$financial_data.netprofit_margin",
+                "gross_margin": "$financial_data.gross_margin",
+                "report_period": "$financial_data.report_period",
+                # 交易指标
+                "turnover_rate": 1,
+                "volume_ratio": 1,
+                # 实时行情数据
+                "close": "$quote_data.close",
+                "open": "$quote_data.open",
+                "high": "$quote_data.high",
+                "low": "$quote_data.low",
+                "pre_close": "$quote_data.pre_close",
+                "pct_chg": "$quote_data.pct_chg",
+                "amount": "$quote_data.amount",
+                "volume": "$quote_data.volume",
+                "trade_date": "$quote_data.trade_date",
+                # 时间戳
+                "updated_at": 1,
+                "quote_updated_at": "$quote_data.updated_at",
+                "financial_updated_at": "$financial_data.updated_at"
+            }
+        }
+    ]
+
+
 async def create_stock_screening_view(db):
     """创建股票筛选视图"""
     try:
@@ -238,104 +337,11 @@ async def create_stock_screening_view(db):
             logger.info("📋 视图 stock_screening_view 已存在，跳过创建")
             return
 
-        # 创建视图：将 stock_basic_info、market_quotes 和 stock_financial_data 关联
-        pipeline = [
-            # 第一步：关联实时行情数据 (market_quotes)
-            {
-                "$lookup": {
-                    "from": "market_quotes",
-                    "localField": "code",
-                    "foreignField": "code",
-                    "as": "quote_data"
-                }
-            },
-            # 第二步：展开 quote_data 数组
-            {
-                "$unwind": {
-                    "path": "$quote_data",
-                    "preserveNullAndEmptyArrays": True
-                }
-            },
-            # 第三步：关联财务数据 (stock_financial_data)
-            {
-                "$lookup": {
-                    "from": "stock_financial_data",
-                    "let": {"stock_code": "$code", "stock_source": "$source"},
-                    "pipeline": [
-                        {
-                            "$match": {
-                                "$expr": {
-                                    "$and": [
-                                        {"$eq": ["$code", "$$stock_code"]},
-                                        {"$eq": ["$data_source", "$$stock_source"]}
-                                    ]
-                                }
-                            }
-                        },
-                        {"$sort": {"report_period": -1}},
-                        {"$limit": 1}
-                    ],
-                    "as": "financial_data"
-                }
-            },
-            # 第四步：展开 financial_data 数组
-            {
-                "$unwind": {
-                    "path": "$financial_data",
-                    "preserveNullAndEmptyArrays": True
-                }
-            },
-            # 第五步：重新组织字段结构
-            {
-                "$project": {
-                    # 基础信息字段
-                    "code": 1,
-                    "name": 1,
-                    "industry": 1,
-                    "area": 1,
-                    "market": 1,
-                    "list_date": 1,
-                    "source": 1,
-                    # 市值信息
-                    "total_mv": 1,
-                    "circ_mv": 1,
-                    # 估值指标
-                    "pe": 1,
-                    "pb": 1,
-                    "pe_ttm": 1,
-                    "pb_mrq": 1,
-                    # 财务指标
-                    "roe": "$financial_data.roe",
-                    "roa": "$financial_data.roa",
-                    "netprofit_margin": "$financial_data.netprofit_margin",
-                    "gross_margin": "$financial_data.gross_margin",
-                    "report_period": "$financial_data.report_period",
-                    # 交易指标
-                    "turnover_rate": 1,
-                    "volume_ratio": 1,
-                    # 实时行情数据
-                    "close": "$quote_data.close",
-                    "open": "$quote_data.open",
-                    "high": "$quote_data.high",
-                    "low": "$quote_data.low",
-                    "pre_close": "$quote_data.pre_close",
-                    "pct_chg": "$quote_data.pct_chg",
-                    "amount": "$quote_data.amount",
-                    "volume": "$quote_data.volume",
-                    "trade_date": "$quote_data.trade_date",
-                    # 时间戳
-                    "updated_at": 1,
-                    "quote_updated_at": "$quote_data.updated_at",
-                    "financial_updated_at": "$financial_data.updated_at"
-                }
-            }
-        ]
-
         # 创建视图
         await db.command({
             "create": "stock_screening_view",
             "viewOn": "stock_basic_info",
-            "pipeline": pipeline
+            "pipeline": stock_screening_pipeline()
         })
 
         logger.info("✅ 视图 stock_screening_view 创建成功")
@@ -188,10 +188,34 @@ class BaoStockRateLimiter(RateLimiter):
         )
 
 
+class YFinanceRateLimiter(RateLimiter):
+    """
+    yfinance专用速率限制器
+
+    Yahoo Finance 没有公开的限流规则，过于频繁会返回 429，使用保守的限流策略
+    （批量下载一次请求包含多只股票，按一次调用计）
+    """
+
+    def __init__(self, max_calls: int = 120, time_window: float = 60):
+        """
+        初始化yfinance速率限制器
+
+        Args:
+            max_calls: 时间窗口内最大调用次数（默认120次/分钟）
+            time_window: 时间窗口大小（秒）
+        """
+        super().__init__(
+            max_calls=max_calls,
+            time_window=time_window,
+            name="YFinanceRateLimiter"
+        )
+
+
 # 全局速率限制器实例
 _tushare_limiter: Optional[TushareRateLimiter] = None
 _akshare_limiter: Optional[AKShareRateLimiter] = None
 _baostock_limiter: Optional[BaoStockRateLimiter] = None
+_yfinance_limiter: Optional[YFinanceRateLimiter] = None
 
 
 def get_tushare_rate_limiter(tier: str = "standard", safety_margin: float = 0.8) -> TushareRateLimiter:
@@ -218,11 +242,20 @@ def get_baostock_rate_limiter() -> BaoStockRateLimiter:
     return _baostock_limiter
 
 
+def get_yfinance_rate_limiter() -> YFinanceRateLimiter:
+    """获取yfinance速率限制器（单例）"""
+    global _yfinance_limiter
+    if _yfinance_limiter is None:
+        _yfinance_limiter = YFinanceRateLimiter()
+    return _yfinance_limiter
+
+
 def reset_all_limiters():
     """重置所有速率限制器"""
-    global _tushare_limiter, _akshare_limiter, _baostock_limiter
+    global _tushare_limiter, _akshare_limiter, _baostock_limiter, _yfinance_limiter
     _tushare_limiter = None
     _akshare_limiter = None
     _baostock_limiter = None
+    _yfinance_limiter = None
     logger.info("🔄 所有速率限制器已重置")
 
@@ -21,6 +21,7 @@ import uvicorn
 import logging
 import time
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from contextlib import asynccontextmanager
 import asyncio
 from pathlib import Path
@@ -37,6 +38,7 @@ from app.routers import multi_market_stocks as multi_market_stocks_router
 from app.routers import notifications as notifications_router
 from app.routers import websocket_notifications as websocket_notifications_router
 from app.routers import scheduler as scheduler_router
+from app.routers import metrics as metrics_router
 from app.services.basics_sync_service import get_basics_sync_service
 from app.services.multi_source_basics_sync_service import MultiSourceBasicsSyncService
 from app.services.scheduler_service import set_scheduler_instance
@@ -68,6 +70,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from app.services.quotes_ingestion_service import QuotesIngestionService
+from app.services.screening_table_service import get_screening_table_service
+from app.services.usage_statistics_service import usage_statistics_service
+from app.services.symbol_directory import refresh_symbol_directory
+from tradingagents.utils.trading_calendar import calendar_file as trading_calendar_file, refresh_trading_calendar
+from app.services.report_list_service import get_report_list_service
 from app.routers import paper as paper_router
 
 
@@ -331,6 +338,60 @@ async def lifespan(app: FastAPI):
             )
             logger.info(f"⏱ 实时行情入库任务已启动: 每 {settings.QUOTES_INGEST_INTERVAL_SECONDS}s")
 
+        # 股票目录：启动时从数据库构建一次，之后由基础信息同步任务刷新
+        asyncio.create_task(refresh_symbol_directory())
+
+        # 交易日历：日历文件不存在时启动后刷新一次，之后按 CRON 定期刷新（覆盖下一年的节假日安排）
+        if settings.TUSHARE_ENABLED and settings.TRADING_CALENDAR_REFRESH_ENABLED:
+            async def refresh_calendar():
+                try:
+                    await asyncio.to_thread(refresh_trading_calendar)
+                except Exception as e:
+                    logger.warning(f"⚠️ 交易日历刷新失败（继续使用已有日历）: {e}")
+
+            if not trading_calendar_file().exists():
+                asyncio.create_task(refresh_calendar())
+            scheduler.add_job(
+                refresh_calendar,
+                CronTrigger.from_crontab(settings.TRADING_CALENDAR_REFRESH_CRON, timezone=settings.TIMEZONE),
+                id="trading_calendar_refresh",
+                name="交易日历刷新"
+            )
+            logger.info(f"📅 交易日历刷新任务已配置: {settings.TRADING_CALENDAR_REFRESH_CRON}")
+
+        # 物化筛选表：启动后立即刷新（未构建时由一个 worker 加锁全量构建），之后按 updated_at 水位增量刷新
+        if settings.SCREENING_TABLE_ENABLED:
+            screening_table = get_screening_table_service()
+            await screening_table.ensure_indexes()
+            scheduler.add_job(
+                screening_table.refresh_changed,
+                IntervalTrigger(seconds=settings.SCREENING_TABLE_REFRESH_INTERVAL_SECONDS, timezone=settings.TIMEZONE),
+                id="screening_table_refresh",
+                name="物化筛选表增量刷新",
+                next_run_time=datetime.now(ZoneInfo(settings.TIMEZONE)),
+            )
+            logger.info(f"⏱ 物化筛选表刷新任务已启动: 每 {settings.SCREENING_TABLE_REFRESH_INTERVAL_SECONDS}s")
+
+        # 分析报告列表：建立游标分页/前缀检索索引，并定期为缺少索引字段的报告补齐
+        report_list = get_report_list_service()
+        await report_list.ensure_indexes()
+        scheduler.add_job(
+            report_list.backfill_index_fields,
+            IntervalTrigger(seconds=settings.REPORT_INDEX_BACKFILL_INTERVAL_SECONDS, timezone=settings.TIMEZONE),
+            id="report_index_backfill",
+            name="分析报告列表索引字段补齐",
+            next_run_time=datetime.now(ZoneInfo(settings.TIMEZONE)),
+        )
+
+        # Token 使用量按日聚合桶：一次性迁移由历史记录重建（加锁，只有一个 worker 执行）
+        async def migrate_usage_buckets():
+            try:
+                await usage_statistics_service.migrate_daily_buckets()
+            except Exception as e:
+                logger.warning(f"⚠️ 按日聚合桶迁移失败（统计继续读取原始记录）: {e}")
+
+        asyncio.create_task(migrate_usage_buckets())
+
         # Tushare统一数据同步任务配置
         logger.info("🔄 配置Tushare统一数据同步任务...")
 
@@ -596,6 +657,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"UserService cleanup error: {e}")
 
+        # 写出缓冲区中的操作日志/Token使用记录（需在关闭数据库连接前执行）
+        try:
+            from tradingagents.utils.audit_writer import shutdown_audit_writers
+            await asyncio.to_thread(shutdown_audit_writers)
+        except Exception as e:
+            logger.warning(f"Audit writer shutdown error: {e}")
+
         await close_db()
         logger.info("TradingAgents FastAPI backend stopped")
 
@@ -684,6 +752,7 @@ async def test_log():
 
 # 注册路由
 app.include_router(health.router, prefix="/api", tags=["health"])
+app.include_router(metrics_router.router, tags=["metrics"])
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(reports.router, tags=["reports"])
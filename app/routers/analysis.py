@@ -12,10 +12,12 @@ import time
 import uuid
 import asyncio
 
+from app.core.config import settings
 from app.routers.auth_db import get_current_user
 from app.services.queue_service import get_queue_service, QueueService
 from app.services.analysis_service import get_analysis_service
 from app.services.simple_analysis_service import get_simple_analysis_service
+from app.services.analysis_executor import AnalysisCapacityError, get_analysis_executor
 from app.services.websocket_manager import get_websocket_manager
 from app.models.analysis import (
     SingleAnalysisRequest, BatchAnalysisRequest, AnalysisParameters,
@@ -90,6 +92,9 @@ async def submit_single_analysis(
             "data": result,
             "message": "分析任务已在后台启动"
         }
+    except AnalysisCapacityError as e:
+        logger.warning(f"⚠️ 分析执行引擎已满，拒绝单股分析任务: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"❌ 提交单股分析任务失败: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -794,10 +799,13 @@ async def submit_batch_analysis(
         if not stock_symbols:
             raise ValueError("股票代码列表不能为空")
 
-        # 🔧 限制批量分析的股票数量（最多10个）
-        MAX_BATCH_SIZE = 10
-        if len(stock_symbols) > MAX_BATCH_SIZE:
-            raise ValueError(f"批量分析最多支持 {MAX_BATCH_SIZE} 个股票，当前提交了 {len(stock_symbols)} 个")
+        # 🔧 限制批量分析的股票数量（BATCH_ANALYSIS_MAX_SIZE，默认10个）
+        max_batch_size = settings.BATCH_ANALYSIS_MAX_SIZE
+        if len(stock_symbols) > max_batch_size:
+            raise ValueError(f"批量分析最多支持 {max_batch_size} 个股票，当前提交了 {len(stock_symbols)} 个")
+
+        # 准入控制：整批任务都能被接收时才创建
+        get_analysis_executor().check_capacity(len(stock_symbols))
 
         # 为每只股票创建单股分析任务
         for i, symbol in enumerate(stock_symbols):
@@ -819,6 +827,8 @@ async def submit_batch_analysis(
                 logger.info(f"✅ [批量分析] 已创建任务: {task_id} - {symbol}")
             except Exception as create_error:
                 logger.error(f"❌ [批量分析] 创建任务失败: {symbol}, 错误: {create_error}", exc_info=True)
+                # 已创建的任务不会被执行：释放其准入名额并标记为失败
+                await simple_service.abandon_tasks(task_ids, f"批量任务提交失败: {create_error}")
                 raise
 
         # 🔧 使用 asyncio.create_task 实现真正的并发执行
@@ -867,6 +877,9 @@ async def submit_batch_analysis(
             },
             "message": f"批量分析任务已提交，共{len(task_ids)}个股票，正在并发执行"
         }
+    except AnalysisCapacityError as e:
+        logger.warning(f"⚠️ [批量分析] 分析执行引擎已满，拒绝提交: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"❌ [批量分析] 提交失败: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
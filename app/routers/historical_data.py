@@ -6,9 +6,10 @@
 import logging
 from datetime import datetime, date
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 
+from app.core.columnar import FORMAT_QUERY_DESCRIPTION, FORMAT_ROWS, columnar_response, negotiate_format, records_frame
 from app.services.historical_data_service import get_historical_data_service
 
 logger = logging.getLogger(__name__)
@@ -35,12 +36,14 @@ class HistoricalDataResponse(BaseModel):
 
 @router.get("/query/{symbol}", response_model=HistoricalDataResponse)
 async def get_historical_data(
+    request: Request,
     symbol: str,
     start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD)"),
     data_source: Optional[str] = Query(None, description="数据源 (tushare/akshare/baostock)"),
     period: Optional[str] = Query(None, description="数据周期 (daily/weekly/monthly)"),
-    limit: Optional[int] = Query(None, ge=1, le=1000, description="限制返回数量")
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="限制返回数量"),
+    fmt: Optional[str] = Query(None, alias="format", description=FORMAT_QUERY_DESCRIPTION)
 ):
     """
     查询股票历史数据
@@ -52,7 +55,9 @@ async def get_historical_data(
         data_source: 数据源筛选
         period: 数据周期筛选
         limit: 限制返回数量
+        format: rows/columns/arrow
     """
+    fmt = negotiate_format(request, fmt)
     try:
         service = await get_historical_data_service()
         
@@ -66,17 +71,25 @@ async def get_historical_data(
             limit=limit
         )
         
+        query_params = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "data_source": data_source,
+            "period": period,
+            "limit": limit
+        }
+        if fmt != FORMAT_ROWS:
+            return columnar_response(
+                records_frame(results), fmt,
+                meta={"symbol": symbol, "query_params": query_params},
+                message=f"查询成功，返回 {len(results)} 条记录"
+            )
+
         # 格式化响应
         response_data = {
             "symbol": symbol,
             "count": len(results),
-            "query_params": {
-                "start_date": start_date,
-                "end_date": end_date,
-                "data_source": data_source,
-                "period": period,
-                "limit": limit
-            },
+            "query_params": query_params,
             "records": results
         }
         
@@ -92,10 +105,15 @@ async def get_historical_data(
 
 
 @router.post("/query", response_model=HistoricalDataResponse)
-async def query_historical_data(request: HistoricalDataQuery):
+async def query_historical_data(
+    request: HistoricalDataQuery,
+    http_request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description=FORMAT_QUERY_DESCRIPTION)
+):
     """
     POST方式查询历史数据
     """
+    fmt = negotiate_format(http_request, fmt)
     try:
         service = await get_historical_data_service()
         
@@ -109,6 +127,13 @@ async def query_historical_data(request: HistoricalDataQuery):
             limit=request.limit
         )
         
+        if fmt != FORMAT_ROWS:
+            return columnar_response(
+                records_frame(results), fmt,
+                meta={"symbol": request.symbol, "query_params": request.dict()},
+                message=f"查询成功，返回 {len(results)} 条记录"
+            )
+
         # 格式化响应
         response_data = {
             "symbol": request.symbol,
@@ -6,7 +6,7 @@
 import logging
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.routers.auth_db import get_current_user
@@ -61,6 +61,7 @@ class LogStatisticsResponse(BaseModel):
     error_files: int
     recent_errors: List[str]
     log_types: dict
+    level_counts: dict = {}
 
 
 @router.get("/files", response_model=List[LogFileInfo])
@@ -127,7 +128,7 @@ async def export_logs(
     current_user: dict = Depends(get_current_user)
 ):
     """
-    导出日志文件
+    导出日志文件（流式返回）
     
     支持导出格式：
     - zip: 压缩包（推荐）
@@ -142,7 +143,7 @@ async def export_logs(
         logger.info(f"📤 用户 {current_user['username']} 导出日志文件")
         
         service = get_log_export_service()
-        export_path = service.export_logs(
+        filename, media_type, stream = service.stream_export(
             filenames=request.filenames,
             level=request.level,
             start_time=request.start_time,
@@ -150,14 +151,9 @@ async def export_logs(
             format=request.format
         )
         
-        # 返回文件下载
-        import os
-        filename = os.path.basename(export_path)
-        media_type = "application/zip" if request.format == "zip" else "text/plain"
-        
-        return FileResponse(
-            path=export_path,
-            filename=filename,
+        # 边压缩边返回，不落地临时文件
+        return StreamingResponse(
+            stream,
             media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
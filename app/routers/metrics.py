@@ -0,0 +1,61 @@
+"""
+Prometheus 指标导出
+
+/metrics 以 Prometheus 文本格式输出图运行遥测（按节点/模型的 LLM 耗时、Token、工具耗时、
+缓存命中、成本）以及分析执行引擎的当前负载。受 METRICS_ENABLED 控制。
+
+指标包含按模型的成本与 Token 用量，不对外公开：配置 METRICS_TOKEN 时要求
+Authorization: Bearer <METRICS_TOKEN>，未配置时只允许本机访问。
+"""
+
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.services.analysis_executor import get_analysis_executor
+from tradingagents.utils.telemetry import get_telemetry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _executor_gauges() -> str:
+    stats = get_analysis_executor().stats()
+    gauges = {
+        "tradingagents_analysis_running": ("执行中的分析任务数", stats["running"]),
+        "tradingagents_analysis_queued": ("等待执行的分析任务数", stats["queued"]),
+        "tradingagents_analysis_admitted": ("已接收未结束的分析任务数", stats["admitted"]),
+    }
+    lines = []
+    for name, (help_text, value) in gauges.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def require_metrics_access(request: Request) -> None:
+    """校验抓取方：匹配 METRICS_TOKEN，或未配置令牌时来自本机"""
+    token = settings.METRICS_TOKEN
+    if token:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(credentials.strip(), token):
+            raise HTTPException(status_code=401, detail="invalid metrics token",
+                                headers={"WWW-Authenticate": "Bearer"})
+        return
+    client_host = request.client.host if request.client else ""
+    if client_host not in _LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="metrics only available from localhost; set METRICS_TOKEN")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """Prometheus 抓取端点"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="metrics disabled")
+    body = get_telemetry().render_prometheus() + _executor_gauges()
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
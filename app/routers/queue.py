@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends
 from app.routers.auth_db import get_current_user
 from app.services.queue_service import get_queue_service, QueueService
+from app.services.analysis_executor import get_analysis_executor
 
 router = APIRouter()
 
 @router.get("/stats")
 async def queue_stats(user: dict = Depends(get_current_user), svc: QueueService = Depends(get_queue_service)):
     stats = await svc.stats()
-    return {"user": user["id"], **stats}
\ No newline at end of file
+    return {"user": user["id"], **stats, "executor": get_analysis_executor().stats()}
+
+
+@router.get("/executor")
+async def executor_stats(user: dict = Depends(get_current_user)):
+    """分析执行引擎状态：执行中/等待中任务数、各供应商并发、排队等待时间"""
+    return get_analysis_executor().stats()
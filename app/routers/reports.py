@@ -3,6 +3,7 @@
 """
 import os
 import json
+import asyncio
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from pathlib import Path
@@ -14,6 +15,8 @@ from pydantic import BaseModel
 from .auth_db import get_current_user
 from ..core.database import get_mongo_db
 from ..utils.timezone import to_config_tz
+from ..services.symbol_directory import get_symbol_directory
+from ..services.report_list_service import get_report_list_service
 import logging
 
 logger = logging.getLogger("webapi")
@@ -24,10 +27,15 @@ _stock_name_cache = {}
 def get_stock_name(stock_code: str) -> str:
     """
     获取股票名称
-    优先级：缓存 -> MongoDB（按数据源优先级） -> 默认返回股票代码
+    优先级：股票目录 -> 缓存 -> MongoDB（按数据源优先级） -> 默认返回股票代码
     """
     global _stock_name_cache
 
+    # 优先查进程共享的股票目录（纯内存）
+    name = get_symbol_directory().get_name(stock_code)
+    if name:
+        return name
+
     # 检查缓存
     if stock_code in _stock_name_cache:
         return _stock_name_cache[stock_code]
@@ -125,53 +133,37 @@ async def get_reports_list(
     start_date: Optional[str] = Query(None, description="开始日期"),
     end_date: Optional[str] = Query(None, description="结束日期"),
     stock_code: Optional[str] = Query(None, description="股票代码"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），传入时忽略 page"),
     user: dict = Depends(get_current_user)
 ):
     """获取分析报告列表"""
     try:
         logger.info(f"🔍 获取报告列表: 用户={user['id']}, 页码={page}, 每页={page_size}, 市场={market_filter}")
 
-        db = get_mongo_db()
+        list_service = get_report_list_service()
 
-        # 构建查询条件
-        query = {}
-
-        # 搜索关键词
-        if search_keyword:
-            query["$or"] = [
-                {"stock_symbol": {"$regex": search_keyword, "$options": "i"}},
-                {"analysis_id": {"$regex": search_keyword, "$options": "i"}},
-                {"summary": {"$regex": search_keyword, "$options": "i"}}
-            ]
-
-        # 市场筛选
-        if market_filter:
-            query["market_type"] = market_filter
-
-        # 股票代码筛选
-        if stock_code:
-            query["stock_symbol"] = stock_code
-
-        # 日期范围筛选
-        if start_date or end_date:
-            date_query = {}
-            if start_date:
-                date_query["$gte"] = start_date
-            if end_date:
-                date_query["$lte"] = end_date
-            query["analysis_date"] = date_query
+        # 构建查询条件（搜索关键词走 search_tokens 前缀索引，子串命中后缀词元）
+        query = list_service.build_query(
+            search_keyword=search_keyword,
+            market_filter=market_filter,
+            start_date=start_date,
+            end_date=end_date,
+            stock_code=stock_code,
+        )
 
         logger.info(f"📊 查询条件: {query}")
 
-        # 计算总数
-        total = await db.analysis_reports.count_documents(query)
-
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = db.analysis_reports.find(query).sort("created_at", -1).skip(skip).limit(page_size)
+        # 总数与分页查询并发执行；分页只取列表需要的字段
+        try:
+            total, (docs, next_cursor) = await asyncio.gather(
+                list_service.count(query),
+                list_service.list_page(query, page_size, cursor=cursor, page=page),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         reports = []
-        async for doc in cursor:
+        for doc in docs:
             # 转换为前端需要的格式
             stock_code = doc.get("stock_symbol", "")
             # 🔥 优先使用MongoDB中保存的股票名称，如果没有则查询
@@ -212,7 +204,7 @@ async def get_reports_list(
                 "analysts": doc.get("analysts", []),
                 "research_depth": doc.get("research_depth", 1),
                 "summary": doc.get("summary", ""),
-                "file_size": len(str(doc.get("reports", {}))),  # 估算大小
+                "file_size": doc.get("reports_size", 0),  # 写入时记录的估算大小
                 "source": doc.get("source", "unknown"),
                 "task_id": doc.get("task_id", "")
             }
@@ -226,11 +218,14 @@ async def get_reports_list(
                 "reports": reports,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             },
             "message": "报告列表获取成功"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ 获取报告列表失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
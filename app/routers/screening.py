@@ -1,9 +1,10 @@
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from app.routers.auth_db import get_current_user
+from app.core.columnar import FORMAT_QUERY_DESCRIPTION, FORMAT_ROWS, columnar_response, negotiate_format, records_frame
 
 from app.services.screening_service import ScreeningService, ScreeningParams
 from app.services.enhanced_screening_service import get_enhanced_screening_service
@@ -154,7 +155,13 @@ def _convert_legacy_conditions_to_new_format(legacy_conditions: Dict[str, Any])
 
 # 传统筛选接口（保持向后兼容，但使用增强服务）
 @router.post("/run", response_model=ScreeningResponse)
-async def run_screening(req: ScreeningRequest, user: dict = Depends(get_current_user)):
+async def run_screening(
+    req: ScreeningRequest,
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description=FORMAT_QUERY_DESCRIPTION),
+    user: dict = Depends(get_current_user)
+):
+    fmt = negotiate_format(request, fmt)
     try:
         logger.info(f"[screening] 请求条件: {req.conditions}")
         logger.info(f"[screening] 排序与分页: order_by={req.order_by}, limit={req.limit}, offset={req.offset}")
@@ -182,6 +189,9 @@ async def run_screening(req: ScreeningRequest, user: dict = Depends(get_current_
             sample = result['items'][:3]
             logger.info(f"[screening] 返回样例(前3条): {sample}")
 
+        if fmt != FORMAT_ROWS:
+            return columnar_response(records_frame(result["items"]), fmt, meta={"total": result["total"]})
+
         return ScreeningResponse(total=result["total"], items=result["items"])
 
     except Exception as e:
@@ -191,13 +201,20 @@ async def run_screening(req: ScreeningRequest, user: dict = Depends(get_current_
 
 # 新的优化筛选接口
 @router.post("/enhanced", response_model=NewScreeningResponse)
-async def enhanced_screening(req: NewScreeningRequest, user: dict = Depends(get_current_user)):
+async def enhanced_screening(
+    req: NewScreeningRequest,
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description=FORMAT_QUERY_DESCRIPTION),
+    user: dict = Depends(get_current_user)
+):
     """
     增强的股票筛选接口
     - 支持更丰富的筛选条件格式
     - 自动选择最优的筛选策略（数据库优化 vs 传统方法）
     - 提供详细的性能统计信息
+    - 支持列式返回（format=columns/arrow）
     """
+    fmt = negotiate_format(request, fmt)
     try:
         logger.info(f"[enhanced_screening] 筛选条件: {len(req.conditions)}个")
         logger.info(f"[enhanced_screening] 排序与分页: order_by={req.order_by}, limit={req.limit}, offset={req.offset}")
@@ -217,6 +234,17 @@ async def enhanced_screening(req: NewScreeningRequest, user: dict = Depends(get_
         logger.info(f"[enhanced_screening] 筛选完成: total={result.get('total')}, "
                    f"took={result.get('took_ms')}ms, optimization={result.get('optimization_used')}")
 
+        if fmt != FORMAT_ROWS:
+            return columnar_response(
+                records_frame(result["items"]), fmt,
+                meta={
+                    "total": result["total"],
+                    "took_ms": result.get("took_ms"),
+                    "optimization_used": result.get("optimization_used"),
+                    "source": result.get("source")
+                }
+            )
+
         return NewScreeningResponse(
             total=result["total"],
             items=result["items"],
@@ -2,6 +2,7 @@
 股票数据API路由 - 基于扩展数据模型
 提供标准化的股票数据访问接口
 """
+import itertools
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi import status
@@ -219,6 +220,7 @@ async def search_stocks(
     try:
         from app.core.database import get_mongo_db
         from app.core.unified_config import UnifiedConfigManager
+        from app.services.symbol_directory import get_symbol_directory
 
         db = get_mongo_db()
         collection = db.stock_basic_info
@@ -238,31 +240,47 @@ async def search_stocks(
 
         preferred_source = enabled_sources[0] if enabled_sources else 'tushare'
 
-        # 构建搜索条件
-        search_conditions = []
-
-        # 如果是6位数字，按代码精确匹配
-        if keyword.isdigit() and len(keyword) == 6:
-            search_conditions.append({"symbol": keyword})
+        # 股票目录已加载时，先用内存前缀索引确定候选代码，再按代码精确查库（避免正则全表扫描）；
+        # 候选代码按批查库并过滤数据源，凑满 limit 条或候选耗尽为止
+        directory = get_symbol_directory()
+        if len(directory):
+            candidates = directory.iter_search(keyword, market="CN")
+            results = []
+            while len(results) < limit:
+                batch = [e.code for e in itertools.islice(candidates, max(limit * 2, 20))]
+                if not batch:
+                    break
+                docs = await collection.find(
+                    {"code": {"$in": batch}, "source": preferred_source}, {"_id": 0}
+                ).to_list(length=len(batch))
+                rank = {code: i for i, code in enumerate(batch)}
+                results.extend(sorted(docs, key=lambda d: rank.get(str(d.get("code")), len(rank))))
+            results = results[:limit]
         else:
-            # 按名称模糊匹配
-            search_conditions.append({"name": {"$regex": keyword, "$options": "i"}})
-            # 如果包含数字，也尝试代码匹配
-            if any(c.isdigit() for c in keyword):
-                search_conditions.append({"symbol": {"$regex": keyword}})
-
-        # 🔥 添加数据源筛选：只查询优先级最高的数据源
-        query = {
-            "$and": [
-                {"$or": search_conditions},
-                {"source": preferred_source}
-            ]
-        }
-
-        # 执行搜索
-        cursor = collection.find(query, {"_id": 0}).limit(limit)
+            # 构建搜索条件
+            search_conditions = []
+
+            # 如果是6位数字，按代码精确匹配
+            if keyword.isdigit() and len(keyword) == 6:
+                search_conditions.append({"symbol": keyword})
+            else:
+                # 按名称模糊匹配
+                search_conditions.append({"name": {"$regex": keyword, "$options": "i"}})
+                # 如果包含数字，也尝试代码匹配
+                if any(c.isdigit() for c in keyword):
+                    search_conditions.append({"symbol": {"$regex": keyword}})
+
+            # 🔥 添加数据源筛选：只查询优先级最高的数据源
+            query = {
+                "$and": [
+                    {"$or": search_conditions},
+                    {"source": preferred_source}
+                ]
+            }
 
-        results = await cursor.to_list(length=limit)
+            # 执行搜索
+            cursor = collection.find(query, {"_id": 0}).limit(limit)
+            results = await cursor.to_list(length=limit)
 
         # 数据标准化
         service = get_stock_data_service()
@@ -5,13 +5,19 @@
 - 路径前缀在 main.py 中挂载为 /api，当前路由自身前缀为 /stocks
 """
 from typing import Optional, Dict, Any, List, Tuple
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 import logging
 import re
 
+import numpy as np
+import pandas as pd
+
 from app.routers.auth_db import get_current_user
 from app.core.database import get_mongo_db
 from app.core.response import ok
+from app.core.columnar import (
+    FORMAT_QUERY_DESCRIPTION, FORMAT_ROWS, columnar_response, frame_records, negotiate_format, records_frame
+)
 
 logger = logging.getLogger(__name__)
 
@@ -418,13 +424,43 @@ async def get_fundamentals(
     return ok(data)
 
 
+def _kline_frame(df: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """MongoDB 历史数据转K线（列与前端 items 字段一致），按列向量化转换"""
+    df = df.tail(limit)
+
+    def numeric(*names: str, default: float = 0.0) -> np.ndarray:
+        for name in names:
+            if name in df.columns:
+                return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        return np.full(len(df), default)
+
+    if "trade_date" in df.columns:
+        times = df["trade_date"].to_numpy()
+    elif "date" in df.columns:
+        times = df["date"].to_numpy()
+    else:
+        times = np.full(len(df), "")
+
+    return pd.DataFrame({
+        "time": times,  # 前端期望 time 字段
+        "open": numeric("open"),
+        "high": numeric("high"),
+        "low": numeric("low"),
+        "close": numeric("close"),
+        "volume": numeric("volume", "vol"),
+        "amount": numeric("amount", default=np.nan),
+    })
+
+
 @router.get("/{code}/kline", response_model=dict)
 async def get_kline(
+    request: Request,
     code: str,
     period: str = "day",
     limit: int = 120,
     adj: str = "none",
     force_refresh: bool = Query(False, description="是否强制刷新（跳过缓存）"),
+    fmt: Optional[str] = Query(None, alias="format", description=FORMAT_QUERY_DESCRIPTION),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -433,6 +469,7 @@ async def get_kline(
     period: day/week/month/5m/15m/30m/60m
     adj: none/qfq/hfq
     force_refresh: 是否强制刷新（跳过缓存）
+    format: rows/columns/arrow（也可通过 Accept: application/vnd.apache.arrow.stream 请求 Arrow）
 
     🔥 新增功能：当天实时K线数据
     - 交易时间内（09:30-15:00）：从 market_quotes 获取实时数据
@@ -446,6 +483,7 @@ async def get_kline(
     valid_periods = {"day","week","month","5m","15m","30m","60m"}
     if period not in valid_periods:
         raise HTTPException(status_code=400, detail=f"不支持的period: {period}")
+    fmt = negotiate_format(request, fmt)
 
     # 检测市场类型
     market, normalized_code = _detect_market_and_code(code)
@@ -459,6 +497,11 @@ async def get_kline(
 
         try:
             kline_data = await service.get_kline(market, normalized_code, period, limit, force_refresh)
+            if fmt != FORMAT_ROWS:
+                return columnar_response(
+                    records_frame(kline_data or []), fmt,
+                    meta={'code': normalized_code, 'period': period, 'source': 'cache_or_api'}
+                )
             return ok(data={
                 'code': normalized_code,
                 'period': period,
@@ -475,7 +518,7 @@ async def get_kline(
     # A股：使用现有逻辑
     code_padded = normalized_code
     adj_norm = None if adj in (None, "none", "", "null") else adj
-    items = None
+    bars = None
     source = None
 
     # 周期映射：前端 -> MongoDB
@@ -510,25 +553,14 @@ async def get_kline(
         df = adapter.get_historical_data(code_padded, start_date, end_date, period=mongodb_period)
 
         if df is not None and not df.empty:
-            # 转换 DataFrame 为列表格式
-            items = []
-            for _, row in df.tail(limit).iterrows():
-                items.append({
-                    "time": row.get("trade_date", row.get("date", "")),  # 前端期望 time 字段
-                    "open": float(row.get("open", 0)),
-                    "high": float(row.get("high", 0)),
-                    "low": float(row.get("low", 0)),
-                    "close": float(row.get("close", 0)),
-                    "volume": float(row.get("volume", row.get("vol", 0))),
-                    "amount": float(row.get("amount", 0)) if "amount" in row else None,
-                })
+            bars = _kline_frame(df, limit)
             source = "mongodb"
-            logger.info(f"✅ 从 MongoDB 获取到 {len(items)} 条 K 线数据")
+            logger.info(f"✅ 从 MongoDB 获取到 {len(bars)} 条 K 线数据")
     except Exception as e:
         logger.warning(f"⚠️ MongoDB 获取 K 线失败: {e}")
 
     # 2. 如果 MongoDB 没有数据，降级到外部 API（带超时保护）
-    if not items:
+    if bars is None or bars.empty:
         logger.info(f"📡 MongoDB 无数据，降级到外部 API")
         try:
             import asyncio
@@ -540,6 +572,7 @@ async def get_kline(
                 asyncio.to_thread(mgr.get_kline_with_fallback, code_padded, period, limit, adj_norm),
                 timeout=10.0
             )
+            bars = records_frame(items or [])
         except asyncio.TimeoutError:
             logger.error(f"❌ 外部 API 获取 K 线超时（10秒）")
             raise HTTPException(status_code=504, detail="获取K线数据超时，请稍后重试")
@@ -548,12 +581,11 @@ async def get_kline(
             raise HTTPException(status_code=500, detail=f"获取K线数据失败: {str(e)}")
 
     # 🔥 3. 检查是否需要添加当天实时数据（仅针对日线）
-    if period == "day" and items:
+    if period == "day" and not bars.empty:
         try:
             # 检查历史数据中是否已有当天的数据（支持两种日期格式）
-            has_today_data = any(
-                item.get("time") in [today_str_yyyymmdd, today_str_formatted]
-                for item in items
+            has_today_data = "time" in bars.columns and bool(
+                bars["time"].astype(str).isin([today_str_yyyymmdd, today_str_formatted]).any()
             )
 
             # 判断是否在交易时间内或收盘后缓冲期
@@ -597,11 +629,11 @@ async def get_kline(
                     # 如果历史数据中已有当天数据，替换；否则追加
                     if has_today_data:
                         # 替换最后一条数据（假设最后一条是当天的）
-                        items[-1] = today_kline
+                        bars = pd.concat([bars.iloc[:-1], pd.DataFrame([today_kline])], ignore_index=True)
                         logger.info(f"✅ 替换当天K线数据: {code_padded}")
                     else:
                         # 追加到末尾
-                        items.append(today_kline)
+                        bars = pd.concat([bars, pd.DataFrame([today_kline])], ignore_index=True)
                         logger.info(f"✅ 追加当天K线数据: {code_padded}")
 
                     source = f"{source}+market_quotes"
@@ -610,14 +642,17 @@ async def get_kline(
         except Exception as e:
             logger.warning(f"⚠️ 获取当天实时数据失败（忽略）: {e}")
 
-    data = {
+    meta = {
         "code": code_padded,
         "period": period,
         "limit": limit,
         "adj": adj if adj else "none",
         "source": source,
-        "items": items or []
     }
+    if fmt != FORMAT_ROWS:
+        return columnar_response(bars, fmt, meta=meta)
+
+    data = {**meta, "items": frame_records(bars)}
     return ok(data)
 
 
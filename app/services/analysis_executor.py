@@ -0,0 +1,257 @@
+"""
+分析任务执行引擎
+
+替代 SimpleAnalysisService 中固定 3 线程的线程池：
+- 总并发数、等待队列上限可配置（ANALYSIS_MAX_WORKERS / ANALYSIS_MAX_QUEUED）
+- 按 LLM 供应商限制并发，使整体吞吐与各家 API 配额匹配
+- 准入控制：已接收（执行中 + 等待中）的任务达到上限时拒绝新提交，并给出建议重试时间
+- 统计队列深度、执行中任务数、排队等待时间，供 /api/queue/stats 展示
+
+等待在事件循环中进行（asyncio.Semaphore），只有拿到执行名额的任务才会占用线程。
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 用于统计的最近等待时间样本数
+_WAIT_SAMPLES = 200
+
+
+class AnalysisCapacityError(Exception):
+    """分析执行引擎已满，拒绝新任务"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """解析 'dashscope=4,deepseek=8' 格式的供应商并发配置"""
+    limits: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        name = name.strip().lower()
+        if not name or not value.strip():
+            continue
+        try:
+            limits[name] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"⚠️ 无效的供应商并发配置: {item}")
+    return limits
+
+
+class _ProviderSlot:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.running = 0
+        self.queued = 0
+
+
+class AnalysisExecutor:
+    """带供应商并发限制和准入控制的分析执行引擎"""
+
+    def __init__(
+        self,
+        max_workers: int = 3,
+        max_queued: int = 20,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_provider_limit: int = 0,
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._provider_limits = {k.lower(): v for k, v in (provider_limits or {}).items()}
+        self._default_provider_limit = default_provider_limit
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._providers: Dict[str, _ProviderSlot] = {}
+
+        # 已接收但未结束的任务：task_id -> 接收时间
+        self._admitted: Dict[str, float] = {}
+        self._running = 0
+        self._queued = 0
+        self._wait_times: deque = deque(maxlen=_WAIT_SAMPLES)
+        self._durations: deque = deque(maxlen=_WAIT_SAMPLES)
+        self._counters = {"admitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    @classmethod
+    def from_settings(cls) -> "AnalysisExecutor":
+        return cls(
+            max_workers=settings.ANALYSIS_MAX_WORKERS,
+            max_queued=settings.ANALYSIS_MAX_QUEUED,
+            provider_limits=parse_provider_limits(settings.ANALYSIS_PROVIDER_CONCURRENCY),
+            default_provider_limit=settings.ANALYSIS_PROVIDER_DEFAULT_CONCURRENCY,
+        )
+
+    # ------------------------------------------------------------------
+    # 准入控制
+    # ------------------------------------------------------------------
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queued
+
+    def admit(self, task_ids: Iterable[str]) -> None:
+        """
+        接收一批任务；容量不足时整体拒绝（抛出 AnalysisCapacityError）
+
+        接收后的任务必须在结束时调用 release()
+        """
+        task_ids = list(task_ids)
+        self.check_capacity(len(task_ids))
+        now = time.monotonic()
+        for task_id in task_ids:
+            self._admitted[task_id] = now
+        self._counters["admitted"] += len(task_ids)
+
+    def check_capacity(self, count: int = 1) -> None:
+        """检查是否还能接收 count 个任务，不足时抛出 AnalysisCapacityError"""
+        if len(self._admitted) + count > self.capacity:
+            self._counters["rejected"] += count
+            retry_after = self._estimate_retry_after()
+            raise AnalysisCapacityError(
+                f"分析任务繁忙：执行中/等待中的任务已达上限 {self.capacity}，请约 {retry_after} 秒后重试",
+                retry_after=retry_after,
+            )
+
+    def release(self, task_id: str) -> None:
+        self._admitted.pop(task_id, None)
+
+    def _estimate_retry_after(self) -> int:
+        avg_duration = sum(self._durations) / len(self._durations) if self._durations else 300
+        backlog = max(1, len(self._admitted) - self.max_workers + 1)
+        return int(avg_duration * backlog / self.max_workers)
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+    def provider_limit(self, provider: str, override: Optional[int] = None) -> int:
+        limit = override or self._provider_limits.get(provider) or self._default_provider_limit
+        return min(limit, self.max_workers) if limit else self.max_workers
+
+    def _provider_slot(self, provider: str, override: Optional[int]) -> _ProviderSlot:
+        limit = self.provider_limit(provider, override)
+        slot = self._providers.get(provider)
+        if slot is None or (slot.limit != limit and slot.running == 0 and slot.queued == 0):
+            slot = _ProviderSlot(limit)
+            self._providers[provider] = slot
+        return slot
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        provider: str = "default",
+        provider_limit: Optional[int] = None,
+    ) -> Any:
+        """在执行线程中运行 fn；先按供应商、再按总并发排队"""
+        async with self.slot(provider, provider_limit):
+            return await self.run_in_pool(fn, *args)
+
+    async def run_in_pool(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在执行线程池中运行 fn（不排队，调用方应已持有 slot）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, *args)
+
+    @asynccontextmanager
+    async def slot(self, provider: str = "default", provider_limit: Optional[int] = None) -> AsyncIterator[None]:
+        """
+        占用一个执行名额：先按供应商、再按总并发排队
+
+        异步执行的分析在事件循环上运行图，只把同步的准备/收尾步骤放进线程池，
+        整个过程持有同一个名额，并发上限与线程执行时一致
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        provider = (provider or "default").lower()
+        provider_slot = self._provider_slot(provider, provider_limit)
+
+        enqueued = time.monotonic()
+        self._queued += 1
+        provider_slot.queued += 1
+        dequeued = False
+        try:
+            # 先拿供应商名额，避免占着总名额等待某个供应商
+            async with provider_slot.semaphore:
+                async with self._slots:
+                    dequeued = True
+                    self._queued -= 1
+                    provider_slot.queued -= 1
+                    self._wait_times.append(time.monotonic() - enqueued)
+                    self._running += 1
+                    provider_slot.running += 1
+                    started = time.monotonic()
+                    try:
+                        yield
+                        self._counters["completed"] += 1
+                    except BaseException:
+                        self._counters["failed"] += 1
+                        raise
+                    finally:
+                        self._durations.append(time.monotonic() - started)
+                        self._running -= 1
+                        provider_slot.running -= 1
+        finally:
+            # 排队期间被取消
+            if not dequeued:
+                self._queued -= 1
+                provider_slot.queued -= 1
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_times)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 3) if waits else 0.0
+
+        return {
+            "backend": "thread",
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "admitted": len(self._admitted),
+            "running": self._running,
+            "queued": self._queued,
+            "saturated": len(self._admitted) >= self.capacity,
+            "providers": {
+                name: {"limit": s.limit, "running": s.running, "queued": s.queued}
+                for name, s in self._providers.items()
+            },
+            "wait_seconds": {
+                "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p50": pct(0.5),
+                "p95": pct(0.95),
+                "max": round(waits[-1], 3) if waits else 0.0,
+            },
+            "totals": dict(self._counters),
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局实例
+_analysis_executor: Optional[AnalysisExecutor] = None
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """获取分析执行引擎实例"""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = AnalysisExecutor.from_settings()
+        logger.info(
+            f"🔧 分析执行引擎: 并发={_analysis_executor.max_workers}, "
+            f"等待上限={_analysis_executor.max_queued}"
+        )
+    return _analysis_executor
@@ -5,7 +5,7 @@
 import logging
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import numpy as np
 
@@ -31,6 +31,10 @@ class FinancialMetricComparison:
     difference_pct: Optional[float]
     is_significant: bool
     tolerance: float
+    compared_count: int = 0
+    breach_count: int = 0
+    max_difference_pct: Optional[float] = None
+    outliers: List[Dict[str, Any]] = field(default_factory=list)
 
 class DataConsistencyChecker:
     """数据一致性检查器"""
@@ -55,6 +59,15 @@ class DataConsistencyChecker:
             'volume': 0.10,
             'turnover_rate': 0.05
         }
+        
+        # 指标在不同数据源中的列名
+        self.metric_aliases = {
+            'price': ['close', 'price'],
+            'volume': ['vol', 'volume'],
+        }
+        
+        # 每个指标/汇总中保留的超差股票数量
+        self.max_outliers = 20
     
     def check_daily_basic_consistency(
         self, 
@@ -65,6 +78,9 @@ class DataConsistencyChecker:
     ) -> DataConsistencyResult:
         """
         检查daily_basic数据的一致性
+
+        两个数据集按标准化后的6位代码一次性对齐，全市场所有可比指标做向量化比较，
+        不再抽样，耗时与股票数量成线性关系。
         
         Args:
             primary_data: 主数据源数据
@@ -87,9 +103,9 @@ class DataConsistencyChecker:
                     details={'reason': 'Empty dataset detected'}
                 )
             
-            # 2. 股票代码匹配
-            common_stocks = self._find_common_stocks(primary_data, secondary_data)
-            if len(common_stocks) == 0:
+            # 2. 按股票代码对齐
+            aligned = self._align_frames(primary_data, secondary_data)
+            if aligned.empty:
                 return DataConsistencyResult(
                     is_consistent=False,
                     primary_source=primary_source,
@@ -100,21 +116,25 @@ class DataConsistencyChecker:
                     details={'reason': 'No overlapping stocks'}
                 )
             
-            logger.info(f"📊 找到{len(common_stocks)}只共同股票进行比较")
+            logger.info(f"📊 找到{len(aligned)}只共同股票进行比较")
             
-            # 3. 逐指标比较
+            # 3. 逐指标向量化比较
             metric_comparisons = []
-            for metric in ['pe', 'pb', 'total_mv']:
-                comparison = self._compare_metric(
-                    primary_data, secondary_data, common_stocks, metric
-                )
+            breaches = {}
+            for metric in self.tolerance_thresholds:
+                comparison, breach = self._compare_metric(aligned, metric)
                 if comparison:
                     metric_comparisons.append(comparison)
+                    breaches[metric] = breach
             
             # 4. 计算整体一致性
             consistency_result = self._calculate_overall_consistency(
                 metric_comparisons, primary_source, secondary_source
             )
+            if metric_comparisons:
+                consistency_result.details.update(
+                    self._summarize_breaches(aligned, breaches)
+                )
             
             return consistency_result
             
@@ -130,88 +150,145 @@ class DataConsistencyChecker:
                 details={'exception': str(e)}
             )
     
-    def _find_common_stocks(self, df1: pd.DataFrame, df2: pd.DataFrame) -> List[str]:
-        """找到两个数据集中的共同股票"""
-        # 尝试不同的股票代码列名
-        code_cols = ['ts_code', 'symbol', 'code', 'stock_code']
+    @staticmethod
+    def _normalize_codes(df: pd.DataFrame) -> Optional[pd.Series]:
+        """提取标准化的6位股票代码（000001.SZ / sh.600000 / 1 -> 000001 / 600000 / 000001）"""
+        for col in ['ts_code', 'symbol', 'code', 'stock_code']:
+            if col in df.columns:
+                digits = df[col].astype(str).str.extract(r'(\d+)', expand=False)
+                return digits.str.zfill(6)
+        return None
+    
+    def _align_frames(self, df1: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
+        """
+        按标准化代码内连接两个数据集
+
+        Returns:
+            以代码为索引的 DataFrame，列为 (指标, 'primary'/'secondary')，仅包含两边都有的指标
+        """
+        codes1 = self._normalize_codes(df1)
+        codes2 = self._normalize_codes(df2)
+        if codes1 is None or codes2 is None:
+            return pd.DataFrame()
         
-        df1_codes = set()
-        df2_codes = set()
+        pairs = {}
+        for metric in self.tolerance_thresholds:
+            col1 = self._metric_column(df1, metric)
+            col2 = self._metric_column(df2, metric)
+            if col1 and col2:
+                pairs[metric] = (col1, col2)
         
-        for col in code_cols:
-            if col in df1.columns:
-                df1_codes.update(df1[col].dropna().astype(str).tolist())
-            if col in df2.columns:
-                df2_codes.update(df2[col].dropna().astype(str).tolist())
+        def _frame(df: pd.DataFrame, codes: pd.Series, side: int) -> pd.DataFrame:
+            columns = {metric: cols[side] for metric, cols in pairs.items()}
+            frame = pd.DataFrame(
+                {metric: pd.to_numeric(df[col], errors='coerce').to_numpy() for metric, col in columns.items()},
+                index=codes.to_numpy(),
+            )
+            frame = frame[frame.index.notna()]
+            # 同一代码出现多次时取第一条
+            return frame[~frame.index.duplicated(keep='first')]
         
-        return list(df1_codes.intersection(df2_codes))
+        left = _frame(df1, codes1, 0)
+        right = _frame(df2, codes2, 1)
+        aligned = left.join(right, how='inner', lsuffix='.primary', rsuffix='.secondary')
+        if not pairs:
+            # 没有可比指标时仍返回共同股票，由后续流程给出“无可比指标”结论
+            aligned = pd.DataFrame(index=left.index.intersection(right.index))
+        aligned.index.name = 'code'
+        return aligned
+    
+    def _metric_column(self, df: pd.DataFrame, metric: str) -> Optional[str]:
+        """指标在数据集中的实际列名"""
+        for col in self.metric_aliases.get(metric, [metric]):
+            if col in df.columns:
+                return col
+        return None
     
     def _compare_metric(
         self, 
-        df1: pd.DataFrame, 
-        df2: pd.DataFrame, 
-        common_stocks: List[str], 
+        aligned: pd.DataFrame, 
         metric: str
-    ) -> Optional[FinancialMetricComparison]:
-        """比较特定指标"""
+    ) -> Tuple[Optional[FinancialMetricComparison], Optional[pd.DataFrame]]:
+        """
+        比较特定指标（全市场向量化）
+
+        Returns:
+            (指标比较结果, 超出容忍度的股票明细)；指标不可比时均为 None
+        """
         try:
-            if metric not in df1.columns or metric not in df2.columns:
-                return None
-            
-            # 获取共同股票的指标值
-            df1_values = []
-            df2_values = []
-            
-            for stock in common_stocks[:100]:  # 限制比较数量
-                val1 = self._get_stock_metric_value(df1, stock, metric)
-                val2 = self._get_stock_metric_value(df2, stock, metric)
-                
-                if val1 is not None and val2 is not None:
-                    df1_values.append(val1)
-                    df2_values.append(val2)
+            primary_col = f'{metric}.primary'
+            secondary_col = f'{metric}.secondary'
+            if primary_col not in aligned.columns or secondary_col not in aligned.columns:
+                return None, None
             
-            if len(df1_values) == 0:
-                return None
-            
-            # 计算平均值和差异
-            avg1 = np.mean(df1_values)
-            avg2 = np.mean(df2_values)
-            
-            if avg1 != 0:
-                diff_pct = abs(avg2 - avg1) / abs(avg1)
-            else:
-                diff_pct = float('inf') if avg2 != 0 else 0
+            # 与逐只比较时一致：缺失值和0视为无效
+            values1 = aligned[primary_col]
+            values2 = aligned[secondary_col]
+            valid = values1.notna() & values2.notna() & (values1 != 0) & (values2 != 0)
+            if not valid.any():
+                return None, None
+            values1 = values1[valid]
+            values2 = values2[valid]
             
+            rel_diff = (values2 - values1).abs() / values1.abs()
             tolerance = self.tolerance_thresholds.get(metric, 0.1)
+            breached = rel_diff > tolerance
+            
+            # 以逐只差异的中位数衡量整体差异，不被个别异常值拉偏
+            diff_pct = float(rel_diff.median())
             is_significant = diff_pct > tolerance
             
+            breach = pd.DataFrame({
+                'primary': values1[breached],
+                'secondary': values2[breached],
+                'difference_pct': rel_diff[breached],
+            }).sort_values('difference_pct', ascending=False)
+            
             return FinancialMetricComparison(
                 metric_name=metric,
-                primary_value=avg1,
-                secondary_value=avg2,
+                primary_value=float(values1.mean()),
+                secondary_value=float(values2.mean()),
                 difference_pct=diff_pct,
                 is_significant=is_significant,
-                tolerance=tolerance
-            )
+                tolerance=tolerance,
+                compared_count=int(valid.sum()),
+                breach_count=int(breached.sum()),
+                max_difference_pct=float(rel_diff.max()),
+                outliers=[
+                    {
+                        'code': code,
+                        'primary_value': float(row.primary),
+                        'secondary_value': float(row.secondary),
+                        'difference_pct': float(row.difference_pct),
+                    }
+                    for code, row in breach.head(self.max_outliers).iterrows()
+                ],
+            ), breach
             
         except Exception as e:
             logger.warning(f"⚠️ 比较指标{metric}失败: {e}")
-            return None
+            return None, None
     
-    def _get_stock_metric_value(self, df: pd.DataFrame, stock_code: str, metric: str) -> Optional[float]:
-        """获取特定股票的指标值"""
-        try:
-            # 尝试不同的匹配方式
-            for code_col in ['ts_code', 'symbol', 'code']:
-                if code_col in df.columns:
-                    mask = df[code_col].astype(str) == stock_code
-                    if mask.any():
-                        value = df.loc[mask, metric].iloc[0]
-                        if pd.notna(value) and value != 0:
-                            return float(value)
-            return None
-        except:
-            return None
+    def _summarize_breaches(self, aligned: pd.DataFrame, breaches: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """汇总逐只股票的超差情况：超差指标越多、差异越大的股票排在越前"""
+        per_stock: Dict[str, Dict[str, float]] = {}
+        for metric, breach in breaches.items():
+            for code, diff in breach['difference_pct'].items():
+                per_stock.setdefault(code, {})[metric] = float(diff)
+        
+        ranked = sorted(
+            per_stock.items(),
+            key=lambda item: (len(item[1]), max(item[1].values())),
+            reverse=True,
+        )
+        return {
+            'compared_stocks': len(aligned),
+            'breach_stocks': len(per_stock),
+            'outlier_stocks': [
+                {'code': code, 'metrics': metrics}
+                for code, metrics in ranked[:self.max_outliers]
+            ],
+        }
     
     def _calculate_overall_consistency(
         self, 
@@ -254,7 +331,12 @@ class DataConsistencyChecker:
                 'secondary_value': comp.secondary_value,
                 'difference_pct': comp.difference_pct,
                 'is_significant': comp.is_significant,
-                'tolerance': comp.tolerance
+                'tolerance': comp.tolerance,
+                'compared_count': comp.compared_count,
+                'breach_count': comp.breach_count,
+                'breach_ratio': comp.breach_count / comp.compared_count if comp.compared_count else 0.0,
+                'max_difference_pct': comp.max_difference_pct,
+                'outliers': comp.outliers
             }
         
         confidence_score = weighted_score / total_weight if total_weight > 0 else 0
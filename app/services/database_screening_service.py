@@ -3,11 +3,14 @@
 利用本地数据库中的股票基础信息进行高效筛选
 """
 
+import asyncio
 import logging
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from app.core.config import settings
 from app.core.database import get_mongo_db
+from app.services.screening_table_service import get_screening_table_service
 # from app.models.screening import ScreeningCondition  # 避免循环导入
 
 logger = logging.getLogger(__name__)
@@ -18,6 +21,7 @@ class DatabaseScreeningService:
     
     def __init__(self):
         # 使用视图而不是基础信息表，视图已经包含了实时行情数据
+        # 物化筛选表就绪时优先查询筛选表（带排序字段索引），否则回退到视图
         self.collection_name = "stock_screening_view"
         
         # 支持的基础信息字段映射
@@ -115,8 +119,7 @@ class DatabaseScreeningService:
             Tuple[List[Dict], int]: (筛选结果, 总数量)
         """
         try:
-            db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection()
 
             # 🔥 获取数据源优先级配置
             if not source:
@@ -154,9 +157,6 @@ class DatabaseScreeningService:
             # 构建排序条件
             sort_conditions = self._build_sort_conditions(order_by)
 
-            # 获取总数
-            total_count = await collection.count_documents(query)
-
             # 执行查询
             cursor = collection.find(query)
 
@@ -167,16 +167,17 @@ class DatabaseScreeningService:
             # 应用分页
             cursor = cursor.skip(offset).limit(limit)
 
-            # 获取结果
-            results = []
-            codes = []
-            async for doc in cursor:
-                # 转换结果格式
-                result = self._format_result(doc)
-                results.append(result)
-                codes.append(doc.get("code"))
+            async def _fetch_page() -> List[Dict[str, Any]]:
+                return [doc async for doc in cursor]
+
+            # 总数与分页查询并发执行
+            total_count, docs = await asyncio.gather(collection.count_documents(query), _fetch_page())
+
+            # 转换结果格式
+            results = [self._format_result(doc) for doc in docs]
 
-            # 批量查询财务数据（ROE等）- 如果视图中没有包含
+            # 批量查询财务数据（ROE等）- 仅针对视图/筛选表中缺少的股票
+            codes = [r.get("code") for r in results if r.get("roe") is None]
             if codes:
                 await self._enrich_with_financial_data(results, codes)
 
@@ -188,6 +189,18 @@ class DatabaseScreeningService:
             logger.error(f"❌ 数据库筛选失败: {e}")
             raise Exception(f"数据库筛选失败: {str(e)}")
     
+    async def _get_collection(self):
+        """物化筛选表就绪时返回筛选表，否则返回视图"""
+        db = get_mongo_db()
+        if settings.SCREENING_TABLE_ENABLED:
+            table_service = get_screening_table_service()
+            try:
+                if await table_service.is_ready():
+                    return db[table_service.collection_name]
+            except Exception as e:
+                logger.warning(f"⚠️ 检查物化筛选表失败，回退到视图: {e}")
+        return db[self.collection_name]
+
     async def _build_query(self, conditions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """构建MongoDB查询条件"""
         query = {}
@@ -402,8 +415,7 @@ class DatabaseScreeningService:
             if not db_field:
                 return {}
             
-            db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection()
             
             # 使用聚合管道获取统计信息
             pipeline = [
@@ -569,8 +581,7 @@ class DatabaseScreeningService:
             if not db_field:
                 return []
             
-            db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection()
             
             # 获取字段的不重复值
             values = await collection.distinct(db_field)
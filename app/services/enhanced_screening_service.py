@@ -115,12 +115,8 @@ class EnhancedScreeningService:
                 except Exception as enrich_err:
                     logger.warning(f"实时行情富集失败（已忽略）: {enrich_err}")
 
-            # 为筛选结果添加实时PE/PB
-            if items:
-                try:
-                    items = await self._enrich_results_with_realtime_metrics(items)
-                except Exception as enrich_err:
-                    logger.warning(f"实时PE/PB富集失败（已忽略）: {enrich_err}")
+            # 实时PE/PB/市值由行情入库周期写入筛选表（筛选前生效），这里不再覆盖，
+            # 否则返回结果可能不满足筛选条件或排序
 
             # 计算耗时
             took_ms = int((time.time() - start_time) * 1000)
@@ -209,27 +205,6 @@ class EnhancedScreeningService:
         """Delegate condition conversion to utils."""
         return _convert_to_traditional_util(conditions)
 
-    async def _enrich_results_with_realtime_metrics(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        为筛选结果添加PE/PB（使用静态数据，避免性能问题）
-
-        Args:
-            items: 筛选结果列表
-
-        Returns:
-            List[Dict]: 富集后的结果列表
-        """
-        # 🔥 股票筛选场景：直接使用 stock_basic_info 中的静态 PE/PB
-        # 原因：批量计算动态 PE 会导致严重的性能问题（每个股票都要查询多个集合）
-        # 静态 PE 基于最近一个交易日的收盘价，对于筛选场景已经足够准确
-
-        logger.info(f"📊 [筛选结果富集] 使用静态PE/PB（避免性能问题），共 {len(items)} 只股票")
-
-        # 注意：items 中的 PE/PB 已经来自 stock_basic_info，这里不需要额外处理
-        # 如果未来需要实时 PE，可以在单个股票详情页面单独计算
-
-        return items
-
     async def get_field_info(self, field: str) -> Optional[Dict[str, Any]]:
         """
         获取字段信息
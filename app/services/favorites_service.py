@@ -9,6 +9,7 @@ from bson import ObjectId
 from app.core.database import get_mongo_db
 from app.models.user import FavoriteStock
 from app.services.quotes_service import get_quotes_service
+from app.services.symbol_directory import get_symbol_directory
 
 
 class FavoritesService:
@@ -73,9 +74,18 @@ class FavoritesService:
         # 先格式化基础字段
         items = [self._format_favorite(fav) for fav in favorites]
 
-        # 批量获取股票基础信息（板块等）
+        # 批量获取股票基础信息（板块等）：优先使用进程共享的股票目录，未命中的再查库
         codes = [it.get("stock_code") for it in items if it.get("stock_code")]
-        if codes:
+        directory = get_symbol_directory()
+        missing_basic = []
+        for it in items:
+            entry = directory.get(it["stock_code"]) if it.get("stock_code") else None
+            if entry:
+                it["board"] = entry.board or "-"
+                it["exchange"] = entry.exchange or "-"
+            elif it.get("stock_code"):
+                missing_basic.append(it["stock_code"])
+        if missing_basic:
             try:
                 # 🔥 获取数据源优先级配置
                 from app.core.unified_config import UnifiedConfigManager
@@ -96,7 +106,7 @@ class FavoritesService:
                 # 从 stock_basic_info 获取板块信息（只查询优先级最高的数据源）
                 basic_info_coll = db["stock_basic_info"]
                 cursor = basic_info_coll.find(
-                    {"code": {"$in": codes}, "source": preferred_source},  # 🔥 添加数据源筛选
+                    {"code": {"$in": missing_basic}, "source": preferred_source},  # 🔥 添加数据源筛选
                     {"code": 1, "sse": 1, "market": 1, "_id": 0}
                 )
                 basic_docs = await cursor.to_list(length=None)
@@ -104,6 +114,8 @@ class FavoritesService:
 
                 for it in items:
                     code = it.get("stock_code")
+                    if code not in missing_basic:
+                        continue
                     basic = basic_map.get(code)
                     if basic:
                         # market 字段表示板块（主板、创业板、科创板等）
@@ -116,8 +128,8 @@ class FavoritesService:
             except Exception as e:
                 # 查询失败时设置默认值
                 for it in items:
-                    it["board"] = "-"
-                    it["exchange"] = "-"
+                    it.setdefault("board", "-")
+                    it.setdefault("exchange", "-")
 
         # 批量获取行情（优先使用入库的 market_quotes，30秒更新）
         if codes:
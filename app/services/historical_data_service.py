@@ -11,9 +11,15 @@ import pandas as pd
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.core.database import get_database
+from tradingagents.dataflows.bar_resample import PERIOD_FREQ, period_span
+from tradingagents.dataflows.cache.data_coverage import COVERAGE_COLLECTION, build_coverage, coverage_key, merge_coverage
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
+# 覆盖清单增量更新的乐观并发重试次数，超过后改为全量构建
+_COVERAGE_UPDATE_RETRIES = 3
+
 
 class HistoricalDataService:
     """统一历史数据管理服务"""
@@ -22,12 +28,14 @@ class HistoricalDataService:
         """初始化服务"""
         self.db = None
         self.collection = None
+        self.coverage_collection = None
         
     async def initialize(self):
         """初始化数据库连接"""
         try:
             self.db = get_database()
             self.collection = self.db.stock_daily_quotes
+            self.coverage_collection = self.db[COVERAGE_COLLECTION]
 
             # 🔥 确保索引存在（提升查询和 upsert 性能）
             await self._ensure_indexes()
@@ -62,6 +70,13 @@ class HistoricalDataService:
                 ("trade_date", -1)
             ], name="symbol_date_index", background=True)
 
+            # 5. 覆盖清单唯一索引：每个 股票+周期+数据源 一条记录
+            await self.coverage_collection.create_index([
+                ("symbol", 1),
+                ("period", 1),
+                ("data_source", 1)
+            ], unique=True, name="symbol_period_source_unique", background=True)
+
             logger.info("✅ 历史数据索引检查完成")
         except Exception as e:
             # 索引创建失败不应该阻止服务启动
@@ -130,12 +145,14 @@ class HistoricalDataService:
             # 准备批量操作
             operations = []
             saved_count = 0
+            saved_dates = []
             batch_size = 200  # 进一步减小批量大小，避免超时（从500改为200）
 
             for date_index, row in data.iterrows():
                 try:
                     # 标准化数据（传递日期索引）
                     doc = self._standardize_record(symbol, row, data_source, market, period, date_index)
+                    saved_dates.append(doc["trade_date"])
 
                     # 创建upsert操作
                     filter_doc = {
@@ -178,6 +195,20 @@ class HistoricalDataService:
                 )
             final_write_duration = (datetime.now() - final_write_start).total_seconds()
 
+            # 周/月线：删除同一周期内标记日期不同的旧K线（周期未结束时同步的部分K线）
+            removed_dates = []
+            if period in PERIOD_FREQ and saved_dates:
+                removed_dates = await self._remove_superseded_bars(symbol, data_source, period, saved_dates)
+
+            # 写入完成后用本次写入的日期增量更新覆盖清单
+            coverage_dates = list(saved_dates)
+            if removed_dates:
+                # 被删除记录之前最近的已有记录，用于判定删除后的缺口
+                previous = await self._previous_trade_date(symbol, data_source, period, min(removed_dates))
+                if previous:
+                    coverage_dates.append(previous)
+            await self._update_coverage(symbol, data_source, period, market, coverage_dates, removed_dates)
+
             total_duration = (datetime.now() - total_start).total_seconds()
             logger.info(
                 f"✅ {symbol} 历史数据保存完成: {saved_count}条记录，"
@@ -429,18 +460,143 @@ class HistoricalDataService:
             logger.error(f"❌ 查询历史数据失败 {symbol}: {e}")
             return []
     
-    async def get_latest_date(self, symbol: str, data_source: str) -> Optional[str]:
-        """获取最新数据日期"""
+    async def _remove_superseded_bars(
+        self,
+        symbol: str,
+        data_source: str,
+        period: str,
+        dates: List[str]
+    ) -> List[str]:
+        """
+        删除本次写入的周/月K所在周期内、标记日期不在本次结果中的旧K线，返回被删除的日期
+
+        本次写入覆盖的每个周期都有且只有一条K线，因此范围内其他日期的记录都已被取代
+        """
+        try:
+            first_day, last_day = period_span(dates, period)
+            query = {
+                **coverage_key(symbol, period, data_source),
+                "trade_date": {"$gte": first_day, "$lte": last_day, "$nin": list(set(dates))},
+            }
+            # 只在本次写入的周期范围内查找（走 symbol+trade_date 索引），不扫描全部历史
+            superseded = await self.collection.distinct("trade_date", query)
+            if not superseded:
+                return []
+            result = await self.collection.delete_many(query)
+            logger.info(f"🧹 {symbol} 删除被取代的{period}K线 {result.deleted_count} 条")
+            return superseded
+        except Exception as e:
+            logger.warning(f"⚠️ {symbol} 清理被取代的{period}K线失败: {e}")
+            return []
+
+    async def _previous_trade_date(
+        self,
+        symbol: str,
+        data_source: str,
+        period: str,
+        before: str
+    ) -> Optional[str]:
+        """指定日期之前最近一条记录的日期（索引查询，取一条）"""
+        doc = await self.collection.find_one(
+            {**coverage_key(symbol, period, data_source), "trade_date": {"$lt": before}},
+            {"trade_date": 1},
+            sort=[("trade_date", -1)],
+        )
+        return doc.get("trade_date") if doc else None
+
+    async def _update_coverage(
+        self,
+        symbol: str,
+        data_source: str,
+        period: str = "daily",
+        market: Optional[str] = None,
+        dates: Optional[List[str]] = None,
+        removed: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        更新覆盖清单
+
+        传入本次写入的日期时，在已有清单上增量合并（merge_coverage），不读取历史数据；
+        清单带 version 字段做乐观并发控制，并发写入冲突时重读重试。
+        清单不存在（清单建立前同步的数据）或未传入日期时，按集合中的实际数据全量构建一次。
+        """
+        try:
+            key = coverage_key(symbol, period, data_source)
+            # 日线按交易日历识别缺口（节假日不算缺口），周/月线按自然日间隔
+            calendar = get_trading_calendar(market) if period == "daily" else None
+
+            for _ in range(_COVERAGE_UPDATE_RETRIES if dates is not None else 0):
+                entry = await self.coverage_collection.find_one(key)
+                if not entry:
+                    break
+                version = entry.get("version")
+                doc = {
+                    **key,
+                    **merge_coverage(entry, dates, removed or (), calendar=calendar),
+                    "market": market or entry.get("market"),
+                    "version": (version or 0) + 1,
+                    "updated_at": datetime.utcnow(),
+                }
+                result = await self.coverage_collection.replace_one({**key, "version": version}, doc)
+                if result.matched_count:
+                    self._log_coverage(symbol, doc)
+                    return doc
+
+            # 全量构建（首次建立清单，或增量更新持续冲突）
+            all_dates = await self.collection.distinct("trade_date", key)
+            doc = {**key, **build_coverage(all_dates, calendar=calendar), "updated_at": datetime.utcnow()}
+            if market:
+                doc["market"] = market
+            previous = await self.coverage_collection.find_one(key, {"version": 1})
+            doc["version"] = ((previous or {}).get("version") or 0) + 1
+            await self.coverage_collection.replace_one(key, doc, upsert=True)
+            self._log_coverage(symbol, doc)
+            return doc
+        except Exception as e:
+            logger.warning(f"⚠️ 更新覆盖清单失败 {symbol}: {e}")
+            return None
+
+    @staticmethod
+    def _log_coverage(symbol: str, doc: Dict[str, Any]) -> None:
+        logger.debug(
+            f"📋 {symbol} 覆盖清单已更新: {doc['first_date']} ~ {doc['last_date']}, "
+            f"{doc['row_count']}条, 缺口{len(doc['gaps'])}处"
+        )
+
+    async def get_coverage(
+        self,
+        symbol: str,
+        data_source: str,
+        period: str = "daily"
+    ) -> Optional[Dict[str, Any]]:
+        """获取覆盖清单（首/末交易日、记录数、缺口）"""
+        if self.collection is None:
+            await self.initialize()
+
+        try:
+            return await self.coverage_collection.find_one(coverage_key(symbol, period, data_source), {"_id": 0})
+        except Exception as e:
+            logger.error(f"❌ 获取覆盖清单失败 {symbol}: {e}")
+            return None
+
+    async def get_latest_date(self, symbol: str, data_source: str, period: str = "daily") -> Optional[str]:
+        """获取最新数据日期（优先读取覆盖清单）"""
         if self.collection is None:
             await self.initialize()
         
         try:
+            coverage = await self.get_coverage(symbol, data_source, period)
+            if coverage and coverage.get("last_date"):
+                return coverage["last_date"]
+
             result = await self.collection.find_one(
-                {"symbol": symbol, "data_source": data_source},
+                {"symbol": symbol, "data_source": data_source, "period": period},
                 sort=[("trade_date", -1)]
             )
             
             if result:
+                # 清单建立前同步的数据：补建清单，后续查询直接命中
+                await self._update_coverage(symbol, data_source, period, result.get("market"))
                 return result["trade_date"]
             return None
             
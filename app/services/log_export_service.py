@@ -3,17 +3,31 @@
 提供日志文件的查询、过滤和导出功能
 """
 
+import io
 import logging
 import os
 import zipfile
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import re
 import json
 
+from app.utils.log_reader import (
+    get_log_index,
+    iter_lines,
+    line_level,
+    line_timestamp,
+    normalize_time,
+    tail_lines,
+)
+
 logger = logging.getLogger("webapi")
 
+# 导出时每次输出的字节数
+_EXPORT_CHUNK_SIZE = 256 * 1024
+
 
 class LogExportService:
     """日志导出服务"""
@@ -136,6 +150,8 @@ class LogExportService:
     ) -> Dict[str, Any]:
         """
         读取日志文件内容（支持过滤）
+
+        从文件末尾向前读取，指定时间范围时先用稀疏索引定位字节区间，不加载整个文件
         
         Args:
             filename: 日志文件名
@@ -154,53 +170,45 @@ class LogExportService:
             raise FileNotFoundError(f"日志文件不存在: {filename}")
         
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
+            index = get_log_index(file_path)
             
-            # 从末尾开始读取指定行数
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
+            # 从末尾开始读取指定行数（时间范围内）
+            if start_time or end_time:
+                range_start, range_end = index.byte_range(start_time, end_time)
+                if range_end >= index.scanned:
+                    range_end = None
+                # 只遍历索引定位的字节区间，保留其中时间范围内的最后N行
+                recent_lines = deque(
+                    (
+                        line for line in iter_lines(file_path, range_start, range_end)
+                        if self._matches(line, start_time=start_time, end_time=end_time)
+                    ),
+                    maxlen=lines,
+                )
+            else:
+                recent_lines = tail_lines(file_path, lines)
             
             # 应用过滤器
             filtered_lines = []
             stats = {
-                "total_lines": len(all_lines),
+                "total_lines": index.line_count,
                 "filtered_lines": 0,
                 "error_count": 0,
                 "warning_count": 0,
                 "info_count": 0,
-                "debug_count": 0
+                "debug_count": 0,
+                # 整个文件的级别计数（增量维护）
+                "level_counts": dict(index.level_counts)
             }
             
             for line in recent_lines:
                 # 统计日志级别
-                if "ERROR" in line:
-                    stats["error_count"] += 1
-                elif "WARNING" in line:
-                    stats["warning_count"] += 1
-                elif "INFO" in line:
-                    stats["info_count"] += 1
-                elif "DEBUG" in line:
-                    stats["debug_count"] += 1
-                
-                # 应用过滤条件
-                if level and level.upper() not in line:
-                    continue
-                
-                if keyword and keyword.lower() not in line.lower():
-                    continue
-                
-                # 时间过滤（简单实现，假设日志格式为 YYYY-MM-DD HH:MM:SS）
-                if start_time or end_time:
-                    time_match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', line)
-                    if time_match:
-                        log_time = time_match.group()
-                        if start_time and log_time < start_time:
-                            continue
-                        if end_time and log_time > end_time:
-                            continue
+                line_lvl = line_level(line)
+                if line_lvl:
+                    stats[f"{line_lvl.lower()}_count"] += 1
                 
-                filtered_lines.append(line.rstrip())
+                if self._matches(line, level, keyword, start_time, end_time):
+                    filtered_lines.append(line.rstrip())
             
             stats["filtered_lines"] = len(filtered_lines)
             
@@ -214,6 +222,132 @@ class LogExportService:
             logger.error(f"❌ 读取日志文件失败: {e}")
             raise
 
+    @staticmethod
+    def _matches(
+        line: str,
+        level: Optional[str] = None,
+        keyword: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> bool:
+        """判断日志行是否满足过滤条件"""
+        if level and level.upper() not in line:
+            return False
+        
+        if keyword and keyword.lower() not in line.lower():
+            return False
+        
+        # 时间过滤（日志格式为 YYYY-MM-DD HH:MM:SS，无时间戳的行保留）
+        if start_time or end_time:
+            log_time = line_timestamp(line)
+            if log_time:
+                if start_time and log_time < normalize_time(start_time):
+                    return False
+                if end_time and log_time > normalize_time(end_time):
+                    return False
+        
+        return True
+
+    def _iter_filtered(
+        self,
+        file_path: Path,
+        level: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """流式读取并过滤整个文件，按块产出字节"""
+        if not (level or start_time or end_time):
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(_EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+        
+        range_start, range_end = 0, None
+        if start_time or end_time:
+            index = get_log_index(file_path)
+            range_start, range_end = index.byte_range(start_time, end_time)
+            # 时间范围延伸到文件末尾时，包含索引之后新写入的内容
+            if range_end >= index.scanned:
+                range_end = None
+        
+        buffer: List[str] = []
+        size = 0
+        for line in iter_lines(file_path, range_start, range_end):
+            if not self._matches(line, level, None, start_time, end_time):
+                continue
+            buffer.append(line)
+            size += len(line)
+            if size >= _EXPORT_CHUNK_SIZE:
+                yield ('\n'.join(buffer) + '\n').encode('utf-8')
+                buffer, size = [], 0
+        if buffer:
+            yield ('\n'.join(buffer) + '\n').encode('utf-8')
+
+    def stream_export(
+        self,
+        filenames: Optional[List[str]] = None,
+        level: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        format: str = "zip"
+    ) -> Tuple[str, str, Iterator[bytes]]:
+        """
+        以流的方式导出日志，边读取边压缩边输出，不生成临时文件
+        
+        Args:
+            filenames: 要导出的日志文件名列表（None表示导出所有）
+            level: 日志级别过滤
+            start_time: 开始时间
+            end_time: 结束时间
+            format: 导出格式（zip, txt）
+            
+        Returns:
+            (下载文件名, 媒体类型, 字节块迭代器)
+        """
+        # 确定要导出的文件（在开始输出前校验参数）
+        if filenames:
+            files_to_export = [self.log_dir / f for f in filenames if (self.log_dir / f).exists()]
+        else:
+            files_to_export = [p for p in self.log_dir.glob("*.log*") if p.is_file()]
+        
+        if not files_to_export:
+            raise ValueError("没有找到要导出的日志文件")
+        
+        if format not in ("zip", "txt"):
+            raise ValueError(f"不支持的导出格式: {format}")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        export_name = f"logs_export_{timestamp}.{format}"
+        
+        def _zip_stream() -> Iterator[bytes]:
+            sink = _ChunkSink()
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for file_path in files_to_export:
+                    with zipf.open(file_path.name, 'w', force_zip64=True) as entry:
+                        for chunk in self._iter_filtered(file_path, level, start_time, end_time):
+                            entry.write(chunk)
+                            data = sink.pop()
+                            if data:
+                                yield data
+            # 剩余压缩数据与中央目录
+            yield sink.pop()
+            logger.info(f"✅ 日志导出完成: {export_name}（{len(files_to_export)}个文件）")
+        
+        def _txt_stream() -> Iterator[bytes]:
+            # 合并所有日志到一个文本流
+            for file_path in files_to_export:
+                header = f"\n{'='*80}\n文件: {file_path.name}\n{'='*80}\n\n"
+                yield header.encode('utf-8')
+                yield from self._iter_filtered(file_path, level, start_time, end_time)
+                yield b'\n\n'
+            logger.info(f"✅ 日志导出完成: {export_name}（{len(files_to_export)}个文件）")
+        
+        if format == "zip":
+            return export_name, "application/zip", _zip_stream()
+        return export_name, "text/plain", _txt_stream()
+
     def export_logs(
         self,
         filenames: Optional[List[str]] = None,
@@ -223,7 +357,7 @@ class LogExportService:
         format: str = "zip"
     ) -> str:
         """
-        导出日志文件
+        导出日志文件到 ./exports/logs
         
         Args:
             filenames: 要导出的日志文件名列表（None表示导出所有）
@@ -236,79 +370,25 @@ class LogExportService:
             导出文件的路径
         """
         try:
-            # 确定要导出的文件
-            if filenames:
-                files_to_export = [self.log_dir / f for f in filenames if (self.log_dir / f).exists()]
-            else:
-                files_to_export = list(self.log_dir.glob("*.log*"))
-            
-            if not files_to_export:
-                raise ValueError("没有找到要导出的日志文件")
+            export_name, _, stream = self.stream_export(
+                filenames=filenames,
+                level=level,
+                start_time=start_time,
+                end_time=end_time,
+                format=format
+            )
             
             # 创建导出目录
             export_dir = Path("./exports/logs")
             export_dir.mkdir(parents=True, exist_ok=True)
+            export_path = export_dir / export_name
             
-            # 生成导出文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            with open(export_path, 'wb') as f:
+                for chunk in stream:
+                    f.write(chunk)
             
-            if format == "zip":
-                export_path = export_dir / f"logs_export_{timestamp}.zip"
-                
-                # 创建ZIP文件
-                with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for file_path in files_to_export:
-                        # 如果有过滤条件，先过滤再添加
-                        if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,  # 读取所有行
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            # 将过滤后的内容写入临时文件
-                            temp_file = export_dir / f"temp_{file_path.name}"
-                            with open(temp_file, 'w', encoding='utf-8') as f:
-                                f.write('\n'.join(filtered_data['lines']))
-                            zipf.write(temp_file, file_path.name)
-                            temp_file.unlink()  # 删除临时文件
-                        else:
-                            zipf.write(file_path, file_path.name)
-                
-                logger.info(f"✅ 日志导出成功: {export_path}")
-                return str(export_path)
-            
-            elif format == "txt":
-                export_path = export_dir / f"logs_export_{timestamp}.txt"
-                
-                # 合并所有日志到一个文本文件
-                with open(export_path, 'w', encoding='utf-8') as outf:
-                    for file_path in files_to_export:
-                        outf.write(f"\n{'='*80}\n")
-                        outf.write(f"文件: {file_path.name}\n")
-                        outf.write(f"{'='*80}\n\n")
-                        
-                        if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            outf.write('\n'.join(filtered_data['lines']))
-                        else:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as inf:
-                                outf.write(inf.read())
-                        
-                        outf.write('\n\n')
-                
-                logger.info(f"✅ 日志导出成功: {export_path}")
-                return str(export_path)
-            
-            else:
-                raise ValueError(f"不支持的导出格式: {format}")
+            logger.info(f"✅ 日志导出成功: {export_path}")
+            return str(export_path)
                 
         except Exception as e:
             logger.error(f"❌ 导出日志失败: {e}")
@@ -317,6 +397,8 @@ class LogExportService:
     def get_log_statistics(self, days: int = 7) -> Dict[str, Any]:
         """
         获取日志统计信息
+
+        级别计数来自增量索引，只扫描上次统计后新写入的内容
         
         Args:
             days: 统计最近几天的日志
@@ -332,7 +414,8 @@ class LogExportService:
                 "total_size_mb": 0,
                 "error_files": 0,
                 "recent_errors": [],
-                "log_types": {}
+                "log_types": {},
+                "level_counts": {}
             }
             
             for file_path in self.log_dir.glob("*.log*"):
@@ -351,15 +434,20 @@ class LogExportService:
                 log_type = self._get_log_type(file_path.name)
                 stats["log_types"][log_type] = stats["log_types"].get(log_type, 0) + 1
                 
+                try:
+                    index = get_log_index(file_path)
+                    for lvl, count in index.level_counts.items():
+                        stats["level_counts"][lvl] = stats["level_counts"].get(lvl, 0) + count
+                except Exception as e:
+                    logger.debug(f"⚠️ 日志索引更新失败 {file_path.name}: {e}")
+                
                 # 统计错误日志
                 if log_type == "error":
                     stats["error_files"] += 1
                     # 读取最近的错误
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                            error_lines = [line for line in lines[-100:] if "ERROR" in line]
-                            stats["recent_errors"].extend(error_lines[-10:])
+                        error_lines = [line for line in tail_lines(file_path, 100) if "ERROR" in line]
+                        stats["recent_errors"].extend(error_lines[-10:])
                     except Exception:
                         pass
             
@@ -372,6 +460,26 @@ class LogExportService:
             return {}
 
 
+class _ChunkSink(io.RawIOBase):
+    """不可定位的写入目标：ZipFile 写入的数据暂存于此，由导出流逐块取走"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
 # 全局服务实例
 _log_export_service: Optional[LogExportService] = None
 
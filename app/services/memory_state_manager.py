@@ -222,26 +222,29 @@ class MemoryStateManager:
             
             logger.info(f"📊 更新任务状态: {task_id} -> {status.value} ({progress}%)")
 
-            # 推送状态更新到 WebSocket
-            if self._websocket_manager:
-                try:
-                    progress_update = {
-                        "type": "progress_update",
-                        "task_id": task_id,
-                        "status": status.value,
-                        "progress": task.progress,
-                        "message": task.message,
-                        "current_step": task.current_step,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    # 异步推送，不等待完成
-                    asyncio.create_task(
-                        self._websocket_manager.send_progress_update(task_id, progress_update)
-                    )
-                except Exception as e:
-                    logger.warning(f"⚠️ WebSocket 推送失败: {e}")
-
+            self._push_progress(task)
             return True
+
+    def _push_progress(self, task: TaskState) -> None:
+        """推送状态更新到 WebSocket"""
+        if not self._websocket_manager:
+            return
+        try:
+            progress_update = {
+                "type": "progress_update",
+                "task_id": task.task_id,
+                "status": task.status.value,
+                "progress": task.progress,
+                "message": task.message,
+                "current_step": task.current_step,
+                "timestamp": datetime.now().isoformat()
+            }
+            # 异步推送，不等待完成
+            asyncio.create_task(
+                self._websocket_manager.send_progress_update(task.task_id, progress_update)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ WebSocket 推送失败: {e}")
     
     async def get_task(self, task_id: str) -> Optional[TaskState]:
         """获取任务状态"""
@@ -413,8 +416,22 @@ class MemoryStateManager:
 _memory_state_manager = None
 
 def get_memory_state_manager() -> MemoryStateManager:
-    """获取内存状态管理器实例"""
+    """
+    获取任务状态管理器实例
+
+    TASK_STATE_BACKEND=redis 时使用 Redis 共享存储（多个 API 进程看到同一份任务状态），
+    Redis 不可用时回退到进程内存
+    """
     global _memory_state_manager
     if _memory_state_manager is None:
-        _memory_state_manager = MemoryStateManager()
+        from app.core.config import settings
+
+        if settings.TASK_STATE_BACKEND.lower() == "redis":
+            try:
+                from app.services.redis_state_manager import RedisStateManager
+                _memory_state_manager = RedisStateManager.from_settings()
+            except Exception as e:
+                logger.warning(f"⚠️ Redis 任务状态存储不可用，回退到进程内存: {e}")
+        if _memory_state_manager is None:
+            _memory_state_manager = MemoryStateManager()
     return _memory_state_manager
@@ -20,6 +20,7 @@ from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
 from app.services.basics_sync import add_financial_metrics as _add_financial_metrics_util
+from app.services.symbol_directory import refresh_symbol_directory
 
 
 logger = logging.getLogger(__name__)
@@ -318,6 +319,9 @@ class MultiSourceBasicsSyncService:
                 f"✅ Multi-source sync finished: total={stats.total} inserted={inserted} "
                 f"updated={updated} errors={errors} sources={stats.data_sources_used}"
             )
+
+            # 刷新进程共享的股票目录（写入快照文件，其他进程按修改时间自动重新加载）
+            await refresh_symbol_directory()
             return stats.__dict__
 
         except Exception as e:
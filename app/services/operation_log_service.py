@@ -2,12 +2,15 @@
 操作日志服务
 """
 
+import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from bson import ObjectId
 
-from app.core.database import get_mongo_db
+from app.core.config import settings
+from app.core.database import get_mongo_db, get_mongo_db_sync
 from app.models.operation_log import (
     OperationLogCreate,
     OperationLogResponse,
@@ -17,6 +20,7 @@ from app.models.operation_log import (
     ActionType
 )
 from app.utils.timezone import now_tz
+from tradingagents.utils.audit_writer import AuditWriter, get_audit_writer, insert_many_unordered
 
 logger = logging.getLogger("webapi")
 
@@ -26,7 +30,45 @@ class OperationLogService:
     
     def __init__(self):
         self.collection_name = "operation_logs"
-    
+
+    @property
+    def writer(self) -> AuditWriter:
+        """
+        操作日志后台批量写入器
+
+        MongoDB 不可用时追加到 logs/operation_logs.jsonl，恢复后由写入器重放回集合
+        """
+        return get_audit_writer(
+            self.collection_name,
+            sink=self._insert_batch,
+            fallback_file=os.path.join(settings.log_dir or "logs", "operation_logs.jsonl"),
+            batch_size=settings.OPLOG_BATCH_SIZE,
+            flush_interval=settings.OPLOG_FLUSH_INTERVAL_SECONDS,
+            replay_decoder=self._decode_fallback_record,
+        )
+
+    def _insert_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """在写入器后台线程中批量插入；部分失败时只回退失败的文档"""
+        insert_many_unordered(get_mongo_db_sync()[self.collection_name], batch)
+
+    @staticmethod
+    def _decode_fallback_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """回退文件中的 _id、时间字段被写成了字符串，重放前还原（_id 不变，重放幂等）"""
+        if ObjectId.is_valid(record.get("_id") or ""):
+            record["_id"] = ObjectId(record["_id"])
+        for field in ("timestamp", "created_at"):
+            if isinstance(record.get(field), str):
+                try:
+                    record[field] = datetime.fromisoformat(record[field])
+                except ValueError:
+                    pass
+        return record
+
+    async def flush_pending(self) -> None:
+        """写出尚在缓冲区中的日志（查询前调用，保证读到最新记录）"""
+        if self.writer.pending():
+            await asyncio.to_thread(self.writer.flush)
+
     async def create_log(
         self,
         user_id: str,
@@ -37,12 +79,11 @@ class OperationLogService:
     ) -> str:
         """创建操作日志"""
         try:
-            db = get_mongo_db()
-
             # 构建日志文档
             # 🔥 使用 naive datetime（不带时区信息），MongoDB 会按原样存储，不会转换为 UTC
             current_time = now_tz().replace(tzinfo=None)  # 移除时区信息，保留本地时间值
             log_doc = {
+                "_id": ObjectId(),  # 客户端生成ID，无需等待写库即可返回
                 "user_id": user_id,
                 "username": username,
                 "action_type": log_data.action_type,
@@ -58,11 +99,11 @@ class OperationLogService:
                 "created_at": current_time  # naive datetime，MongoDB 按原样存储
             }
             
-            # 插入数据库
-            result = await db[self.collection_name].insert_one(log_doc)
-            
+            # 提交到后台批量写入器，请求路径不等待写库
+            self.writer.submit(log_doc)
+
             logger.info(f"📝 操作日志已记录: {username} - {log_data.action}")
-            return str(result.inserted_id)
+            return str(log_doc["_id"])
             
         except Exception as e:
             logger.error(f"创建操作日志失败: {e}")
@@ -71,6 +112,7 @@ class OperationLogService:
     async def get_logs(self, query: OperationLogQuery) -> Tuple[List[OperationLogResponse], int]:
         """获取操作日志列表"""
         try:
+            await self.flush_pending()
             db = get_mongo_db()
             
             # 构建查询条件
@@ -131,6 +173,7 @@ class OperationLogService:
     async def get_stats(self, days: int = 30) -> OperationLogStats:
         """获取操作日志统计"""
         try:
+            await self.flush_pending()
             db = get_mongo_db()
             
             # 时间范围（使用中国时区）
@@ -197,6 +240,7 @@ class OperationLogService:
     async def clear_logs(self, days: Optional[int] = None, action_type: Optional[str] = None) -> Dict[str, Any]:
         """清空操作日志"""
         try:
+            await self.flush_pending()
             db = get_mongo_db()
             
             # 构建删除条件
@@ -228,6 +272,7 @@ class OperationLogService:
     async def get_log_by_id(self, log_id: str) -> Optional[OperationLogResponse]:
         """根据ID获取操作日志"""
         try:
+            await self.flush_pending()
             db = get_mongo_db()
 
             doc = await db[self.collection_name].find_one({"_id": ObjectId(log_id)})
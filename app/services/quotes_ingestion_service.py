@@ -9,6 +9,9 @@ from pymongo import UpdateOne
 from app.core.config import settings
 from app.core.database import get_mongo_db
 from app.services.data_sources.manager import DataSourceManager
+from app.services.screening_table_service import get_screening_table_service
+from tradingagents.dataflows.realtime_valuation import get_realtime_valuation_engine
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -327,8 +330,8 @@ class QuotesIngestionService:
         - 大大降低错过收盘价的风险
         """
         now = now or datetime.now(self.tz)
-        # 工作日 Mon-Fri
-        if now.weekday() > 4:
+        # 交易日（排除周末和节假日）
+        if not get_trading_calendar("CN").is_trading_day(now.date()):
             return False
         t = now.time()
         # 上交所/深交所常规交易时段
@@ -368,6 +371,7 @@ class QuotesIngestionService:
         db = get_mongo_db()
         coll = db[self.collection_name]
         ops = []
+        written: Dict[str, Dict] = {}
         updated_at = datetime.now(self.tz)
         for code, q in quotes_map.items():
             if not code:
@@ -382,26 +386,22 @@ class QuotesIngestionService:
             if code6 in ["300750", "000001", "600000"]:  # 只记录几个示例股票
                 logger.info(f"📊 [写入market_quotes] {code6} - volume={volume}, amount={q.get('amount')}, source={source}")
 
-            ops.append(
-                UpdateOne(
-                    {"code": code6},
-                    {"$set": {
-                        "code": code6,
-                        "symbol": code6,  # 添加 symbol 字段，与 code 保持一致
-                        "close": q.get("close"),
-                        "pct_chg": q.get("pct_chg"),
-                        "amount": q.get("amount"),
-                        "volume": volume,
-                        "open": q.get("open"),
-                        "high": q.get("high"),
-                        "low": q.get("low"),
-                        "pre_close": q.get("pre_close"),
-                        "trade_date": trade_date,
-                        "updated_at": updated_at,
-                    }},
-                    upsert=True,
-                )
-            )
+            doc = {
+                "code": code6,
+                "symbol": code6,  # 添加 symbol 字段，与 code 保持一致
+                "close": q.get("close"),
+                "pct_chg": q.get("pct_chg"),
+                "amount": q.get("amount"),
+                "volume": volume,
+                "open": q.get("open"),
+                "high": q.get("high"),
+                "low": q.get("low"),
+                "pre_close": q.get("pre_close"),
+                "trade_date": trade_date,
+                "updated_at": updated_at,
+            }
+            written[code6] = doc
+            ops.append(UpdateOne({"code": code6}, {"$set": doc}, upsert=True))
         if not ops:
             logger.info("无可写入的数据，跳过")
             return
@@ -410,6 +410,23 @@ class QuotesIngestionService:
             f"✅ 行情入库完成 source={source}, matched={result.matched_count}, upserted={len(result.upserted_ids) if result.upserted_ids else 0}, modified={result.modified_count}"
         )
 
+        # 同步更新物化筛选表中的行情字段
+        if settings.SCREENING_TABLE_ENABLED:
+            try:
+                await get_screening_table_service().apply_quotes(written, updated_at)
+            except Exception as e:
+                logger.warning(f"更新筛选表行情失败（忽略）: {e}")
+
+        # 刷新全市场实时估值快照（筛选表与基本面工具共用）
+        if settings.REALTIME_VALUATION_ENABLED:
+            try:
+                engine = get_realtime_valuation_engine()
+                await engine.arefresh(db)
+                if settings.SCREENING_TABLE_ENABLED:
+                    await get_screening_table_service().apply_valuations(engine.get_many(written), updated_at)
+            except Exception as e:
+                logger.warning(f"刷新实时估值快照失败（忽略）: {e}")
+
     async def backfill_from_historical_data(self) -> None:
         """
         从历史数据集合导入前一天的收盘数据到 market_quotes
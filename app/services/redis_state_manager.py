@@ -0,0 +1,433 @@
+"""
+Redis 任务状态管理器
+
+MemoryStateManager 把任务保存在进程内字典中，多个 uvicorn worker 各自只能看到自己创建的任务，
+列表接口每次都要遍历、排序全部任务。本模块提供接口相同的共享实现：
+- 每个任务一个 Hash（task_state:{task_id}），字段逐个 JSON 编码，更新时只写变化的字段
+- 按开始时间打分的有序集合作为二级索引：全部 / 按状态 / 按用户 / 按用户+状态
+- 列表查询直接在对应索引上按分数倒序取一页，复杂度 O(log N + 页大小)
+- 本进程写入的任务和最近读取的任务保存在短 TTL、有容量上限的本地 LRU 缓存中，状态轮询不必每次访问 Redis
+- 状态更新用 WATCH/MULTI 乐观事务完成“读-改-写”，并发更新冲突时重试
+
+使用同步 Redis 客户端：分析任务在线程池中以新建事件循环的方式调用 update_task_status，
+异步客户端的连接绑定在主事件循环上，无法跨循环使用。异步方法通过 asyncio.to_thread
+执行 Redis 调用，不阻塞事件循环。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.memory_state_manager import MemoryStateManager, TaskState, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "task_state"
+TERMINAL_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+_DATETIME_FIELDS = ("start_time", "end_time")
+_TASK_FIELDS = tuple(f.name for f in fields(TaskState))
+
+# 两次机会性清理之间的最小间隔（秒）
+_CLEANUP_INTERVAL = 600
+# 本地缓存最多保存的任务数
+_CACHE_MAX_ENTRIES = 1024
+# 乐观事务冲突时的最大重试次数
+_UPDATE_RETRIES = 5
+
+
+def _task_key(task_id: str) -> str:
+    return f"{KEY_PREFIX}:{task_id}"
+
+
+def _index_key(user_id: Optional[str] = None, status: Optional[TaskStatus] = None) -> str:
+    key = f"{KEY_PREFIX}:idx"
+    if user_id is not None:
+        key += f":user:{user_id}"
+    if status is not None:
+        key += f":status:{status.value}"
+    if user_id is None and status is None:
+        key += ":all"
+    return key
+
+
+def encode_fields(values: Dict[str, Any]) -> Dict[str, str]:
+    """TaskState 字段 -> Redis Hash 字段（None 不写入）"""
+    encoded = {}
+    for name, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, TaskStatus):
+            encoded[name] = value.value
+        elif isinstance(value, datetime):
+            encoded[name] = value.isoformat()
+        else:
+            encoded[name] = json.dumps(value, ensure_ascii=False, default=str)
+    return encoded
+
+
+def decode_task(raw: Dict[str, str]) -> Optional[TaskState]:
+    """Redis Hash -> TaskState，数据不完整时返回 None"""
+    if not raw or "task_id" not in raw or "status" not in raw:
+        return None
+    values: Dict[str, Any] = {}
+    for name in _TASK_FIELDS:
+        if name not in raw:
+            continue
+        value = raw[name]
+        if name == "status":
+            values[name] = TaskStatus(value)
+        elif name in _DATETIME_FIELDS:
+            values[name] = datetime.fromisoformat(value)
+        else:
+            values[name] = json.loads(value)
+    return TaskState(**values)
+
+
+class RedisStateManager(MemoryStateManager):
+    """基于 Redis 的共享任务状态管理器（接口与 MemoryStateManager 一致）"""
+
+    def __init__(
+        self,
+        redis_client,
+        cache_ttl: float = 1.0,
+        retention_hours: int = 24,
+        cache_max_entries: int = _CACHE_MAX_ENTRIES,
+    ):
+        super().__init__()
+        self._redis = redis_client
+        self._cache_ttl = cache_ttl
+        self._retention_hours = retention_hours
+        self._cache_max_entries = cache_max_entries
+        self._cache: "OrderedDict[str, Tuple[float, TaskState]]" = OrderedDict()
+        self._last_cleanup = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "RedisStateManager":
+        """按应用配置创建，连接失败时抛出异常"""
+        import redis
+
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=5,
+            retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+        )
+        client.ping()
+        logger.info("✅ 任务状态使用 Redis 共享存储")
+        return cls(
+            client,
+            cache_ttl=settings.TASK_STATE_CACHE_TTL_SECONDS,
+            retention_hours=settings.TASK_STATE_RETENTION_HOURS,
+        )
+
+    # ------------------------------------------------------------------
+    # 本地缓存
+    # ------------------------------------------------------------------
+    def _cache_put(self, task: TaskState) -> None:
+        with self._lock:
+            self._cache[task.task_id] = (time.monotonic(), task)
+            self._cache.move_to_end(task.task_id)
+            while len(self._cache) > self._cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def _cache_get(self, task_id: str) -> Optional[TaskState]:
+        with self._lock:
+            cached = self._cache.get(task_id)
+            if cached and time.monotonic() - cached[0] < self._cache_ttl:
+                self._cache.move_to_end(task_id)
+                return cached[1]
+            self._cache.pop(task_id, None)
+            return None
+
+    def _cache_drop(self, task_id: str) -> None:
+        with self._lock:
+            self._cache.pop(task_id, None)
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+    def _add_to_indexes(self, pipe, task_id: str, user_id: str, status: TaskStatus, score: float) -> None:
+        entry = {task_id: score}
+        pipe.zadd(_index_key(), entry)
+        pipe.zadd(_index_key(user_id=user_id), entry)
+        pipe.zadd(_index_key(status=status), entry)
+        pipe.zadd(_index_key(user_id=user_id, status=status), entry)
+
+    def _remove_from_status_indexes(self, pipe, task_id: str, user_id: str, keep: Optional[TaskStatus] = None) -> None:
+        for s in TaskStatus:
+            if s != keep:
+                pipe.zrem(_index_key(status=s), task_id)
+                pipe.zrem(_index_key(user_id=user_id, status=s), task_id)
+
+    def _remove_from_indexes(self, pipe, task_id: str, user_id: str) -> None:
+        pipe.zrem(_index_key(), task_id)
+        pipe.zrem(_index_key(user_id=user_id), task_id)
+        self._remove_from_status_indexes(pipe, task_id, user_id)
+
+    # ------------------------------------------------------------------
+    # 任务读写
+    # ------------------------------------------------------------------
+    async def create_task(
+        self,
+        task_id: str,
+        user_id: str,
+        stock_code: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        stock_name: Optional[str] = None,
+    ) -> TaskState:
+        """创建新任务"""
+        estimated_duration = self._calculate_estimated_duration(parameters or {})
+        task_state = TaskState(
+            task_id=task_id,
+            user_id=user_id,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            status=TaskStatus.PENDING,
+            start_time=datetime.now(),
+            parameters=parameters or {},
+            estimated_duration=estimated_duration,
+            message="任务已创建，等待执行..."
+        )
+
+        await asyncio.to_thread(self._create, task_state)
+
+        logger.info(f"📝 创建任务状态: {task_id}")
+        logger.info(f"⏱️ 预估总时长: {estimated_duration:.1f}秒 ({estimated_duration/60:.1f}分钟)")
+        return task_state
+
+    def _create(self, task_state: TaskState) -> None:
+        task_id = task_state.task_id
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(_task_key(task_id))
+        pipe.hset(_task_key(task_id), mapping=encode_fields(
+            {name: getattr(task_state, name) for name in _TASK_FIELDS}
+        ))
+        self._add_to_indexes(pipe, task_id, task_state.user_id, task_state.status, task_state.start_time.timestamp())
+        pipe.execute()
+        self._cache_put(task_state)
+        self._maybe_cleanup()
+
+    async def update_task_status(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        progress: Optional[int] = None,
+        message: Optional[str] = None,
+        current_step: Optional[str] = None,
+        result_data: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ) -> bool:
+        """更新任务状态（只写入变化的字段）"""
+        task = await asyncio.to_thread(
+            self._update,
+            task_id,
+            status,
+            progress=progress,
+            message=message,
+            current_step=current_step,
+            result_data=result_data,
+            error_message=error_message,
+        )
+        if task is None:
+            return False
+        logger.info(f"📊 更新任务状态: {task_id} -> {status.value} ({progress}%)")
+        self._push_progress(task)
+        return True
+
+    def _update(self, task_id: str, status: TaskStatus, **changes: Any) -> Optional[TaskState]:
+        """WATCH 任务 Hash 后读-改-写；其他进程在此期间修改了任务时重试"""
+        from redis.exceptions import WatchError
+
+        key = _task_key(task_id)
+        for _ in range(_UPDATE_RETRIES):
+            with self._redis.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(key)
+                    task = decode_task(pipe.hgetall(key))
+                    if task is None:
+                        logger.warning(f"⚠️ 任务不存在: {task_id}")
+                        self._cache_drop(task_id)
+                        return None
+
+                    updated: Dict[str, Any] = {"status": status}
+                    updated.update({k: v for k, v in changes.items() if v is not None})
+                    if status in TERMINAL_STATUSES:
+                        updated["end_time"] = datetime.now()
+                        if task.start_time:
+                            updated["execution_time"] = (updated["end_time"] - task.start_time).total_seconds()
+                    for name, value in updated.items():
+                        setattr(task, name, value)
+
+                    score = task.start_time.timestamp() if task.start_time else time.time()
+                    pipe.multi()
+                    pipe.hset(key, mapping=encode_fields(updated))
+                    self._remove_from_status_indexes(pipe, task_id, task.user_id, keep=status)
+                    pipe.zadd(_index_key(status=status), {task_id: score})
+                    pipe.zadd(_index_key(user_id=task.user_id, status=status), {task_id: score})
+                    pipe.execute()
+                except WatchError:
+                    continue
+            self._cache_put(task)
+            return task
+        logger.warning(f"⚠️ 任务状态更新冲突，重试 {_UPDATE_RETRIES} 次后放弃: {task_id}")
+        return None
+
+    async def get_task(self, task_id: str) -> Optional[TaskState]:
+        """获取任务状态（本地缓存 -> Redis）"""
+        task = self._cache_get(task_id)
+        if task is not None:
+            return task
+        raw = await asyncio.to_thread(self._redis.hgetall, _task_key(task_id))
+        task = decode_task(raw)
+        if task is not None:
+            self._cache_put(task)
+        return task
+
+    def _list(self, index_key: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        task_ids = self._redis.zrevrange(index_key, offset, offset + limit - 1) if limit > 0 else []
+        if not task_ids:
+            return []
+        pipe = self._redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(_task_key(task_id))
+        tasks = []
+        dangling = []
+        for task_id, raw in zip(task_ids, pipe.execute()):
+            task = decode_task(raw)
+            if task is None:
+                dangling.append(task_id)
+                continue
+            self._cache_put(task)
+            item = task.to_dict()
+            # 兼容前端字段
+            if not item.get('stock_name'):
+                item['stock_name'] = None
+            tasks.append(item)
+        if dangling:
+            self._redis.zrem(index_key, *dangling)
+        return tasks
+
+    async def list_all_tasks(
+        self,
+        status: Optional[TaskStatus] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """获取所有任务列表（不限用户），按开始时间倒序"""
+        return await asyncio.to_thread(self._list, _index_key(status=status), limit, offset)
+
+    async def list_user_tasks(
+        self,
+        user_id: str,
+        status: Optional[TaskStatus] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """获取用户的任务列表，按开始时间倒序"""
+        return await asyncio.to_thread(self._list, _index_key(user_id=user_id, status=status), limit, offset)
+
+    def _delete(self, task_id: str) -> bool:
+        key = _task_key(task_id)
+        user_id = self._redis.hget(key, "user_id")
+        self._cache_drop(task_id)
+        if user_id is None:
+            return False
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(key)
+        self._remove_from_indexes(pipe, task_id, json.loads(user_id))
+        pipe.execute()
+        return True
+
+    async def delete_task(self, task_id: str) -> bool:
+        """删除任务"""
+        deleted = await asyncio.to_thread(self._delete, task_id)
+        if deleted:
+            logger.info(f"🗑️ 删除任务: {task_id}")
+        return deleted
+
+    async def remove_task(self, task_id: str) -> bool:
+        """从共享存储中删除任务"""
+        deleted = await asyncio.to_thread(self._delete, task_id)
+        if deleted:
+            logger.info(f"🗑️ 任务已从共享存储中删除: {task_id}")
+        else:
+            logger.warning(f"⚠️ 任务不存在于共享存储中: {task_id}")
+        return deleted
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息（各索引的基数）"""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zcard(_index_key())
+        for s in TaskStatus:
+            pipe.zcard(_index_key(status=s))
+        total_tasks, *counts = await asyncio.to_thread(pipe.execute)
+        status_counts = {s.value: c for s, c in zip(TaskStatus, counts) if c}
+        return {
+            "total_tasks": total_tasks,
+            "status_distribution": status_counts,
+            "running_tasks": status_counts.get("running", 0),
+            "completed_tasks": status_counts.get("completed", 0),
+            "failed_tasks": status_counts.get("failed", 0)
+        }
+
+    async def cleanup_old_tasks(self, max_age_hours: int = 24) -> int:
+        """清理已结束的旧任务"""
+        removed = await asyncio.to_thread(self._purge_finished, max_age_hours)
+        logger.info(f"🧹 清理了 {removed} 个旧任务")
+        return removed
+
+    def _purge_finished(self, max_age_hours: int) -> int:
+        cutoff_time = datetime.now().timestamp() - (max_age_hours * 3600)
+        removed = 0
+        for s in TERMINAL_STATUSES:
+            for task_id in self._redis.zrangebyscore(_index_key(status=s), "-inf", cutoff_time):
+                if self._delete(task_id):
+                    removed += 1
+                else:
+                    self._redis.zrem(_index_key(status=s), task_id)
+        return removed
+
+    async def cleanup_zombie_tasks(self, max_running_hours: int = 2) -> int:
+        """清理僵尸任务（长时间处于 running/pending 状态的任务）"""
+        return await asyncio.to_thread(self._cleanup_zombies, max_running_hours)
+
+    def _cleanup_zombies(self, max_running_hours: int) -> int:
+        cutoff_time = datetime.now().timestamp() - (max_running_hours * 3600)
+        zombie_ids = []
+        for s in (TaskStatus.RUNNING, TaskStatus.PENDING):
+            zombie_ids.extend(self._redis.zrangebyscore(_index_key(status=s), "-inf", cutoff_time))
+
+        cleaned = 0
+        for task_id in zombie_ids:
+            task = self._update(
+                task_id,
+                TaskStatus.FAILED,
+                error_message=f"任务超时（运行时间超过 {max_running_hours} 小时）",
+                message="任务已超时，自动标记为失败",
+                progress=0,
+            )
+            if task is not None:
+                cleaned += 1
+                logger.warning(f"⚠️ 僵尸任务已标记为失败: {task_id} (运行时间: {task.execution_time or 0:.1f}秒)")
+
+        if cleaned:
+            logger.info(f"🧹 清理了 {cleaned} 个僵尸任务")
+        return cleaned
+
+    def _maybe_cleanup(self) -> None:
+        """创建任务时机会性地清理过期任务，避免共享存储无限增长"""
+        now = time.monotonic()
+        if now - self._last_cleanup < _CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        try:
+            self._purge_finished(self._retention_hours)
+        except Exception as e:
+            logger.warning(f"⚠️ 清理过期任务状态失败: {e}")
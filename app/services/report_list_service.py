@@ -0,0 +1,268 @@
+"""
+分析报告列表服务
+
+报告列表页只需要元数据，但 analysis_reports 的每个文档都带着多个模块的完整报告（单篇可达数百KB）。
+本服务负责列表查询的三个方面：
+- 摘要投影：列表查询只取元数据字段，报告大小在写入时记录为 reports_size
+- 游标分页：按 (created_at, _id) 降序做 keyset 分页，深翻页不再 skip 扫描
+- 前缀检索：写入时生成 search_tokens（代码/名称/ID/摘要词元及其所有后缀），搜索走多键索引上的锚定前缀匹配，
+  替代对 stock_symbol/analysis_id/summary 的非锚定正则；子串（如 "0001" 匹配 "000001"）同样命中后缀词元的前缀
+- 总数：无筛选条件时使用 estimated_document_count，有条件时短时间缓存 count_documents 结果
+"""
+
+import base64
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import get_mongo_db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "analysis_reports"
+
+# 单个词元的最大长度；更长的关键词先用前缀走索引，再用原字段精确过滤
+MAX_TOKEN_CHARS = 8
+# 每篇报告最多保留的词元数
+MAX_TOKENS = 2000
+# 词元生成规则版本；规则变化后递增，backfill_index_fields 会为旧版本的报告重新生成
+SEARCH_TOKENS_VERSION = 2
+
+# 列表页需要的字段
+LIST_PROJECTION = {
+    "analysis_id": 1, "stock_symbol": 1, "stock_name": 1, "market_type": 1, "model_info": 1,
+    "status": 1, "created_at": 1, "analysis_date": 1, "analysts": 1, "research_depth": 1,
+    "summary": 1, "reports_size": 1, "source": 1, "task_id": 1,
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)?")
+_CJK_RE = re.compile(r"[㐀-鿿]+")
+
+
+def build_search_tokens(doc: Dict[str, Any]) -> List[str]:
+    """
+    生成报告的搜索词元（小写）
+
+    - 股票代码（含/不含后缀）、股票名称、分析ID 及其每个后缀作为词元
+    - 摘要中的英文/数字单词及其每个后缀作为词元
+    - 摘要中的中文片段按每个起始位置截取最长 MAX_TOKEN_CHARS 个字
+
+    任意子串都是某个后缀的前缀，因此对词元做锚定前缀匹配即可实现子串检索，始终走索引
+    """
+    tokens: Dict[str, None] = {}
+
+    def add(token: str) -> None:
+        token = token.strip().lower()[:MAX_TOKEN_CHARS * 4]
+        if token:
+            tokens.setdefault(token, None)
+
+    def add_suffixes(value: str) -> None:
+        value = value.strip()
+        for i in range(len(value)):
+            add(value[i:])
+
+    symbol = str(doc.get("stock_symbol") or "")
+    add_suffixes(symbol)
+    add_suffixes(symbol.split(".")[0])
+    add_suffixes(str(doc.get("stock_name") or ""))
+    add_suffixes(str(doc.get("analysis_id") or ""))
+
+    summary = str(doc.get("summary") or "").lower()
+    for word in _WORD_RE.findall(summary):
+        add_suffixes(word)
+        if len(tokens) >= MAX_TOKENS:
+            return list(tokens)[:MAX_TOKENS]
+    for run in _CJK_RE.findall(summary):
+        for i in range(len(run)):
+            add(run[i:i + MAX_TOKEN_CHARS])
+            if len(tokens) >= MAX_TOKENS:
+                return list(tokens)
+    return list(tokens)
+
+
+def estimate_reports_size(reports: Any) -> int:
+    """报告内容大小估算（与列表页原先的 file_size 口径一致）"""
+    return len(str(reports or {}))
+
+
+def index_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """写入报告时需要附带的索引字段"""
+    return {
+        "search_tokens": build_search_tokens(doc),
+        "search_tokens_version": SEARCH_TOKENS_VERSION,
+        "reports_size": estimate_reports_size(doc.get("reports")),
+    }
+
+
+def encode_cursor(created_at: datetime, doc_id: ObjectId) -> str:
+    raw = f"{created_at.isoformat()}|{doc_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(doc_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def build_search_filter(keyword: str) -> Dict[str, Any]:
+    """关键词 -> 索引可用的前缀查询条件"""
+    keyword = keyword.strip().lower()
+    prefix = keyword[:MAX_TOKEN_CHARS] if _CJK_RE.search(keyword) else keyword[:MAX_TOKEN_CHARS * 4]
+    condition: Dict[str, Any] = {"search_tokens": {"$regex": f"^{re.escape(prefix)}"}}
+    if prefix != keyword:
+        # 关键词超过词元长度：索引先按前缀收窄范围，再对原字段做精确过滤
+        pattern = re.escape(keyword)
+        condition = {"$and": [condition, {"$or": [
+            {field: {"$regex": pattern, "$options": "i"}}
+            for field in ("stock_symbol", "stock_name", "analysis_id", "summary")
+        ]}]}
+    return condition
+
+
+class ReportListService:
+    """分析报告列表查询"""
+
+    def __init__(self) -> None:
+        self._count_cache: Dict[str, Tuple[float, int]] = {}
+
+    async def ensure_indexes(self) -> None:
+        coll = get_mongo_db()[COLLECTION]
+        try:
+            await coll.create_index([("created_at", -1), ("_id", -1)], name="created_at_id_desc")
+            await coll.create_index([("stock_symbol", 1), ("created_at", -1)], name="stock_symbol_created_at")
+            await coll.create_index([("market_type", 1), ("created_at", -1)], name="market_type_created_at")
+            await coll.create_index([("search_tokens", 1), ("created_at", -1)], name="search_tokens_created_at")
+        except Exception as e:
+            logger.warning(f"创建报告列表索引失败（忽略）: {e}")
+
+    async def backfill_index_fields(self, batch_size: int = 200) -> int:
+        """为历史报告（或其他入口写入的报告）补齐/重新生成 search_tokens / reports_size，返回处理数量"""
+        coll = get_mongo_db()[COLLECTION]
+        missing = {"$or": [
+            {"search_tokens_version": {"$ne": SEARCH_TOKENS_VERSION}},
+            {"reports_size": {"$exists": False}},
+        ]}
+        projection = {"stock_symbol": 1, "stock_name": 1, "analysis_id": 1, "summary": 1, "reports": 1}
+        total = 0
+        while True:
+            ops = []
+            async for doc in coll.find(missing, projection).limit(batch_size):
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": index_fields(doc)}))
+            if not ops:
+                break
+            await coll.bulk_write(ops, ordered=False)
+            total += len(ops)
+            if len(ops) < batch_size:
+                break
+        if total:
+            logger.info(f"🔖 已为 {total} 篇历史报告补齐列表索引字段")
+        return total
+
+    def build_query(
+        self,
+        search_keyword: Optional[str] = None,
+        market_filter: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        stock_code: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if search_keyword and search_keyword.strip():
+            query.update(build_search_filter(search_keyword))
+        if market_filter:
+            query["market_type"] = market_filter
+        if stock_code:
+            query["stock_symbol"] = stock_code
+        if start_date or end_date:
+            date_query = {}
+            if start_date:
+                date_query["$gte"] = start_date
+            if end_date:
+                date_query["$lte"] = end_date
+            query["analysis_date"] = date_query
+        return query
+
+    async def count(self, query: Dict[str, Any]) -> int:
+        """总数：无条件时取集合元数据估算值，有条件时短时间缓存"""
+        coll = get_mongo_db()[COLLECTION]
+        if not query:
+            return await coll.estimated_document_count()
+
+        key = repr(sorted(query.items()))
+        now = time.monotonic()
+        cached = self._count_cache.get(key)
+        if cached and now - cached[0] < settings.REPORT_LIST_COUNT_CACHE_SECONDS:
+            return cached[1]
+        total = await coll.count_documents(query)
+        if len(self._count_cache) > 256:
+            self._count_cache.clear()
+        self._count_cache[key] = (now, total)
+        return total
+
+    async def list_page(
+        self,
+        query: Dict[str, Any],
+        page_size: int,
+        cursor: Optional[str] = None,
+        page: int = 1,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        查询一页报告（仅元数据字段）
+
+        传入 cursor 时按 (created_at, _id) keyset 分页；否则按页码分页（兼容旧前端）。
+        返回 (文档列表, 下一页游标)。
+        """
+        coll = get_mongo_db()[COLLECTION]
+        find_query = query
+        skip = 0
+        if cursor:
+            created_at, doc_id = decode_cursor(cursor)
+            after = {"$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": doc_id}},
+            ]}
+            find_query = {"$and": [query, after]} if query else after
+        else:
+            skip = (page - 1) * page_size
+
+        docs = []
+        # 多取一条判断是否还有下一页
+        mongo_cursor = (
+            coll.find(find_query, LIST_PROJECTION)
+            .sort([("created_at", -1), ("_id", -1)])
+            .skip(skip)
+            .limit(page_size + 1)
+        )
+        async for doc in mongo_cursor:
+            docs.append(doc)
+
+        next_cursor = None
+        if len(docs) > page_size:
+            docs = docs[:page_size]
+            last = docs[-1]
+            if isinstance(last.get("created_at"), datetime):
+                next_cursor = encode_cursor(last["created_at"], last["_id"])
+        return docs, next_cursor
+
+
+# 全局服务实例
+_report_list_service: Optional[ReportListService] = None
+
+
+def get_report_list_service() -> ReportListService:
+    """获取报告列表服务实例"""
+    global _report_list_service
+    if _report_list_service is None:
+        _report_list_service = ReportListService()
+    return _report_list_service
@@ -0,0 +1,287 @@
+"""
+物化股票筛选表服务
+
+stock_screening_view 是非物化视图，每次筛选查询（count + find）都会重新执行
+stock_basic_info ⋈ market_quotes ⋈ stock_financial_data 的 $lookup 关联。
+本服务把同一份关联结果物化到集合 `stock_screening_table`，并在可排序字段上建立复合索引：
+- 全量重建：表为空 / 尚未构建 / 表结构版本变化时，用 $merge 写入，并删除已不存在的股票
+- 增量刷新：定时任务按 updated_at 水位找出有变化的基础信息 / 财务数据，只重算这些股票
+- 行情推送：实时行情入库后直接把最新行情字段写入筛选表，无需重新关联
+- 估值推送：实时估值快照刷新后把动态 PE/PB/市值写入筛选表，筛选条件与排序直接作用于实时估值
+  （全量重建 / 增量刷新会暂时写回静态估值，下一个行情周期再覆盖）
+
+构建状态（表结构版本、增量水位、重建锁）保存在 screening_table_meta 集合中，
+多个 worker 共享：只有拿到重建锁的 worker 执行全量重建，其余 worker 直接做增量刷新。
+"""
+
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from pymongo import UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.database import get_mongo_db, stock_screening_pipeline
+
+logger = logging.getLogger(__name__)
+
+SCREENING_TABLE = "stock_screening_table"
+SCREENING_TABLE_META = "screening_table_meta"
+
+# 筛选表结构版本：修改 stock_screening_pipeline 或筛选表字段后递增，各 worker 检测到后触发一次全量重建
+SCREENING_TABLE_VERSION = 1
+
+# 全量重建锁的有效期（超时视为持有者已退出）
+REBUILD_LOCK_SECONDS = 30 * 60
+# is_ready 结果的缓存时间
+READY_CACHE_SECONDS = 60
+
+# 行情字段：market_quotes 字段 -> 筛选表字段
+QUOTE_FIELDS = ("close", "open", "high", "low", "pre_close", "pct_chg", "amount", "volume", "trade_date")
+
+# 估值字段：实时估值快照字段 -> 筛选表字段
+VALUATION_FIELDS = {"pe": "pe", "pb": "pb", "pe_ttm": "pe_ttm", "market_cap": "total_mv"}
+
+# 筛选排序常用字段（均与 source 组成复合索引，查询总是带 source 条件）
+SORTABLE_FIELDS = (
+    "total_mv", "circ_mv", "pe", "pb", "pe_ttm", "pb_mrq", "roe",
+    "turnover_rate", "volume_ratio", "pct_chg", "amount", "close", "volume",
+)
+
+
+def updated_since_query(since: datetime) -> Dict[str, Any]:
+    """
+    updated_at >= since 的查询条件
+
+    各同步服务写入的 updated_at 既有 datetime（本地时间 / UTC 的 naive 值、带时区值），
+    也有 ISO 字符串（"T" 或空格分隔）。取 UTC 与本地墙钟时间中较早者作为下界，
+    字符串按两种分隔符分别比较（字符串只能按字典序比较，分隔符不同会漏掉当天的记录）。
+    """
+    since_utc = since.astimezone(timezone.utc).replace(tzinfo=None)
+    since_local = since.astimezone(ZoneInfo(settings.TIMEZONE)).replace(tzinfo=None)
+    lower = min(since_utc, since_local)
+    return {"$or": [
+        {"updated_at": {"$gte": lower}},
+        {"updated_at": {"$gte": lower.isoformat(sep="T")}},
+        {"updated_at": {"$gte": lower.isoformat(sep=" ")}},
+    ]}
+
+
+class ScreeningTableService:
+    """物化筛选表的构建与增量维护"""
+
+    def __init__(self, collection_name: str = SCREENING_TABLE) -> None:
+        self.collection_name = collection_name
+        self._ready: Optional[bool] = None
+        self._ready_checked_at = 0.0
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def ensure_indexes(self) -> None:
+        db = get_mongo_db()
+        coll = db[self.collection_name]
+        try:
+            # $merge 依赖 on 字段上的唯一索引
+            await coll.create_index([("code", 1), ("source", 1)], unique=True, name="code_source_unique")
+            for field in SORTABLE_FIELDS:
+                await coll.create_index([("source", 1), (field, -1)], name=f"source_{field}_desc")
+            await coll.create_index([("source", 1), ("industry", 1)], name="source_industry")
+        except Exception as e:
+            logger.warning(f"创建筛选表索引失败（忽略）: {e}")
+
+    async def is_ready(self) -> bool:
+        """筛选表是否有数据（未构建时筛选服务回退到视图；结果缓存 READY_CACHE_SECONDS 秒，表被删除后会重新检测）"""
+        if self._ready is None or time.monotonic() - self._ready_checked_at > READY_CACHE_SECONDS:
+            db = get_mongo_db()
+            self._ready = await db[self.collection_name].estimated_document_count() > 0
+            self._ready_checked_at = time.monotonic()
+        return self._ready
+
+    async def _load_meta(self, db) -> Dict[str, Any]:
+        return await db[SCREENING_TABLE_META].find_one({"_id": self.collection_name}) or {}
+
+    async def _needs_rebuild(self, db, meta: Dict[str, Any]) -> bool:
+        if meta.get("version") != SCREENING_TABLE_VERSION or not meta.get("watermark"):
+            return True
+        return await db[self.collection_name].estimated_document_count() == 0
+
+    async def _acquire_rebuild_lock(self, db) -> bool:
+        """抢占全量重建锁（锁文档即 meta 文档，过期的锁可被接管）"""
+        now = datetime.now(timezone.utc)
+        try:
+            await db[SCREENING_TABLE_META].find_one_and_update(
+                {"_id": self.collection_name, "$or": [
+                    {"lock_owner": None},
+                    {"lock_expires_at": {"$lt": now}},
+                ]},
+                {"$set": {
+                    "lock_owner": self._owner,
+                    "lock_expires_at": now + timedelta(seconds=REBUILD_LOCK_SECONDS),
+                }},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # meta 文档存在但锁被其他 worker 持有
+            return False
+        return True
+
+    async def _release_rebuild_lock(self, db) -> None:
+        await db[SCREENING_TABLE_META].update_one(
+            {"_id": self.collection_name, "lock_owner": self._owner},
+            {"$set": {"lock_owner": None, "lock_expires_at": None}},
+        )
+
+    async def rebuild(self) -> int:
+        """全量重建筛选表，返回重建后的记录数（调用方负责加锁，见 refresh_changed）"""
+        db = get_mongo_db()
+        started = datetime.now(timezone.utc)
+        start_time = time.time()
+
+        await self._merge(db, match=None, refreshed_at=started)
+        # 删除基础信息中已不存在的股票（本次未被刷新的行）
+        removed = await db[self.collection_name].delete_many({"refreshed_at": {"$lt": started}})
+
+        count = await db[self.collection_name].count_documents({})
+        await db[SCREENING_TABLE_META].update_one(
+            {"_id": self.collection_name},
+            {"$set": {"version": SCREENING_TABLE_VERSION, "watermark": started, "built_at": started}},
+            upsert=True,
+        )
+        self._ready = count > 0
+        self._ready_checked_at = time.monotonic()
+        logger.info(
+            f"✅ 筛选表全量重建完成: {count} 条, 移除 {removed.deleted_count} 条, "
+            f"耗时 {time.time() - start_time:.2f}秒"
+        )
+        return count
+
+    async def _rebuild_guarded(self, db) -> int:
+        """持有重建锁时全量重建；锁被占用或其他 worker 刚完成重建时跳过"""
+        if not await self._acquire_rebuild_lock(db):
+            logger.info("⏳ 其他 worker 正在重建筛选表，跳过本次刷新")
+            return 0
+        try:
+            # 拿到锁后再检查一次：等待期间其他 worker 可能已完成重建
+            if not await self._needs_rebuild(db, await self._load_meta(db)):
+                return 0
+            return await self.rebuild()
+        finally:
+            await self._release_rebuild_lock(db)
+
+    async def refresh_codes(self, codes: Iterable[str]) -> int:
+        """重算指定股票在筛选表中的记录，返回股票数"""
+        codes = sorted({c for c in codes if c})
+        if not codes:
+            return 0
+        db = get_mongo_db()
+        await self._merge(db, match={"code": {"$in": codes}}, refreshed_at=datetime.now(timezone.utc))
+        return len(codes)
+
+    async def refresh_changed(self) -> int:
+        """
+        增量刷新：找出水位之后有更新的基础信息 / 财务数据并重算对应股票
+
+        尚未构建、表为空或表结构版本变化时执行（加锁的）全量重建
+        """
+        db = get_mongo_db()
+        meta = await self._load_meta(db)
+        if await self._needs_rebuild(db, meta):
+            return await self._rebuild_guarded(db)
+
+        started = datetime.now(timezone.utc)
+        watermark = meta["watermark"]
+        if watermark.tzinfo is None:
+            # Motor 默认返回 naive UTC 时间
+            watermark = watermark.replace(tzinfo=timezone.utc)
+        changed = updated_since_query(watermark)
+
+        codes = set(await db["stock_basic_info"].distinct("code", changed))
+        codes.update(await db["stock_financial_data"].distinct("code", changed))
+        refreshed = await self.refresh_codes(codes)
+        # 多个 worker 并发刷新时水位只前进
+        await db[SCREENING_TABLE_META].update_one(
+            {"_id": self.collection_name}, {"$max": {"watermark": started}}
+        )
+        if refreshed:
+            logger.info(f"🔄 筛选表增量刷新: {refreshed} 只股票")
+        return refreshed
+
+    async def apply_quotes(self, quotes: Dict[str, Dict[str, Any]], updated_at: datetime) -> int:
+        """
+        把最新行情直接写入筛选表（行情按 code 关联，对所有数据源的记录生效）
+
+        Args:
+            quotes: {6位代码: 行情字段}
+            updated_at: 行情入库时间
+        """
+        if not quotes or not await self.is_ready():
+            return 0
+        ops = []
+        for code, q in quotes.items():
+            fields = {f: q.get(f) for f in QUOTE_FIELDS}
+            fields["quote_updated_at"] = updated_at
+            ops.append(UpdateMany({"code": code}, {"$set": fields}))
+        db = get_mongo_db()
+        result = await db[self.collection_name].bulk_write(ops, ordered=False)
+        logger.debug(f"筛选表行情更新: matched={result.matched_count}, modified={result.modified_count}")
+        return result.modified_count
+
+    async def apply_valuations(self, valuations: Dict[str, Dict[str, Any]], updated_at: datetime) -> int:
+        """
+        把实时估值快照写入筛选表（在筛选查询之前生效，过滤和排序都基于实时值）
+
+        Args:
+            valuations: {6位代码: 实时估值}（RealtimeValuationEngine.get_many 的结果）
+            updated_at: 估值计算时间
+        """
+        if not valuations or not await self.is_ready():
+            return 0
+        ops = []
+        for code, v in valuations.items():
+            fields = {target: v[f] for f, target in VALUATION_FIELDS.items() if v.get(f) is not None}
+            if not fields:
+                continue
+            fields["is_realtime_valuation"] = bool(v.get("is_realtime"))
+            fields["valuation_updated_at"] = updated_at
+            ops.append(UpdateMany({"code": code}, {"$set": fields}))
+        if not ops:
+            return 0
+        db = get_mongo_db()
+        result = await db[self.collection_name].bulk_write(ops, ordered=False)
+        logger.debug(f"筛选表估值更新: matched={result.matched_count}, modified={result.modified_count}")
+        return result.modified_count
+
+    async def _merge(self, db, match: Optional[Dict[str, Any]], refreshed_at: datetime) -> None:
+        # $merge 要求 on 字段存在；筛选查询总是带 source 条件，缺少 source 的记录本就不会被查到
+        base_match: Dict[str, Any] = {"code": {"$nin": [None, ""]}, "source": {"$nin": [None, ""]}}
+        pipeline: List[Dict[str, Any]] = [{"$match": {**base_match, **(match or {})}}]
+        pipeline.extend(stock_screening_pipeline())
+        pipeline.extend([
+            # 使用筛选表自身的 _id，避免 replace 时修改 _id
+            {"$unset": "_id"},
+            {"$addFields": {"refreshed_at": refreshed_at}},
+            {"$merge": {
+                "into": self.collection_name,
+                "on": ["code", "source"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ])
+        async for _ in db["stock_basic_info"].aggregate(pipeline, allowDiskUse=True):
+            pass
+
+
+# 全局服务实例
+_screening_table_service: Optional[ScreeningTableService] = None
+
+
+def get_screening_table_service() -> ScreeningTableService:
+    """获取物化筛选表服务实例"""
+    global _screening_table_service
+    if _screening_table_service is None:
+        _screening_table_service = ScreeningTableService()
+    return _screening_table_service
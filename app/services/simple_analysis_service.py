@@ -7,7 +7,7 @@ import asyncio
 import uuid
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Generator, NamedTuple, Optional, List, Tuple
 from pathlib import Path
 import sys
 
@@ -32,6 +32,9 @@ from app.services.config_service import ConfigService
 from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
 from app.services.redis_progress_tracker import RedisProgressTracker, get_progress_by_id
 from app.services.progress_log_handler import register_analysis_tracker, unregister_analysis_tracker
+from app.services.symbol_directory import get_symbol_directory
+from app.services.report_list_service import index_fields
+from app.services.analysis_executor import AnalysisCapacityError, get_analysis_executor
 
 # 股票基础信息获取（用于补充显示名称）
 try:
@@ -46,6 +49,27 @@ except Exception:
 # 设置日志
 logger = logging.getLogger("app.services.simple_analysis_service")
 
+
+class _GraphRun(NamedTuple):
+    """分析步骤在图执行处暂停时交给调用方的参数"""
+    graph: TradingAgentsGraph
+    company_name: str
+    trade_date: str
+    progress_callback: Any
+    task_id: str
+
+
+def _resume_steps(steps: Generator, outcome: Any = None, error: Optional[BaseException] = None) -> Any:
+    """把图执行结果（或异常）送回分析步骤生成器，返回分析结果"""
+    try:
+        if error is not None:
+            steps.throw(error)
+        else:
+            steps.send(outcome)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("分析步骤在图执行后再次暂停")
+
 # 配置服务实例
 config_service = ConfigService()
 
@@ -598,14 +622,12 @@ class SimpleAnalysisService:
         # 进度跟踪器缓存
         self._progress_trackers: Dict[str, RedisProgressTracker] = {}
 
-        # 🔧 创建共享的线程池，支持并发执行多个分析任务
-        # 默认最多同时执行3个分析任务（可根据服务器资源调整）
-        import concurrent.futures
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        # 🔧 共享的分析执行引擎：总并发、按供应商并发、等待队列上限均可配置
+        self._executor = get_analysis_executor()
 
         logger.info(f"🔧 [服务初始化] SimpleAnalysisService 实例ID: {id(self)}")
         logger.info(f"🔧 [服务初始化] 内存管理器实例ID: {id(self.memory_manager)}")
-        logger.info(f"🔧 [服务初始化] 线程池最大并发数: 3")
+        logger.info(f"🔧 [服务初始化] 分析最大并发数: {self._executor.max_workers}, 等待上限: {self._executor.max_queued}")
 
         # 设置 WebSocket 管理器
         # 简单的股票名称缓存，减少重复查询
@@ -653,10 +675,13 @@ class SimpleAnalysisService:
         """解析股票名称（带缓存）"""
         if not code:
             return ""
+        # 优先查进程共享的股票目录（纯内存）
+        name = get_symbol_directory().get_name(code)
+        if name:
+            return name
         # 命中缓存
         if code in self._stock_name_cache:
             return self._stock_name_cache[code]
-        name = None
         try:
             if _get_stock_info_safe:
                 info = _get_stock_info_safe(code)
@@ -745,6 +770,9 @@ class SimpleAnalysisService:
             logger.info(f"📝 创建分析任务: {task_id} - {stock_code}")
             logger.info(f"🔍 内存管理器实例ID: {id(self.memory_manager)}")
 
+            # 准入控制：执行引擎已满时直接拒绝（AnalysisCapacityError），由 execute_analysis_background 结束时释放
+            self._executor.admit([task_id])
+
             # 在内存中创建任务状态
             task_state = await self.memory_manager.create_task(
                 task_id=task_id,
@@ -802,10 +830,33 @@ class SimpleAnalysisService:
                 "message": "任务已创建，等待执行"
             }
 
+        except AnalysisCapacityError:
+            raise
         except Exception as e:
             logger.error(f"❌ 创建分析任务失败: {e}")
+            self._executor.release(task_id)
             raise
 
+    async def abandon_tasks(self, task_ids: List[str], reason: str) -> None:
+        """
+        放弃已创建但不会执行的任务（如批量提交中途失败）：释放准入名额并标记为失败
+
+        这些任务不会进入 execute_analysis_background，名额不释放会永久占用执行引擎容量
+        """
+        for task_id in task_ids:
+            self._executor.release(task_id)
+            try:
+                await self.memory_manager.update_task_status(
+                    task_id=task_id,
+                    status=TaskStatus.FAILED,
+                    progress=0,
+                    message="任务未启动",
+                    error_message=reason,
+                )
+                await self._update_task_status(task_id, AnalysisStatus.FAILED, 0, reason)
+            except Exception as e:
+                logger.warning(f"⚠️ 标记放弃的任务失败: {task_id}, {e}")
+
     async def execute_analysis_background(
         self,
         task_id: str,
@@ -1053,6 +1104,9 @@ class SimpleAnalysisService:
             # 同步更新MongoDB状态为失败
             await self._update_task_status(task_id, AnalysisStatus.FAILED, 0, user_friendly_error)
         finally:
+            # 释放执行引擎的准入名额
+            self._executor.release(task_id)
+
             # 清理进度跟踪器缓存
             if task_id in self._progress_trackers:
                 del self._progress_trackers[task_id]
@@ -1067,22 +1121,52 @@ class SimpleAnalysisService:
         request: SingleAnalysisRequest,
         progress_tracker: Optional[RedisProgressTracker] = None
     ) -> Dict[str, Any]:
-        """同步执行分析（在共享线程池中运行）"""
-        # 🔧 使用共享线程池，支持多个任务并发执行
-        # 不再每次创建新的线程池，避免串行执行
-        loop = asyncio.get_event_loop()
-        logger.info(f"🚀 [线程池] 提交分析任务到共享线程池: {task_id} - {request.stock_code}")
-        result = await loop.run_in_executor(
-            self._thread_pool,  # 使用共享线程池
-            self._run_analysis_sync,
-            task_id,
-            user_id,
-            request,
-            progress_tracker
-        )
-        logger.info(f"✅ [线程池] 分析任务执行完成: {task_id}")
+        """执行分析（在共享执行引擎中运行）"""
+        from app.core.config import settings
+
+        provider, provider_limit = await self._resolve_execution_provider(request)
+        logger.info(f"🚀 [执行引擎] 提交分析任务: {task_id} - {request.stock_code} (供应商: {provider})")
+        if settings.ANALYSIS_ASYNC_GRAPH:
+            async with self._executor.slot(provider, provider_limit):
+                result = await self._run_analysis_async(task_id, user_id, request, progress_tracker)
+        else:
+            result = await self._executor.run(
+                self._run_analysis_sync,
+                task_id,
+                user_id,
+                request,
+                progress_tracker,
+                provider=provider,
+                provider_limit=provider_limit,
+            )
+        logger.info(f"✅ [执行引擎] 分析任务执行完成: {task_id}")
         return result
 
+    async def _run_analysis_async(
+        self,
+        task_id: str,
+        user_id: str,
+        request: SingleAnalysisRequest,
+        progress_tracker: Optional[RedisProgressTracker] = None
+    ) -> Dict[str, Any]:
+        """
+        异步执行分析：准备与结果处理在执行线程中完成，图通过 apropagate 在事件循环上执行
+
+        图执行期间不占用执行线程，同步的节点/工具由 LangGraph 按节点放到线程中运行
+        """
+        steps = self._analysis_steps(task_id, user_id, request, progress_tracker)
+        graph_run = await self._executor.run_in_pool(next, steps)
+        try:
+            outcome = await graph_run.graph.apropagate(
+                graph_run.company_name,
+                graph_run.trade_date,
+                progress_callback=graph_run.progress_callback,
+                task_id=graph_run.task_id,
+            )
+        except Exception as e:
+            return await self._executor.run_in_pool(_resume_steps, steps, None, e)
+        return await self._executor.run_in_pool(_resume_steps, steps, outcome)
+
     def _run_analysis_sync(
         self,
         task_id: str,
@@ -1090,7 +1174,53 @@ class SimpleAnalysisService:
         request: SingleAnalysisRequest,
         progress_tracker: Optional[RedisProgressTracker] = None
     ) -> Dict[str, Any]:
-        """同步执行分析的具体实现"""
+        """同步执行分析（整个分析在执行线程中运行，图通过 propagate 执行）"""
+        steps = self._analysis_steps(task_id, user_id, request, progress_tracker)
+        graph_run = next(steps)
+        try:
+            outcome = graph_run.graph.propagate(
+                graph_run.company_name,
+                graph_run.trade_date,
+                progress_callback=graph_run.progress_callback,
+                task_id=graph_run.task_id,
+            )
+        except Exception as e:
+            return _resume_steps(steps, error=e)
+        return _resume_steps(steps, outcome)
+
+    async def _resolve_execution_provider(self, request: SingleAnalysisRequest) -> Tuple[str, Optional[int]]:
+        """
+        确定任务占用哪个供应商的并发名额
+
+        按快速模型所属供应商排队；模型配置 performance_metrics.max_concurrency 可覆盖供应商默认上限
+        """
+        model_name = request.parameters.quick_analysis_model if request.parameters else None
+        if not model_name:
+            return "default", None
+        try:
+            system_config = await config_service.get_system_config()
+            for llm_config in (system_config.llm_configs if system_config else []):
+                if llm_config.model_name == model_name:
+                    provider = llm_config.provider.value if hasattr(llm_config.provider, 'value') else str(llm_config.provider)
+                    max_concurrency = (llm_config.performance_metrics or {}).get("max_concurrency")
+                    return provider, int(max_concurrency) if max_concurrency else None
+        except Exception as e:
+            logger.debug(f"读取模型并发配置失败，使用默认供应商映射: {e}")
+        return _get_default_provider_by_model(model_name), None
+
+    def _analysis_steps(
+        self,
+        task_id: str,
+        user_id: str,
+        request: SingleAnalysisRequest,
+        progress_tracker: Optional[RedisProgressTracker] = None
+    ) -> Generator[_GraphRun, Tuple[Any, Any], Dict[str, Any]]:
+        """
+        分析的具体步骤（生成器）
+
+        准备好图和进度回调后产出 _GraphRun 并暂停，由调用方同步（propagate）或异步（apropagate）
+        执行图，再把 (state, decision) 送回（或把异常 throw 回来）继续处理结果，返回值为分析结果
+        """
         try:
             # 在线程中重新初始化日志系统
             from tradingagents.utils.logging_init import init_logging, get_logger
@@ -1496,17 +1626,14 @@ class SimpleAnalysisService:
                 except Exception as e:
                     logger.error(f"❌ Graph进度回调失败: {e}", exc_info=True)
 
-            logger.info(f"🚀 准备调用 trading_graph.propagate，progress_callback={graph_progress_callback}")
+            logger.info(f"🚀 准备执行分析图，progress_callback={graph_progress_callback}")
 
-            # 执行实际分析，传递进度回调和task_id
-            state, decision = trading_graph.propagate(
-                request.stock_code,
-                analysis_date,
-                progress_callback=graph_progress_callback,
-                task_id=task_id
+            # 执行实际分析（由调用方执行图），传递进度回调和task_id
+            state, decision = yield _GraphRun(
+                trading_graph, request.stock_code, analysis_date, graph_progress_callback, task_id
             )
 
-            logger.info(f"✅ trading_graph.propagate 执行完成")
+            logger.info(f"✅ 分析图执行完成")
 
             # 🔍 调试：检查decision的结构
             logger.info(f"🔍 [DEBUG] Decision类型: {type(decision)}")
@@ -1962,9 +2089,10 @@ class SimpleAnalysisService:
 
             # 1) 从内存读取所有任务
             logger.info(f"📋 [Tasks] 准备从内存读取所有任务: status={status}, limit={limit}, offset={offset}")
+            # 两个来源都按开始时间倒序，各取前 offset+limit 条合并后即可得到正确的一页
             tasks_in_mem = await self.memory_manager.list_all_tasks(
                 status=task_status,
-                limit=limit * 2,
+                limit=offset + limit,
                 offset=0
             )
             logger.info(f"📋 [Tasks] 内存返回数量: {len(tasks_in_mem)}")
@@ -1977,14 +2105,12 @@ class SimpleAnalysisService:
             if task_status:
                 query["status"] = task_status.value
 
-            count = await collection.count_documents(query)
-            logger.info(f"📋 [Tasks] MongoDB 任务总数: {count}")
-
-            cursor = collection.find(query).sort("start_time", -1).limit(limit * 2)
+            cursor = collection.find(query).sort("start_time", -1).limit(offset + limit)
             tasks_from_db = []
             async for doc in cursor:
                 doc.pop("_id", None)
                 tasks_from_db.append(doc)
+            count = len(tasks_from_db)
 
             logger.info(f"📋 [Tasks] MongoDB 返回数量: {len(tasks_from_db)}")
 
@@ -2053,8 +2179,8 @@ class SimpleAnalysisService:
             tasks_in_mem = await self.memory_manager.list_user_tasks(
                 user_id=user_id,
                 status=task_status,
-                limit=limit * 2,  # 多读一些，后面合并去重
-                offset=0  # 内存中的任务不多，全部读取
+                limit=offset + limit,  # 按开始时间倒序取到当前页末尾，后面合并去重
+                offset=0
             )
             logger.info(f"📋 [Tasks] 内存返回数量: {len(tasks_in_mem)}")
 
@@ -2106,7 +2232,7 @@ class SimpleAnalysisService:
 
                 logger.info(f"📋 [Tasks] MongoDB 查询条件: {query}")
                 # 读取更多数据用于合并
-                cursor = db.analysis_tasks.find(query).sort("created_at", -1).limit(limit * 2)
+                cursor = db.analysis_tasks.find(query).sort("created_at", -1).limit(offset + limit)
                 async for doc in cursor:
                     count += 1
                     # 兼容 user_id 或 user 字段
@@ -2621,6 +2747,9 @@ class SimpleAnalysisService:
                 "performance_metrics": result.get("performance_metrics", {})
             }
 
+            # 报告列表使用的搜索词元与大小字段
+            document.update(index_fields(document))
+
             # 保存到analysis_reports集合（与web目录保持一致）
             result_insert = await db.analysis_reports.insert_one(document)
 
@@ -0,0 +1,331 @@
+"""
+进程共享的股票目录
+
+把 A股/港股/美股 基础信息（代码、名称、市场、板块、交易所、行业、拼音首字母）加载为列式数组，
+提供 O(1) 的代码→名称/市场查询，以及基于有序数组 + 二分查找的代码 / 名称 / 拼音前缀搜索。
+
+- 由基础信息同步任务在同步完成后重建（也在应用启动时构建一次），从 MongoDB 读取后写入快照文件
+- 快照文件是按代码排序的 TSV，原子替换；其他进程（多 worker）通过 mmap 读取快照，
+  并按文件修改时间自动重新加载，不需要各自查询数据库
+- 任务列表、自选股、报告列表等补齐股票名称时只查内存，没有任何 I/O
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    from pypinyin import Style, lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_HEADER = "# symbol-directory v1"
+
+# 前缀区间上界
+_MAX_CHAR = "\uffff"
+
+# 市场 -> 基础信息集合
+MARKET_COLLECTIONS = {
+    "CN": "stock_basic_info",
+    "HK": "stock_basic_info_hk",
+    "US": "stock_basic_info_us",
+}
+
+
+class SymbolEntry(NamedTuple):
+    code: str
+    name: str
+    market: str      # CN / HK / US
+    board: str       # 板块（主板、创业板、科创板等）
+    exchange: str    # 交易所
+    industry: str
+    pinyin: str      # 名称拼音首字母（小写），未安装 pypinyin 时为空
+
+
+def _name_initials(name: str) -> str:
+    if not PYPINYIN_AVAILABLE or not name:
+        return ""
+    try:
+        return "".join(p[0] for p in lazy_pinyin(name, style=Style.FIRST_LETTER) if p).lower()
+    except Exception:
+        return ""
+
+
+def _clean(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("\t", " ").replace("\n", " ").strip()
+
+
+def normalize_code(code: str) -> Tuple[str, Optional[str]]:
+    """规范化代码，返回 (代码, 推断的市场)；无法推断市场时为 None"""
+    code = str(code or "").strip().upper()
+    if not code:
+        return "", None
+    base, _, suffix = code.partition(".")
+    if suffix == "HK":
+        return base.lstrip("0").zfill(5), "HK"
+    if suffix in ("SH", "SZ", "SS", "BJ"):
+        return base.zfill(6), "CN"
+    if base.isdigit():
+        if len(base) == 6:
+            return base, "CN"
+        if len(base) <= 5:
+            return base.zfill(5), "HK"
+    return base, None
+
+
+class SymbolDirectory:
+    """列式存储的股票目录"""
+
+    def __init__(self, entries: Iterable[SymbolEntry] = ()):
+        ordered = sorted(entries, key=lambda e: (e.code, e.market))
+        self.codes: List[str] = [e.code for e in ordered]
+        self.names: List[str] = [e.name for e in ordered]
+        self.markets: List[str] = [e.market for e in ordered]
+        self.boards: List[str] = [e.board for e in ordered]
+        self.exchanges: List[str] = [e.exchange for e in ordered]
+        self.industries: List[str] = [e.industry for e in ordered]
+        self.pinyins: List[str] = [e.pinyin for e in ordered]
+
+        # (market, code) -> 行号；code -> 行号（同一代码在多个市场时保留第一个）
+        self._by_market_code: Dict[Tuple[str, str], int] = {}
+        self._by_code: Dict[str, int] = {}
+        for i, (code, market) in enumerate(zip(self.codes, self.markets)):
+            self._by_market_code.setdefault((market, code), i)
+            self._by_code.setdefault(code, i)
+
+        # 前缀索引：有序 (key, 行号) 数组；codes 本身已有序
+        self._name_index = sorted((n.lower(), i) for i, n in enumerate(self.names) if n)
+        self._pinyin_index = sorted((p, i) for i, p in enumerate(self.pinyins) if p)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _entry(self, i: int) -> SymbolEntry:
+        return SymbolEntry(
+            self.codes[i], self.names[i], self.markets[i], self.boards[i],
+            self.exchanges[i], self.industries[i], self.pinyins[i],
+        )
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def get(self, code: str, market: Optional[str] = None) -> Optional[SymbolEntry]:
+        """按代码查询（支持 000001 / 600000.SH / 0700.HK / AAPL 等写法）"""
+        normalized, inferred = normalize_code(code)
+        market = (market or inferred or "").upper()
+        if market:
+            i = self._by_market_code.get((market, normalized))
+        else:
+            i = self._by_code.get(normalized)
+        return self._entry(i) if i is not None else None
+
+    def get_name(self, code: str, default: Optional[str] = None) -> Optional[str]:
+        entry = self.get(code)
+        return entry.name if entry and entry.name else default
+
+    def get_names(self, codes: Iterable[str]) -> Dict[str, str]:
+        """批量查询名称，只返回命中的代码"""
+        result = {}
+        for code in codes:
+            name = self.get_name(code)
+            if name:
+                result[code] = name
+        return result
+
+    def search(self, keyword: str, limit: int = 10, market: Optional[str] = None) -> List[SymbolEntry]:
+        """
+        前缀搜索：代码前缀 > 拼音首字母前缀 > 名称前缀，结果不足时补充代码 / 名称包含匹配
+        """
+        if limit <= 0:
+            return []
+        return list(itertools.islice(self.iter_search(keyword, market), limit))
+
+    def iter_search(self, keyword: str, market: Optional[str] = None) -> Iterator[SymbolEntry]:
+        """按 search 的排序惰性产出全部匹配项（调用方需要再按其他条件过滤时使用）"""
+        keyword = (keyword or "").strip()
+        if not keyword:
+            return
+        market = market.upper() if market else None
+        lower = keyword.lower()
+        upper = keyword.upper()
+        candidates = itertools.chain(
+            self._prefix_range(self.codes, upper),
+            (i for _, i in self._prefix_items(self._pinyin_index, lower)),
+            (i for _, i in self._prefix_items(self._name_index, lower)),
+            (i for i, c in enumerate(self.codes) if upper in c),
+            (i for i, n in enumerate(self.names) if lower in n.lower()),
+        )
+        seen = set()
+        for i in candidates:
+            if i in seen or (market and self.markets[i] != market):
+                continue
+            seen.add(i)
+            yield self._entry(i)
+
+    @staticmethod
+    def _prefix_range(sorted_keys: List[str], prefix: str) -> range:
+        lo = bisect.bisect_left(sorted_keys, prefix)
+        hi = bisect.bisect_left(sorted_keys, prefix + _MAX_CHAR)
+        return range(lo, hi)
+
+    @staticmethod
+    def _prefix_items(index: List[Tuple[str, int]], prefix: str) -> List[Tuple[str, int]]:
+        lo = bisect.bisect_left(index, (prefix, -1))
+        hi = bisect.bisect_left(index, (prefix + _MAX_CHAR, -1))
+        return index[lo:hi]
+
+    # ------------------------------------------------------------------
+    # 快照文件
+    # ------------------------------------------------------------------
+    def dump(self, path: Path) -> None:
+        """原子写入快照文件（按代码排序的 TSV）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{SNAPSHOT_HEADER}\t{len(self)}\n")
+            for i in range(len(self)):
+                f.write("\t".join(self._entry(i)) + "\n")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SymbolDirectory":
+        """通过 mmap 读取快照文件"""
+        entries = []
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = mm.readline().decode("utf-8")
+                if not header.startswith(SNAPSHOT_HEADER):
+                    raise ValueError(f"无效的股票目录快照: {path}")
+                for raw in iter(mm.readline, b""):
+                    fields = raw.decode("utf-8").rstrip("\n").split("\t")
+                    if len(fields) == len(SymbolEntry._fields):
+                        entries.append(SymbolEntry(*fields))
+        return cls(entries)
+
+
+# ----------------------------------------------------------------------
+# 进程内共享实例
+# ----------------------------------------------------------------------
+_directory = SymbolDirectory()
+_snapshot_mtime: Optional[float] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def _snapshot_path() -> Path:
+    return Path(settings.SYMBOL_DIRECTORY_FILE)
+
+
+def get_symbol_directory() -> SymbolDirectory:
+    """
+    获取当前进程的股票目录
+
+    每隔 SYMBOL_DIRECTORY_RELOAD_SECONDS 检查一次快照文件修改时间，有变化时重新加载。
+    """
+    global _directory, _snapshot_mtime, _last_check
+    now = time.monotonic()
+    if now - _last_check < settings.SYMBOL_DIRECTORY_RELOAD_SECONDS:
+        return _directory
+    with _reload_lock:
+        if now - _last_check < settings.SYMBOL_DIRECTORY_RELOAD_SECONDS:
+            return _directory
+        _last_check = now
+        path = _snapshot_path()
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return _directory
+        if mtime != _snapshot_mtime:
+            try:
+                _directory = SymbolDirectory.load(path)
+                _snapshot_mtime = mtime
+                logger.info(f"📇 已加载股票目录快照: {len(_directory)} 只")
+            except Exception as e:
+                logger.warning(f"⚠️ 加载股票目录快照失败: {e}")
+    return _directory
+
+
+def set_symbol_directory(directory: SymbolDirectory) -> None:
+    """替换当前进程的股票目录"""
+    global _directory
+    _directory = directory
+
+
+async def _preferred_sources() -> List[str]:
+    try:
+        from app.core.unified_config import UnifiedConfigManager
+        configs = await UnifiedConfigManager().get_data_source_configs_async()
+        enabled = [ds.type.lower() for ds in configs if ds.enabled]
+        if enabled:
+            return enabled
+    except Exception as e:
+        logger.debug(f"获取数据源优先级失败，使用默认顺序: {e}")
+    return ["tushare", "akshare", "baostock"]
+
+
+async def build_symbol_directory(db) -> SymbolDirectory:
+    """从各市场基础信息集合构建目录；同一代码有多个数据源时取优先级最高的数据源"""
+    priority = {source: i for i, source in enumerate(await _preferred_sources())}
+    projection = {"_id": 0, "code": 1, "symbol": 1, "name": 1, "market": 1,
+                  "sse": 1, "exchange": 1, "industry": 1, "source": 1}
+
+    best: Dict[Tuple[str, str], Tuple[int, SymbolEntry]] = {}
+    for market, collection in MARKET_COLLECTIONS.items():
+        async for doc in db[collection].find({}, projection):
+            raw_code = doc.get("code") or doc.get("symbol")
+            if not raw_code:
+                continue
+            code, _ = normalize_code(raw_code)
+            if market == "HK":
+                code = code.lstrip("0").zfill(5)
+            name = _clean(doc.get("name"))
+            rank = priority.get(str(doc.get("source") or "").lower(), len(priority))
+            key = (market, code)
+            if key in best and best[key][0] <= rank:
+                continue
+            best[key] = (rank, SymbolEntry(
+                code=code,
+                name=name,
+                market=market,
+                board=_clean(doc.get("market")),
+                exchange=_clean(doc.get("sse") or doc.get("exchange")),
+                industry=_clean(doc.get("industry")),
+                pinyin=_name_initials(name),
+            ))
+    return SymbolDirectory(entry for _, entry in best.values())
+
+
+async def refresh_symbol_directory() -> Optional[SymbolDirectory]:
+    """从数据库重建目录，写入快照文件并替换当前进程的实例（基础信息同步完成后调用）"""
+    from app.core.database import get_mongo_db
+
+    global _snapshot_mtime
+    try:
+        start = time.time()
+        directory = await build_symbol_directory(get_mongo_db())
+        path = _snapshot_path()
+        await asyncio.to_thread(directory.dump, path)
+        with _reload_lock:
+            set_symbol_directory(directory)
+            _snapshot_mtime = path.stat().st_mtime
+        logger.info(f"📇 股票目录已刷新: {len(directory)} 只，耗时 {time.time() - start:.2f}秒")
+        return directory
+    except Exception as e:
+        logger.warning(f"⚠️ 刷新股票目录失败: {e}")
+        return None
@@ -3,13 +3,41 @@
 管理模型使用记录和成本统计
 """
 
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
-from collections import defaultdict
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from app.core.database import get_mongo_db
 from app.models.config import UsageRecord, UsageStatistics
+from tradingagents.config.usage_buckets import (
+    BUCKET_COLLECTION,
+    CUTOFF_DELAY_SECONDS,
+    CUTOFF_SETTLE_SECONDS,
+    MIGRATION_DONE,
+    MIGRATION_ID,
+    MIGRATION_LOCK_SECONDS,
+    STATE_CACHE_SECONDS,
+    bucket_filter,
+    bucket_increments,
+    bucket_index_spec,
+    bucket_totals_stages,
+    bucket_update,
+    counted_live,
+    fold_rollup,
+    new_rollup,
+    plain_groups,
+    rebuild_pipeline,
+    records_as_buckets_stages,
+    rollup_facet_stage,
+)
 
 logger = logging.getLogger("app.services.usage_statistics_service")
 
@@ -20,6 +48,9 @@ class UsageStatisticsService:
     def __init__(self):
         # 使用 tradingagents 的集合名称
         self.collection_name = "token_usage"
+        # 按日聚合桶的迁移状态缓存：(读取时间, 状态文档)
+        self._bucket_state: Optional[Dict[str, Any]] = None
+        self._bucket_state_at = 0.0
     
     async def add_usage_record(self, record: UsageRecord) -> bool:
         """添加使用记录"""
@@ -30,6 +61,14 @@ class UsageStatisticsService:
             record_dict = record.model_dump(exclude={"id"})
             result = await collection.insert_one(record_dict)
 
+            # 迁移截止点之后的记录同步累加到按日聚合桶
+            state = await self._load_bucket_state(db)
+            if counted_live({"_id": result.inserted_id}, state.get("cutoff_id")):
+                for key, inc in bucket_increments([record_dict]).items():
+                    await db[BUCKET_COLLECTION].update_one(
+                        bucket_filter(key), bucket_update(inc, datetime.now()), upsert=True
+                    )
+
             logger.info(f"✅ 添加使用记录成功: {record.provider}/{record.model_name}")
             return True
         except Exception as e:
@@ -76,109 +115,142 @@ class UsageStatisticsService:
             logger.error(f"❌ 获取使用记录失败: {e}")
             return []
     
+    async def _load_bucket_state(self, db) -> Dict[str, Any]:
+        """读取按日聚合桶的迁移状态（截止点确定后不再变化，迁移完成后永久缓存）"""
+        state = self._bucket_state
+        if state and state.get("status") == MIGRATION_DONE:
+            return state
+        if state is None or time.monotonic() - self._bucket_state_at > STATE_CACHE_SECONDS:
+            state = await db[BUCKET_COLLECTION].find_one({"_id": MIGRATION_ID}) or {}
+            self._bucket_state = state
+            self._bucket_state_at = time.monotonic()
+        return state
+
+    async def migrate_daily_buckets(self) -> bool:
+        """
+        一次性迁移：由历史原始记录重建按日聚合桶（启动后在后台执行）
+
+        在 _migration 状态文档上加锁，只有一个 worker 执行；锁超时后其他 worker 可以接手。
+        截止点设在当前时间之后 CUTOFF_DELAY_SECONDS，保证此后插入的记录都由写入方累加，
+        等截止点之前的插入完成后，把 _id 早于截止点的记录重建到桶的 history 子文档。
+
+        Returns:
+            本 worker 是否完成了迁移（已完成或其他 worker 正在执行时返回 False）
+        """
+        db = get_mongo_db()
+        buckets = db[BUCKET_COLLECTION]
+        await buckets.create_index(bucket_index_spec(), unique=True)
+
+        now = datetime.now(timezone.utc)
+        try:
+            state = await buckets.find_one_and_update(
+                {
+                    "_id": MIGRATION_ID,
+                    "status": {"$ne": MIGRATION_DONE},
+                    "$or": [{"locked_until": {"$exists": False}}, {"locked_until": {"$lt": now}}],
+                },
+                {
+                    "$set": {
+                        "locked_until": now + timedelta(seconds=MIGRATION_LOCK_SECONDS),
+                        "owner": f"{socket.gethostname()}:{os.getpid()}",
+                    },
+                    # 截止点只在首次创建时确定，接手的 worker 沿用同一截止点（重建结果相同）
+                    "$setOnInsert": {
+                        "cutoff_id": ObjectId.from_datetime(now + timedelta(seconds=CUTOFF_DELAY_SECONDS)),
+                        "status": "pending",
+                    },
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # 已完成，或其他 worker 持有迁移锁
+            return False
+
+        cutoff_id = state["cutoff_id"]
+        wait = (cutoff_id.generation_time - datetime.now(timezone.utc)).total_seconds() + CUTOFF_SETTLE_SECONDS
+        if wait > 0:
+            logger.info(f"🔄 按日聚合迁移：等待 {wait:.0f}s 后由历史记录重建 token_usage_daily")
+            await asyncio.sleep(wait)
+
+        await db[self.collection_name].aggregate(
+            rebuild_pipeline({"_id": {"$lt": cutoff_id}}, history=True)
+        ).to_list(length=None)
+        await buckets.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"status": MIGRATION_DONE, "rebuilt_at": datetime.now()}, "$unset": {"locked_until": ""}},
+        )
+        self._bucket_state = None
+        logger.info("✅ token_usage_daily 迁移重建完成")
+        return True
+
     async def get_usage_statistics(
         self,
         days: int = 7,
         provider: Optional[str] = None,
         model_name: Optional[str] = None
     ) -> UsageStatistics:
-        """获取使用统计"""
+        """
+        获取使用统计
+
+        起始日之后的完整天数读取按日聚合桶；起始日当天只有部分时段在范围内，
+        从原始记录（按时间索引）补齐。两部分都用同一个 $facet 管道汇总。
+        按日聚合迁移完成前全部从原始记录统计。
+        """
         try:
             db = get_mongo_db()
             collection = db[self.collection_name]
+            buckets_ready = (await self._load_bucket_state(db)).get("status") == MIGRATION_DONE
             
             # 计算时间范围
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
+            start_day = start_date.strftime("%Y-%m-%d")
+            next_day = (start_date + timedelta(days=1)).strftime("%Y-%m-%d")
             
-            # 构建查询条件
-            query = {
-                "timestamp": {
-                    "$gte": start_date.isoformat(),
-                    "$lte": end_date.isoformat()
-                }
-            }
+            filters = {}
             if provider:
-                query["provider"] = provider
+                filters["provider"] = provider
             if model_name:
-                query["model_name"] = model_name
+                filters["model_name"] = model_name
             
-            # 获取所有记录
-            cursor = collection.find(query)
-            records = []
-            async for doc in cursor:
-                records.append(doc)
+            # 完整天数：桶
+            bucket_query = {
+                "date": {"$gt": start_day, "$lte": end_date.strftime("%Y-%m-%d")},
+                **filters
+            }
+            # 起始日当天的剩余时段：原始记录
+            raw_query = {
+                "timestamp": {"$gte": start_date.isoformat(), "$lt": next_day},
+                **filters
+            }
+            
+            if not buckets_ready:
+                bucket_facets = []
+                raw_query["timestamp"] = {"$gte": start_date.isoformat()}
+            else:
+                bucket_facets = await db[BUCKET_COLLECTION].aggregate(
+                    [{"$match": bucket_query}, *bucket_totals_stages(), rollup_facet_stage()]
+                ).to_list(length=1)
+
+            rollup = new_rollup()
+            raw_facets = await collection.aggregate(
+                [{"$match": raw_query}, *records_as_buckets_stages(), rollup_facet_stage()]
+            ).to_list(length=1)
+            for facet in bucket_facets + raw_facets:
+                fold_rollup(rollup, facet)
             
             # 统计数据
+            totals = rollup["totals"]
             stats = UsageStatistics()
-            stats.total_requests = len(records)
-
-            # 按货币统计成本
-            cost_by_currency = defaultdict(float)
-
-            by_provider = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_model = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_date = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-
-            for record in records:
-                cost = record.get("cost", 0.0)
-                currency = record.get("currency", "CNY")
-
-                # 总计
-                stats.total_input_tokens += record.get("input_tokens", 0)
-                stats.total_output_tokens += record.get("output_tokens", 0)
-                stats.total_cost += cost  # 保留向后兼容
-                cost_by_currency[currency] += cost
-
-                # 按供应商统计
-                provider_key = record.get("provider", "unknown")
-                by_provider[provider_key]["requests"] += 1
-                by_provider[provider_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_provider[provider_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_provider[provider_key]["cost"] += cost
-                by_provider[provider_key]["cost_by_currency"][currency] += cost
-
-                # 按模型统计
-                model_key = f"{record.get('provider', 'unknown')}/{record.get('model_name', 'unknown')}"
-                by_model[model_key]["requests"] += 1
-                by_model[model_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_model[model_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_model[model_key]["cost"] += cost
-                by_model[model_key]["cost_by_currency"][currency] += cost
-
-                # 按日期统计
-                timestamp = record.get("timestamp", "")
-                if timestamp:
-                    date_key = timestamp[:10]  # YYYY-MM-DD
-                    by_date[date_key]["requests"] += 1
-                    by_date[date_key]["input_tokens"] += record.get("input_tokens", 0)
-                    by_date[date_key]["output_tokens"] += record.get("output_tokens", 0)
-                    by_date[date_key]["cost"] += cost
-                    by_date[date_key]["cost_by_currency"][currency] += cost
-
-            # 转换 defaultdict 为普通 dict（包括嵌套的 cost_by_currency）
-            stats.cost_by_currency = dict(cost_by_currency)
-            stats.by_provider = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_provider.items()}
-            stats.by_model = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_model.items()}
-            stats.by_date = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_date.items()}
+            stats.total_requests = totals["requests"]
+            stats.total_input_tokens = totals["input_tokens"]
+            stats.total_output_tokens = totals["output_tokens"]
+            stats.total_cost = totals["cost"]  # 保留向后兼容
+            stats.cost_by_currency = dict(totals["cost_by_currency"])
+            stats.by_provider = plain_groups(rollup["by_provider"])
+            stats.by_model = plain_groups(rollup["by_model"])
+            stats.by_date = plain_groups(rollup["by_date"])
             
             logger.info(f"✅ 获取使用统计成功: {stats.total_requests} 条记录")
             return stats
@@ -224,6 +296,14 @@ class UsageStatisticsService:
                 "timestamp": {"$lt": cutoff_date.isoformat()}
             })
             
+            # 同步清理聚合桶：截止日之前的桶直接删除，截止日当天由剩余记录重算
+            cutoff_day = cutoff_date.strftime("%Y-%m-%d")
+            next_day = (cutoff_date + timedelta(days=1)).strftime("%Y-%m-%d")
+            await db[BUCKET_COLLECTION].delete_many({"date": {"$lte": cutoff_day}})
+            await collection.aggregate(
+                rebuild_pipeline({"timestamp": {"$gte": cutoff_day, "$lt": next_day}})
+            ).to_list(length=None)
+            
             deleted_count = result.deleted_count
             logger.info(f"✅ 删除旧记录成功: {deleted_count} 条")
             return deleted_count
@@ -0,0 +1,227 @@
+"""
+日志文件读取工具
+
+为日志查看/统计/导出提供与文件大小无关的访问方式：
+- tail_lines: 从文件末尾按块向前读取最后 N 行，不加载整个文件
+- LogFileIndex: 每个文件一份稀疏索引（时间戳 -> 字节偏移）和级别计数，
+  只增量扫描上次之后追加的内容；文件被轮转改名后按 inode 复用，被截断/替换后重建
+"""
+
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("webapi")
+
+# 日志中的时间戳格式：YYYY-MM-DD HH:MM:SS（文本与 JSON 格式一致）
+TIMESTAMP_PATTERN = re.compile(rb"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+LEVELS = ("ERROR", "WARNING", "INFO", "DEBUG")
+
+_BLOCK_SIZE = 64 * 1024
+_SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+# 稀疏索引间隔：每隔约 1MB 记录一个时间戳检查点
+DEFAULT_INDEX_INTERVAL = 1024 * 1024
+# 缓存的索引数量上限
+_MAX_INDEXES = 64
+
+
+def line_level(line: str) -> Optional[str]:
+    """判断日志行级别（按 ERROR > WARNING > INFO > DEBUG 的优先顺序匹配）"""
+    for level in LEVELS:
+        if level in line:
+            return level
+    return None
+
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """将 ISO 时间（2025-01-01T10:00:00）转换为日志时间戳格式，便于直接按字符串比较"""
+    if not value:
+        return None
+    return value.replace("T", " ")[:19]
+
+
+def line_timestamp(line: str) -> Optional[str]:
+    """提取日志行中的时间戳"""
+    match = TIMESTAMP_PATTERN.search(line.encode("utf-8", errors="ignore"))
+    return match.group().decode() if match else None
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="ignore")
+
+
+def tail_lines(path: Path, count: int, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    读取 [start, end) 字节范围内的最后 count 行
+
+    从 end 开始按块向前读取，读到足够的换行符即停止，耗时只与 count 相关
+    """
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        if end is None:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+        position = end
+        blocks: List[bytes] = []
+        newlines = 0
+        while position > start and newlines <= count:
+            size = min(_BLOCK_SIZE, position - start)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    lines = data.splitlines()
+    # 若未读到范围起点，第一行可能不完整
+    if position > start and len(lines) > count:
+        lines = lines[1:]
+    return [_decode(line) for line in lines[-count:]]
+
+
+def iter_lines(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """按行流式读取 [start, end) 字节范围"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        for raw in f:
+            if end is not None and position >= end:
+                break
+            position += len(raw)
+            yield _decode(raw).rstrip("\r\n")
+
+
+class LogFileIndex:
+    """
+    单个日志文件的增量索引
+
+    - line_count / level_counts: 已扫描部分的行数与各级别计数
+    - checkpoints: 稀疏的 (时间戳, 行起始偏移)，用于时间范围查询时定位字节区间
+    """
+
+    def __init__(self, path: Path, interval: int = DEFAULT_INDEX_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, identity: Optional[Tuple[int, int]]) -> None:
+        self.identity = identity
+        self.scanned = 0
+        self.line_count = 0
+        self.level_counts: Dict[str, int] = {level: 0 for level in LEVELS}
+        self._times: List[str] = []
+        self._offsets: List[int] = []
+        self._next_checkpoint = 0
+
+    def refresh(self) -> "LogFileIndex":
+        """扫描上次之后追加的完整行；文件被截断或替换时重建"""
+        with self._lock:
+            stat = self.path.stat()
+            identity = (stat.st_dev, stat.st_ino)
+            if identity != self.identity or stat.st_size < self.scanned:
+                if self.identity is not None:
+                    logger.debug(f"🔄 [LogFileIndex] 文件已替换或截断，重建索引: {self.path.name}")
+                self._reset(identity)
+            if stat.st_size > self.scanned:
+                self._scan(stat.st_size)
+            return self
+
+    def _scan(self, size: int) -> None:
+        with open(self.path, "rb") as f:
+            f.seek(self.scanned)
+            offset = self.scanned
+            pending = b""
+            while offset + len(pending) < size:
+                chunk = f.read(min(_SCAN_CHUNK_SIZE, size - offset - len(pending)))
+                if not chunk:
+                    break
+                data = pending + chunk
+                cut = data.rfind(b"\n")
+                if cut < 0:
+                    pending = data
+                    continue
+                self._scan_lines(data[:cut + 1], offset)
+                offset += cut + 1
+                pending = data[cut + 1:]
+            # 末尾未写完的行留到下次扫描
+            self.scanned = offset
+
+    def _scan_lines(self, data: bytes, offset: int) -> None:
+        counts = self.level_counts
+        lines = data.split(b"\n")[:-1]
+        self.line_count += len(lines)
+        for raw in lines:
+            if b"ERROR" in raw:
+                counts["ERROR"] += 1
+            elif b"WARNING" in raw:
+                counts["WARNING"] += 1
+            elif b"INFO" in raw:
+                counts["INFO"] += 1
+            elif b"DEBUG" in raw:
+                counts["DEBUG"] += 1
+            if offset >= self._next_checkpoint:
+                match = TIMESTAMP_PATTERN.search(raw)
+                if match:
+                    timestamp = match.group().decode()
+                    # 只保留单调递增的检查点，保证二分查找有效
+                    if not self._times or timestamp >= self._times[-1]:
+                        self._times.append(timestamp)
+                        self._offsets.append(offset)
+                    self._next_checkpoint = offset + self.interval
+            offset += len(raw) + 1
+
+    def byte_range(self, start_time: Optional[str] = None, end_time: Optional[str] = None) -> Tuple[int, int]:
+        """
+        时间范围对应的字节区间（保守估计，区间内的行仍需逐行过滤）
+
+        Returns:
+            (起始偏移, 结束偏移)；结束偏移为已扫描的末尾或 end_time 之后的第一个检查点
+        """
+        start, end = 0, self.scanned
+        start_time = normalize_time(start_time)
+        end_time = normalize_time(end_time)
+        if start_time:
+            # 最后一个早于 start_time 的检查点
+            i = bisect_left(self._times, start_time) - 1
+            if i >= 0:
+                start = self._offsets[i]
+        if end_time:
+            # 第一个晚于 end_time 的检查点
+            i = bisect_right(self._times, end_time)
+            if i < len(self._offsets):
+                end = self._offsets[i]
+        return start, max(start, end)
+
+
+_indexes: "OrderedDict[Tuple[int, int], LogFileIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_log_index(path: Path) -> LogFileIndex:
+    """
+    获取（并增量刷新）日志文件索引
+
+    以 (设备, inode) 为键缓存：RotatingFileHandler 轮转时文件被改名，索引随之复用
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (stat.st_dev, stat.st_ino)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = LogFileIndex(path)
+            _indexes[key] = index
+            while len(_indexes) > _MAX_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            index.path = path
+            _indexes.move_to_end(key)
+    return index.refresh()
@@ -1,7 +1,7 @@
 """
 交易时间判断工具模块
 
-提供统一的交易时间判断逻辑，用于判断当前是否在A股交易时间内。
+提供统一的交易时间判断逻辑，用于判断当前是否在A股交易时间内（交易日由交易日历判断，排除节假日）。
 """
 
 from datetime import datetime, time as dtime
@@ -9,6 +9,7 @@ from typing import Optional
 from zoneinfo import ZoneInfo
 
 from app.core.config import settings
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 
 def is_trading_time(now: Optional[datetime] = None) -> bool:
@@ -34,8 +35,8 @@ def is_trading_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not get_trading_calendar("CN").is_trading_day(now.date()):
         return False
     
     t = now.time()
@@ -67,8 +68,8 @@ def is_strict_trading_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not get_trading_calendar("CN").is_trading_day(now.date()):
         return False
     
     t = now.time()
@@ -95,8 +96,8 @@ def is_pre_market_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not get_trading_calendar("CN").is_trading_day(now.date()):
         return False
     
     t = now.time()
@@ -119,8 +120,8 @@ def is_after_market_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not get_trading_calendar("CN").is_trading_day(now.date()):
         return False
     
     t = now.time()
@@ -149,8 +150,8 @@ def get_trading_status(now: Optional[datetime] = None) -> str:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 周末
-    if now.weekday() > 4:
+    # 周末 / 节假日
+    if not get_trading_calendar("CN").is_trading_day(now.date()):
         return "closed"
     
     t = now.time()
@@ -11,6 +11,7 @@ from app.core.database import get_mongo_db
 from app.services.historical_data_service import get_historical_data_service
 from app.services.news_data_service import get_news_data_service
 from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -647,19 +648,26 @@ class AKShareSyncService:
 
         for symbol in batch:
             try:
-                # 确定该股票的起始日期
+                # 确定该股票的起始/截止日期
                 symbol_start_date = start_date
+                symbol_end_date = end_date
                 if not symbol_start_date:
                     if incremental:
                         # 增量同步：获取该股票的最后日期
                         symbol_start_date = await self._get_last_sync_date(symbol)
+                        # 按交易日历收缩区间：没有新的已收盘交易日（周末/节假日/盘中）时不调用接口
+                        planned = get_trading_calendar("CN").plan_sync_range(symbol_start_date, end_date)
+                        if planned is None:
+                            logger.debug(f"⏭️ {symbol}: {symbol_start_date} 之后没有新的交易日，跳过")
+                            continue
+                        symbol_start_date, symbol_end_date = planned
                         logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
                     else:
                         # 全量同步：最近1年
                         symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
 
                 # 获取历史数据
-                hist_data = await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period)
+                hist_data = await self.provider.get_historical_data(symbol, symbol_start_date, symbol_end_date, period)
 
                 if hist_data is not None and not hist_data.empty:
                     # 保存到统一历史数据集合
@@ -13,6 +13,7 @@ from app.core.config import get_settings
 from app.core.database import get_database
 from app.services.historical_data_service import get_historical_data_service
 from tradingagents.dataflows.providers.china.baostock import BaoStockProvider
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -423,10 +424,17 @@ class BaoStockSyncService:
 
         for code in code_batch:
             try:
-                # 确定该股票的起始日期
+                # 确定该股票的起始/截止日期
+                code_end_date = end_date
                 if incremental:
                     # 增量同步：获取该股票的最后日期
                     start_date = await self._get_last_sync_date(code)
+                    # 按交易日历收缩区间：没有新的已收盘交易日（周末/节假日/盘中）时不调用接口
+                    planned = get_trading_calendar("CN").plan_sync_range(start_date, end_date)
+                    if planned is None:
+                        logger.debug(f"⏭️ {code}: {start_date} 之后没有新的交易日，跳过")
+                        continue
+                    start_date, code_end_date = planned
                     logger.debug(f"📅 {code}: 从 {start_date} 开始同步")
                 elif days >= 3650:
                     # 全历史同步
@@ -435,7 +443,7 @@ class BaoStockSyncService:
                     # 固定天数同步
                     start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
 
-                hist_data = await self.provider.get_historical_data(code, start_date, end_date, period)
+                hist_data = await self.provider.get_historical_data(code, start_date, code_end_date, period)
 
                 if hist_data is not None and not hist_data.empty:
                     # 更新数据库
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+港股/美股同步引擎
+
+HKSyncService / USSyncService 共用的批量工具：
+1. run_bounded: 在专用线程池中有界并发执行同步的数据源调用（yfinance/AKShare），每次调用前经过速率限制器
+2. download_latest_quotes: yfinance 批量下载（一次请求多只股票）并提取最新行情
+3. bulk_upsert: 分块无序 bulk_write
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# 同步数据源调用专用线程池，避免占满默认线程池
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FOREIGN_SYNC_CONCURRENCY,
+            thread_name_prefix="foreign-sync",
+        )
+    return _executor
+
+
+async def run_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    rate_limiter: Optional[RateLimiter] = None,
+    concurrency: Optional[int] = None,
+) -> List[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    有界并发执行同步函数
+
+    Args:
+        func: 同步函数（在线程池中执行），参数为单个 item
+        items: 待处理项
+        rate_limiter: 每次调用前获取许可
+        concurrency: 并发数（默认 FOREIGN_SYNC_CONCURRENCY）
+
+    Returns:
+        与 items 顺序一致的 [(item, 结果, 异常)]，单项失败不影响其他项
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency or settings.FOREIGN_SYNC_CONCURRENCY)
+    executor = _get_executor()
+
+    async def _call(item):
+        async with semaphore:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            try:
+                return item, await loop.run_in_executor(executor, func, item), None
+            except Exception as e:
+                return item, None, e
+
+    return await asyncio.gather(*(_call(item) for item in items))
+
+
+def _latest_quote(frame: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """从单只股票的日线中取最新一根K线，昨收取前一根收盘价"""
+    frame = frame.dropna(subset=["Close"])
+    if frame.empty:
+        return None
+    latest = frame.iloc[-1]
+    quote = {
+        "close": float(latest["Close"]),
+        "open": float(latest["Open"]) if pd.notna(latest.get("Open")) else None,
+        "high": float(latest["High"]) if pd.notna(latest.get("High")) else None,
+        "low": float(latest["Low"]) if pd.notna(latest.get("Low")) else None,
+        "volume": int(latest["Volume"]) if pd.notna(latest.get("Volume")) else 0,
+        "trade_date": pd.Timestamp(frame.index[-1]).strftime("%Y-%m-%d"),
+    }
+    if len(frame) > 1:
+        quote["pre_close"] = float(frame["Close"].iloc[-2])
+    return quote
+
+
+def parse_download(data: Optional[pd.DataFrame], tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """解析 yf.download(group_by='ticker') 的结果为 {ticker: 最新行情}"""
+    quotes: Dict[str, Dict[str, Any]] = {}
+    if data is None or data.empty:
+        return quotes
+    if not isinstance(data.columns, pd.MultiIndex):
+        # 单只股票时部分版本返回单层列
+        data = pd.concat({tickers[0]: data}, axis=1)
+    available = set(data.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        quote = _latest_quote(data[ticker])
+        if quote:
+            quotes[ticker] = quote
+    return quotes
+
+
+async def download_latest_quotes(
+    tickers: List[str],
+    rate_limiter: Optional[RateLimiter] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    yfinance 批量下载最新行情（每批 batch_size 只股票，每批计一次限流）
+
+    Returns:
+        {ticker: {close, open, high, low, volume, trade_date, pre_close}}
+    """
+    import yfinance as yf
+
+    batch_size = batch_size or settings.FOREIGN_SYNC_YF_BATCH_SIZE
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+    def _download(batch: List[str]) -> Dict[str, Dict[str, Any]]:
+        data = yf.download(
+            tickers=batch,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+        )
+        return parse_download(data, batch)
+
+    quotes: Dict[str, Dict[str, Any]] = {}
+    # yf.download 使用模块级共享状态，批次之间不能并发；批次内由 yfinance 自身多线程下载
+    for batch, result, error in await run_bounded(_download, batches, rate_limiter, concurrency=1):
+        if error is not None:
+            logger.warning(f"⚠️ yfinance 批量下载失败 ({batch[0]} 等{len(batch)}只): {error}")
+            continue
+        quotes.update(result)
+    logger.info(f"📊 yfinance 批量行情: {len(quotes)}/{len(tickers)} 只, {len(batches)} 次请求")
+    return quotes
+
+
+def build_quote_doc(code: str, quote: Dict[str, Any], currency: str) -> Dict[str, Any]:
+    """标准化行情文档；有昨收时按昨收计算涨跌幅，否则沿用按开盘价计算的口径"""
+    doc = {
+        "code": code,
+        "close": quote["close"],
+        "open": quote.get("open") or 0.0,
+        "high": quote.get("high") or 0.0,
+        "low": quote.get("low") or 0.0,
+        "volume": quote.get("volume") or 0,
+        "currency": currency,
+        "updated_at": datetime.now(),
+    }
+    if quote.get("trade_date"):
+        doc["trade_date"] = quote["trade_date"]
+    base = quote.get("pre_close") or doc["open"]
+    if quote.get("pre_close"):
+        doc["pre_close"] = quote["pre_close"]
+    if base and base > 0:
+        doc["pct_chg"] = round((doc["close"] - base) / base * 100, 2)
+    return doc
+
+
+async def bulk_upsert(collection, operations: List[Any], chunk_size: int = 1000) -> Dict[str, int]:
+    """分块执行无序 bulk_write，返回 {updated, inserted, failed}"""
+    result = {"updated": 0, "inserted": 0, "failed": 0}
+    for i in range(0, len(operations), chunk_size):
+        chunk = operations[i:i + chunk_size]
+        try:
+            bulk_result = await collection.bulk_write(chunk, ordered=False)
+            result["updated"] += bulk_result.modified_count
+            result["inserted"] += bulk_result.upserted_count
+        except Exception as e:
+            logger.error(f"❌ 批量写入失败: {e}")
+            result["failed"] += len(chunk)
+    return result
@@ -27,16 +27,20 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+import pandas as pd
+
 from tradingagents.dataflows.providers.hk.hk_stock import HKStockProvider
 from tradingagents.dataflows.providers.hk.improved_hk import ImprovedHKStockProvider
 from app.core.database import get_mongo_db
 from app.core.config import settings
+from app.core.rate_limiter import get_akshare_rate_limiter, get_yfinance_rate_limiter
+from app.worker.foreign_sync_engine import build_quote_doc, bulk_upsert, download_latest_quotes, run_bounded
 
 logger = logging.getLogger(__name__)
 
 
-class HKDataService:
-    """港股数据服务（按需获取+缓存模式）"""
+class HKSyncService:
+    """港股数据同步服务（支持多数据源）"""
 
     def __init__(self):
         self.db = get_mongo_db()
@@ -168,7 +172,7 @@ class HKDataService:
             logger.info("🔄 强制刷新港股列表")
 
         # 获取港股列表（从 AKShare 或缓存）
-        stock_list = self._get_hk_stock_list_from_akshare()
+        stock_list = await asyncio.to_thread(self._get_hk_stock_list_from_akshare)
 
         if not stock_list:
             logger.error("❌ 无法获取港股列表")
@@ -180,57 +184,78 @@ class HKDataService:
         operations = []
         failed_count = 0
 
-        for stock_code in stock_list:
-            try:
-                # 从数据源获取数据
-                stock_info = provider.get_stock_info(stock_code)
+        # yfinance 基础信息只能逐只获取：线程池有界并发 + 速率限制
+        results = await run_bounded(
+            self._fetch_yfinance_info, stock_list, rate_limiter=get_yfinance_rate_limiter()
+        )
+        for stock_code, stock_info, error in results:
+            if error is not None:
+                logger.error(f"❌ 同步失败: {stock_code} from {source}: {error}")
+                failed_count += 1
+                continue
 
-                if not stock_info or not stock_info.get('name'):
-                    logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
-                    failed_count += 1
-                    continue
+            if not stock_info or not stock_info.get('name'):
+                logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
+                failed_count += 1
+                continue
+
+            # 标准化数据格式
+            normalized_info = self._normalize_stock_info(stock_info, source)
+            normalized_info["code"] = stock_code.lstrip('0').zfill(5)  # 标准化为5位代码
+            normalized_info["source"] = source
+            normalized_info["updated_at"] = datetime.now()
+
+            # 批量更新操作
+            operations.append(
+                UpdateOne(
+                    {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
+                    {"$set": normalized_info},
+                    upsert=True
+                )
+            )
 
-                # 标准化数据格式
-                normalized_info = self._normalize_stock_info(stock_info, source)
-                normalized_info["code"] = stock_code.lstrip('0').zfill(5)  # 标准化为5位代码
-                normalized_info["source"] = source
-                normalized_info["updated_at"] = datetime.now()
+        # 执行批量操作
+        result = await bulk_upsert(self.db.stock_basic_info_hk, operations)
+        result["failed"] += failed_count
 
-                # 批量更新操作
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
-                        {"$set": normalized_info},
-                        upsert=True
-                    )
-                )
+        logger.info(
+            f"✅ 港股基础信息同步完成 ({source}): "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
 
-                logger.debug(f"✅ 准备同步: {stock_code} ({stock_info.get('name')}) from {source}")
+        return result
 
-            except Exception as e:
-                logger.error(f"❌ 同步失败: {stock_code} from {source}: {e}")
-                failed_count += 1
+    def _fetch_yfinance_info(self, stock_code: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单只港股的 yfinance 基础信息（在线程池中执行）
 
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-
-        if operations:
-            try:
-                bulk_result = await self.db.stock_basic_info_hk.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-
-                logger.info(
-                    f"✅ 港股基础信息同步完成 ({source}): "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
+        直接调用 yfinance：HKStockProvider.get_stock_info 内部按实例串行休眠限流，
+        并发时由同步引擎的速率限制器统一控制；无效代码返回 None 而不是占位名称
+        """
+        import yfinance as yf
+
+        symbol = self.providers["yfinance"]._normalize_hk_symbol(stock_code)
+        info = yf.Ticker(symbol).info
+        if not info or 'symbol' not in info:
+            return None
+        return {
+            'symbol': symbol,
+            'name': info.get('longName', info.get('shortName')),
+            'currency': info.get('currency', 'HKD'),
+            'exchange': info.get('exchange', 'HKG'),
+            'market_cap': info.get('marketCap'),
+            'sector': info.get('sector'),
+            'industry': info.get('industry'),
+        }
 
-        return result
+    async def _fetch_hk_spot(self):
+        """获取全部港股实时行情（新浪接口，一次调用）"""
+        import akshare as ak
+
+        await get_akshare_rate_limiter().acquire()
+        return await asyncio.to_thread(ak.stock_hk_spot)
 
     async def _sync_basic_info_from_akshare_batch(self, force_update: bool = False) -> Dict[str, int]:
         """
@@ -243,14 +268,11 @@ class HKDataService:
             Dict: 同步统计信息 {updated: int, inserted: int, failed: int}
         """
         try:
-            import akshare as ak
-            from datetime import datetime
-
             logger.info("🇭🇰 开始批量同步港股基础信息 (数据源: akshare)")
 
             # 获取所有港股实时行情（包含代码、名称等基础信息）
             # 使用新浪财经接口（更稳定）
-            df = ak.stock_hk_spot()
+            df = await self._fetch_hk_spot()
 
             if df is None or df.empty:
                 logger.error("❌ AKShare 返回空数据")
@@ -258,80 +280,66 @@ class HKDataService:
 
             logger.info(f"📊 获取到 {len(df)} 只港股数据")
 
+            # 向量化提取代码和名称（新浪接口的列名是 '中文名称'）
+            codes = df['代码'].fillna('').astype(str).str.strip()
+            names = df.get('中文名称', pd.Series('', index=df.index)).fillna('').astype(str).str.strip()
+            valid = (codes != '') & (names != '')
+            failed_count = int((~valid).sum())
+
+            # 标准化代码格式（确保是5位数字）
+            normalized_codes = codes.str.lstrip('0').str.zfill(5)
+
+            # 可选字段：行情数据中的其他信息（空值和0不写入）
+            optional = pd.DataFrame(index=df.index)
+            for column, field, scale in (
+                ('最新价', 'latest_price', 1),
+                ('涨跌幅', 'change_percent', 1),
+                ('总市值', 'total_mv', 1e8),  # 转换为亿港币
+                ('市盈率', 'pe', 1),
+            ):
+                if column in df.columns:
+                    optional[field] = pd.to_numeric(df[column], errors='coerce') / scale
+
+            now = datetime.now()
             operations = []
-            failed_count = 0
-
-            for _, row in df.iterrows():
-                try:
-                    # 提取股票代码和名称
-                    stock_code = str(row.get('代码', '')).strip()
-                    # 新浪接口的列名是 '中文名称'
-                    stock_name = str(row.get('中文名称', '')).strip()
-
-                    if not stock_code or not stock_name:
-                        failed_count += 1
-                        continue
-
-                    # 标准化代码格式（确保是5位数字）
-                    normalized_code = stock_code.lstrip('0').zfill(5)
-
-                    # 构建基础信息
-                    stock_info = {
-                        "code": normalized_code,
-                        "name": stock_name,
-                        "currency": "HKD",
-                        "exchange": "HKG",
-                        "market": "香港交易所",
-                        "area": "香港",
-                        "source": "akshare",
-                        "updated_at": datetime.now()
-                    }
-
-                    # 可选字段：提取行情数据中的其他信息
-                    if '最新价' in row and row['最新价']:
-                        stock_info["latest_price"] = float(row['最新价'])
-
-                    if '涨跌幅' in row and row['涨跌幅']:
-                        stock_info["change_percent"] = float(row['涨跌幅'])
-
-                    if '总市值' in row and row['总市值']:
-                        # 转换为亿港币
-                        stock_info["total_mv"] = float(row['总市值']) / 100000000
-
-                    if '市盈率' in row and row['市盈率']:
-                        stock_info["pe"] = float(row['市盈率'])
-
-                    # 批量更新操作
-                    operations.append(
-                        UpdateOne(
-                            {"code": normalized_code, "source": "akshare"},
-                            {"$set": stock_info},
-                            upsert=True
-                        )
+            for idx in df.index[valid]:
+                stock_info = {
+                    "code": normalized_codes[idx],
+                    "name": names[idx],
+                    "currency": "HKD",
+                    "exchange": "HKG",
+                    "market": "香港交易所",
+                    "area": "香港",
+                    "source": "akshare",
+                    "updated_at": now
+                }
+                for field, value in optional.loc[idx].items():
+                    if pd.notna(value) and value:
+                        stock_info[field] = float(value)
+
+                # 批量更新操作
+                operations.append(
+                    UpdateOne(
+                        {"code": stock_info["code"], "source": "akshare"},
+                        {"$set": stock_info},
+                        upsert=True
                     )
+                )
 
-                except Exception as e:
-                    logger.debug(f"⚠️ 处理股票数据失败: {stock_code}: {e}")
-                    failed_count += 1
+            # 顺便刷新港股列表缓存，供 yfinance 同步和行情同步复用
+            self.hk_stock_list = normalized_codes[valid].tolist()
+            self._stock_list_cache_time = now
 
             # 执行批量操作
-            result = {"updated": 0, "inserted": 0, "failed": failed_count}
-
-            if operations:
-                try:
-                    bulk_result = await self.db.stock_basic_info_hk.bulk_write(operations)
-                    result["updated"] = bulk_result.modified_count
-                    result["inserted"] = bulk_result.upserted_count
-
-                    logger.info(
-                        f"✅ 港股基础信息批量同步完成 (akshare): "
-                        f"更新 {result['updated']} 条, "
-                        f"插入 {result['inserted']} 条, "
-                        f"失败 {result['failed']} 条"
-                    )
-                except Exception as e:
-                    logger.error(f"❌ 批量写入失败: {e}")
-                    result["failed"] += len(operations)
+            result = await bulk_upsert(self.db.stock_basic_info_hk, operations)
+            result["failed"] += failed_count
+
+            logger.info(
+                f"✅ 港股基础信息批量同步完成 (akshare): "
+                f"更新 {result['updated']} 条, "
+                f"插入 {result['inserted']} 条, "
+                f"失败 {result['failed']} 条"
+            )
 
             return result
 
@@ -393,71 +401,65 @@ class HKDataService:
         
         logger.info(f"🇭🇰 开始同步港股实时行情 (数据源: {source})")
         
-        operations = []
-        failed_count = 0
+        if source == "akshare":
+            quotes = await self._quotes_from_spot()
+            stock_count = len(quotes)
+        else:
+            stock_list = await asyncio.to_thread(self._get_hk_stock_list_from_akshare)
+            stock_count = len(stock_list)
+            # yfinance 批量下载：每次请求多只股票
+            tickers = {provider._normalize_hk_symbol(code): code for code in stock_list}
+            downloaded = await download_latest_quotes(list(tickers), rate_limiter=get_yfinance_rate_limiter())
+            quotes = {tickers[ticker]: quote for ticker, quote in downloaded.items()}
         
-        for stock_code in self.hk_stock_list:
-            try:
-                # 获取实时价格
-                quote = provider.get_real_time_price(stock_code)
-                
-                if not quote or not quote.get('price'):
-                    logger.warning(f"⚠️ 跳过无效行情: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                # 标准化行情数据
-                normalized_quote = {
-                    "code": stock_code.lstrip('0').zfill(5),
-                    "close": float(quote.get('price', 0)),
-                    "open": float(quote.get('open', 0)),
-                    "high": float(quote.get('high', 0)),
-                    "low": float(quote.get('low', 0)),
-                    "volume": int(quote.get('volume', 0)),
-                    "currency": "HKD",
-                    "updated_at": datetime.now()
-                }
-                
-                # 计算涨跌幅
-                if normalized_quote["open"] > 0:
-                    pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
-                    normalized_quote["pct_chg"] = round(pct_chg, 2)
-                
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_quote["code"]},
-                        {"$set": normalized_quote},
-                        upsert=True
-                    )
+        operations = []
+        for stock_code, quote in quotes.items():
+            if not quote.get('close'):
+                continue
+            # 标准化行情数据
+            normalized_quote = build_quote_doc(stock_code.lstrip('0').zfill(5), quote, "HKD")
+            operations.append(
+                UpdateOne(
+                    {"code": normalized_quote["code"]},
+                    {"$set": normalized_quote},
+                    upsert=True
                 )
-                
-                logger.debug(f"✅ 准备同步行情: {stock_code} (价格: {normalized_quote['close']} HKD)")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步行情失败: {stock_code}: {e}")
-                failed_count += 1
+            )
         
         # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
+        result = await bulk_upsert(self.db.market_quotes_hk, operations)
+        result["failed"] += stock_count - len(operations)
         
-        if operations:
-            try:
-                bulk_result = await self.db.market_quotes_hk.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 港股行情同步完成: "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
+        logger.info(
+            f"✅ 港股行情同步完成: "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         
         return result
 
+    async def _quotes_from_spot(self) -> Dict[str, Dict[str, Any]]:
+        """从 AKShare 全市场快照中提取行情（一次调用覆盖全部港股）"""
+        df = await self._fetch_hk_spot()
+        if df is None or df.empty:
+            return {}
+        
+        columns = {'close': '最新价', 'open': '今开', 'high': '最高', 'low': '最低', 'volume': '成交量', 'pre_close': '昨收'}
+        values = pd.DataFrame({
+            field: pd.to_numeric(df[column], errors='coerce') if column in df.columns else float('nan')
+            for field, column in columns.items()
+        })
+        values['volume'] = values['volume'].fillna(0)
+        values['code'] = df['代码'].fillna('').astype(str).str.strip()
+        values = values[(values['code'] != '') & values['close'].notna()]
+        
+        quotes = {}
+        for record in values.to_dict('records'):
+            code = record.pop('code')
+            quotes[code] = {k: v for k, v in record.items() if pd.notna(v)}
+        return quotes
+
 
 # ==================== 全局服务实例 ====================
 
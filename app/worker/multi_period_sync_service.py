@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 多周期历史数据同步服务
-支持日线、周线、月线数据的统一同步
+支持日线、周线、月线数据的统一同步：每只股票只请求一次日线，周线/月线由日线本地聚合
 """
 import asyncio
 import logging
@@ -9,10 +9,17 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from app.core.config import settings
+from app.core.rate_limiter import (
+    get_akshare_rate_limiter,
+    get_baostock_rate_limiter,
+    get_tushare_rate_limiter,
+)
 from app.services.historical_data_service import get_historical_data_service
 from app.worker.tushare_sync_service import TushareSyncService
 from app.worker.akshare_sync_service import AKShareSyncService
 from app.worker.baostock_sync_service import BaoStockSyncService
+from tradingagents.dataflows.bar_resample import PERIOD_FREQ, period_start, resample_bars
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +48,8 @@ class MultiPeriodSyncService:
         self.tushare_service = None
         self.akshare_service = None
         self.baostock_service = None
+        # 每个数据源同时同步的股票数
+        self.concurrency = settings.MULTI_PERIOD_SYNC_CONCURRENCY
         
     async def initialize(self):
         """初始化服务"""
@@ -107,27 +116,24 @@ class MultiPeriodSyncService:
                    f"时间范围: {start_date or '默认'} 到 {end_date or '今天'}")
         
         try:
-            # 按数据源和周期组合同步
+            # 每个数据源一次流水线：日线只请求一次，周线/月线本地聚合
             for data_source in data_sources:
-                for period in periods:
-                    period_stats = await self._sync_period_data(
-                        data_source, period, symbols, start_date, end_date
-                    )
-                    
-                    # 累计统计
-                    if period == "daily":
-                        stats.daily_records += period_stats.get("records", 0)
-                    elif period == "weekly":
-                        stats.weekly_records += period_stats.get("records", 0)
-                    elif period == "monthly":
-                        stats.monthly_records += period_stats.get("records", 0)
-                    
-                    stats.success_count += period_stats.get("success", 0)
-                    stats.error_count += period_stats.get("errors", 0)
-                    
-                    # 进度日志
-                    logger.info(f"📊 {data_source}-{period}同步完成: "
-                               f"{period_stats.get('records', 0)}条记录")
+                source_stats = await self._sync_source_data(
+                    data_source, periods, symbols, start_date, end_date
+                )
+                
+                # 累计统计
+                stats.daily_records += source_stats.get("daily", 0)
+                stats.weekly_records += source_stats.get("weekly", 0)
+                stats.monthly_records += source_stats.get("monthly", 0)
+                stats.success_count += source_stats.get("success", 0)
+                stats.error_count += source_stats.get("errors", 0)
+                
+                # 进度日志
+                logger.info(f"📊 {data_source}同步完成: "
+                           f"日线{source_stats.get('daily', 0)}, 周线{source_stats.get('weekly', 0)}, "
+                           f"月线{source_stats.get('monthly', 0)}条记录, "
+                           f"数据源调用{source_stats.get('provider_calls', 0)}次")
             
             logger.info(f"✅ 多周期数据同步完成: "
                        f"日线{stats.daily_records}, 周线{stats.weekly_records}, "
@@ -140,105 +146,113 @@ class MultiPeriodSyncService:
             stats.errors.append(str(e))
             return stats
     
-    async def _sync_period_data(
+    def _get_source(self, data_source: str):
+        """数据源对应的 (同步服务, 速率限制器, 并发数)"""
+        if data_source == "tushare":
+            # 优先使用同步服务按积分等级配置的限制器（同一单例）
+            rate_limiter = getattr(self.tushare_service, "rate_limiter", None) or get_tushare_rate_limiter()
+            return self.tushare_service, rate_limiter, self.concurrency
+        if data_source == "akshare":
+            return self.akshare_service, get_akshare_rate_limiter(), self.concurrency
+        if data_source == "baostock":
+            # BaoStock 客户端共用一个全局会话，不支持并发请求
+            return self.baostock_service, get_baostock_rate_limiter(), 1
+        return None, None, 0
+    
+    async def _sync_source_data(
         self,
         data_source: str,
-        period: str,
+        periods: List[str],
         symbols: List[str],
         start_date: str = None,
         end_date: str = None
     ) -> Dict[str, Any]:
-        """同步特定周期的数据"""
-        stats = {"records": 0, "success": 0, "errors": 0}
+        """
+        同步单个数据源的多周期数据
+
+        并发的股票 worker 共用该数据源的速率限制器；每只股票只请求一次日线
+        """
+        stats = {"daily": 0, "weekly": 0, "monthly": 0, "success": 0, "errors": 0, "provider_calls": 0}
         
-        try:
-            logger.info(f"📈 开始同步{data_source}-{period}数据: {len(symbols)}只股票")
-            
-            # 选择对应的服务
-            if data_source == "tushare":
-                service = self.tushare_service
-            elif data_source == "akshare":
-                service = self.akshare_service
-            elif data_source == "baostock":
-                service = self.baostock_service
-            else:
-                logger.error(f"❌ 不支持的数据源: {data_source}")
-                return stats
-            
-            # 批量处理
-            batch_size = 50
-            for i in range(0, len(symbols), batch_size):
-                batch = symbols[i:i + batch_size]
-                batch_stats = await self._sync_batch_period_data(
-                    service, data_source, period, batch, start_date, end_date
-                )
-                
-                stats["records"] += batch_stats["records"]
-                stats["success"] += batch_stats["success"]
-                stats["errors"] += batch_stats["errors"]
-                
-                # 进度日志
-                progress = min(i + batch_size, len(symbols))
-                logger.info(f"📊 {data_source}-{period}进度: {progress}/{len(symbols)}")
-                
-                # API限流
-                await asyncio.sleep(0.5)
-            
-            return stats
-            
-        except Exception as e:
-            logger.error(f"❌ {data_source}-{period}同步失败: {e}")
-            stats["errors"] += 1
+        service, rate_limiter, concurrency = self._get_source(data_source)
+        if service is None:
+            logger.error(f"❌ 不支持的数据源: {data_source}")
             return stats
+        
+        # 周/月线需要完整的首个周期，起始日期向前对齐
+        fetch_start = period_start(start_date, periods)
+        logger.info(f"📈 开始同步{data_source}数据: {len(symbols)}只股票, 周期{periods}, 并发{concurrency}")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        done = 0
+        
+        async def _worker(symbol: str):
+            nonlocal done
+            async with semaphore:
+                symbol_stats = await self._sync_symbol_periods(
+                    service, rate_limiter, data_source, symbol, periods, fetch_start, end_date
+                )
+            for key, value in symbol_stats.items():
+                stats[key] += value
+            done += 1
+            if done % 50 == 0 or done == len(symbols):
+                logger.info(f"📊 {data_source}进度: {done}/{len(symbols)}")
+        
+        await asyncio.gather(*(_worker(symbol) for symbol in symbols))
+        return stats
     
-    async def _sync_batch_period_data(
+    async def _sync_symbol_periods(
         self,
         service,
+        rate_limiter,
         data_source: str,
-        period: str,
-        symbols: List[str],
+        symbol: str,
+        periods: List[str],
         start_date: str = None,
         end_date: str = None
-    ) -> Dict[str, Any]:
-        """同步批次周期数据"""
-        stats = {"records": 0, "success": 0, "errors": 0}
+    ) -> Dict[str, int]:
+        """获取一只股票的日线，聚合出周线/月线后分别保存"""
+        stats = {"daily": 0, "weekly": 0, "monthly": 0, "success": 0, "errors": 0, "provider_calls": 0}
         
-        for symbol in symbols:
-            try:
-                # 获取历史数据
-                if data_source == "tushare":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
-                elif data_source == "akshare":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
-                elif data_source == "baostock":
-                    hist_data = await service.provider.get_historical_data(
-                        symbol, start_date, end_date, period
-                    )
+        try:
+            await rate_limiter.acquire()
+            stats["provider_calls"] += 1
+            daily_data = await service.provider.get_historical_data(
+                symbol, start_date, end_date, "daily"
+            )
+            
+            if daily_data is None or daily_data.empty:
+                stats["errors"] += 1
+                return stats
+            
+            # 先聚合再保存：保存时会就地做单位转换
+            frames = {}
+            for period in periods:
+                if period == "daily":
+                    frames[period] = daily_data.copy()
+                elif period in PERIOD_FREQ:
+                    frames[period] = resample_bars(daily_data, period)
                 else:
+                    logger.warning(f"⚠️ 不支持的周期: {period}")
+            
+            for period, data in frames.items():
+                if data is None or data.empty:
                     continue
-                
-                if hist_data is not None and not hist_data.empty:
-                    # 保存到数据库
-                    saved_count = await self.historical_service.save_historical_data(
-                        symbol=symbol,
-                        data=hist_data,
-                        data_source=data_source,
-                        market="CN",
-                        period=period
-                    )
-                    
-                    stats["records"] += saved_count
-                    stats["success"] += 1
-                else:
-                    stats["errors"] += 1
-                    
-            except Exception as e:
-                logger.error(f"❌ {symbol}-{period}同步失败: {e}")
-                stats["errors"] += 1
+                # 保存到数据库
+                saved_count = await self.historical_service.save_historical_data(
+                    symbol=symbol,
+                    data=data,
+                    data_source=data_source,
+                    market="CN",
+                    period=period
+                )
+                stats[period] += saved_count
+            
+            stats["success"] += 1
+            
+        except Exception as e:
+            logger.error(f"❌ {symbol}多周期同步失败: {e}")
+            stats["errors"] += 1
         
         return stats
     
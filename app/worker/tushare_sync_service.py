@@ -15,6 +15,7 @@ from app.core.database import get_mongo_db
 from app.core.config import settings
 from app.core.rate_limiter import get_tushare_rate_limiter
 from app.utils.timezone import now_tz
+from tradingagents.utils.trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -573,6 +574,7 @@ class TushareSyncService:
             "success_count": 0,
             "error_count": 0,
             "total_records": 0,
+            "skipped_count": 0,
             "start_time": datetime.utcnow(),
             "errors": []
         }
@@ -639,14 +641,22 @@ class TushareSyncService:
                     # 速率限制
                     await self.rate_limiter.acquire()
 
-                    # 确定该股票的起始日期
+                    # 确定该股票的起始/截止日期
                     symbol_start_date = start_date
+                    symbol_end_date = end_date
                     if not symbol_start_date:
                         if all_history:
                             symbol_start_date = "1990-01-01"
                         elif incremental:
                             # 增量同步：获取该股票的最后日期
                             symbol_start_date = await self._get_last_sync_date(symbol)
+                            # 按交易日历收缩区间：没有新的已收盘交易日（周末/节假日/盘中）时不调用接口
+                            planned = get_trading_calendar("CN").plan_sync_range(symbol_start_date, end_date)
+                            if planned is None:
+                                logger.debug(f"⏭️ {symbol}: {symbol_start_date} 之后没有新的交易日，跳过")
+                                stats["skipped_count"] += 1
+                                continue
+                            symbol_start_date, symbol_end_date = planned
                             logger.debug(f"📅 {symbol}: 从 {symbol_start_date} 开始同步")
                         else:
                             symbol_start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
@@ -659,7 +669,7 @@ class TushareSyncService:
 
                     # ⏱️ 性能监控：API 调用
                     api_start = datetime.now()
-                    df = await self.provider.get_historical_data(symbol, symbol_start_date, end_date, period=period)
+                    df = await self.provider.get_historical_data(symbol, symbol_start_date, symbol_end_date, period=period)
                     api_duration = (datetime.now() - api_start).total_seconds()
 
                     if df is not None and not df.empty:
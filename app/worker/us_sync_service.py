@@ -29,6 +29,8 @@ sys.path.insert(0, str(project_root))
 from tradingagents.dataflows.providers.us.yfinance import YFinanceUtils
 from app.core.database import get_mongo_db
 from app.core.config import settings
+from app.core.rate_limiter import get_yfinance_rate_limiter
+from app.worker.foreign_sync_engine import build_quote_doc, bulk_upsert, download_latest_quotes, run_bounded
 
 logger = logging.getLogger(__name__)
 
@@ -195,7 +197,7 @@ class USSyncService:
             logger.info("🔄 强制刷新美股列表")
 
         # 获取美股列表（从 Finnhub 或缓存）
-        stock_list = self._get_us_stock_list_from_finnhub()
+        stock_list = await asyncio.to_thread(self._get_us_stock_list_from_finnhub)
 
         if not stock_list:
             logger.error("❌ 无法获取美股列表")
@@ -207,56 +209,48 @@ class USSyncService:
         operations = []
         failed_count = 0
 
-        for stock_code in stock_list:
-            try:
-                # 从 yfinance 获取数据
-                stock_info = self.yfinance_provider.get_stock_info(stock_code)
-                
-                if not stock_info or not stock_info.get('shortName'):
-                    logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                # 标准化数据格式
-                normalized_info = self._normalize_stock_info(stock_info, source)
-                normalized_info["code"] = stock_code.upper()
-                normalized_info["source"] = source
-                normalized_info["updated_at"] = datetime.now()
-                
-                # 批量更新操作
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
-                        {"$set": normalized_info},
-                        upsert=True
-                    )
-                )
-                
-                logger.debug(f"✅ 准备同步: {stock_code} ({stock_info.get('shortName')}) from {source}")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步失败: {stock_code} from {source}: {e}")
+        # 从 yfinance 获取数据：线程池有界并发 + 速率限制
+        # 通过类调用：init_ticker 装饰后的方法第一个参数即股票代码
+        results = await run_bounded(
+            YFinanceUtils.get_stock_info, stock_list, rate_limiter=get_yfinance_rate_limiter()
+        )
+        for stock_code, stock_info, error in results:
+            if error is not None:
+                logger.error(f"❌ 同步失败: {stock_code} from {source}: {error}")
                 failed_count += 1
-        
-        # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
-        
-        if operations:
-            try:
-                bulk_result = await self.db.stock_basic_info_us.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 美股基础信息同步完成 ({source}): "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
+                continue
+
+            if not stock_info or not stock_info.get('shortName'):
+                logger.warning(f"⚠️ 跳过无效数据: {stock_code}")
+                failed_count += 1
+                continue
+
+            # 标准化数据格式
+            normalized_info = self._normalize_stock_info(stock_info, source)
+            normalized_info["code"] = stock_code.upper()
+            normalized_info["source"] = source
+            normalized_info["updated_at"] = datetime.now()
+
+            # 批量更新操作
+            operations.append(
+                UpdateOne(
+                    {"code": normalized_info["code"], "source": source},  # 🔥 联合查询条件
+                    {"$set": normalized_info},
+                    upsert=True
                 )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
-        
+            )
+
+        # 执行批量操作
+        result = await bulk_upsert(self.db.stock_basic_info_us, operations)
+        result["failed"] += failed_count
+
+        logger.info(
+            f"✅ 美股基础信息同步完成 ({source}): "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
+
         return result
     
     def _normalize_stock_info(self, stock_info: Dict, source: str) -> Dict:
@@ -312,72 +306,34 @@ class USSyncService:
         
         logger.info(f"🇺🇸 开始同步美股实时行情 (数据源: {source})")
         
-        operations = []
-        failed_count = 0
+        stock_list = await asyncio.to_thread(self._get_us_stock_list_from_finnhub)
         
-        for stock_code in self.us_stock_list:
-            try:
-                # 获取最近1天的数据作为实时行情
-                import yfinance as yf
-                ticker = yf.Ticker(stock_code)
-                data = ticker.history(period="1d")
-                
-                if data.empty:
-                    logger.warning(f"⚠️ 跳过无效行情: {stock_code}")
-                    failed_count += 1
-                    continue
-                
-                latest = data.iloc[-1]
-                
-                # 标准化行情数据
-                normalized_quote = {
-                    "code": stock_code.upper(),
-                    "close": float(latest['Close']),
-                    "open": float(latest['Open']),
-                    "high": float(latest['High']),
-                    "low": float(latest['Low']),
-                    "volume": int(latest['Volume']),
-                    "currency": "USD",
-                    "updated_at": datetime.now()
-                }
-                
-                # 计算涨跌幅
-                if normalized_quote["open"] > 0:
-                    pct_chg = ((normalized_quote["close"] - normalized_quote["open"]) / normalized_quote["open"]) * 100
-                    normalized_quote["pct_chg"] = round(pct_chg, 2)
-                
-                operations.append(
-                    UpdateOne(
-                        {"code": normalized_quote["code"]},
-                        {"$set": normalized_quote},
-                        upsert=True
-                    )
+        # yfinance 批量下载：每次请求多只股票，取最近几个交易日以得到昨收
+        tickers = list(dict.fromkeys(stock_code.upper() for stock_code in stock_list))
+        quotes = await download_latest_quotes(tickers, rate_limiter=get_yfinance_rate_limiter())
+        
+        operations = []
+        for ticker, quote in quotes.items():
+            # 标准化行情数据
+            normalized_quote = build_quote_doc(ticker, quote, "USD")
+            operations.append(
+                UpdateOne(
+                    {"code": normalized_quote["code"]},
+                    {"$set": normalized_quote},
+                    upsert=True
                 )
-                
-                logger.debug(f"✅ 准备同步行情: {stock_code} (价格: {normalized_quote['close']} USD)")
-                
-            except Exception as e:
-                logger.error(f"❌ 同步行情失败: {stock_code}: {e}")
-                failed_count += 1
+            )
         
         # 执行批量操作
-        result = {"updated": 0, "inserted": 0, "failed": failed_count}
+        result = await bulk_upsert(self.db.market_quotes_us, operations)
+        result["failed"] += len(tickers) - len(operations)
         
-        if operations:
-            try:
-                bulk_result = await self.db.market_quotes_us.bulk_write(operations)
-                result["updated"] = bulk_result.modified_count
-                result["inserted"] = bulk_result.upserted_count
-                
-                logger.info(
-                    f"✅ 美股行情同步完成: "
-                    f"更新 {result['updated']} 条, "
-                    f"插入 {result['inserted']} 条, "
-                    f"失败 {result['failed']} 条"
-                )
-            except Exception as e:
-                logger.error(f"❌ 批量写入失败: {e}")
-                result["failed"] += len(operations)
+        logger.info(
+            f"✅ 美股行情同步完成: "
+            f"更新 {result['updated']} 条, "
+            f"插入 {result['inserted']} 条, "
+            f"失败 {result['failed']} 条"
+        )
         
         return result
 
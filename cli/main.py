@@ -1616,6 +1616,44 @@ def analyze():
     run_analysis()
 
 
+@app.command(
+    name="backtest",
+    help="历史回测 | Backtest over historical dates"
+)
+def backtest(
+    symbols: str = typer.Argument(..., help="股票代码，逗号分隔 | Comma-separated symbols"),
+    start: str = typer.Option(..., "--start", "-s", help="开始日期 YYYY-MM-DD | Start date"),
+    end: str = typer.Option(..., "--end", "-e", help="结束日期 YYYY-MM-DD | End date"),
+    output: str = typer.Option("backtest_results.parquet", "--output", "-o", help="结果文件 | Output file"),
+    analysts: str = typer.Option("market,fundamentals", "--analysts", "-a", help="分析师，逗号分隔 | Analysts"),
+    horizons: str = typer.Option("1,5,20", "--horizons", help="远期收益交易日跨度 | Forward return horizons"),
+    workers: int = typer.Option(4, "--workers", "-w", help="并行线程数 | Parallel workers"),
+    no_reflect: bool = typer.Option(False, "--no-reflect", help="不做反思，所有日期并行 | Disable reflection"),
+):
+    """
+    按 股票 × 交易日 重放分析流程，记录决策与远期收益
+    Replay the analysis graph over symbols x trading days
+    """
+    from tradingagents.graph.backtest import BacktestRunner, summarize
+
+    horizon_list = [int(h) for h in horizons.split(",") if h.strip()]
+    runner = BacktestRunner(
+        config=DEFAULT_CONFIG.copy(),
+        selected_analysts=[a.strip() for a in analysts.split(",") if a.strip()],
+        horizons=horizon_list,
+        max_workers=workers,
+        reflect=not no_reflect,
+    )
+    frame = runner.run(symbols.split(","), start, end, output_path=output)
+
+    summary_table = Table(show_header=True, header_style="bold magenta")
+    summary_table.add_column("指标 | Metric", style="cyan")
+    summary_table.add_column("值 | Value", style="green")
+    for key, value in summarize(frame, horizon_list).items():
+        summary_table.add_row(key, f"{value:.4f}" if isinstance(value, float) else str(value))
+    console.print(summary_table)
+
+
 @app.command(
     name="config",
     help="配置设置 | Configuration settings"
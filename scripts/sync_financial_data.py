@@ -26,6 +26,7 @@ sys.path.insert(0, str(project_root))
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
 from tradingagents.dataflows.providers.china.akshare import AKShareProvider
+from tradingagents.dataflows.financial_ttm import latest_ttm
 import logging
 
 # 配置日志
@@ -252,59 +253,20 @@ def _calculate_ttm_metric(df, metric_name: str) -> Optional[float]:
         if '报告期' not in df.columns or metric_name not in df.columns:
             return None
 
-        # 按报告期排序（升序）
-        df_sorted = df.sort_values('报告期', ascending=True).reset_index(drop=True)
-
-        # 获取最新一期
-        latest = df_sorted.iloc[-1]
-        latest_period = str(latest['报告期'])
-        latest_value = _safe_float(latest[metric_name])
-
-        if latest_value is None:
+        # TTM = 最近年报 + (本期累计 - 去年同期累计)，年报期直接使用年报数据
+        ttm_value = latest_ttm(df, [metric_name], period_col='报告期')[metric_name]
+        if ttm_value is None:
+            # 如果无法计算 TTM，返回 None（不使用简单年化，因为对季节性行业不准确）
+            logger.warning(f"   ⚠️ {metric_name}TTM计算失败: 缺少去年同期或基准年报数据")
             return None
 
-        # 判断最新期是否是年报（报告期以1231结尾）
-        if latest_period.endswith('1231'):
-            # 年报，直接使用
-            logger.debug(f"   使用年报{metric_name}作为TTM: {latest_value:.2f} 万元")
-            return latest_value
-
-        # 非年报，需要计算 TTM
-        # 提取年份和月份
-        try:
-            year = int(latest_period[:4])
-            month_day = latest_period[4:]
-        except:
-            return None
-
-        # 查找最近的年报（上一年的1231）
-        last_year = year - 1
-        last_annual_period = f"{last_year}1231"
-
-        # 查找去年同期
-        last_same_period = f"{last_year}{month_day}"
+        # 年报期直接使用年报数据，计算得到的 TTM 只保留正值
+        if str(df['报告期'].max()).replace('-', '').endswith('1231'):
+            logger.debug(f"   使用年报{metric_name}作为TTM: {ttm_value:.2f} 万元")
+            return ttm_value
 
-        # 在 DataFrame 中查找
-        last_annual_row = df_sorted[df_sorted['报告期'] == last_annual_period]
-        last_same_row = df_sorted[df_sorted['报告期'] == last_same_period]
-
-        if not last_annual_row.empty and not last_same_row.empty:
-            last_annual_value = _safe_float(last_annual_row.iloc[0][metric_name])
-            last_same_value = _safe_float(last_same_row.iloc[0][metric_name])
-
-            if last_annual_value is not None and last_same_value is not None:
-                # TTM = 最近年报 + (本期累计 - 去年同期累计)
-                ttm_value = last_annual_value + (latest_value - last_same_value)
-                logger.debug(f"   ✅ 计算{metric_name}TTM: {last_annual_value:.2f} + ({latest_value:.2f} - {last_same_value:.2f}) = {ttm_value:.2f} 万元")
-                return ttm_value if ttm_value > 0 else None
-
-        # 如果无法计算 TTM，返回 None（不使用简单年化，因为对季节性行业不准确）
-        if not last_annual_row.empty:
-            logger.warning(f"   ⚠️ {metric_name}TTM计算失败: 缺少去年同期数据（需要: {last_same_period}）")
-        else:
-            logger.warning(f"   ⚠️ {metric_name}TTM计算失败: 缺少基准年报（需要: {last_annual_period}）")
-
-        return None
+        logger.debug(f"   ✅ 计算{metric_name}TTM: {ttm_value:.2f} 万元")
+        return ttm_value if ttm_value > 0 else None
 
     except Exception as e:
         logger.warning(f"   计算{metric_name}TTM失败: {e}")
@@ -0,0 +1,147 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from tradingagents.config.usage_buckets import (
+    bucket_filter,
+    bucket_increments,
+    counted_live,
+    fold_rollup,
+    new_rollup,
+    plain_groups,
+    rebuild_pipeline,
+)
+
+RECORDS = [
+    {"timestamp": "2025-10-01T09:00:00+08:00", "provider": "dashscope", "model_name": "qwen-plus",
+     "input_tokens": 100, "output_tokens": 50, "cost": 0.1, "currency": "CNY"},
+    {"timestamp": "2025-10-01T10:00:00+08:00", "provider": "dashscope", "model_name": "qwen-plus",
+     "input_tokens": 200, "output_tokens": 20, "cost": 0.2, "currency": "CNY"},
+    {"timestamp": "2025-10-02T10:00:00+08:00", "provider": "openai", "model_name": "gpt-4o",
+     "input_tokens": 10, "output_tokens": 5, "cost": 0.5, "currency": "USD"},
+    {"timestamp": "", "provider": "openai", "model_name": "gpt-4o", "input_tokens": 1, "output_tokens": 1, "cost": 1.0},
+]
+
+
+def _facet(buckets):
+    """按 rollup_facet_stage 的分组方式在内存中汇总桶（模拟服务端 $facet 输出）"""
+    groupings = {
+        "totals": ("currency",),
+        "by_provider": ("provider", "currency"),
+        "by_model": ("provider", "model_name", "currency"),
+        "by_date": ("date", "currency"),
+    }
+    facet = {}
+    for name, fields in groupings.items():
+        groups = defaultdict(lambda: defaultdict(float))
+        for bucket in buckets:
+            key = tuple(bucket[f] for f in fields)
+            for counter in ("requests", "input_tokens", "output_tokens", "cost"):
+                groups[key][counter] += bucket[counter]
+        facet[name] = [{"_id": dict(zip(fields, key)), **values} for key, values in groups.items()]
+    return facet
+
+
+def test_increments_merge_records_per_daily_bucket():
+    increments = bucket_increments(RECORDS)
+
+    assert len(increments) == 2  # 无时间戳的记录不入桶
+    qwen = increments[("2025-10-01", "dashscope", "qwen-plus", "CNY")]
+    assert qwen["requests"] == 2
+    assert qwen["input_tokens"] == 300
+    assert abs(qwen["cost"] - 0.3) < 1e-9
+    assert bucket_filter(("2025-10-02", "openai", "gpt-4o", "USD")) == {
+        "date": "2025-10-02", "provider": "openai", "model_name": "gpt-4o", "currency": "USD"
+    }
+
+
+def test_fold_rollup_matches_per_record_statistics():
+    buckets = [
+        {**bucket_filter(key), **inc} for key, inc in bucket_increments(RECORDS[:3]).items()
+    ]
+    rollup = new_rollup()
+    # 桶与原始记录部分分别汇总后合并
+    fold_rollup(rollup, _facet(buckets[:1]))
+    fold_rollup(rollup, _facet(buckets[1:]))
+
+    assert rollup["totals"]["requests"] == 3
+    cost_by_currency = dict(rollup["totals"]["cost_by_currency"])
+    assert abs(cost_by_currency["CNY"] - 0.3) < 1e-9 and cost_by_currency["USD"] == 0.5
+    by_model = plain_groups(rollup["by_model"])
+    assert by_model["dashscope/qwen-plus"]["output_tokens"] == 70
+    assert by_model["openai/gpt-4o"]["cost_by_currency"] == {"USD": 0.5}
+    assert set(rollup["by_date"]) == {"2025-10-01", "2025-10-02"}
+
+
+def test_rebuild_pipeline_merges_into_bucket_collection():
+    pipeline = rebuild_pipeline({"timestamp": {"$gte": "2025-10-01"}})
+
+    assert pipeline[0] == {"$match": {"timestamp": {"$gte": "2025-10-01"}}}
+    assert pipeline[-1]["$merge"]["into"] == "token_usage_daily"
+    assert pipeline[-1]["$merge"]["on"] == ["date", "provider", "model_name", "currency"]
+
+
+def test_history_rebuild_only_sets_history_subdocument():
+    pipeline = rebuild_pipeline({"_id": {"$lt": "cutoff"}}, history=True)
+
+    merge = pipeline[-1]["$merge"]
+    # 重建只覆盖 history，保留写入方 $inc 的顶层计数，重跑结果相同
+    assert merge["whenMatched"] == [{"$set": {"history": "$$new.history"}}]
+    assert pipeline[-2]["$project"]["history"]["requests"] == "$requests"
+
+
+def test_records_are_split_between_history_and_live_by_cutoff_id():
+    cutoff = ObjectId.from_datetime(datetime(2025, 10, 1, 12))
+    before = {"_id": ObjectId.from_datetime(datetime(2025, 10, 1, 11))}
+    after = {"_id": ObjectId.from_datetime(datetime(2025, 10, 1, 13))}
+
+    assert not counted_live(before, cutoff)
+    assert counted_live(after, cutoff)
+    # 迁移尚未开始：写入方不累加，统计读取原始记录
+    assert not counted_live(after, None)
+
+
+class _FakeBuckets:
+    def __init__(self, state):
+        self.state = state
+        self.operations = []
+
+    def find_one(self, query):
+        return self.state
+
+    def bulk_write(self, operations, ordered=False):
+        self.operations.extend(operations)
+
+
+class _FailingColl:
+    """第 2 条记录写入失败，其余写入成功"""
+
+    def insert_many(self, docs, ordered=False):
+        for doc in docs:
+            doc["_id"] = ObjectId()
+        raise BulkWriteError({"writeErrors": [{"index": 1, "code": 121, "errmsg": "validation"}]})
+
+
+def test_partial_insert_only_counts_inserted_documents():
+    from tradingagents.config.mongodb_storage import MongoDBStorage
+    from tradingagents.utils.audit_writer import AuditPartialWrite
+
+    buckets = _FakeBuckets({"cutoff_id": ObjectId.from_datetime(datetime.now() - timedelta(days=1))})
+    storage = MongoDBStorage.__new__(MongoDBStorage)
+    storage._connected = True
+    storage._bucket_state = None
+    storage._bucket_state_at = 0.0
+    storage.collection = _FailingColl()
+    storage.db = {"token_usage_daily": buckets}
+
+    with pytest.raises(AuditPartialWrite) as exc:
+        storage.save_usage_documents(RECORDS[:3])
+
+    assert exc.value.failed == [RECORDS[1]]
+    increments = {tuple(op._filter.values()): op._doc["$inc"] for op in buckets.operations}
+    assert increments[("2025-10-01", "dashscope", "qwen-plus", "CNY")]["requests"] == 1
+    assert increments[("2025-10-01", "dashscope", "qwen-plus", "CNY")]["input_tokens"] == 100
+    assert ("2025-10-02", "openai", "gpt-4o", "USD") in increments
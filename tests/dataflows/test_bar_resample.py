@@ -0,0 +1,108 @@
+import asyncio
+
+import pandas as pd
+
+from tradingagents.dataflows.bar_resample import period_span, period_start, resample_bars
+
+
+def _daily():
+    # 2024-09-30(周一) ~ 2024-10-11；10月1日-7日国庆休市
+    dates = ["20240926", "20240927", "20240930", "20241008", "20241009", "20241010", "20241011"]
+    return pd.DataFrame({
+        "trade_date": dates,
+        "open": [10.0, 10.5, 11.0, 12.0, 11.5, 11.0, 11.2],
+        "high": [10.6, 11.0, 12.0, 12.5, 11.8, 11.4, 11.6],
+        "low": [9.9, 10.4, 10.9, 11.5, 11.0, 10.8, 11.0],
+        "close": [10.5, 11.0, 11.8, 11.6, 11.1, 11.3, 11.5],
+        "pre_close": [10.0, 10.5, 11.0, 11.8, 11.6, 11.1, 11.3],
+        "vol": [100, 200, 300, 400, 500, 600, 700],
+        "amount": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+    })
+
+
+def test_weekly_bars_follow_trading_days():
+    weekly = resample_bars(_daily(), "weekly")
+
+    assert [d.strftime("%Y-%m-%d") for d in weekly.index] == ["2024-09-27", "2024-09-30", "2024-10-11"]
+    # 国庆周只有周一一个交易日
+    assert weekly.loc["2024-09-30", "volume"] == 300
+    last = weekly.loc["2024-10-11"]
+    assert (last["open"], last["high"], last["low"], last["close"]) == (12.0, 12.5, 10.8, 11.5)
+    assert last["volume"] == 2200 and last["amount"] == 22.0
+    assert last["pre_close"] == 11.8
+    assert abs(last["pct_chg"] - (11.5 - 11.8) / 11.8 * 100) < 1e-3
+    assert weekly.iloc[0]["pre_close"] == 10.0
+
+
+def test_monthly_bars_and_start_alignment():
+    monthly = resample_bars(_daily().set_index(pd.to_datetime(_daily()["trade_date"])).drop(columns="trade_date"), "monthly")
+
+    assert [d.strftime("%Y-%m-%d") for d in monthly.index] == ["2024-09-30", "2024-10-11"]
+    assert monthly.loc["2024-09-30", "high"] == 12.0
+    assert monthly.loc["2024-10-11", "pre_close"] == 11.8
+
+    assert period_start("2024-10-09", ["daily"]) == "2024-10-09"
+    assert period_start("2024-10-09", ["daily", "weekly"]) == "2024-10-07"
+    assert period_start("2024-10-09", ["weekly", "monthly"]) == "2024-10-01"
+
+
+def test_multi_period_sync_fetches_daily_once(monkeypatch):
+    from app.worker import multi_period_sync_service as module
+
+    calls = []
+    saved = {}
+
+    class Provider:
+        async def get_historical_data(self, symbol, start_date, end_date, period):
+            calls.append((symbol, period))
+            return _daily()
+
+    class Historical:
+        async def save_historical_data(self, symbol, data, data_source, market, period):
+            saved[(symbol, period)] = len(data)
+            return len(data)
+
+    class Limiter:
+        async def acquire(self):
+            pass
+
+    service = module.MultiPeriodSyncService()
+    service.historical_service = Historical()
+    service.akshare_service = type("S", (), {"provider": Provider()})()
+    monkeypatch.setattr(module, "get_akshare_rate_limiter", lambda: Limiter())
+
+    stats = asyncio.run(service.sync_multi_period_data(
+        symbols=["000001", "600000"], data_sources=["akshare"], start_date="2024-09-26", end_date="2024-10-11"
+    ))
+
+    assert sorted(calls) == [("000001", "daily"), ("600000", "daily")]
+    assert stats.daily_records == 14 and stats.weekly_records == 6 and stats.monthly_records == 4
+    assert stats.success_count == 2 and stats.error_count == 0
+
+
+def test_resync_removes_partial_bar_of_same_period():
+    from app.services.historical_data_service import HistoricalDataService
+
+    # 周二同步时保存的部分周K（2025-10-14），周三同步后同一周标记为 2025-10-15
+    assert period_span(["2025-10-15"], "weekly") == ("2025-10-13", "2025-10-19")
+    assert period_span(["2025-09-30", "2025-10-15"], "monthly") == ("2025-09-01", "2025-10-31")
+
+    class Coll:
+        def __init__(self):
+            self.deleted = []
+
+        async def distinct(self, field, query):
+            return ["2025-10-14"]
+
+        async def delete_many(self, query):
+            self.deleted.append(query)
+            return type("R", (), {"deleted_count": 1})()
+
+    service = HistoricalDataService()
+    service.collection = Coll()
+    removed = asyncio.run(service._remove_superseded_bars("000001", "akshare", "weekly", ["2025-10-15"]))
+    assert removed == ["2025-10-14"]
+
+    query = service.collection.deleted[0]
+    assert query["symbol"] == "000001" and query["period"] == "weekly" and query["data_source"] == "akshare"
+    assert query["trade_date"] == {"$gte": "2025-10-13", "$lte": "2025-10-19", "$nin": ["2025-10-15"]}
@@ -0,0 +1,56 @@
+import math
+
+import pandas as pd
+
+from tradingagents.dataflows.financial_ttm import latest_ttm, single_quarter_values, ttm_values
+
+
+# Tushare 利润表：累计值，按报告期倒序；20240630 有一条更正记录
+INCOME = [
+    {"ts_code": "600000.SH", "end_date": "20250630", "revenue": 60.0, "n_income_attr_p": 6.0},
+    {"ts_code": "600000.SH", "end_date": "20250331", "revenue": 25.0, "n_income_attr_p": 2.0},
+    {"ts_code": "600000.SH", "end_date": "20241231", "revenue": 100.0, "n_income_attr_p": 10.0},
+    {"ts_code": "600000.SH", "end_date": "20240930", "revenue": 70.0, "n_income_attr_p": 7.0},
+    {"ts_code": "600000.SH", "end_date": "20240630", "revenue": 50.0, "n_income_attr_p": None},
+    {"ts_code": "600000.SH", "end_date": "20240630", "revenue": 999.0, "n_income_attr_p": 1.0},
+    {"ts_code": "000001.SZ", "end_date": "2024-12-31", "revenue": 5.0, "n_income_attr_p": 1.0},
+]
+
+
+def _row(frame, period, group=None):
+    mask = frame["end_date"] == period
+    if group is not None:
+        mask &= frame["ts_code"] == group
+    return frame[mask].iloc[0]
+
+
+def test_ttm_for_all_fields_and_symbols_in_one_pass():
+    ttm = ttm_values(INCOME, ["revenue", "n_income_attr_p"], group_col="ts_code")
+
+    latest = _row(ttm, "20250630", "600000.SH")
+    # 2024年报 + (2025H1 - 2024H1)，重复报告期取第一条
+    assert latest["revenue"] == 110.0
+    # 去年同期值缺失时无法计算
+    assert math.isnan(latest["n_income_attr_p"])
+    # 年报期直接取年报值；日期中的分隔符被统一
+    assert _row(ttm, "20241231", "000001.SZ")["revenue"] == 5.0
+    # 缺少去年年报
+    assert math.isnan(_row(ttm, "20250331", "600000.SH")["revenue"])
+
+
+def test_single_quarter_values():
+    quarterly = single_quarter_values(INCOME, ["revenue"], group_col="ts_code")
+
+    assert _row(quarterly, "20250331", "600000.SH")["revenue"] == 25.0
+    assert _row(quarterly, "20250630", "600000.SH")["revenue"] == 35.0
+    assert _row(quarterly, "20241231", "600000.SH")["revenue"] == 30.0
+    # 缺少上一季度
+    assert math.isnan(_row(quarterly, "20240630", "600000.SH")["revenue"])
+
+
+def test_latest_ttm_uses_latest_period():
+    single = [r for r in INCOME if r["ts_code"] == "600000.SH"]
+    result = latest_ttm(pd.DataFrame(single), ["revenue", "n_income_attr_p", "missing"])
+
+    assert result == {"revenue": 110.0, "n_income_attr_p": None, "missing": None}
+    assert latest_ttm([], ["revenue"]) == {"revenue": None}
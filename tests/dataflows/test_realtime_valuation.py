@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from tradingagents.dataflows import realtime_valuation
+from tradingagents.dataflows.realtime_metrics import calculate_realtime_pe_pb
+from tradingagents.dataflows.realtime_valuation import RealtimeValuationEngine, compute_valuations
+
+NOW = datetime(2025, 10, 14, 10, 30)
+YESTERDAY = NOW - timedelta(days=1)
+
+QUOTES = [
+    {"code": "000001", "close": 11.0, "pre_close": 10.0, "updated_at": NOW},
+    {"code": "000002", "close": 22.0, "pre_close": 20.0, "updated_at": NOW},
+    {"code": "000003", "close": 5.5, "pre_close": None, "updated_at": NOW},
+    {"code": "000004", "close": 8.0, "pre_close": 8.0, "updated_at": NOW},
+]
+BASICS = [
+    {"code": "000001", "pe": 9.0, "pe_ttm": 10.0, "pb": 1.1, "total_mv": 1000.0, "total_share": 1000000.0, "updated_at": YESTERDAY},
+    {"code": "000002", "pe": 18.0, "pe_ttm": 20.0, "pb": 2.0, "total_mv": 400.0, "total_share": None, "updated_at": YESTERDAY},
+    {"code": "000003", "pe": 30.0, "pe_ttm": 25.0, "pb": 3.0, "total_mv": 50.0, "total_share": None, "updated_at": YESTERDAY},
+    # 亏损股：无法反推 TTM 净利润
+    {"code": "000004", "pe": -5.0, "pe_ttm": -6.0, "pb": 0.8, "total_mv": 80.0, "total_share": 100000.0, "updated_at": YESTERDAY},
+]
+EQUITIES = [{"code": "000001", "total_equity": 5e10}]
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find_one(self, query, sort=None):
+        for doc in self.docs:
+            if all(doc.get(k) == v for k, v in query.items()):
+                return dict(doc)
+        return None
+
+
+class _Client:
+    def __init__(self):
+        basics = [{**b, "source": "tushare"} for b in BASICS]
+        self.db = type("DB", (), {
+            "market_quotes": _Collection(QUOTES),
+            "stock_basic_info": _Collection(basics),
+            "stock_financial_data": _Collection(EQUITIES),
+        })()
+
+    def __getitem__(self, name):
+        return self.db
+
+
+def test_batch_matches_single_symbol_calculation():
+    frame = compute_valuations(QUOTES, BASICS, EQUITIES, now=NOW)
+    assert sorted(frame.index) == ["000001", "000002", "000003"]
+
+    client = _Client()
+    for code in frame.index:
+        single = calculate_realtime_pe_pb(code, client)
+        row = frame.loc[code]
+        for field in ("pe", "pe_ttm", "pb", "market_cap", "ttm_net_profit", "total_shares"):
+            assert row[field] == pytest.approx(single[field]), (code, field)
+
+    # 000001: 昨日市值 100亿 / PE_TTM 10 = 10亿净利润，实时市值 110亿
+    assert frame.loc["000001", "pe_ttm"] == 11.0
+    assert frame.loc["000001", "pb"] == 2.2
+    # 无财务数据时使用 Tushare PB
+    assert frame.loc["000002", "pb"] == 2.0
+
+
+def test_engine_snapshot_serves_lookups_until_stale(monkeypatch):
+    engine = RealtimeValuationEngine(max_age=60)
+    engine._basics, engine._equities = BASICS, EQUITIES
+    engine._fundamentals_at = float("inf")
+    assert engine.get("000001") is None
+
+    assert engine.load(QUOTES, now=NOW) == 3
+    monkeypatch.setattr(realtime_valuation, "_engine", engine)
+    # 快照命中时不访问数据库
+    assert calculate_realtime_pe_pb("000001", db_client=object())["pe_ttm"] == 11.0
+    assert set(engine.get_many(["000002", "4", "000003"])) == {"000002", "000003"}
+
+    engine._refreshed_at -= 120
+    assert engine.get("000001") is None
+    assert engine.get_many(["000001"]) == {}
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+
+_CHUNKS = [
+    {"Market Analyst": {"market_report": "市场报告"}},
+    {"tools_market": {"messages": []}},
+    {"Trader": {"trader_investment_plan": "买入"}},
+    {"Risk Judge": {"final_trade_decision": "最终决策: 买入"}},
+]
+
+
+class _FakeGraph:
+    def stream(self, state, **kwargs):
+        yield from _CHUNKS
+
+    async def astream(self, state, **kwargs):
+        for chunk in _CHUNKS:
+            await asyncio.sleep(0)
+            yield chunk
+
+
+def _make_graph():
+    graph = object.__new__(TradingAgentsGraph)
+    graph.config = {"prefetch_data": False}
+    graph.debug = False
+    graph.graph = _FakeGraph()
+    graph.propagator = SimpleNamespace(
+        create_initial_state=lambda company, date: {"company_of_interest": company, "trade_date": date},
+        get_graph_args=lambda use_progress_callback=False: {
+            "stream_mode": "updates" if use_progress_callback else "values",
+            "config": {},
+        },
+    )
+    graph.deep_thinking_llm = SimpleNamespace(model_name="fake-model")
+    graph._log_state = lambda trade_date, final_state: None
+    graph.process_signal = lambda signal, symbol=None: {"action": "买入", "raw": signal}
+    return graph
+
+
+def test_apropagate_matches_propagate_state_and_progress():
+    sync_messages, async_messages = [], []
+
+    sync_state, sync_decision = _make_graph().propagate("000001", "2025-01-15", sync_messages.append)
+
+    async def on_progress(message):
+        async_messages.append(message)
+
+    async_state, async_decision = asyncio.run(
+        _make_graph().apropagate("000001", "2025-01-15", on_progress)
+    )
+
+    assert async_messages == sync_messages == ["📊 市场分析师", "💼 交易员决策", "🎯 风险经理"]
+    assert async_decision == sync_decision
+    assert async_decision["model_info"] == "SimpleNamespace:fake-model"
+    for key in ("market_report", "trader_investment_plan", "final_trade_decision"):
+        assert async_state[key] == sync_state[key]
+    assert set(async_state["performance_metrics"]["node_timings"]) == {
+        "Market Analyst", "tools_market", "Trader", "Risk Judge"
+    }
+
+
+def test_analysis_service_runs_graph_with_apropagate():
+    from app.services.analysis_executor import AnalysisExecutor
+    from app.services.simple_analysis_service import SimpleAnalysisService, _GraphRun
+
+    calls = []
+
+    class _Graph:
+        def propagate(self, *args, **kwargs):
+            calls.append("propagate")
+            return {"final_trade_decision": "买入"}, {"action": "买入"}
+
+        async def apropagate(self, *args, **kwargs):
+            calls.append("apropagate")
+            return {"final_trade_decision": "买入"}, {"action": "买入"}
+
+    def steps(task_id, user_id, request, progress_tracker=None):
+        calls.append("prepare")
+        state, decision = yield _GraphRun(_Graph(), "000001", "2025-01-15", None, task_id)
+        calls.append("finish")
+        return {"task_id": task_id, "decision": decision, "state": state}
+
+    svc = SimpleAnalysisService.__new__(SimpleAnalysisService)
+    svc._executor = AnalysisExecutor(max_workers=1, max_queued=0)
+    svc._analysis_steps = steps
+
+    async def scenario():
+        async with svc._executor.slot():
+            return await svc._run_analysis_async("t1", "u1", None)
+
+    result = asyncio.run(scenario())
+    assert result["decision"] == {"action": "买入"}
+    assert calls == ["prepare", "apropagate", "finish"]
+
+    calls.clear()
+    assert svc._run_analysis_sync("t2", "u1", None)["task_id"] == "t2"
+    assert calls == ["prepare", "propagate", "finish"]
+
+
+def test_news_tool_async_fetches_sources_concurrently(monkeypatch):
+    import threading
+
+    import tradingagents.agents.utils.agent_utils as agent_utils
+    from tradingagents.agents.utils.agent_utils import Toolkit
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def eastmoney(ticker):
+        barrier.wait()
+        return "## 东方财富新闻\n- A"
+
+    def google(ticker, is_china, curr_date):
+        barrier.wait()
+        return "## Google新闻\n- B"
+
+    monkeypatch.setattr(agent_utils, "_eastmoney_news_section", eastmoney)
+    monkeypatch.setattr(agent_utils, "_google_news_section", google)
+
+    # 两个新闻源都等待对方到达屏障：只有并发执行时才能完成
+    result = asyncio.run(Toolkit.get_stock_news_unified.ainvoke({"ticker": "000001", "curr_date": "2025-01-15"}))
+
+    assert "## 东方财富新闻" in result and "## Google新闻" in result
+    assert "2025-01-08 至 2025-01-15" in result
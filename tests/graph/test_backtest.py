@@ -0,0 +1,91 @@
+import pandas as pd
+
+from tradingagents.graph.backtest import BacktestRunner, forward_returns, summarize
+
+
+def _prices(symbol, start_date, end_date):
+    dates = pd.bdate_range("2025-01-06", periods=30)
+    return pd.DataFrame({"date": dates, "close": [10.0 + i for i in range(len(dates))]})
+
+
+class _FakeGraph:
+    def __init__(self, events):
+        self.events = events
+        self.curr_state = None
+
+    def propagate(self, symbol, trade_date):
+        self.events.append(("propagate", symbol, trade_date))
+        state = {"trade_date": trade_date, "performance_metrics": {"node_timings": {"Trader": 0.5}}}
+        return state, {"action": "买入", "target_price": 12.0, "confidence": 0.8, "risk_score": 0.3}
+
+    def reflect_and_remember(self, returns):
+        self.events.append(("reflect", self.curr_state["trade_date"], round(returns, 6)))
+
+
+def test_backtest_records_decisions_returns_and_delays_reflection(tmp_path):
+    events = []
+    runner = BacktestRunner(
+        config={"memory_enabled": True, "llm_provider": "fake"},
+        horizons=(1, 5),
+        max_workers=2,
+        price_loader=_prices,
+        graph_factory=lambda config, callbacks: _FakeGraph(events),
+    )
+    output = tmp_path / "results.csv"
+    frame = runner.run(["000001", "600000"], "2025-01-06", "2025-01-10", output_path=str(output))
+
+    assert len(frame) == 10 and output.exists()
+    first = frame[(frame.symbol == "000001") & (frame.trade_date == "2025-01-06")].iloc[0]
+    assert first["position"] == 1
+    assert first["fwd_return_1d"] == first["strategy_return_1d"] == 11.0 / 10.0 - 1
+    assert first["node_time:Trader"] == 0.5
+
+    # 1 日收益在下一交易日收盘才可知：反思只能发生在之后的分析之前，不能提前
+    lane = [e for e in events if e[0] == "reflect" or e[1] == "000001"]
+    assert lane.index(("reflect", "2025-01-06", 0.1)) > lane.index(("propagate", "000001", "2025-01-07"))
+
+    summary = summarize(frame, (1, 5))
+    assert summary["runs"] == 10 and summary["hit_rate_1d"] == 1.0
+
+    assert forward_returns(_prices(None, None, None), "2025-01-05", (1,)) == {1: None}
+
+
+def test_parallel_lanes_do_not_share_memory():
+    import threading
+
+    memories = {}
+    seen = []
+    lane_a_done = threading.Event()
+
+    class _MemoryGraph(_FakeGraph):
+        def __init__(self, config):
+            super().__init__([])
+            # 与 TradingAgentsGraph 一样按 memory_namespace 选择记忆集合
+            self.memory = memories.setdefault(config["memory_namespace"], [])
+
+        def propagate(self, symbol, trade_date):
+            if symbol == "600000":
+                # 让 000001 先跑完全部日期并写入反思
+                lane_a_done.wait(timeout=10)
+            seen.append((symbol, trade_date, list(self.memory)))
+            if symbol == "000001" and trade_date == "2025-01-10":
+                lane_a_done.set()
+            return super().propagate(symbol, trade_date)
+
+        def reflect_and_remember(self, returns):
+            self.memory.append(self.curr_state["trade_date"])
+
+    runner = BacktestRunner(
+        config={"memory_enabled": True, "llm_provider": "fake"},
+        horizons=(1,),
+        max_workers=2,
+        price_loader=_prices,
+        graph_factory=lambda config, callbacks: _MemoryGraph(config),
+    )
+    runner.run(["000001", "600000"], "2025-01-06", "2025-01-10")
+
+    assert lane_a_done.is_set() and len(memories) == 2
+    # 000001 只看到自己已实现的反思；600000 在更早的日期看不到 000001 的反思
+    assert ("000001", "2025-01-10", ["2025-01-06", "2025-01-07", "2025-01-08"]) in seen
+    assert ("600000", "2025-01-06", []) in seen
+    assert ("600000", "2025-01-08", ["2025-01-06"]) in seen
@@ -0,0 +1,50 @@
+import threading
+from types import SimpleNamespace
+
+from tradingagents.graph.data_prefetch import data_prefetch
+from tradingagents.utils.prefetch_memo import get_current_memo, prefetchable
+
+
+def _fake_toolkit(calls):
+    @prefetchable("get_stock_market_data_unified")
+    def market(ticker, start_date, end_date):
+        calls.append((ticker, start_date, end_date, threading.current_thread().name))
+        return f"market {ticker} {start_date} {end_date}"
+
+    @prefetchable("get_stock_fundamentals_unified")
+    def fundamentals(ticker, start_date=None, end_date=None, curr_date=None):
+        calls.append((ticker, start_date, end_date, threading.current_thread().name))
+        return f"fundamentals {ticker} {start_date}"
+
+    return SimpleNamespace(
+        get_stock_market_data_unified=SimpleNamespace(func=market),
+        get_stock_fundamentals_unified=SimpleNamespace(func=fundamentals),
+    )
+
+
+def test_tools_read_prefetched_results():
+    calls = []
+    toolkit = _fake_toolkit(calls)
+    market = toolkit.get_stock_market_data_unified.func
+    fundamentals = toolkit.get_stock_fundamentals_unified.func
+
+    with data_prefetch(toolkit, None, "000001", "2025-01-15", ["market", "fundamentals"]) as memo:
+        # 与分析师提示词一致的参数：命中预取结果，不再重复获取
+        assert market("000001", "2025-01-15", "2025-01-15") == "market 000001 2025-01-15 2025-01-15"
+        assert fundamentals(ticker="000001", start_date="2025-01-05", end_date="2025-01-15",
+                            curr_date="2025-01-15") == "fundamentals 000001 2025-01-05"
+        # 参数不同：照常直接获取
+        assert market("000001", "2024-01-01", "2025-01-15").startswith("market")
+
+    assert memo.stats == {"registered": 2, "hits": 2, "fallbacks": 0}
+    prefetch_calls = [c for c in calls if c[3].startswith("prefetch")]
+    assert len(prefetch_calls) == 2
+    assert len(calls) == 3
+    assert get_current_memo() is None
+
+
+def test_tools_run_directly_without_prefetch_scope():
+    calls = []
+    toolkit = _fake_toolkit(calls)
+    assert toolkit.get_stock_market_data_unified.func("AAPL", "2025-01-15", "2025-01-15").startswith("market")
+    assert len(calls) == 1
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from tradingagents.agents.utils.debate_context import DebateContextBudget, estimate_tokens, split_turns
+
+
+class _SummaryLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=f"摘要{len(self.prompts)}")
+
+
+def _history(rounds):
+    turns = []
+    for i in range(rounds):
+        turns.append(f"Bull Analyst: 第{i}轮看涨论点" + "增长" * 200)
+        turns.append(f"Bear Analyst: 第{i}轮看跌论点" + "风险" * 200)
+    return "".join("\n" + t for t in turns)
+
+
+def test_history_is_bounded_and_summaries_are_incremental():
+    llm = _SummaryLLM()
+    budget = DebateContextBudget(llm, budgets={"researcher": 1200, "manager": 0}, summary_tokens=200)
+
+    short = _history(1)
+    assert budget.bound(short) == short
+    assert "".join(split_turns(short)) == short
+
+    history = _history(4)
+    bounded = budget.bound(history)
+    assert estimate_tokens(bounded) <= 1200
+    assert bounded.startswith("【此前辩论摘要】\n摘要1")
+    assert bounded.endswith(history[-300:])
+    # 裁判角色不限制
+    assert budget.bound(history, role="manager") == history
+
+    # 同一份历史再次使用（例如对方发言）直接复用摘要
+    assert budget.bound(history) == bounded
+    assert len(llm.prompts) == 1
+
+    # 下一轮只把新滑出窗口的发言并入已有摘要
+    longer = _history(6)
+    budget.bound(longer)
+    assert len(llm.prompts) == 2
+    assert "已有摘要：\n摘要1" in llm.prompts[1]
+    assert "第0轮看涨论点" not in llm.prompts[1]
@@ -0,0 +1,86 @@
+import time
+
+from tradingagents.graph.conditional_logic import ConditionalLogic
+from tradingagents.graph.parallel_debate import (
+    RISK_DEBATE_ROUND_NODE,
+    create_parallel_invest_debate_round,
+    create_parallel_risk_debate_round,
+)
+
+
+def _fake_risk_node(role):
+    key = role.lower()
+
+    def node(state):
+        time.sleep(0.2)
+        snapshot = state["risk_debate_state"]
+        argument = f"{role} Analyst: round {snapshot['count'] // 3}"
+        return {
+            "risk_debate_state": {
+                **snapshot,
+                "history": snapshot["history"] + "\n" + argument,
+                f"{key}_history": snapshot.get(f"{key}_history", "") + "\n" + argument,
+                f"current_{key}_response": argument,
+                "latest_speaker": role,
+                "count": snapshot["count"] + 1,
+            }
+        }
+
+    return node
+
+
+def test_risk_round_runs_debaters_concurrently_and_merges_history():
+    round_node = create_parallel_risk_debate_round(
+        _fake_risk_node("Risky"), _fake_risk_node("Safe"), _fake_risk_node("Neutral")
+    )
+    state = {"risk_debate_state": {"history": "", "count": 0}}
+
+    start = time.time()
+    update = round_node(state)["risk_debate_state"]
+    assert time.time() - start < 0.5  # 三次 0.2s 调用并行执行
+
+    assert update["count"] == 3
+    assert update["latest_speaker"] == "Neutral"
+    assert update["history"].split("\n")[1:] == [
+        "Risky Analyst: round 0",
+        "Safe Analyst: round 0",
+        "Neutral Analyst: round 0",
+    ]
+    assert update["safe_history"] == "\nSafe Analyst: round 0"
+
+    logic = ConditionalLogic(max_risk_discuss_rounds=2)
+    assert logic.should_continue_risk_round({"risk_debate_state": update}) == RISK_DEBATE_ROUND_NODE
+    update["count"] = 6
+    assert logic.should_continue_risk_round({"risk_debate_state": update}) == "Risk Judge"
+
+
+def test_invest_round_gives_each_side_the_opponents_previous_argument():
+    seen = {}
+
+    def make_node(side):
+        def node(state):
+            debate = state["investment_debate_state"]
+            seen[side] = debate["current_response"]
+            argument = f"{side} Analyst: reply"
+            return {
+                "investment_debate_state": {
+                    "history": debate["history"] + "\n" + argument,
+                    f"{side.lower()}_history": debate.get(f"{side.lower()}_history", "") + "\n" + argument,
+                    "current_response": argument,
+                    "count": debate["count"] + 1,
+                }
+            }
+        return node
+
+    round_node = create_parallel_invest_debate_round(make_node("Bull"), make_node("Bear"))
+    state = {"investment_debate_state": {
+        "history": "", "count": 2,
+        "current_bull_response": "Bull Analyst: previous",
+        "current_bear_response": "Bear Analyst: previous",
+    }}
+    update = round_node(state)["investment_debate_state"]
+
+    assert seen == {"Bull": "Bear Analyst: previous", "Bear": "Bull Analyst: previous"}
+    assert update["count"] == 4
+    assert update["current_response"] == "Bear Analyst: reply"
+    assert update["history"] == "\nBull Analyst: reply\nBear Analyst: reply"
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.analysis_executor import AnalysisCapacityError, AnalysisExecutor, parse_provider_limits
+
+
+def test_provider_limit_caps_concurrency_and_records_waits():
+    executor = AnalysisExecutor(max_workers=4, max_queued=10, provider_limits={"deepseek": 1})
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def job():
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run(job, provider="DeepSeek") for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 3
+    assert active["peak"] == 1
+
+    stats = executor.stats()
+    assert stats["providers"]["deepseek"]["limit"] == 1
+    assert stats["running"] == 0 and stats["queued"] == 0
+    assert stats["totals"]["completed"] == 3
+    assert stats["wait_seconds"]["max"] > 0
+    executor.shutdown()
+
+
+def test_admission_rejects_when_saturated():
+    executor = AnalysisExecutor(max_workers=1, max_queued=1)
+    executor.admit(["a", "b"])
+
+    with pytest.raises(AnalysisCapacityError) as exc_info:
+        executor.admit(["c"])
+    assert exc_info.value.retry_after > 0
+    assert executor.stats()["saturated"] is True
+
+    executor.release("a")
+    executor.admit(["c"])
+    assert executor.stats()["totals"]["rejected"] == 1
+
+    assert parse_provider_limits("dashscope=4, deepseek = 8,bad") == {"dashscope": 4, "deepseek": 8}
+    executor.shutdown()
+
+
+def test_abandoned_batch_tasks_release_capacity():
+    from app.services.memory_state_manager import MemoryStateManager, TaskStatus
+    from app.services.simple_analysis_service import SimpleAnalysisService
+
+    executor = AnalysisExecutor(max_workers=1, max_queued=1)
+    svc = SimpleAnalysisService.__new__(SimpleAnalysisService)
+    svc._executor = executor
+    svc.memory_manager = MemoryStateManager()
+    db_updates = []
+
+    async def _record_db_status(task_id, status, progress, error_message=None):
+        db_updates.append((task_id, status))
+
+    svc._update_task_status = _record_db_status
+
+    async def scenario():
+        executor.admit(["t1", "t2"])
+        for task_id in ("t1", "t2"):
+            await svc.memory_manager.create_task(task_id, "u1", "000001")
+        with pytest.raises(AnalysisCapacityError):
+            executor.check_capacity(1)
+
+        await svc.abandon_tasks(["t1", "t2"], "批量任务提交失败")
+
+        executor.check_capacity(2)
+        task = await svc.memory_manager.get_task("t1")
+        assert task.status == TaskStatus.FAILED
+        assert task.error_message == "批量任务提交失败"
+        assert [t for t, _ in db_updates] == ["t1", "t2"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from app.services.data_consistency_checker import DataConsistencyChecker
+
+
+def _frames():
+    primary = pd.DataFrame({
+        'ts_code': ['000001.SZ', '000002.SZ', '600000.SH', '600519.SH', '000001.SZ'],
+        'pe': [10.0, 15.0, 8.0, 30.0, 99.0],
+        'pb': [1.2, 2.0, 0.9, 8.0, 9.9],
+        'total_mv': [1000.0, 500.0, 800.0, 20000.0, 1.0],
+        'close': [11.0, 20.0, 7.5, 1500.0, 1.0],
+    })
+    secondary = pd.DataFrame({
+        'symbol': ['000001', '000002', '600000', '300750'],
+        'pe': [10.1, 15.0, 12.0, 25.0],   # 600000 PE 差异 50%
+        'pb': [1.2, 0, 0.9, 5.0],          # 0 视为无效
+        'total_mv': [1000.0, 500.0, 800.0, 9000.0],
+        'close': [11.0, 20.0, None, 200.0],
+    })
+    return primary, secondary
+
+
+def test_full_market_join_reports_breaches_and_outliers():
+    checker = DataConsistencyChecker()
+    primary, secondary = _frames()
+
+    result = checker.check_daily_basic_consistency(primary, secondary, 'tushare', 'akshare')
+
+    # 按6位代码对齐，重复代码取第一条
+    assert result.details['compared_stocks'] == 3
+    pe = result.differences['pe']
+    assert pe['compared_count'] == 3
+    assert pe['breach_count'] == 1
+    assert pe['outliers'][0]['code'] == '600000'
+    assert abs(pe['outliers'][0]['difference_pct'] - 0.5) < 1e-9
+    assert abs(pe['difference_pct'] - 0.01) < 1e-9
+    assert result.differences['pb']['compared_count'] == 2
+    assert result.differences['price']['compared_count'] == 2
+    assert result.details['breach_stocks'] == 1
+    assert result.details['outlier_stocks'] == [{'code': '600000', 'metrics': {'pe': pe['outliers'][0]['difference_pct']}}]
+    assert result.is_consistent
+
+
+def test_no_common_stocks():
+    checker = DataConsistencyChecker()
+    primary, secondary = _frames()
+    secondary = secondary.assign(symbol=['111111', '222222', '333333', '444444'])
+
+    result = checker.check_daily_basic_consistency(primary, secondary, 'tushare', 'akshare')
+
+    assert result.recommended_action == 'use_primary_only'
+    assert result.differences == {'error': 'No common stocks found'}
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+
+from app.worker.foreign_sync_engine import build_quote_doc, parse_download, run_bounded
+
+
+def _bars(closes):
+    index = pd.date_range("2024-06-03", periods=len(closes), freq="B")
+    return pd.DataFrame(
+        {
+            "Open": [c - 1 for c in closes],
+            "High": [c + 1 for c in closes],
+            "Low": [c - 2 for c in closes],
+            "Close": closes,
+            "Volume": [1000] * len(closes),
+        },
+        index=index,
+    )
+
+
+def test_parse_download_grouped_by_ticker():
+    data = pd.concat({"0700.HK": _bars([300.0, 310.0]), "9988.HK": _bars([80.0, float("nan")])}, axis=1)
+
+    quotes = parse_download(data, ["0700.HK", "9988.HK", "0005.HK"])
+
+    assert set(quotes) == {"0700.HK", "9988.HK"}
+    assert quotes["0700.HK"]["close"] == 310.0
+    assert quotes["0700.HK"]["pre_close"] == 300.0
+    assert quotes["0700.HK"]["trade_date"] == "2024-06-04"
+    # 最新一天缺失时取最近的有效K线
+    assert quotes["9988.HK"]["close"] == 80.0
+    assert "pre_close" not in quotes["9988.HK"]
+
+
+def test_parse_download_single_level_columns():
+    quotes = parse_download(_bars([10.0]), ["AAPL"])
+    assert quotes["AAPL"]["close"] == 10.0
+
+
+def test_build_quote_doc_uses_pre_close_for_pct_chg():
+    doc = build_quote_doc("00700", {"close": 110.0, "open": 105.0, "pre_close": 100.0}, "HKD")
+    assert doc["pct_chg"] == 10.0
+    assert doc["currency"] == "HKD"
+
+    doc = build_quote_doc("AAPL", {"close": 110.0, "open": 100.0}, "USD")
+    assert doc["pct_chg"] == 10.0
+    assert "pre_close" not in doc
+
+
+def test_run_bounded_limits_concurrency_and_isolates_errors():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(item):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        if item == 3:
+            raise ValueError("bad item")
+        return item * 2
+
+    results = asyncio.run(run_bounded(work, range(8), concurrency=2))
+
+    assert [item for item, _, _ in results] == list(range(8))
+    assert results[1][1] == 2
+    assert isinstance(results[3][2], ValueError)
+    assert 1 < peak <= 2
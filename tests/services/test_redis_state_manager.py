@@ -0,0 +1,155 @@
+import asyncio
+
+from redis.exceptions import WatchError
+
+from app.services.memory_state_manager import TaskStatus
+from app.services.redis_state_manager import RedisStateManager
+
+
+class _FakeRedis:
+    """只实现任务状态管理器用到的命令"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        # 每个 key 的写入版本号，用于模拟 WATCH
+        self.versions = {}
+        # 在 WATCH 之后、EXEC 之前执行一次的回调（模拟其他进程的并发写入）
+        self.on_watch = None
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def hset(self, key, mapping):
+        self._touch(key)
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def delete(self, key):
+        self._touch(key)
+        self.hashes.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for m in members:
+            self.zsets.get(key, {}).pop(m, None)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrevrange(self, key, start, end):
+        ordered = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1], reverse=True)
+        return [m for m, _ in ordered[start:end + 1]]
+
+    def zrangebyscore(self, key, low, high):
+        return [m for m, s in self.zsets.get(key, {}).items() if s <= float(high)]
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._calls = []
+        self._watched = {}
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def watch(self, *keys):
+        self._watched = {k: self._redis.versions.get(k, 0) for k in keys}
+        self._immediate = True
+        if self._redis.on_watch:
+            callback, self._redis.on_watch = self._redis.on_watch, None
+            callback()
+
+    def multi(self):
+        self._immediate = False
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if self._immediate:
+                return getattr(self._redis, name)(*args, **kwargs)
+            self._calls.append((name, args, kwargs))
+        return call
+
+    def execute(self):
+        if any(self._redis.versions.get(k, 0) != v for k, v in self._watched.items()):
+            raise WatchError("watched key changed")
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+def test_tasks_are_shared_and_indexed_across_managers():
+    redis = _FakeRedis()
+    worker_a = RedisStateManager(redis, cache_ttl=0)
+    worker_b = RedisStateManager(redis, cache_ttl=0)
+
+    async def scenario():
+        await worker_a.create_task("t1", "u1", "000001", {"research_depth": "快速"})
+        await worker_a.create_task("t2", "u1", "600000")
+        await worker_a.create_task("t3", "u2", "00700")
+        await worker_a.update_task_status("t1", TaskStatus.RUNNING, progress=40, message="分析中")
+        await worker_a.update_task_status("t2", TaskStatus.COMPLETED, result_data={"decision": {"action": "买入"}})
+
+        # 另一个进程看到同一份状态
+        task = await worker_b.get_task("t1")
+        assert task.status == TaskStatus.RUNNING and task.progress == 40
+
+        running = await worker_b.list_user_tasks("u1", status=TaskStatus.RUNNING)
+        assert [t["task_id"] for t in running] == ["t1"]
+        completed = await worker_b.get_task("t2")
+        assert completed.result_data == {"decision": {"action": "买入"}}
+        assert completed.end_time is not None
+
+        page = await worker_b.list_all_tasks(limit=2, offset=1)
+        assert [t["task_id"] for t in page] == ["t2", "t1"]
+
+        stats = await worker_b.get_statistics()
+        assert stats["total_tasks"] == 3
+        assert stats["status_distribution"] == {"pending": 1, "running": 1, "completed": 1}
+
+        assert await worker_b.remove_task("t3")
+        assert await worker_a.get_task("t3") is None
+        assert await worker_a.list_user_tasks("u2") == []
+
+    asyncio.run(scenario())
+
+
+def test_update_retries_when_task_changed_concurrently():
+    redis = _FakeRedis()
+    manager = RedisStateManager(redis, cache_ttl=0)
+
+    async def scenario():
+        await manager.create_task("t1", "u1", "000001")
+        # 第一次 WATCH 后另一个进程写入了进度，本次事务冲突后重读重试
+        redis.on_watch = lambda: redis.hset("task_state:t1", {"current_step": '"数据采集"'})
+        assert await manager.update_task_status("t1", TaskStatus.RUNNING, progress=10)
+
+        task = await manager.get_task("t1")
+        assert task.status == TaskStatus.RUNNING and task.progress == 10
+        assert task.current_step == "数据采集"
+
+    asyncio.run(scenario())
+
+
+def test_local_cache_is_bounded():
+    manager = RedisStateManager(_FakeRedis(), cache_ttl=60, cache_max_entries=2)
+
+    async def scenario():
+        for i in range(5):
+            await manager.create_task(f"t{i}", "u1", "000001")
+
+    asyncio.run(scenario())
+    assert list(manager._cache) == ["t3", "t4"]
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.report_list_service import (
+    SEARCH_TOKENS_VERSION,
+    ReportListService,
+    build_search_filter,
+    build_search_tokens,
+    decode_cursor,
+    encode_cursor,
+    index_fields,
+)
+
+
+def test_search_tokens_support_code_name_and_chinese_substring():
+    tokens = build_search_tokens({
+        "stock_symbol": "0700.HK",
+        "stock_name": "腾讯控股",
+        "analysis_id": "ABC_123",
+        "summary": "建议买入，游戏业务 Revenue 增长",
+    })
+
+    assert "0700.hk" in tokens and "0700" in tokens
+    assert "腾讯控股" in tokens and "abc_123" in tokens
+    assert "revenue" in tokens
+    # 中文子串可以通过词元前缀命中
+    assert any(t.startswith("游戏业务") for t in tokens)
+
+    assert build_search_filter("Reven") == {"search_tokens": {"$regex": "^reven"}}
+    long_filter = build_search_filter("建议买入游戏业务增长明显")
+    assert long_filter["$and"][0] == {"search_tokens": {"$regex": "^建议买入游戏业务"}}
+    assert {"summary": {"$regex": "建议买入游戏业务增长明显", "$options": "i"}} in long_filter["$and"][1]["$or"]
+
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *_args, **_kwargs):
+        return self
+
+    def skip(self, n):
+        self.docs = self.docs[n:]
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def __aiter__(self):
+        for d in self.docs:
+            yield d
+
+
+class _FakeColl:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        return _FakeCursor(list(self.docs))
+
+
+def test_list_page_uses_keyset_cursor_and_summary_projection(monkeypatch):
+    import app.services.report_list_service as mod
+
+    ts = datetime(2025, 1, 15, 10, 30)
+    docs = [{"_id": ObjectId(), "created_at": ts, "stock_symbol": str(i)} for i in range(3)]
+    coll = _FakeColl(docs)
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: {"analysis_reports": coll})
+
+    svc = ReportListService()
+    page, next_cursor = asyncio.run(svc.list_page({"market_type": "A股"}, page_size=2))
+    assert len(page) == 2
+    assert decode_cursor(next_cursor) == (ts, docs[1]["_id"])
+    assert "reports" not in coll.queries[0][1]
+
+    asyncio.run(svc.list_page({"market_type": "A股"}, page_size=2, cursor=next_cursor))
+    query = coll.queries[1][0]
+    assert query["$and"][0] == {"market_type": "A股"}
+    assert {"created_at": ts, "_id": {"$lt": docs[1]["_id"]}} in query["$and"][1]["$or"]
+
+    assert decode_cursor(encode_cursor(ts, docs[0]["_id"])) == (ts, docs[0]["_id"])
+
+
+def test_substring_search_uses_suffix_tokens_without_regex_scan():
+    tokens = build_search_tokens({
+        "stock_symbol": "000001.SZ",
+        "stock_name": "平安银行",
+        "analysis_id": "task_20250115",
+        "summary": "Outperform",
+    })
+    # 代码/名称/ID/英文单词的中间或末尾片段都能通过后缀词元的前缀命中
+    assert any(t.startswith("0001") for t in tokens)
+    assert any(t.startswith("银行") for t in tokens)
+    assert any(t.startswith("0115") for t in tokens)
+    assert any(t.startswith("perform") for t in tokens)
+
+    import re
+    for keyword in ("0001", "银行", "perform"):
+        prefix = build_search_filter(keyword)["search_tokens"]["$regex"]
+        assert any(re.match(prefix, t) for t in tokens)
+
+    # 查询条件只包含索引上的锚定前缀匹配
+    query = ReportListService().build_query(search_keyword="0001", market_filter="A股")
+    assert query == {"search_tokens": {"$regex": "^0001"}, "market_type": "A股"}
+
+    fields = index_fields({"stock_symbol": "000001"})
+    assert fields["search_tokens_version"] == SEARCH_TOKENS_VERSION
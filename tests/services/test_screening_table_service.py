@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime
+
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, *_args, **_kwargs):
+        return self
+
+    def skip(self, *_args, **_kwargs):
+        return self
+
+    def limit(self, *_args, **_kwargs):
+        return self
+
+    async def __aiter__(self):
+        for d in self._docs:
+            yield d
+
+
+class _FakeColl:
+    def __init__(self, name, docs):
+        self.name = name
+        self._docs = docs
+        self.bulk_ops = []
+
+    async def count_documents(self, _query):
+        return len(self._docs)
+
+    def find(self, _query):
+        return _FakeCursor(self._docs)
+
+    async def estimated_document_count(self):
+        return len(self._docs)
+
+    async def bulk_write(self, ops, ordered=True):
+        self.bulk_ops.extend(ops)
+
+        class _Result:
+            matched_count = len(ops)
+            modified_count = len(ops)
+
+        return _Result()
+
+
+class _FakeDB:
+    def __init__(self, collections):
+        self.collections = collections
+        self.accessed = []
+
+    def __getitem__(self, name):
+        self.accessed.append(name)
+        return self.collections.setdefault(name, _FakeColl(name, []))
+
+
+def test_screening_queries_materialized_table_when_ready(monkeypatch):
+    import app.services.database_screening_service as screening_mod
+    import app.services.screening_table_service as table_mod
+    from app.services.database_screening_service import DatabaseScreeningService
+    from app.services.screening_table_service import ScreeningTableService
+
+    db = _FakeDB({"stock_screening_table": _FakeColl("stock_screening_table", [
+        {"code": "000001", "name": "平安银行", "roe": 12.3, "total_mv": 2000},
+    ])})
+    monkeypatch.setattr(screening_mod, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(table_mod, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(table_mod, "_screening_table_service", ScreeningTableService())
+
+    results, total = asyncio.run(DatabaseScreeningService().screen_stocks([], source="tushare"))
+
+    assert total == 1
+    assert results[0]["roe"] == 12.3
+    assert "stock_screening_view" not in db.accessed
+    # 筛选表已包含财务指标，不再单独查询 stock_financial_data
+    assert "stock_financial_data" not in db.accessed
+
+
+def test_apply_quotes_updates_all_sources_for_code(monkeypatch):
+    import app.services.screening_table_service as table_mod
+    from app.services.screening_table_service import ScreeningTableService
+
+    table = _FakeColl("stock_screening_table", [{"code": "000001", "source": "tushare"}])
+    db = _FakeDB({"stock_screening_table": table})
+    monkeypatch.setattr(table_mod, "get_mongo_db", lambda: db)
+
+    now = datetime(2025, 1, 15, 10, 30)
+    svc = ScreeningTableService()
+    asyncio.run(svc.apply_quotes({"000001": {"close": 10.5, "pct_chg": 1.2, "symbol": "000001"}}, now))
+
+    assert len(table.bulk_ops) == 1
+    op = table.bulk_ops[0]
+    assert op._filter == {"code": "000001"}
+    fields = op._doc["$set"]
+    assert fields["close"] == 10.5 and fields["pct_chg"] == 1.2
+    assert fields["quote_updated_at"] == now
+    assert "symbol" not in fields
+
+
+def test_apply_valuations_writes_realtime_fields_before_query(monkeypatch):
+    import app.services.screening_table_service as table_mod
+    from app.services.screening_table_service import ScreeningTableService
+
+    table = _FakeColl("stock_screening_table", [{"code": "000001", "source": "tushare"}])
+    db = _FakeDB({"stock_screening_table": table})
+    monkeypatch.setattr(table_mod, "get_mongo_db", lambda: db)
+
+    now = datetime(2025, 1, 15, 10, 30)
+    svc = ScreeningTableService()
+    asyncio.run(svc.apply_valuations({
+        "000001": {"pe": 5.1, "pb": 0.6, "pe_ttm": 5.3, "market_cap": 2100.5, "is_realtime": True},
+        "000002": {"pe": None, "pb": None, "pe_ttm": None, "market_cap": None},
+    }, now))
+
+    # 没有可用估值的股票不写入
+    assert len(table.bulk_ops) == 1
+    fields = table.bulk_ops[0]._doc["$set"]
+    assert fields["pe_ttm"] == 5.3 and fields["total_mv"] == 2100.5
+    assert fields["is_realtime_valuation"] is True
+    assert fields["valuation_updated_at"] == now
+
+
+def test_updated_since_query_covers_string_and_naive_formats(monkeypatch):
+    from datetime import timezone
+
+    import app.services.screening_table_service as table_mod
+
+    monkeypatch.setattr(table_mod.settings, "TIMEZONE", "Asia/Shanghai")
+    since = datetime(2025, 10, 14, 1, 30, tzinfo=timezone.utc)
+    bounds = [c["updated_at"]["$gte"] for c in table_mod.updated_since_query(since)["$or"]]
+
+    # UTC 与北京时间中较早者作为下界
+    assert bounds[0] == datetime(2025, 10, 14, 1, 30)
+    # 空格分隔的字符串与 "T" 分隔的字符串分别比较
+    assert "2025-10-14 09:30:00" >= bounds[2]
+    assert "2025-10-14T09:30:00" >= bounds[1]
+    assert "2025-10-14 00:30:00" < bounds[2]
+
+
+def test_refresh_changed_skips_rebuild_when_lock_held(monkeypatch):
+    from pymongo.errors import DuplicateKeyError
+
+    import app.services.screening_table_service as table_mod
+    from app.services.screening_table_service import ScreeningTableService
+
+    class _MetaColl(_FakeColl):
+        async def find_one(self, _query):
+            return {"_id": "stock_screening_table", "lock_owner": "other-worker"}
+
+        async def find_one_and_update(self, *_args, **_kwargs):
+            raise DuplicateKeyError("E11000")
+
+    db = _FakeDB({"screening_table_meta": _MetaColl("screening_table_meta", [])})
+    monkeypatch.setattr(table_mod, "get_mongo_db", lambda: db)
+
+    svc = ScreeningTableService()
+
+    async def _fail_rebuild():
+        raise AssertionError("rebuild must not run without the lock")
+
+    monkeypatch.setattr(svc, "rebuild", _fail_rebuild)
+    assert asyncio.run(svc.refresh_changed()) == 0
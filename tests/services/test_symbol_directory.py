@@ -0,0 +1,43 @@
+from app.services.symbol_directory import SymbolDirectory, SymbolEntry
+
+
+def _entries():
+    return [
+        SymbolEntry("000001", "平安银行", "CN", "主板", "深圳证券交易所", "银行", "payh"),
+        SymbolEntry("000002", "万科A", "CN", "主板", "深圳证券交易所", "房地产", "wka"),
+        SymbolEntry("600000", "浦发银行", "CN", "主板", "上海证券交易所", "银行", "pfyh"),
+        SymbolEntry("00700", "腾讯控股", "HK", "", "", "", "txkg"),
+        SymbolEntry("AAPL", "Apple Inc.", "US", "", "NASDAQ", "Technology", ""),
+    ]
+
+
+def test_lookup_accepts_common_code_formats():
+    directory = SymbolDirectory(_entries())
+
+    assert directory.get_name("000001") == "平安银行"
+    assert directory.get_name("600000.SH") == "浦发银行"
+    assert directory.get("0700.HK").market == "HK"
+    assert directory.get_name("aapl") == "Apple Inc."
+    assert directory.get_name("999999", default="?") == "?"
+
+
+def test_prefix_search_ranks_code_then_pinyin_then_name():
+    directory = SymbolDirectory(_entries())
+
+    # 代码前缀命中在前，代码包含匹配在后
+    assert [e.code for e in directory.search("0000")] == ["000001", "000002", "600000"]
+    assert [e.code for e in directory.search("pf")] == ["600000"]
+    # 名称前缀，其次名称包含
+    assert [e.code for e in directory.search("银行")] == ["000001", "600000"]
+    assert [e.code for e in directory.search("0", market="HK")] == ["00700"]
+    assert len(directory.search("0", limit=2)) == 2
+    assert [e.code for e in directory.search("0001")] == ["000001"]
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = tmp_path / "symbol_directory.tsv"
+    SymbolDirectory(_entries()).dump(path)
+
+    loaded = SymbolDirectory.load(path)
+    assert len(loaded) == 5
+    assert loaded.get("00700") == _entries()[3]
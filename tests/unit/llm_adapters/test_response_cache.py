@@ -0,0 +1,44 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+
+from tradingagents.llm_adapters.response_cache import LLMCacheMissError, LLMResponseCache, make_cache_key
+
+
+def test_readwrite_cache_then_strict_replay(tmp_path):
+    path = tmp_path / "llm_cache.sqlite"
+    llm = FakeListChatModel(responses=["first", "second"], cache=LLMResponseCache(path))
+
+    assert llm.invoke("分析 000001").content == "first"
+    # 相同请求直接返回缓存结果，不再调用模型
+    assert llm.invoke("分析 000001").content == "first"
+    assert llm.invoke("分析 600000").content == "second"
+
+    # 模型配置一致（FakeListChatModel 的 responses 也属于模型参数）时才能命中
+    replay = FakeListChatModel(responses=["first", "second"], cache=LLMResponseCache(path, replay=True))
+    assert replay.invoke("分析 600000").content == "second"
+    with pytest.raises(LLMCacheMissError):
+        replay.invoke("分析 000002")
+
+
+def test_cache_key_ignores_volatile_message_fields():
+    llm_string = "model=gpt-4o-mini;temperature=0.1"
+
+    first = dumps([HumanMessage(content="hi"), AIMessage(content="ok", id="run-1", response_metadata={"t": 1})])
+    second = dumps([HumanMessage(content="hi"), AIMessage(content="ok", id="run-2", response_metadata={"t": 2})])
+    assert make_cache_key(first, llm_string) == make_cache_key(second, llm_string)
+    assert make_cache_key(first, llm_string) != make_cache_key(first, llm_string + ";tools=[x]")
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm_cache.sqlite", max_bytes=600)
+    llm = FakeListChatModel(responses=["x" * 100] * 10, cache=cache)
+    for i in range(6):
+        llm.invoke(f"prompt {i}")
+
+    assert cache.stats["evicted"] > 0
+    assert cache._query_total_bytes() <= 600
+    # 最新写入的条目仍然保留
+    assert llm.invoke("prompt 5").content == "x" * 100
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,87 @@
+from tradingagents.utils.audit_writer import AuditWriter, read_jsonl
+
+
+def test_audit_writer_batches_into_sink(tmp_path):
+    batches = []
+    writer = AuditWriter("test", sink=batches.append, fallback_file=tmp_path / "audit.jsonl",
+                         batch_size=10, flush_interval=60)
+    for i in range(5):
+        writer.submit({"i": i})
+
+    # 未达到阈值前不写入
+    assert writer.pending() == 5
+    assert batches == []
+
+    writer.close()
+    assert [r["i"] for r in batches[0]] == [0, 1, 2, 3, 4]
+    assert writer.pending() == 0
+    assert not (tmp_path / "audit.jsonl").exists()
+
+
+def test_audit_writer_falls_back_to_jsonl_on_sink_error(tmp_path):
+    def broken_sink(_batch):
+        raise RuntimeError("db down")
+
+    fallback = tmp_path / "audit.jsonl"
+    writer = AuditWriter("test", sink=broken_sink, fallback_file=fallback, batch_size=10, flush_interval=60)
+    writer.submit({"i": 1})
+    writer.flush()
+    writer.submit({"i": 2})
+    writer.close()
+
+    # 追加写入，不重写整个文件
+    assert [r["i"] for r in read_jsonl(fallback)] == [1, 2]
+    assert writer.stats["fallback"] == 2
+
+
+def test_audit_writer_applies_backpressure_when_buffer_full(tmp_path):
+    batches = []
+    writer = AuditWriter("test", sink=batches.append, batch_size=3, flush_interval=60, max_buffer=3)
+    for i in range(3):
+        writer.submit({"i": i})
+
+    # 缓冲区满时在调用方同步写出，不丢弃记录
+    assert sum(len(b) for b in batches) == 3
+    writer.close()
+
+
+def test_audit_writer_falls_back_only_failed_records(tmp_path):
+    from tradingagents.utils.audit_writer import AuditPartialWrite
+
+    def partial_sink(batch):
+        raise AuditPartialWrite([r for r in batch if r["i"] % 2])
+
+    fallback = tmp_path / "audit.jsonl"
+    writer = AuditWriter("test", sink=partial_sink, fallback_file=fallback, batch_size=10, flush_interval=60)
+    for i in range(4):
+        writer.submit({"i": i})
+    writer.close()
+
+    assert [r["i"] for r in read_jsonl(fallback)] == [1, 3]
+    assert writer.stats["flushed"] == 2
+
+
+def test_audit_writer_replays_fallback_file(tmp_path):
+    fallback = tmp_path / "audit.jsonl"
+    fallback.write_text('{"i": 1}\n{"i": 2}\n', encoding="utf-8")
+    available = {"ok": False}
+    batches = []
+
+    def sink(batch):
+        if not available["ok"]:
+            raise RuntimeError("db down")
+        batches.append(batch)
+
+    writer = AuditWriter("test", sink=sink, fallback_file=fallback, batch_size=10, flush_interval=60,
+                         replay_decoder=lambda r: {**r, "replayed": True})
+
+    # sink 不可用时记录保留在回退文件中
+    assert writer.replay_fallback() == 0
+    assert [r["i"] for r in read_jsonl(fallback)] == [1, 2]
+
+    available["ok"] = True
+    assert writer.replay_fallback() == 2
+    assert batches == [[{"i": 1, "replayed": True}, {"i": 2, "replayed": True}]]
+    assert not fallback.exists()
+    assert list(tmp_path.iterdir()) == []
+    writer.close()
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import app.core.columnar as columnar
+from app.core.columnar import (
+    ARROW_STREAM_MEDIA_TYPE,
+    columnar_response,
+    frame_records,
+    negotiate_format,
+    records_frame,
+)
+
+
+def _request(accept: str = "application/json") -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def _bars() -> pd.DataFrame:
+    return records_frame([
+        {"_id": "x1", "time": "2024-06-03", "close": 10.5, "volume": 1000},
+        {"_id": "x2", "time": "2024-06-04", "close": np.nan, "volume": 2000},
+    ])
+
+
+def test_negotiate_format():
+    assert negotiate_format(_request()) == "rows"
+    assert negotiate_format(_request(ARROW_STREAM_MEDIA_TYPE)) == "arrow"
+    # 显式参数优先于 Accept 头
+    assert negotiate_format(_request(ARROW_STREAM_MEDIA_TYPE), "COLUMNS") == "columns"
+    with pytest.raises(HTTPException) as exc:
+        negotiate_format(_request(), "csv")
+    assert exc.value.status_code == 400
+
+
+def test_arrow_not_acceptable_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(columnar, "ARROW_AVAILABLE", False)
+
+    for request, fmt in ((_request(ARROW_STREAM_MEDIA_TYPE), None), (_request(), "arrow")):
+        with pytest.raises(HTTPException) as exc:
+            negotiate_format(request, fmt)
+        assert exc.value.status_code == 406
+    # 其他格式不受影响
+    assert negotiate_format(_request(), "columns") == "columns"
+
+
+def test_columns_response():
+    response = columnar_response(_bars(), "columns", meta={"code": "000001"})
+    body = json.loads(response.body)
+
+    assert response.media_type == "application/json"
+    assert body["success"] is True
+    assert body["data"]["code"] == "000001"
+    assert body["data"]["count"] == 2
+    assert body["data"]["columns"] == {
+        "time": ["2024-06-03", "2024-06-04"],
+        "close": [10.5, None],
+        "volume": [1000, 2000],
+    }
+
+
+def test_columns_response_without_orjson(monkeypatch):
+    # 未安装 orjson 时退化为标准库 json，数值列转为列表
+    monkeypatch.setattr(columnar, "ORJSON_AVAILABLE", False)
+    monkeypatch.setattr(columnar, "orjson", None)
+
+    response = columnar_response(_bars(), "columns")
+    body = json.loads(response.body)
+
+    assert body["data"]["columns"]["volume"] == [1000, 2000]
+    assert body["data"]["columns"]["close"] == [10.5, None]
+
+
+def test_arrow_response_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    response = columnar_response(_bars(), "arrow", meta={"code": "000001"})
+    table = pa.ipc.open_stream(response.body).read_all()
+
+    assert response.media_type == ARROW_STREAM_MEDIA_TYPE
+    assert table.column_names == ["time", "close", "volume"]
+    assert table.column("volume").to_pylist() == [1000, 2000]
+    assert table.column("close").to_pylist() == [10.5, None]
+    assert json.loads(table.schema.metadata[b"meta"]) == {"code": "000001"}
+
+
+def test_frame_records_replaces_nan():
+    assert frame_records(_bars())[1] == {"time": "2024-06-04", "close": None, "volume": 2000}
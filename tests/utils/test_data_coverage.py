@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from tradingagents.dataflows.cache import mongodb_cache_adapter
+from tradingagents.dataflows.cache.data_coverage import build_coverage, evaluate_coverage, merge_coverage
+from tradingagents.utils.stock_validator import StockDataPreparer
+
+
+def test_build_coverage_records_range_count_and_gaps():
+    dates = ["2025-01-03", "2025-01-02", "2025-01-06", "2025-01-06", "2025-02-20", None]
+    coverage = build_coverage(dates)
+    assert coverage == {
+        "first_date": "2025-01-02",
+        "last_date": "2025-02-20",
+        "row_count": 4,
+        "gaps": [["2025-01-06", "2025-02-20"]],
+    }
+    assert build_coverage([])["last_date"] is None
+
+
+def test_merge_coverage_matches_full_rebuild():
+    history = ["2025-01-02", "2025-01-03", "2025-01-06", "2025-02-20", "2025-02-21"]
+    entry = build_coverage(history)
+
+    # 追加新日期、回补缺口内的日期、覆盖写入已有日期
+    written = ["2025-02-21", "2025-02-24", "2025-01-20", "2025-01-03"]
+    merged = merge_coverage(entry, written)
+    assert merged == build_coverage(history + written)
+
+    # 大跨度追加产生新缺口
+    assert merge_coverage(entry, ["2025-06-02"]) == build_coverage(history + ["2025-06-02"])
+
+    # 周期内被取代的旧记录（调用方附带被删除日期之前最近的已有记录）
+    weekly = build_coverage(["2025-01-03", "2025-01-10", "2025-01-15"])
+    merged = merge_coverage(weekly, ["2025-01-10", "2025-01-17"], removed=["2025-01-15"])
+    assert merged == build_coverage(["2025-01-03", "2025-01-10", "2025-01-17"])
+
+    assert merge_coverage(None, ["2025-01-02"]) == build_coverage(["2025-01-02"])
+
+
+def test_evaluate_coverage_checks_overlap_and_freshness():
+    entry = {"first_date": "2024-01-02", "last_date": "2025-10-13", "row_count": 430, "gaps": []}
+    monday = datetime(2025, 10, 13, 18, 0)
+    result = evaluate_coverage(entry, "2024-10-01", "2025-10-13", today=monday)
+    assert result["has_data"] and result["is_latest"] and result["record_count"] == 430
+
+    stale = evaluate_coverage(entry, "2024-10-01", "2025-10-20", today=datetime(2025, 10, 20, 18, 0))
+    assert stale["has_data"] and not stale["is_latest"]
+
+    assert not evaluate_coverage(entry, "2025-11-01", "2025-11-30", today=monday)["has_data"]
+    assert not evaluate_coverage(None, "2024-10-01", "2025-10-13")["has_data"]
+
+
+def test_readiness_check_uses_manifest_without_loading_history(monkeypatch):
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    class _Adapter:
+        use_app_cache = True
+        db = object()
+
+        def get_data_coverage(self, symbol, period="daily"):
+            return [
+                {"data_source": "tushare", "first_date": "2020-01-02", "last_date": "2020-06-30", "row_count": 120},
+                {"data_source": "akshare", "first_date": "2024-01-02", "last_date": today, "row_count": 400},
+            ]
+
+        def get_historical_data(self, *args, **kwargs):
+            raise AssertionError("不应加载历史数据")
+
+    monkeypatch.setattr(mongodb_cache_adapter, "get_mongodb_cache_adapter", lambda: _Adapter())
+    preparer = StockDataPreparer.__new__(StockDataPreparer)
+    result = preparer._check_database_data("000001", "2024-10-01", today)
+    # 优先级更高的数据源不覆盖请求区间时，使用下一个数据源的清单
+    assert result["has_data"] and result["is_latest"]
+    assert result["record_count"] == 400
+
+
+def test_update_coverage_merges_without_rescanning_history():
+    import asyncio
+
+    from app.services.historical_data_service import HistoricalDataService
+
+    class Quotes:
+        async def distinct(self, field, query):
+            raise AssertionError("增量更新不应扫描历史数据")
+
+    class Coverage:
+        def __init__(self, doc):
+            self.doc = doc
+
+        async def find_one(self, query, *args):
+            return dict(self.doc)
+
+        async def replace_one(self, query, doc, upsert=False):
+            matched = query.get("version") == self.doc.get("version")
+            if matched:
+                self.doc = doc
+            return type("R", (), {"matched_count": int(matched)})()
+
+    key = {"symbol": "000001", "period": "weekly", "data_source": "akshare"}
+    service = HistoricalDataService()
+    service.collection = Quotes()
+    service.coverage_collection = Coverage({**key, **build_coverage(["2025-01-03", "2025-01-10"]), "version": 2})
+
+    doc = asyncio.run(service._update_coverage("000001", "akshare", "weekly", "CN", ["2025-01-10", "2025-01-17"]))
+    assert doc["last_date"] == "2025-01-17" and doc["row_count"] == 3 and doc["version"] == 3
+    assert service.coverage_collection.doc is doc
@@ -0,0 +1,77 @@
+import io
+import zipfile
+
+from app.services.log_export_service import LogExportService
+from app.utils.log_reader import LogFileIndex, get_log_index, tail_lines
+
+
+def _write_log(path, start=0, count=2000):
+    levels = ["INFO", "DEBUG", "WARNING", "ERROR"]
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            minute, second = divmod(i, 60)
+            f.write(
+                f"2025-01-01 {minute // 60:02d}:{minute % 60:02d}:{second:02d} | webapi | "
+                f"{levels[i % 4]:<8} | 第{i}行\n"
+            )
+
+
+def test_tail_lines_reads_from_end(tmp_path):
+    path = tmp_path / "webapi.log"
+    _write_log(path)
+
+    lines = tail_lines(path, 3)
+
+    assert [line.split("第")[-1] for line in lines] == ["1997行", "1998行", "1999行"]
+    assert len(tail_lines(path, 5000)) == 2000
+
+
+def test_index_counts_incrementally_and_locates_time_range(tmp_path):
+    path = tmp_path / "webapi.log"
+    _write_log(path)
+    index = LogFileIndex(path, interval=4096).refresh()
+    assert index.line_count == 2000
+    assert index.level_counts == {"ERROR": 500, "WARNING": 500, "INFO": 500, "DEBUG": 500}
+
+    # 追加内容只扫描新增部分，未写完的行留到下次
+    _write_log(path, start=2000, count=4)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("2025-01-01 00:33:24 | webapi | ERROR")
+    index.refresh()
+    assert index.line_count == 2004
+    assert index.level_counts["ERROR"] == 501
+
+    start, end = index.byte_range("2025-01-01T00:10:00", "2025-01-01T00:12:00")
+    assert 0 < start < end < index.scanned
+    with open(path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start).decode()
+    assert "00:10:00" in chunk and "00:12:00" in chunk
+
+    # 文件被截断后重建
+    path.write_text("2025-01-02 00:00:00 | webapi | INFO | x\n", encoding="utf-8")
+    index.refresh()
+    assert index.line_count == 1
+
+
+def test_read_and_stream_export(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    _write_log(log_dir / "webapi.log")
+    service = LogExportService(log_dir=str(log_dir))
+
+    content = service.read_log_file(
+        "webapi.log", lines=10, level="ERROR",
+        start_time="2025-01-01T00:01:00", end_time="2025-01-01T00:01:59",
+    )
+    assert content["stats"]["total_lines"] == 2000
+    assert content["lines"][-1].endswith("第119行")
+    assert all("ERROR" in line and " 00:01:" in line for line in content["lines"])
+    assert get_log_index(log_dir / "webapi.log").line_count == 2000
+
+    name, media_type, stream = service.stream_export(level="ERROR", format="zip")
+    assert name.endswith(".zip") and media_type == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(stream)))
+    exported = archive.read("webapi.log").decode().splitlines()
+    assert len(exported) == 500
+    assert all("ERROR" in line for line in exported)
@@ -0,0 +1,42 @@
+import logging
+import logging.handlers
+import queue
+
+from tradingagents.utils.logging_manager import LazyQueueHandler, RateLimitFilter
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord("dataflows", level, __file__, 1, msg, args, None)
+
+
+def test_rate_limit_filter_caps_low_levels_only():
+    f = RateLimitFilter(max_per_second=2, max_level="INFO")
+    results = [f.filter(_record()) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+
+    # WARNING 及以上不受限流影响
+    assert f.filter(_record(level=logging.WARNING))
+
+
+def test_rate_limit_filter_sampling():
+    f = RateLimitFilter(sample_every=3)
+    kept = [f.filter(_record()) for _ in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
+
+
+def test_lazy_queue_handler_defers_formatting_to_listener():
+    q = queue.Queue()
+    memory = logging.handlers.MemoryHandler(capacity=100)
+    memory.setFormatter(logging.Formatter("%(levelname)s|%(message)s"))
+    listener = logging.handlers.QueueListener(q, memory, respect_handler_level=True)
+    listener.start()
+    try:
+        handler = LazyQueueHandler(q)
+        handler.emit(_record())
+    finally:
+        listener.stop()
+
+    record = memory.buffer[0]
+    assert record.getMessage() == "hello world"
+    assert record.args is None
+    assert memory.format(record) == "INFO|hello world"
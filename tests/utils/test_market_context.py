@@ -0,0 +1,45 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tradingagents.utils.market_context import (
+    clear_market_contexts,
+    get_current_market_context,
+    market_shared,
+    shared_market_context,
+)
+
+
+def test_market_tool_runs_once_per_market_and_date():
+    clear_market_contexts()
+    calls = []
+    lock = threading.Lock()
+
+    @market_shared("get_global_news_openai")
+    def global_news(curr_date):
+        with lock:
+            calls.append(curr_date)
+        time.sleep(0.05)
+        return f"news {curr_date}"
+
+    def analyze(symbol):
+        with shared_market_context("china_a", "2025-01-15"):
+            return global_news("2025-01-15")
+
+    # 同一批次的多只股票并发分析：只真正获取一次
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(analyze, ["000001", "000002", "600000", "600519", "300750"]))
+
+    assert results == ["news 2025-01-15"] * 5
+    assert calls == ["2025-01-15"]
+
+    with shared_market_context("china_a", "2025-01-15") as context:
+        assert context.stats["computed"] == 1 and context.stats["hits"] == 4
+
+    # 不同交易日期使用独立上下文；未绑定上下文时照常执行
+    with shared_market_context("china_a", "2025-01-16"):
+        global_news("2025-01-16")
+    global_news("2025-01-15")
+    assert calls == ["2025-01-15", "2025-01-16", "2025-01-15"]
+    assert get_current_market_context() is None
+    clear_market_contexts()
@@ -0,0 +1,82 @@
+from typing import TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+
+from tradingagents.utils.telemetry import RunTelemetry, TelemetryRegistry
+
+
+class _State(TypedDict):
+    text: str
+
+
+@tool
+def lookup(query: str) -> str:
+    """查询数据"""
+    return f"data for {query}"
+
+
+def test_llm_and_tool_calls_are_attributed_to_graph_nodes():
+    llm = GenericFakeChatModel(messages=iter([
+        AIMessage(content="看涨", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}),
+        AIMessage(content="买入", usage_metadata={"input_tokens": 200, "output_tokens": 10, "total_tokens": 210}),
+    ]))
+
+    def analyst(state):
+        # 与智能体一致：节点内部直接调用，不显式传递 config
+        lookup.invoke({"query": state["text"]})
+        return {"text": llm.invoke(state["text"]).content}
+
+    def trader(state):
+        return {"text": llm.invoke(state["text"]).content}
+
+    builder = StateGraph(_State)
+    builder.add_node("Market Analyst", analyst)
+    builder.add_node("Trader", trader)
+    builder.add_edge(START, "Market Analyst")
+    builder.add_edge("Market Analyst", "Trader")
+    builder.add_edge("Trader", END)
+
+    registry = TelemetryRegistry()
+    telemetry = RunTelemetry(registry=registry)
+    builder.compile().invoke({"text": "000001"}, config={"callbacks": [telemetry]})
+    summary = telemetry.finish({"Market Analyst": 1.5, "Trader": 0.5})
+
+    assert summary["nodes"]["Market Analyst"]["prompt_tokens"] == 120
+    assert summary["nodes"]["Market Analyst"]["tool_calls"] == 1
+    assert summary["nodes"]["Trader"]["completion_tokens"] == 10
+    assert summary["totals"]["llm_calls"] == 2
+
+    text = registry.render_prometheus()
+    assert 'tradingagents_llm_tokens_total{node="Trader",model="unknown",kind="prompt"} 200' in text
+    assert 'tradingagents_node_seconds_bucket{node="Market Analyst",le="2.5"} 1' in text
+    assert 'tradingagents_tool_seconds_count{node="Market Analyst",tool="lookup"} 1' in text
+    assert 'tradingagents_graph_runs_total{status="success"} 1' in text
+
+
+def test_metrics_endpoint_requires_token_or_localhost(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routers import metrics as metrics_router
+
+    # 其他测试可能重载 app.core.config，直接修改路由模块持有的 settings
+    settings = metrics_router.settings
+    app = FastAPI()
+    app.include_router(metrics_router.router)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics_router, "_executor_gauges", lambda: "")
+
+    # 未配置令牌：只允许本机
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert TestClient(app, client=("203.0.113.5", 5000)).get("/metrics").status_code == 403
+    assert TestClient(app, client=("127.0.0.1", 5000)).get("/metrics").status_code == 200
+
+    # 配置令牌后必须携带 Bearer 令牌
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    remote = TestClient(app, client=("203.0.113.5", 5000))
+    assert remote.get("/metrics").status_code == 401
+    assert remote.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert remote.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
@@ -0,0 +1,99 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from tradingagents.dataflows.cache.data_coverage import build_coverage
+from tradingagents.utils import trading_calendar
+from tradingagents.utils.trading_calendar import ExchangeCalendar, get_trading_calendar, save_trading_calendars
+
+SH = ZoneInfo("Asia/Shanghai")
+# 2025 年国庆：10月1日-8日休市
+HOLIDAYS = {date(2025, 10, d) for d in range(1, 9)}
+
+
+def _cn_calendar():
+    start, end = date(2025, 9, 1), date(2025, 10, 31)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    open_days = [d for d in days if d.weekday() < 5 and d not in HOLIDAYS]
+    return ExchangeCalendar.from_open_dates("CN", open_days, start, end)
+
+
+def test_holiday_aware_lookups():
+    cal = _cn_calendar()
+    assert cal.is_trading_day("2025-09-30")
+    assert not cal.is_trading_day("20251008")
+    assert cal.next_trading_day("2025-09-30") == date(2025, 10, 9)
+    assert cal.prev_trading_day("2025-10-09") == date(2025, 9, 30)
+    assert cal.prev_trading_day("2025-10-05", inclusive=True) == date(2025, 9, 30)
+    assert cal.trading_days_between("2025-09-29", "2025-10-10") == 4
+    # 超出日历范围的部分按工作日计数
+    assert cal.trading_days_between("2025-10-30", "2025-11-04") == 4
+    assert cal.is_trading_day("2025-11-03") and not cal.is_trading_day("2025-11-01")
+
+
+def test_sync_planning_and_close_alignment():
+    cal = _cn_calendar()
+    # 节假日期间：最后一根日线是 9月30日，没有需要同步的交易日
+    during_holiday = datetime(2025, 10, 6, 10, 0, tzinfo=SH)
+    assert cal.plan_sync_range("2025-10-01", "2025-10-06", moment=during_holiday) is None
+    # 节后首日盘中：当日日线尚未产生
+    assert cal.plan_sync_range("2025-10-01", "2025-10-09", moment=datetime(2025, 10, 9, 11, 0, tzinfo=SH)) is None
+    assert cal.plan_sync_range("2025-10-01", "2025-10-10", moment=datetime(2025, 10, 10, 16, 0, tzinfo=SH)) == (
+        "2025-10-09", "2025-10-10"
+    )
+
+    # 节前收盘后缓存的数据在节后首个交易日收盘后才过期
+    assert cal.next_close_after(datetime(2025, 9, 30, 18, 0, tzinfo=SH)) == datetime(2025, 10, 9, 15, 30, tzinfo=SH)
+    assert not cal.is_session_open(during_holiday)
+    assert cal.is_session_open(datetime(2025, 10, 9, 10, 0, tzinfo=SH))
+
+
+def test_coverage_gaps_ignore_holidays():
+    cal = _cn_calendar()
+    coverage = build_coverage(["2025-09-29", "2025-09-30", "2025-10-09", "2025-10-13"], calendar=cal)
+    # 10月10日缺失才是真正的缺口
+    assert coverage["gaps"] == [["2025-10-09", "2025-10-13"]]
+
+
+def test_calendar_file_round_trip(tmp_path, monkeypatch):
+    path = tmp_path / "trading_calendar.json"
+    monkeypatch.setenv("TRADING_CALENDAR_FILE", str(path))
+    monkeypatch.setattr(trading_calendar, "_calendars", {})
+    monkeypatch.setattr(trading_calendar, "_loaded_mtime", None)
+
+    save_trading_calendars({"CN": _cn_calendar()})
+    loaded = get_trading_calendar("A股")
+    assert loaded.source == "tushare"
+    assert not loaded.is_trading_day("2025-10-03")
+    # 没有日历的市场按工作日估算
+    assert get_trading_calendar("us").source == "weekday"
+
+
+def test_refresh_clamps_calendar_to_published_range(tmp_path, monkeypatch):
+    import pandas as pd
+
+    import tradingagents.dataflows.providers.china.tushare as tushare_mod
+
+    class _Api:
+        def trade_cal(self, **_kwargs):
+            # 只发布到 2025-10-10（周五），之后的日期尚无数据
+            days = pd.date_range("2025-10-01", "2025-10-10")
+            return pd.DataFrame({
+                "cal_date": days.strftime("%Y%m%d"),
+                "is_open": [int(d >= pd.Timestamp("2025-10-09")) for d in days],
+            })
+
+    class _Provider:
+        api = _Api()
+
+    monkeypatch.setattr(tushare_mod, "get_tushare_provider", lambda: _Provider())
+    monkeypatch.setenv("TRADING_CALENDAR_FILE", str(tmp_path / "trading_calendar.json"))
+    monkeypatch.setattr(trading_calendar, "_calendars", {})
+    monkeypatch.setattr(trading_calendar, "_loaded_mtime", None)
+
+    assert trading_calendar.refresh_trading_calendar(["CN"], "2025-01-01", "2026-12-31") == {"CN": 2}
+    calendar = get_trading_calendar("CN")
+    assert calendar.end == date(2025, 10, 10)
+    assert not calendar.is_trading_day("2025-10-08")
+    # 未发布的日期按工作日估算，而不是当作休市
+    assert calendar.is_trading_day("2025-10-13")
+    assert calendar.next_trading_day("2025-10-10") == date(2025, 10, 13)
@@ -7,7 +7,7 @@ from datetime import datetime
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_analyst_module
 # 导入统一新闻工具
-from tradingagents.tools.unified_news_tool import create_unified_news_tool
+from tradingagents.tools.unified_news_tool import create_unified_news_tool, get_model_info
 # 导入股票工具类
 from tradingagents.utils.stock_utils import StockUtils
 # 导入Google工具调用处理器
@@ -188,14 +188,7 @@ def create_news_analyst(llm, toolkit):
         prompt = prompt.partial(ticker=ticker)
         
         # 获取模型信息用于统一新闻工具的特殊处理
-        model_info = ""
-        try:
-            if hasattr(llm, 'model_name'):
-                model_info = f"{llm.__class__.__name__}:{llm.model_name}"
-            else:
-                model_info = llm.__class__.__name__
-        except:
-            model_info = "Unknown"
+        model_info = get_model_info(llm)
         
         logger.info(f"[新闻分析师] 准备调用LLM进行新闻分析，模型: {model_info}")
         
@@ -6,9 +6,11 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_research_manager(llm, memory):
+def create_research_manager(llm, memory, context_budget=None):
     def research_manager_node(state) -> dict:
         history = state["investment_debate_state"].get("history", "")
+        # 辩论上下文预算：历史超出预算时，早期发言以滚动摘要代替
+        history_context = context_budget.bound(history, role="manager") if context_budget else history
         market_research_report = state["market_report"]
         sentiment_report = state["sentiment_report"]
         news_report = state["news_report"]
@@ -63,7 +65,7 @@ def create_research_manager(llm, memory):
 
 以下是辩论：
 辩论历史：
-{history}
+{history_context}
 
 请用中文撰写所有分析内容和建议。"""
 
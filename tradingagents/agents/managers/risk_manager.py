@@ -6,12 +6,14 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_risk_manager(llm, memory):
+def create_risk_manager(llm, memory, context_budget=None):
     def risk_manager_node(state) -> dict:
 
         company_name = state["company_of_interest"]
 
         history = state["risk_debate_state"]["history"]
+        # 辩论上下文预算：历史超出预算时，早期发言以滚动摘要代替
+        history_context = context_budget.bound(history, role="manager") if context_budget else history
         risk_debate_state = state["risk_debate_state"]
         market_research_report = state["market_report"]
         news_report = state["news_report"]
@@ -47,7 +49,7 @@ def create_risk_manager(llm, memory):
 ---
 
 **分析师辩论历史：**
-{history}
+{history_context}
 
 ---
 
@@ -7,12 +7,14 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_bull_researcher(llm, memory):
+def create_bull_researcher(llm, memory, context_budget=None):
     def bull_node(state) -> dict:
         logger.debug(f"🐂 [DEBUG] ===== 看涨研究员节点开始 =====")
 
         investment_debate_state = state["investment_debate_state"]
         history = investment_debate_state.get("history", "")
+        # 辩论上下文预算：历史超出预算时，早期发言以滚动摘要代替
+        history_context = context_budget.bound(history, role="researcher") if context_budget else history
         bull_history = investment_debate_state.get("bull_history", "")
 
         current_response = investment_debate_state.get("current_response", "")
@@ -116,7 +118,7 @@ def create_bull_researcher(llm, memory):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务新闻：{news_report}
 公司基本面报告：{fundamentals_report}
-辩论对话历史：{history}
+辩论对话历史：{history_context}
 最后的看跌论点：{current_response}
 类似情况的反思和经验教训：{past_memory_str}
 
@@ -6,10 +6,12 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_risky_debator(llm):
+def create_risky_debator(llm, context_budget=None):
     def risky_node(state) -> dict:
         risk_debate_state = state["risk_debate_state"]
         history = risk_debate_state.get("history", "")
+        # 辩论上下文预算：历史超出预算时，早期发言以滚动摘要代替
+        history_context = context_budget.bound(history, role="risk_debator") if context_budget else history
         risky_history = risk_debate_state.get("risky_history", "")
 
         current_safe_response = risk_debate_state.get("current_safe_response", "")
@@ -32,7 +34,7 @@ def create_risky_debator(llm):
         logger.info(f"  - history: {len(history):,} 字符")
         total_length = (len(market_research_report) + len(sentiment_report) +
                        len(news_report) + len(fundamentals_report) +
-                       len(trader_decision) + len(history) +
+                       len(trader_decision) + len(history_context) +
                        len(current_safe_response) + len(current_neutral_response))
         logger.info(f"  - 总Prompt长度: {total_length:,} 字符 (~{total_length//4:,} tokens)")
 
@@ -46,7 +48,7 @@ def create_risky_debator(llm):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务报告：{news_report}
 公司基本面报告：{fundamentals_report}
-以下是当前对话历史：{history} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
+以下是当前对话历史：{history_context} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
 
 积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
 
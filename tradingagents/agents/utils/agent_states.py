@@ -21,6 +21,8 @@ class InvestDebateState(TypedDict):
     ]  # Bullish Conversation history
     history: Annotated[str, "Conversation history"]  # Conversation history
     current_response: Annotated[str, "Latest response"]  # Last response
+    current_bull_response: Annotated[str, "Latest response by the bull researcher (concurrent debate)"]
+    current_bear_response: Annotated[str, "Latest response by the bear researcher (concurrent debate)"]
     judge_decision: Annotated[str, "Final judge decision"]  # Last response
     count: Annotated[int, "Length of the current conversation"]  # Conversation length
 
@@ -5,6 +5,7 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import RemoveMessage
 from langchain_core.tools import tool
 from datetime import date, timedelta, datetime
+import asyncio
 import functools
 import pandas as pd
 import os
@@ -17,6 +18,8 @@ from langchain_core.messages import HumanMessage
 # 导入统一日志系统和工具日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_tool_call, log_analysis_step
+from tradingagents.utils.prefetch_memo import prefetchable
+from tradingagents.utils.market_context import market_shared
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -58,6 +61,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @market_shared("get_reddit_news")
     def get_reddit_news(
         curr_date: Annotated[str, "Date you want to get news for in yyyy-mm-dd format"],
     ) -> str:
@@ -197,6 +201,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @market_shared("get_china_market_overview")
     def get_china_market_overview(
         curr_date: Annotated[str, "当前日期，格式 yyyy-mm-dd"],
     ) -> str:
@@ -460,6 +465,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @market_shared("get_google_news")
     def get_google_news(
         query: Annotated[str, "Query to search with"],
         curr_date: Annotated[str, "Curr date in yyyy-mm-dd format"],
@@ -520,6 +526,7 @@ class Toolkit:
 
     @staticmethod
     @tool
+    @market_shared("get_global_news_openai")
     def get_global_news_openai(
         curr_date: Annotated[str, "Current date in yyyy-mm-dd format"],
     ):
@@ -692,6 +699,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_fundamentals_unified", log_args=True)
+    @prefetchable("get_stock_fundamentals_unified")
     def get_stock_fundamentals_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"] = None,
@@ -1041,6 +1049,7 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_market_data_unified", log_args=True)
+    @prefetchable("get_stock_market_data_unified")
     def get_stock_market_data_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD。注意：系统会自动扩展到配置的回溯天数（通常为365天），你只需要传递分析日期即可"],
@@ -1093,8 +1102,8 @@ class Toolkit:
                     stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
 
                     # 🔍 调试：打印返回数据的前500字符
-                    logger.info(f"🔍 [市场工具调试] A股数据返回长度: {len(stock_data)}")
-                    logger.info(f"🔍 [市场工具调试] A股数据前500字符:\n{stock_data[:500]}")
+                    logger.debug("🔍 [市场工具调试] A股数据返回长度: %d", len(stock_data))
+                    logger.debug("🔍 [市场工具调试] A股数据前500字符:\n%.500s", stock_data)
 
                     result_data.append(f"## A股市场数据\n{stock_data}")
                 except Exception as e:
@@ -1110,8 +1119,8 @@ class Toolkit:
                     hk_data = get_hk_stock_data_unified(ticker, start_date, end_date)
 
                     # 🔍 调试：打印返回数据的前500字符
-                    logger.info(f"🔍 [市场工具调试] 港股数据返回长度: {len(hk_data)}")
-                    logger.info(f"🔍 [市场工具调试] 港股数据前500字符:\n{hk_data[:500]}")
+                    logger.debug("🔍 [市场工具调试] 港股数据返回长度: %d", len(hk_data))
+                    logger.debug("🔍 [市场工具调试] 港股数据前500字符:\n%.500s", hk_data)
 
                     result_data.append(f"## 港股市场数据\n{hk_data}")
                 except Exception as e:
@@ -1171,114 +1180,9 @@ class Toolkit:
         logger.info(f"📰 [统一新闻工具] 分析股票: {ticker}")
 
         try:
-            from tradingagents.utils.stock_utils import StockUtils
-            from datetime import datetime, timedelta
-
-            # 自动识别股票类型
-            market_info = StockUtils.get_market_info(ticker)
-            is_china = market_info['is_china']
-            is_hk = market_info['is_hk']
-            is_us = market_info['is_us']
-
-            logger.info(f"📰 [统一新闻工具] 股票类型: {market_info['market_name']}")
-
-            # 计算新闻查询的日期范围
-            end_date = datetime.strptime(curr_date, '%Y-%m-%d')
-            start_date = end_date - timedelta(days=7)
-            start_date_str = start_date.strftime('%Y-%m-%d')
-
-            result_data = []
-
-            if is_china or is_hk:
-                # 中国A股和港股：使用AKShare东方财富新闻和Google新闻（中文搜索）
-                logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 处理中文新闻...")
-
-                # 1. 尝试获取AKShare东方财富新闻
-                try:
-                    # 处理股票代码
-                    clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
-                                   .replace('.HK', '').replace('.XSHE', '').replace('.XSHG', '')
-                    
-                    logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 尝试获取东方财富新闻: {clean_ticker}")
-
-                    # 通过 AKShare Provider 获取新闻
-                    from tradingagents.dataflows.providers.china.akshare import AKShareProvider
-
-                    provider = AKShareProvider()
-
-                    # 获取东方财富新闻
-                    news_df = provider.get_stock_news_sync(symbol=clean_ticker)
-
-                    if news_df is not None and not news_df.empty:
-                        # 格式化东方财富新闻
-                        em_news_items = []
-                        for _, row in news_df.iterrows():
-                            # AKShare 返回的字段名
-                            news_title = row.get('新闻标题', '') or row.get('标题', '')
-                            news_time = row.get('发布时间', '') or row.get('时间', '')
-                            news_url = row.get('新闻链接', '') or row.get('链接', '')
-
-                            news_item = f"- **{news_title}** [{news_time}]({news_url})"
-                            em_news_items.append(news_item)
-                        
-                        # 添加到结果中
-                        if em_news_items:
-                            em_news_text = "\n".join(em_news_items)
-                            result_data.append(f"## 东方财富新闻\n{em_news_text}")
-                            logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 成功获取{len(em_news_items)}条东方财富新闻")
-                except Exception as em_e:
-                    logger.error(f"❌ [统一新闻工具] 东方财富新闻获取失败: {em_e}")
-                    result_data.append(f"## 东方财富新闻\n获取失败: {em_e}")
-
-                # 2. 获取Google新闻作为补充
-                try:
-                    # 获取公司中文名称用于搜索
-                    if is_china:
-                        # A股使用股票代码搜索，添加更多中文关键词
-                        clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
-                                       .replace('.XSHE', '').replace('.XSHG', '')
-                        search_query = f"{clean_ticker} 股票 公司 财报 新闻"
-                        logger.info(f"🇨🇳 [统一新闻工具] A股Google新闻搜索关键词: {search_query}")
-                    else:
-                        # 港股使用代码搜索
-                        search_query = f"{ticker} 港股"
-                        logger.info(f"🇭🇰 [统一新闻工具] 港股Google新闻搜索关键词: {search_query}")
-
-                    from tradingagents.dataflows.interface import get_google_news
-                    news_data = get_google_news(search_query, curr_date)
-                    result_data.append(f"## Google新闻\n{news_data}")
-                    logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 成功获取Google新闻")
-                except Exception as google_e:
-                    logger.error(f"❌ [统一新闻工具] Google新闻获取失败: {google_e}")
-                    result_data.append(f"## Google新闻\n获取失败: {google_e}")
-
-            else:
-                # 美股：使用Finnhub新闻
-                logger.info(f"🇺🇸 [统一新闻工具] 处理美股新闻...")
-
-                try:
-                    from tradingagents.dataflows.interface import get_finnhub_news
-                    news_data = get_finnhub_news(ticker, start_date_str, curr_date)
-                    result_data.append(f"## 美股新闻\n{news_data}")
-                except Exception as e:
-                    result_data.append(f"## 美股新闻\n获取失败: {e}")
-
-            # 组合所有数据
-            combined_result = f"""# {ticker} 新闻分析
-
-**股票类型**: {market_info['market_name']}
-**分析日期**: {curr_date}
-**新闻时间范围**: {start_date_str} 至 {curr_date}
-
-{chr(10).join(result_data)}
-
----
-*数据来源: 根据股票类型自动选择最适合的新闻源*
-"""
-
-            logger.info(f"📰 [统一新闻工具] 数据获取完成，总长度: {len(combined_result)}")
-            return combined_result
-
+            market_info, start_date_str, fetchers = _news_request(ticker, curr_date)
+            sections = [fetch() for fetch in fetchers]
+            return _format_news_result(ticker, market_info, curr_date, start_date_str, sections)
         except Exception as e:
             error_msg = f"统一新闻工具执行失败: {str(e)}"
             logger.error(f"❌ [统一新闻工具] {error_msg}")
@@ -1377,3 +1281,138 @@ class Toolkit:
             error_msg = f"统一情绪分析工具执行失败: {str(e)}"
             logger.error(f"❌ [统一情绪工具] {error_msg}")
             return error_msg
+
+
+# ----------------------------------------------------------------------
+# 统一新闻工具的数据获取（同步工具顺序执行，异步工具并发执行各新闻源）
+# ----------------------------------------------------------------------
+def _eastmoney_news_section(ticker: str):
+    """东方财富新闻（AKShare），没有新闻时返回 None"""
+    try:
+        # 处理股票代码
+        clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
+                       .replace('.HK', '').replace('.XSHE', '').replace('.XSHG', '')
+
+        logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 尝试获取东方财富新闻: {clean_ticker}")
+
+        # 通过 AKShare Provider 获取新闻
+        from tradingagents.dataflows.providers.china.akshare import AKShareProvider
+
+        provider = AKShareProvider()
+
+        # 获取东方财富新闻
+        news_df = provider.get_stock_news_sync(symbol=clean_ticker)
+
+        if news_df is not None and not news_df.empty:
+            # 格式化东方财富新闻
+            em_news_items = []
+            for _, row in news_df.iterrows():
+                # AKShare 返回的字段名
+                news_title = row.get('新闻标题', '') or row.get('标题', '')
+                news_time = row.get('发布时间', '') or row.get('时间', '')
+                news_url = row.get('新闻链接', '') or row.get('链接', '')
+
+                news_item = f"- **{news_title}** [{news_time}]({news_url})"
+                em_news_items.append(news_item)
+
+            if em_news_items:
+                logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 成功获取{len(em_news_items)}条东方财富新闻")
+                em_news_text = "\n".join(em_news_items)
+                return f"## 东方财富新闻\n{em_news_text}"
+        return None
+    except Exception as em_e:
+        logger.error(f"❌ [统一新闻工具] 东方财富新闻获取失败: {em_e}")
+        return f"## 东方财富新闻\n获取失败: {em_e}"
+
+
+def _google_news_section(ticker: str, is_china: bool, curr_date: str) -> str:
+    """Google新闻（中文关键词搜索）"""
+    try:
+        if is_china:
+            # A股使用股票代码搜索，添加更多中文关键词
+            clean_ticker = ticker.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
+                           .replace('.XSHE', '').replace('.XSHG', '')
+            search_query = f"{clean_ticker} 股票 公司 财报 新闻"
+            logger.info(f"🇨🇳 [统一新闻工具] A股Google新闻搜索关键词: {search_query}")
+        else:
+            # 港股使用代码搜索
+            search_query = f"{ticker} 港股"
+            logger.info(f"🇭🇰 [统一新闻工具] 港股Google新闻搜索关键词: {search_query}")
+
+        from tradingagents.dataflows.interface import get_google_news
+        news_data = get_google_news(search_query, curr_date)
+        logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 成功获取Google新闻")
+        return f"## Google新闻\n{news_data}"
+    except Exception as google_e:
+        logger.error(f"❌ [统一新闻工具] Google新闻获取失败: {google_e}")
+        return f"## Google新闻\n获取失败: {google_e}"
+
+
+def _finnhub_news_section(ticker: str, start_date: str, curr_date: str) -> str:
+    """美股新闻（Finnhub）"""
+    try:
+        from tradingagents.dataflows.interface import get_finnhub_news
+        news_data = get_finnhub_news(ticker, start_date, curr_date)
+        return f"## 美股新闻\n{news_data}"
+    except Exception as e:
+        return f"## 美股新闻\n获取失败: {e}"
+
+
+def _news_request(ticker: str, curr_date: str):
+    """识别市场并确定新闻时间范围，返回 (市场信息, 起始日期, 各新闻源的获取函数)；各新闻源互不依赖"""
+    from tradingagents.utils.stock_utils import StockUtils
+
+    # 自动识别股票类型
+    market_info = StockUtils.get_market_info(ticker)
+    logger.info(f"📰 [统一新闻工具] 股票类型: {market_info['market_name']}")
+
+    # 计算新闻查询的日期范围
+    end_date = datetime.strptime(curr_date, '%Y-%m-%d')
+    start_date_str = (end_date - timedelta(days=7)).strftime('%Y-%m-%d')
+
+    if market_info['is_china'] or market_info['is_hk']:
+        # 中国A股和港股：使用AKShare东方财富新闻和Google新闻（中文搜索）
+        logger.info(f"🇨🇳🇭🇰 [统一新闻工具] 处理中文新闻...")
+        fetchers = [
+            functools.partial(_eastmoney_news_section, ticker),
+            functools.partial(_google_news_section, ticker, market_info['is_china'], curr_date),
+        ]
+    else:
+        # 美股：使用Finnhub新闻
+        logger.info(f"🇺🇸 [统一新闻工具] 处理美股新闻...")
+        fetchers = [functools.partial(_finnhub_news_section, ticker, start_date_str, curr_date)]
+    return market_info, start_date_str, fetchers
+
+
+def _format_news_result(ticker: str, market_info: dict, curr_date: str, start_date_str: str, sections) -> str:
+    result_data = [section for section in sections if section]
+    combined_result = f"""# {ticker} 新闻分析
+
+**股票类型**: {market_info['market_name']}
+**分析日期**: {curr_date}
+**新闻时间范围**: {start_date_str} 至 {curr_date}
+
+{chr(10).join(result_data)}
+
+---
+*数据来源: 根据股票类型自动选择最适合的新闻源*
+"""
+
+    logger.info(f"📰 [统一新闻工具] 数据获取完成，总长度: {len(combined_result)}")
+    return combined_result
+
+
+async def _aget_stock_news_unified(ticker: str, curr_date: str) -> str:
+    """get_stock_news_unified 的异步实现（apropagate 下由 ToolNode 调用）：各新闻源在线程中并发获取"""
+    logger.info(f"📰 [统一新闻工具] 分析股票(异步): {ticker}")
+    try:
+        market_info, start_date_str, fetchers = await asyncio.to_thread(_news_request, ticker, curr_date)
+        sections = await asyncio.gather(*(asyncio.to_thread(fetch) for fetch in fetchers))
+        return _format_news_result(ticker, market_info, curr_date, start_date_str, sections)
+    except Exception as e:
+        error_msg = f"统一新闻工具执行失败: {str(e)}"
+        logger.error(f"❌ [统一新闻工具] {error_msg}")
+        return error_msg
+
+
+Toolkit.get_stock_news_unified.coroutine = _aget_stock_news_unified
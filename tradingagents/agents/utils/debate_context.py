@@ -0,0 +1,206 @@
+"""
+辩论上下文预算
+
+投资辩论和风险讨论的 history 是不断追加的字符串，每次发言都会把完整历史发回 LLM，
+提示词长度随 max_debate_rounds × max_risk_discuss_rounds 增长。
+
+DebateContextBudget 为研究员、风险分析师和裁判节点限制历史部分的 Token 预算：
+- 历史未超出预算时原样使用
+- 超出时保留最近的若干次发言原文，更早的发言压缩为滚动摘要
+- 摘要按历史前缀缓存：下一轮只需把新滑出窗口的发言并入已有摘要，同一份摘要被多空双方、
+  裁判共用，每段历史只摘要一次
+
+状态中保存的仍是完整历史，只有发给 LLM 的提示词被压缩。
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+# 各发言者写入历史时使用的前缀，用于切分发言
+_TURN_PATTERN = re.compile(r"\n(?=(?:Bull|Bear|Risky|Safe|Neutral) Analyst:)")
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+# 默认的节点角色预算（tokens）
+DEFAULT_BUDGETS = {"researcher": 6000, "risk_debator": 6000, "manager": 12000}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 Token 数：中文字符约 1 token/字，其余约 4 字符/token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """按估算 Token 数截断文本"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # 二分查找满足预算的最长前缀/后缀
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        part = text[-mid:] if keep_tail else text[:mid]
+        if estimate_tokens(part) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[-low:] if keep_tail and low else text[:low]
+
+
+def split_turns(history: str) -> List[str]:
+    """把辩论历史切分为单次发言（每段以 '\\n' 开头，拼接后与原文一致）"""
+    if not history:
+        return []
+    parts = _TURN_PATTERN.split(history)
+    return [parts[0]] + ["\n" + part for part in parts[1:]]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class DebateContextBudget:
+    """辩论历史的 Token 预算与滚动摘要（每个图实例一个，节点间共享摘要缓存）"""
+
+    def __init__(
+        self,
+        llm,
+        budgets: Optional[Dict[str, int]] = None,
+        summary_tokens: int = 1500,
+        max_entries: int = 128,
+    ):
+        """
+        Args:
+            llm: 生成摘要使用的模型（通常为快速模型）
+            budgets: 节点角色 -> 历史部分的 Token 预算，<=0 表示该角色不限制
+            summary_tokens: 滚动摘要的目标长度
+            max_entries: 摘要缓存的最大条目数
+        """
+        self.llm = llm
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.summary_tokens = summary_tokens
+        self.max_entries = max_entries
+        # 历史前缀摘要 -> (前缀长度, 摘要)
+        self._summaries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"bounded": 0, "summaries": 0, "reused": 0}
+
+    @classmethod
+    def from_config(cls, llm, config: dict) -> Optional["DebateContextBudget"]:
+        """按配置创建；未开启时返回 None"""
+        if not config.get("debate_context_budget_enabled", True):
+            return None
+        return cls(
+            llm,
+            budgets={
+                "researcher": config.get("researcher_context_tokens", DEFAULT_BUDGETS["researcher"]),
+                "risk_debator": config.get("risk_debator_context_tokens", DEFAULT_BUDGETS["risk_debator"]),
+                "manager": config.get("manager_context_tokens", DEFAULT_BUDGETS["manager"]),
+            },
+            summary_tokens=config.get("debate_summary_tokens", 1500),
+        )
+
+    def bound(self, history: str, role: str = "researcher") -> str:
+        """返回不超过角色预算的历史文本：早期发言摘要 + 最近发言原文"""
+        budget = self.budgets.get(role, 0)
+        if budget <= 0 or estimate_tokens(history) <= budget:
+            return history
+
+        turns = split_turns(history)
+        recent_budget = max(budget - self.summary_tokens, budget // 2)
+        recent: List[str] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn)
+            if recent and used + cost > recent_budget:
+                break
+            recent.insert(0, turn)
+            used += cost
+
+        if len(recent) == 1 and used > recent_budget:
+            # 单次发言就超出预算：保留其结尾部分
+            recent = ["\n" + truncate_to_tokens(recent[0], recent_budget, keep_tail=True).lstrip("\n")]
+
+        cutoff = len(history) - sum(len(t) for t in turns[len(turns) - len(recent):])
+        summary = self._summary_for(history[:cutoff]) if cutoff > 0 else ""
+        self.stats["bounded"] += 1
+        logger.info(f"✂️ [辩论上下文] {role}: 历史 ~{estimate_tokens(history):,} tokens -> "
+                    f"摘要 {len(turns) - len(recent)} 次发言 + 保留最近 {len(recent)} 次发言 (预算 {budget:,})")
+        if not summary:
+            return "".join(recent)
+        return f"【此前辩论摘要】\n{summary}\n\n【最近发言】{''.join(recent)}"
+
+    # ------------------------------------------------------------------
+    # 滚动摘要
+    # ------------------------------------------------------------------
+    def _summary_for(self, prefix: str) -> str:
+        key = _digest(prefix)
+        with self._lock:
+            cached = self._summaries.get(key)
+            if cached is not None:
+                self._summaries.move_to_end(key)
+                self.stats["reused"] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                base_length, base_summary = self._longest_cached_prefix(prefix)
+
+        if not owner:
+            # 并发的另一方正在生成同一份摘要
+            self.stats["reused"] += 1
+            return future.result()
+
+        try:
+            summary = self._summarize(base_summary, prefix[base_length:])
+            with self._lock:
+                self._summaries[key] = (len(prefix), summary)
+                while len(self._summaries) > self.max_entries:
+                    self._summaries.popitem(last=False)
+            future.set_result(summary)
+            return summary
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _longest_cached_prefix(self, prefix: str) -> Tuple[int, str]:
+        """找到已摘要过的最长历史前缀，只需把其后的新发言并入（调用方持有锁）"""
+        best = (0, "")
+        for key, (length, summary) in self._summaries.items():
+            if best[0] < length <= len(prefix) and _digest(prefix[:length]) == key:
+                best = (length, summary)
+        return best
+
+    def _summarize(self, previous_summary: str, new_turns: str) -> str:
+        self.stats["summaries"] += 1
+        limit_chars = self.summary_tokens
+        prompt = f"""请把以下辩论内容压缩为不超过{limit_chars}字的中文摘要，供后续发言者参考。
+要求：按发言者保留核心论点、关键数据和主要分歧，删除重复和客套内容，不要添加新的观点。
+
+已有摘要：
+{previous_summary or '（无）'}
+
+需要并入摘要的新发言：
+{new_turns}
+"""
+        try:
+            summary = self.llm.invoke(prompt).content.strip()
+        except Exception as e:
+            logger.warning(f"⚠️ [辩论上下文] 摘要生成失败，改为截断: {e}")
+            summary = f"{previous_summary}\n{new_turns}".strip()
+        return truncate_to_tokens(summary, self.summary_tokens, keep_tail=True)
@@ -40,6 +40,7 @@ logger = get_logger('agents')
 
 # 导入数据模型（避免循环导入）
 from .usage_models import UsageRecord, ModelConfig, PricingConfig
+from tradingagents.utils.audit_writer import AuditSinkUnavailable, get_audit_writer, read_jsonl
 
 try:
     from .mongodb_storage import MongoDBStorage
@@ -68,6 +69,8 @@ class ConfigManager:
         self.models_file = self.config_dir / "models.json"
         self.pricing_file = self.config_dir / "pricing.json"
         self.usage_file = self.config_dir / "usage.json"
+        # 追加写入的使用记录文件（JSONL），usage.json 仅作为旧版本数据兼容读取
+        self.usage_log_file = self.config_dir / "usage.jsonl"
         self.settings_file = self.config_dir / "settings.json"
 
         # 加载.env文件（保持向后兼容）
@@ -364,26 +367,63 @@ class ConfigManager:
             logger.error(f"保存定价配置失败: {e}")
     
     def load_usage_records(self) -> List[UsageRecord]:
-        """加载使用记录"""
+        """加载使用记录（旧版 usage.json + 追加写入的 usage.jsonl）"""
         try:
-            if not self.usage_file.exists():
-                return []
-            with open(self.usage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [UsageRecord(**item) for item in data]
+            # 先写出缓冲区中的记录，保证读到最新数据
+            self._get_usage_writer().flush()
+
+            data: List[Dict[str, Any]] = []
+            if self.usage_file.exists():
+                with open(self.usage_file, 'r', encoding='utf-8') as f:
+                    data.extend(json.load(f))
+            data.extend(read_jsonl(self.usage_log_file))
+
+            records = []
+            for item in data:
+                item.pop('_id', None)
+                item.pop('_created_at', None)
+                records.append(UsageRecord(**item))
+
+            # 限制记录数量：超出上限较多时压缩一次文件（均摊 O(1)）
+            max_records = self.load_settings().get("max_usage_records", 10000)
+            if len(records) > max_records:
+                records = records[-max_records:]
+                if len(data) > max_records * 2:
+                    self.save_usage_records(records)
+            return records
         except Exception as e:
             logger.error(f"加载使用记录失败: {e}")
             return []
-    
+
     def save_usage_records(self, records: List[UsageRecord]):
-        """保存使用记录"""
+        """保存使用记录（整体重写 usage.jsonl，并合并掉旧版 usage.json）"""
         try:
-            data = [asdict(record) for record in records]
-            with open(self.usage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._get_usage_writer().flush()
+            tmp_file = self.usage_log_file.with_suffix(".jsonl.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+            os.replace(tmp_file, self.usage_log_file)
+            if self.usage_file.exists():
+                self.usage_file.unlink()
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
-    
+
+    def _get_usage_writer(self):
+        """获取使用记录的后台批量写入器（MongoDB 优先，失败时追加到 usage.jsonl）"""
+        return get_audit_writer(
+            f"token_usage:{self.config_dir.resolve()}",
+            sink=self._write_usage_batch,
+            fallback_file=self.usage_log_file,
+        )
+
+    def _write_usage_batch(self, batch: List[Dict[str, Any]]):
+        """批量写入MongoDB；未连接时抛出异常，由写入器回退到JSONL文件"""
+        if not (self.mongodb_storage and self.mongodb_storage.is_connected()):
+            raise AuditSinkUnavailable()
+        if not self.mongodb_storage.save_usage_documents(batch):
+            raise RuntimeError("MongoDB批量写入失败")
+
     def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
                         output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
         """添加使用记录"""
@@ -402,42 +442,11 @@ class ConfigManager:
             analysis_type=analysis_type
         )
 
-        # 🔍 详细日志：记录保存位置
-        logger.info(f"💾 [Token记录] 准备保存: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{cost:.4f}, session={session_id}")
-
-        # 优先使用MongoDB存储
-        if self.mongodb_storage and self.mongodb_storage.is_connected():
-            logger.info(f"📊 [Token记录] 使用 MongoDB 存储 (数据库: {self.mongodb_storage.database_name}, 集合: {self.mongodb_storage.collection_name})")
-            success = self.mongodb_storage.save_usage_record(record)
-            if success:
-                logger.info(f"✅ [Token记录] MongoDB 保存成功: {provider}/{model_name}")
-                return record
-            else:
-                logger.error(f"⚠️ [Token记录] MongoDB保存失败，回退到JSON文件存储")
-        else:
-            # 🔍 详细日志：为什么没有使用MongoDB
-            if self.mongodb_storage is None:
-                logger.warning(f"⚠️ [Token记录] MongoDB存储未初始化 (mongodb_storage=None)")
-                logger.warning(f"   💡 请检查环境变量: USE_MONGODB_STORAGE={os.getenv('USE_MONGODB_STORAGE', '未设置')}")
-            elif not self.mongodb_storage.is_connected():
-                logger.warning(f"⚠️ [Token记录] MongoDB未连接 (is_connected=False)")
-
-            logger.info(f"📄 [Token记录] 使用 JSON 文件存储: {self.usage_file}")
-
-        # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
-
-        # 限制记录数量
-        settings = self.load_settings()
-        max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
-
-        self.save_usage_records(records)
-        logger.info(f"✅ [Token记录] JSON 文件保存成功: {self.usage_file}")
+        # 异步批量写入：MongoDB 优先，不可用时追加到 usage.jsonl，不阻塞 LLM 调用
+        self._get_usage_writer().submit(asdict(record))
+        logger.debug(f"💾 [Token记录] 已提交: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{cost:.4f}, session={session_id}")
         return record
-    
+
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> tuple[float, str]:
         """
         计算使用成本
@@ -558,6 +567,8 @@ class ConfigManager:
     
     def get_usage_statistics(self, days: int = 30) -> Dict[str, Any]:
         """获取使用统计"""
+        self._get_usage_writer().flush()
+
         # 优先使用MongoDB获取统计
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             try:
@@ -694,6 +705,9 @@ class TokenTracker:
 
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        # 今日累计成本（按天懒加载一次，之后增量累加，避免每次调用都全量统计）
+        self._today: Optional[str] = None
+        self._today_cost = 0.0
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
                    output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
@@ -729,9 +743,15 @@ class TokenTracker:
         settings = self.config_manager.load_settings()
         threshold = settings.get("cost_alert_threshold", 100.0)
 
-        # 获取今日总成本
-        today_stats = self.config_manager.get_usage_statistics(1)
-        total_today = today_stats["total_cost"]
+        # 获取今日总成本：每天只全量统计一次，之后增量累加
+        today = datetime.now(ZoneInfo(get_timezone_name())).strftime('%Y-%m-%d')
+        if self._today != today:
+            today_stats = self.config_manager.get_usage_statistics(1)
+            self._today = today
+            self._today_cost = today_stats["total_cost"]
+        else:
+            self._today_cost += current_cost
+        total_today = self._today_cost
 
         if total_today >= threshold:
             logger.warning(f"⚠️ 成本警告: 今日成本已达到 ¥{total_today:.4f}，超过阈值 ¥{threshold}",
@@ -5,11 +5,23 @@ MongoDB存储适配器
 """
 
 import os
+import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from typing import Dict, List, Optional, Any
 from dataclasses import asdict
 from .usage_models import UsageRecord
+from .usage_buckets import (
+    BUCKET_COLLECTION,
+    MIGRATION_DONE,
+    MIGRATION_ID,
+    STATE_CACHE_SECONDS,
+    bucket_filter,
+    bucket_increments,
+    bucket_index_spec,
+    bucket_update,
+    counted_live,
+)
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -17,8 +29,8 @@ from tradingagents.config.runtime_settings import get_timezone_name
 logger = get_logger('agents')
 
 try:
-    from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+    from pymongo import MongoClient, UpdateOne
+    from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
@@ -49,6 +61,9 @@ class MongoDBStorage:
         self.db = None
         self.collection = None
         self._connected = False
+        # 按日聚合桶迁移状态缓存（截止点由 app 启动时的迁移确定）
+        self._bucket_state: Optional[Dict[str, Any]] = None
+        self._bucket_state_at = 0.0
         
         # 尝试连接
         self._connect()
@@ -103,6 +118,9 @@ class MongoDBStorage:
             
             # 创建分析类型索引
             self.collection.create_index("analysis_type")
+
+            # 按日聚合桶的唯一索引
+            self.db[BUCKET_COLLECTION].create_index(bucket_index_spec(), unique=True)
             
         except Exception as e:
             logger.error(f"创建MongoDB索引失败: {e}")
@@ -132,6 +150,7 @@ class MongoDBStorage:
             result = self.collection.insert_one(record_dict)
 
             if result.inserted_id:
+                self._update_daily_buckets([record_dict])
                 logger.info(f"✅ [MongoDB存储] 记录已保存: ID={result.inserted_id}, {record.provider}/{record.model_name}, ¥{record.cost:.4f}")
                 return True
             else:
@@ -144,6 +163,69 @@ class MongoDBStorage:
             logger.error(f"   堆栈: {traceback.format_exc()}")
             return False
     
+    def save_usage_documents(self, documents: List[Dict[str, Any]]) -> bool:
+        """
+        批量保存使用记录（供后台批量写入器调用）
+
+        部分记录写入失败时抛出 AuditPartialWrite（只包含失败的记录），已写入的记录照常累加到桶
+        """
+        if not self._connected:
+            return False
+        if not documents:
+            return True
+
+        from tradingagents.utils.audit_writer import AuditPartialWrite
+
+        try:
+            created_at = datetime.now(ZoneInfo(get_timezone_name()))
+            docs = [{**doc, '_created_at': created_at} for doc in documents]
+            try:
+                self.collection.insert_many(docs, ordered=False)
+                failed = set()
+            except BulkWriteError as e:
+                failed = {err["index"] for err in e.details.get("writeErrors", [])}
+            # 只累加实际写入的记录；失败的原始记录交给写入器回退，之后重放时再累加
+            self._update_daily_buckets([doc for i, doc in enumerate(docs) if i not in failed])
+            if failed:
+                raise AuditPartialWrite([documents[i] for i in sorted(failed)])
+            logger.debug(f"✅ [MongoDB存储] 批量保存 {len(docs)} 条记录")
+            return True
+        except AuditPartialWrite:
+            raise
+        except Exception as e:
+            logger.error(f"❌ [MongoDB存储] 批量保存记录失败: {e}")
+            return False
+
+    def _cutoff_id(self):
+        """按日聚合迁移的截止 _id（尚未开始迁移时为 None，此时不累加桶）"""
+        state = self._bucket_state
+        if state is None or (
+            state.get("status") != MIGRATION_DONE and time.monotonic() - self._bucket_state_at > STATE_CACHE_SECONDS
+        ):
+            state = self.db[BUCKET_COLLECTION].find_one({"_id": MIGRATION_ID}) or {}
+            self._bucket_state = state
+            self._bucket_state_at = time.monotonic()
+        return state.get("cutoff_id")
+
+    def _update_daily_buckets(self, documents: List[Dict[str, Any]]):
+        """
+        将新写入的记录累加到按日聚合桶（每个桶一次 $inc，失败不影响原始记录）
+
+        只累加 _id 不早于迁移截止点的记录，更早的记录由迁移重建统计
+        """
+        try:
+            now = datetime.now(ZoneInfo(get_timezone_name()))
+            cutoff_id = self._cutoff_id()
+            live = [doc for doc in documents if counted_live(doc, cutoff_id)]
+            operations = [
+                UpdateOne(bucket_filter(key), bucket_update(inc, now), upsert=True)
+                for key, inc in bucket_increments(live).items()
+            ]
+            if operations:
+                self.db[BUCKET_COLLECTION].bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"❌ [MongoDB存储] 更新按日聚合桶失败: {e}")
+
     def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
         """从MongoDB加载使用记录"""
         if not self._connected:
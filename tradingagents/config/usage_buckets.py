@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Token 使用量按日预聚合
+
+token_usage 每条 LLM 调用一条记录，历史增长到百万级后按时间范围扫描原始记录做统计会越来越慢。
+写入记录时同步累加到 token_usage_daily：每个 (日期, 供应商, 模型, 货币) 一个桶文档，
+看板查询 30/90 天只需读取几百个桶，统计用同一套 $facet 管道完成。
+
+历史记录由一次性迁移重建（在桶集合的 _migration 状态文档上加锁，只有一个 worker 执行）：
+迁移选定一个截止 _id，_id 早于截止点的记录由服务端聚合写入桶的 history 子文档，
+不早于截止点的记录由写入方 $inc 到桶的顶层计数；两部分按 _id 划分、互不重叠，
+重建只覆盖 history，可以安全重跑。迁移完成前统计直接读取原始记录。
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BUCKET_COLLECTION = "token_usage_daily"
+
+# 桶的唯一键（同时用于 $merge 的 on 字段）
+BUCKET_KEY_FIELDS = ("date", "provider", "model_name", "currency")
+
+COUNTER_FIELDS = ("requests", "input_tokens", "output_tokens", "cost")
+
+# 历史重建写入的子文档（与写入方 $inc 的顶层计数分开存放）
+HISTORY_FIELD = "history"
+
+# 迁移状态文档的 _id（没有 date 字段，不会被统计查询匹配）
+MIGRATION_ID = "_migration"
+MIGRATION_DONE = "done"
+# 写入方缓存迁移状态的时间（秒）
+STATE_CACHE_SECONDS = 60
+# 截止点相对迁移开始的延后时间：大于状态缓存时间，保证截止点之后插入记录时所有写入方都已读到截止点
+CUTOFF_DELAY_SECONDS = 2 * STATE_CACHE_SECONDS
+# 截止点之后再等待的时间，让截止点之前已分配 _id 的插入完成
+CUTOFF_SETTLE_SECONDS = 15
+# 迁移锁有效期（超时视为执行迁移的 worker 已退出，其他 worker 可以接手）
+MIGRATION_LOCK_SECONDS = 30 * 60
+
+
+def bucket_key(record: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """使用记录所属的桶：日期取时间戳前10位（记录写入时的本地日期）"""
+    return (
+        str(record.get("timestamp") or "")[:10],
+        record.get("provider") or "unknown",
+        record.get("model_name") or "unknown",
+        record.get("currency") or "CNY",
+    )
+
+
+def bucket_increments(records: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str, str, str], Dict[str, Any]]:
+    """将一批使用记录合并为每个桶的增量，批量写入时每个桶只需一次 $inc"""
+    increments: Dict[Tuple[str, str, str, str], Dict[str, Any]] = defaultdict(
+        lambda: {"requests": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+    )
+    for record in records:
+        key = bucket_key(record)
+        if not key[0]:
+            continue
+        inc = increments[key]
+        inc["requests"] += 1
+        inc["input_tokens"] += record.get("input_tokens") or 0
+        inc["output_tokens"] += record.get("output_tokens") or 0
+        inc["cost"] += record.get("cost") or 0.0
+    return dict(increments)
+
+
+def bucket_filter(key: Tuple[str, str, str, str]) -> Dict[str, str]:
+    """桶的查询条件"""
+    return dict(zip(BUCKET_KEY_FIELDS, key))
+
+
+def bucket_update(inc: Dict[str, Any], now: Any) -> Dict[str, Any]:
+    """桶的 upsert 更新文档"""
+    return {"$inc": inc, "$set": {"updated_at": now}}
+
+
+def counted_live(record: Dict[str, Any], cutoff_id: Any) -> bool:
+    """
+    记录是否由写入方实时累加到桶
+
+    只有已读到迁移截止点、且记录 _id 不早于截止点时才累加；更早的记录由历史重建统计
+    """
+    record_id = record.get("_id")
+    if cutoff_id is None or record_id is None:
+        return False
+    try:
+        return record_id >= cutoff_id
+    except TypeError:
+        return False
+
+
+def bucket_index_spec() -> List[Tuple[str, int]]:
+    """桶集合的唯一索引（date 在前，便于按日期范围查询）"""
+    return [(field, 1) for field in BUCKET_KEY_FIELDS]
+
+
+def records_as_buckets_stages() -> List[Dict[str, Any]]:
+    """把原始记录投影成桶的形状（每条记录 requests=1），以便与桶共用统计管道"""
+    return [
+        {
+            "$project": {
+                "_id": 0,
+                "date": {"$substrCP": [{"$ifNull": ["$timestamp", ""]}, 0, 10]},
+                "provider": {"$ifNull": ["$provider", "unknown"]},
+                "model_name": {"$ifNull": ["$model_name", "unknown"]},
+                "currency": {"$ifNull": ["$currency", "CNY"]},
+                "requests": {"$literal": 1},
+                "input_tokens": {"$ifNull": ["$input_tokens", 0]},
+                "output_tokens": {"$ifNull": ["$output_tokens", 0]},
+                "cost": {"$ifNull": ["$cost", 0.0]},
+            }
+        }
+    ]
+
+
+def bucket_totals_stages() -> List[Dict[str, Any]]:
+    """桶的计数 = 写入方累加的顶层计数 + 历史重建的 history 计数"""
+    return [
+        {
+            "$addFields": {
+                field: {"$add": [{"$ifNull": [f"${field}", 0]}, {"$ifNull": [f"${HISTORY_FIELD}.{field}", 0]}]}
+                for field in COUNTER_FIELDS
+            }
+        }
+    ]
+
+
+def rebuild_pipeline(match: Optional[Dict[str, Any]] = None, history: bool = False) -> List[Dict[str, Any]]:
+    """
+    由原始记录重算桶并 $merge 到桶集合
+
+    Args:
+        match: 参与重算的原始记录条件
+        history: True 时只写入桶的 history 子文档（迁移重建，保留写入方累加的计数）；
+            False 时整体替换桶（清理旧记录后重算不再有新写入的日期）
+    """
+    pipeline: List[Dict[str, Any]] = [{"$match": match}] if match else []
+    pipeline += records_as_buckets_stages()
+    pipeline += [
+        {"$match": {"date": {"$ne": ""}}},
+        {
+            "$group": {
+                "_id": {field: f"${field}" for field in BUCKET_KEY_FIELDS},
+                **{field: {"$sum": f"${field}"} for field in COUNTER_FIELDS},
+            }
+        },
+    ]
+    if history:
+        pipeline += [
+            {
+                "$project": {
+                    "_id": 0,
+                    **{field: f"$_id.{field}" for field in BUCKET_KEY_FIELDS},
+                    HISTORY_FIELD: {field: f"${field}" for field in COUNTER_FIELDS},
+                }
+            },
+            {
+                "$merge": {
+                    "into": BUCKET_COLLECTION,
+                    "on": list(BUCKET_KEY_FIELDS),
+                    "whenMatched": [{"$set": {HISTORY_FIELD: f"$$new.{HISTORY_FIELD}"}}],
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+    else:
+        pipeline += [
+            {
+                "$project": {
+                    "_id": 0,
+                    **{field: f"$_id.{field}" for field in BUCKET_KEY_FIELDS},
+                    **{field: 1 for field in COUNTER_FIELDS},
+                }
+            },
+            {
+                "$merge": {
+                    "into": BUCKET_COLLECTION,
+                    "on": list(BUCKET_KEY_FIELDS),
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+    return pipeline
+
+
+def _sum_by(*fields: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "$group": {
+                "_id": {field: f"${field}" for field in fields},
+                **{counter: {"$sum": f"${counter}"} for counter in COUNTER_FIELDS},
+            }
+        }
+    ]
+
+
+def rollup_facet_stage() -> Dict[str, Any]:
+    """
+    一次 $facet 同时得到总计、按供应商、按模型、按日期的汇总（均再按货币拆分）
+
+    输入文档须为桶的形状（经 bucket_totals_stages 合并计数的桶，或经 records_as_buckets_stages 投影的原始记录）
+    """
+    return {
+        "$facet": {
+            "totals": _sum_by("currency"),
+            "by_provider": _sum_by("provider", "currency"),
+            "by_model": _sum_by("provider", "model_name", "currency"),
+            "by_date": _sum_by("date", "currency"),
+        }
+    }
+
+
+def _empty_group() -> Dict[str, Any]:
+    return {
+        "requests": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cost": 0.0,
+        "cost_by_currency": defaultdict(float),
+    }
+
+
+def _accumulate(target: Dict[str, Any], row: Dict[str, Any], currency: str) -> None:
+    target["requests"] += row.get("requests", 0)
+    target["input_tokens"] += row.get("input_tokens", 0)
+    target["output_tokens"] += row.get("output_tokens", 0)
+    target["cost"] += row.get("cost", 0.0)
+    target["cost_by_currency"][currency] += row.get("cost", 0.0)
+
+
+def new_rollup() -> Dict[str, Any]:
+    """空的汇总结果，可依次合并多个 $facet 结果"""
+    return {
+        "totals": _empty_group(),
+        "by_provider": defaultdict(_empty_group),
+        "by_model": defaultdict(_empty_group),
+        "by_date": defaultdict(_empty_group),
+    }
+
+
+def fold_rollup(rollup: Dict[str, Any], facet: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """将一个 $facet 结果合并进汇总"""
+    for row in facet.get("totals", []):
+        _accumulate(rollup["totals"], row, row["_id"].get("currency") or "CNY")
+    for row in facet.get("by_provider", []):
+        key = row["_id"]
+        _accumulate(rollup["by_provider"][key.get("provider") or "unknown"], row, key.get("currency") or "CNY")
+    for row in facet.get("by_model", []):
+        key = row["_id"]
+        model_key = f"{key.get('provider') or 'unknown'}/{key.get('model_name') or 'unknown'}"
+        _accumulate(rollup["by_model"][model_key], row, key.get("currency") or "CNY")
+    for row in facet.get("by_date", []):
+        key = row["_id"]
+        if key.get("date"):
+            _accumulate(rollup["by_date"][key["date"]], row, key.get("currency") or "CNY")
+    return rollup
+
+
+def plain_groups(groups: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """转换 defaultdict 为普通 dict（包括嵌套的 cost_by_currency）"""
+    return {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in groups.items()}
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+日线 -> 周线/月线 本地重采样
+
+多周期同步时每只股票只向数据源请求一次日线（前复权），周线、月线由日线向量化聚合得到，
+与数据源按同样口径生成的周/月K一致：
+- 周：自然周（周一至周日），月：自然月
+- 开=首日开盘，高=最高，低=最低，收=末日收盘，量/额/换手率=求和
+- 日期标记为该周/月内最后一个交易日（节假日、停牌日自然跳过）；周期未结束时标记日期会随同步后移，
+  保存时按 period_span 删除同一周期内被取代的旧K线
+- 昨收=上一周/月的收盘价，涨跌额/涨跌幅据此重算
+"""
+
+from typing import Optional, Tuple
+
+import pandas as pd
+
+# 支持重采样的周期及其 pandas Period 频率
+PERIOD_FREQ = {
+    "weekly": "W-SUN",
+    "monthly": "M",
+}
+
+# 各数据源日线中的列名 -> 标准列名
+_COLUMN_ALIASES = {
+    "vol": "volume",
+    "turnover": "amount",
+    "turn": "turnover_rate",
+    "preclose": "pre_close",
+}
+
+
+def _daily_frame(daily: pd.DataFrame) -> pd.DataFrame:
+    """统一日期与列名，按日期升序"""
+    df = daily.rename(columns={k: v for k, v in _COLUMN_ALIASES.items() if v not in daily.columns})
+    if "date" in df.columns:
+        dates = df["date"]
+    elif "trade_date" in df.columns:
+        dates = df["trade_date"]
+    else:
+        dates = df.index.to_series(index=df.index)
+    dates = pd.to_datetime(
+        dates.astype(str).str.replace("-", "", regex=False).str[:8],
+        format="%Y%m%d",
+        errors="coerce",
+    )
+    df = df.assign(date=dates.to_numpy()).dropna(subset=["date"])
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def resample_bars(daily: Optional[pd.DataFrame], period: str) -> Optional[pd.DataFrame]:
+    """
+    由日线聚合周线或月线
+
+    Args:
+        daily: 日线数据（日期在 date/trade_date 列或索引中）
+        period: weekly / monthly
+
+    Returns:
+        以日期为索引（名为 date）的 DataFrame；输入为空时返回 None
+    """
+    if period not in PERIOD_FREQ:
+        raise ValueError(f"不支持的重采样周期: {period}")
+    if daily is None or daily.empty:
+        return None
+
+    df = _daily_frame(daily)
+    if df.empty or "close" not in df.columns:
+        return None
+
+    keys = df["date"].dt.to_period(PERIOD_FREQ[period])
+    grouped = df.groupby(keys, sort=True)
+
+    bars = pd.DataFrame({"date": grouped["date"].last()})
+    for column, how in (("open", "first"), ("high", "max"), ("low", "min"), ("close", "last")):
+        if column in df.columns:
+            bars[column] = grouped[column].agg(how)
+    for column in ("volume", "amount", "turnover_rate"):
+        if column in df.columns:
+            bars[column] = grouped[column].sum(min_count=1)
+
+    # 昨收：上一周期收盘；首个周期取其首日的昨收
+    pre_close = bars["close"].shift(1)
+    if "pre_close" in df.columns:
+        pre_close.iloc[0] = grouped["pre_close"].first().iloc[0]
+    bars["pre_close"] = pre_close
+    bars["change"] = (bars["close"] - bars["pre_close"]).round(4)
+    bars["pct_chg"] = (bars["change"] / bars["pre_close"] * 100).round(4)
+
+    return bars.set_index("date")
+
+
+def period_span(dates, period: str) -> Tuple[str, str]:
+    """
+    一组周/月K日期所覆盖的完整周期范围（首个周期的第一天, 末个周期的最后一天），格式 YYYY-MM-DD
+
+    用于找出同一周期内标记日期不同的旧K线：周期未结束时按当时最后一个交易日标记，
+    周期内之后再同步时标记日期会后移
+    """
+    periods = pd.to_datetime(pd.Series(list(dates))).dt.to_period(PERIOD_FREQ[period])
+    return (
+        periods.min().start_time.strftime("%Y-%m-%d"),
+        periods.max().end_time.strftime("%Y-%m-%d"),
+    )
+
+
+def period_start(date_str: Optional[str], periods) -> Optional[str]:
+    """
+    需要聚合周/月线时，把起始日期向前对齐到所在月的1日（同时覆盖所在周的周一），
+    避免首个周/月K只由窗口内的部分交易日聚合而成
+    """
+    if not date_str:
+        return date_str
+    wanted = set(periods) & set(PERIOD_FREQ)
+    if not wanted:
+        return date_str
+    start = pd.Timestamp(date_str)
+    aligned = start - pd.Timedelta(days=start.weekday())
+    if "monthly" in wanted:
+        aligned = min(aligned, start.replace(day=1))
+    return aligned.strftime("%Y-%m-%d")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+历史数据覆盖清单（data_coverage）
+
+每个 (symbol, period, data_source) 一条记录，描述 stock_daily_quotes 中已有的数据范围：
+首个/最后交易日、记录数以及疑似缺口。HistoricalDataService.save_historical_data 每次写入后
+用本次写入的日期增量合并（merge_coverage），不再扫描该股票的全部历史；清单不存在时
+（清单建立前同步的数据）才由集合中的实际数据全量构建一次（build_coverage）。
+
+分析前的数据就绪检查、同步服务的增量起点只需一次索引查询，不再加载整个回溯窗口。
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from tradingagents.utils.trading_calendar import ExchangeCalendar, get_trading_calendar
+
+COVERAGE_COLLECTION = "data_coverage"
+
+# 无交易日历时（周/月线），相邻两条记录相隔超过该天数（自然日）视为缺口
+DEFAULT_GAP_DAYS = 10
+
+_DATE_FORMAT = "%Y-%m-%d"
+
+
+def coverage_key(symbol: str, period: str, data_source: str) -> Dict[str, str]:
+    """清单记录的唯一键（与 stock_daily_quotes 的 symbol/period/data_source 一致）"""
+    return {"symbol": symbol, "period": period, "data_source": data_source}
+
+
+def build_coverage(
+    dates: Iterable[str],
+    gap_days: int = DEFAULT_GAP_DAYS,
+    calendar: Optional[ExchangeCalendar] = None,
+) -> Dict[str, Any]:
+    """
+    由已有交易日期计算覆盖信息
+
+    Args:
+        dates: 交易日期（YYYY-MM-DD）
+        gap_days: 判定缺口的自然日间隔（未提供交易日历时使用）
+        calendar: 交易日历（日线），提供时相邻记录之间缺少任一交易日即为缺口
+
+    Returns:
+        {"first_date", "last_date", "row_count", "gaps": [[缺口前最后日期, 缺口后首个日期], ...]}
+    """
+    ordered = sorted({str(d)[:10] for d in dates if d})
+    gaps: List[List[str]] = []
+    previous = None
+    for current in ordered:
+        try:
+            current_dt = datetime.strptime(current, _DATE_FORMAT)
+        except ValueError:
+            continue
+        if previous is not None and _missing(previous[1], current_dt, gap_days, calendar):
+            gaps.append([previous[0], current])
+        previous = (current, current_dt)
+    return {
+        "first_date": ordered[0] if ordered else None,
+        "last_date": ordered[-1] if ordered else None,
+        "row_count": len(ordered),
+        "gaps": gaps,
+    }
+
+
+def _missing(
+    previous: datetime, current: datetime, gap_days: int, calendar: Optional[ExchangeCalendar]
+) -> bool:
+    """相邻两条记录之间是否有缺口"""
+    if calendar is not None:
+        return calendar.trading_days_between(previous + timedelta(days=1), current - timedelta(days=1)) > 0
+    return (current - previous).days > gap_days
+
+
+def merge_coverage(
+    entry: Optional[Dict[str, Any]],
+    dates: Iterable[str],
+    removed: Iterable[str] = (),
+    gap_days: int = DEFAULT_GAP_DAYS,
+    calendar: Optional[ExchangeCalendar] = None,
+) -> Dict[str, Any]:
+    """
+    把新写入的日期合并进已有清单（不需要读取历史数据）
+
+    原有范围内、不在缺口中的区间数据是连续的，新日期落在其中时不改变记录数和缺口；
+    只需在锚点（原首/末日期、原缺口两端、新日期）之间重新判定缺口。
+
+    Args:
+        entry: 已有清单（None 时等同于 build_coverage）
+        dates: 本次写入的日期
+        removed: 本次删除的日期（周/月线被同一周期新K线取代的旧记录）；
+            调用方需把被删除日期之前最近的一条已有记录放进 dates，以便判定删除后的缺口
+        gap_days / calendar: 同 build_coverage
+
+    Returns:
+        与 build_coverage 相同结构的覆盖信息
+    """
+    removed_set = {str(d)[:10] for d in removed if d}
+    if not entry or not entry.get("last_date"):
+        return build_coverage(dates, gap_days=gap_days, calendar=calendar)
+
+    first, last = str(entry["first_date"])[:10], str(entry["last_date"])[:10]
+    old_gaps = [(str(a)[:10], str(b)[:10]) for a, b in entry.get("gaps") or []]
+    written = {str(d)[:10] for d in dates if d} - removed_set
+
+    def in_old_gap(day: str) -> bool:
+        return any(a < day < b for a, b in old_gaps)
+
+    # 原范围之外或原缺口之内的日期一定是新增记录；范围内连续区间中的日期已存在（覆盖写入）
+    added = [d for d in written if d < first or d > last or in_old_gap(d)]
+    row_count = max(int(entry.get("row_count") or 0) + len(added) - len(removed_set), 0)
+
+    anchors = {first, last, *(d for gap in old_gaps for d in gap), *written} - removed_set
+    ordered = []
+    for day in sorted(anchors):
+        try:
+            ordered.append((day, datetime.strptime(day, _DATE_FORMAT)))
+        except ValueError:
+            continue
+    if not ordered:
+        return build_coverage([], gap_days=gap_days, calendar=calendar)
+
+    gaps: List[List[str]] = []
+    for (prev_day, prev_dt), (day, dt) in zip(ordered, ordered[1:]):
+        # 完全落在原连续区间内（且中间没有被删除的记录）的一对锚点之间有原有数据，不可能是缺口
+        dense = (
+            first <= prev_day and day <= last
+            and not any(a < day and b > prev_day for a, b in old_gaps)
+            and not any(prev_day < r < day for r in removed_set)
+        )
+        if not dense and _missing(prev_dt, dt, gap_days, calendar):
+            gaps.append([prev_day, day])
+
+    return {
+        "first_date": ordered[0][0],
+        "last_date": ordered[-1][0],
+        "row_count": row_count,
+        "gaps": gaps,
+    }
+
+
+def evaluate_coverage(
+    entry: Optional[Dict[str, Any]],
+    start_date: str,
+    end_date: str,
+    today: Optional[datetime] = None,
+    calendar: Optional[ExchangeCalendar] = None,
+) -> Dict[str, Any]:
+    """
+    根据清单记录判断 [start_date, end_date] 的数据是否存在、是否最新
+
+    返回结构与 StockDataPreparer._check_database_data 一致；
+    是否最新按交易日历计算（最新日期之后最多缺 1 个交易日），周末和节假日不会判为过期
+    """
+    if not entry or not entry.get("last_date"):
+        return {
+            "has_data": False,
+            "is_latest": False,
+            "record_count": 0,
+            "latest_date": None,
+            "message": "数据库中没有数据",
+        }
+
+    first_date = str(entry.get("first_date") or "")[:10]
+    latest_date = str(entry["last_date"])[:10]
+    if latest_date < str(start_date)[:10] or (first_date and first_date > str(end_date)[:10]):
+        return {
+            "has_data": False,
+            "is_latest": False,
+            "record_count": 0,
+            "latest_date": latest_date,
+            "message": f"数据库中没有 {start_date} ~ {end_date} 的数据（已有 {first_date} ~ {latest_date}）",
+        }
+
+    calendar = calendar or get_trading_calendar(entry.get("market") or "CN")
+    recent = calendar.prev_trading_day(today or datetime.now(), inclusive=True)
+    # 判断数据是否最新（允许1个交易日的延迟）
+    latest_dt = datetime.strptime(latest_date, _DATE_FORMAT)
+    is_latest = calendar.trading_days_between(latest_dt + timedelta(days=1), recent) <= 1
+
+    record_count = entry.get("row_count", 0)
+    message = f"找到{record_count}条记录，最新日期: {latest_date}"
+    gaps = entry.get("gaps") or []
+    if gaps:
+        message += f"，疑似缺口{len(gaps)}处"
+    if not is_latest:
+        message += f"（需要更新到{recent.strftime(_DATE_FORMAT)}）"
+
+    return {
+        "has_data": True,
+        "is_latest": is_latest,
+        "record_count": record_count,
+        "latest_date": latest_date,
+        "gaps": gaps,
+        "message": message,
+    }
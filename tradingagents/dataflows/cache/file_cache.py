@@ -255,6 +255,10 @@ class StockDataCache:
 
         is_valid = age.total_seconds() < max_age_hours * 3600
 
+        # 行情数据按收盘对齐：收盘后产生新日线即失效；休市期间缓存的数据在下次收盘前一直有效
+        if (data_type or metadata.get('data_type')) == 'stock_data':
+            is_valid = self._market_aligned_validity(metadata.get('symbol') or symbol or '', cached_at, is_valid)
+
         if is_valid:
             market_type = self._determine_market_type(metadata.get('symbol', ''))
             cache_type = f"{market_type}_{metadata.get('data_type', 'stock_data')}"
@@ -263,6 +267,25 @@ class StockDataCache:
 
         return is_valid
     
+    def _market_aligned_validity(self, symbol: str, cached_at: datetime, ttl_valid: bool) -> bool:
+        """
+        按交易日历判断行情缓存是否有效
+
+        - 缓存之后已有收盘（含数据发布缓冲）：新的日线已产生，缓存失效
+        - 缓存于交易时段内：数据仍在变化，沿用 TTL 判断
+        - 缓存于休市期间（收盘后 / 周末 / 节假日）：下次收盘前数据不会变化，缓存有效
+        """
+        try:
+            from tradingagents.utils.trading_calendar import get_trading_calendar
+            market = 'CN' if self._determine_market_type(symbol) == 'china' else 'HK' if str(symbol).upper().endswith('.HK') else 'US'
+            calendar = get_trading_calendar(market)
+            if datetime.now().astimezone() >= calendar.next_close_after(cached_at):
+                return False
+            return ttl_valid if calendar.is_session_open(cached_at) else True
+        except Exception as e:
+            logger.debug(f"交易日历判断失败，使用TTL: {e}")
+            return ttl_valid
+
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
                        data_source: str = "unknown") -> str:
@@ -99,7 +99,7 @@ class MongoDBCacheAdapter:
                 StockMarket.HONG_KONG: 'hk_stocks',
             }
             market_category = market_mapping.get(market)
-            logger.info(f"📊 [数据源优先级] 股票代码: {symbol}, 市场分类: {market_category}")
+            logger.debug("📊 [数据源优先级] 股票代码: %s, 市场分类: %s", symbol, market_category)
 
             # 2. 从数据库读取配置
             if self.db is not None:
@@ -111,7 +111,7 @@ class MongoDBCacheAdapter:
 
                 if config_data and config_data.get('data_source_configs'):
                     configs = config_data['data_source_configs']
-                    logger.info(f"📊 [数据源优先级] 从数据库读取到 {len(configs)} 个数据源配置")
+                    logger.debug("📊 [数据源优先级] 从数据库读取到 %d 个数据源配置", len(configs))
 
                     # 3. 过滤启用的数据源
                     enabled = []
@@ -121,21 +121,21 @@ class MongoDBCacheAdapter:
                         ds_priority = ds.get('priority', 0)
                         ds_categories = ds.get('market_categories', [])
 
-                        logger.info(f"📊 [数据源配置] 类型: {ds_type}, 启用: {ds_enabled}, 优先级: {ds_priority}, 市场: {ds_categories}")
+                        logger.debug("📊 [数据源配置] 类型: %s, 启用: %s, 优先级: %s, 市场: %s", ds_type, ds_enabled, ds_priority, ds_categories)
 
                         if not ds_enabled:
-                            logger.info(f"⚠️ [数据源优先级] {ds_type} 未启用，跳过")
+                            logger.debug("⚠️ [数据源优先级] %s 未启用，跳过", ds_type)
                             continue
 
                         # 检查市场分类
                         if ds_categories and market_category:
                             if market_category not in ds_categories:
-                                logger.info(f"⚠️ [数据源优先级] {ds_type} 不支持市场 {market_category}，跳过")
+                                logger.debug("⚠️ [数据源优先级] %s 不支持市场 %s，跳过", ds_type, market_category)
                                 continue
 
                         enabled.append(ds)
 
-                    logger.info(f"📊 [数据源优先级] 过滤后启用的数据源: {len(enabled)} 个")
+                    logger.debug("📊 [数据源优先级] 过滤后启用的数据源: %d 个", len(enabled))
 
                     # 4. 按优先级排序（数字越大优先级越高）
                     enabled.sort(key=lambda x: x.get('priority', 0), reverse=True)
@@ -143,7 +143,7 @@ class MongoDBCacheAdapter:
                     # 5. 返回数据源类型列表
                     result = [ds.get('type', '').lower() for ds in enabled if ds.get('type')]
                     if result:
-                        logger.info(f"✅ [数据源优先级] {symbol} ({market_category}): {result}")
+                        logger.info("✅ [数据源优先级] %s (%s): %s", symbol, market_category, result)
                         return result
                     else:
                         logger.warning(f"⚠️ [数据源优先级] 没有可用的数据源配置，使用默认顺序")
@@ -157,6 +157,34 @@ class MongoDBCacheAdapter:
         logger.info(f"📊 [数据源优先级] 使用默认顺序: ['tushare', 'akshare', 'baostock']")
         return ['tushare', 'akshare', 'baostock']
 
+    def get_data_coverage(self, symbol: str, period: str = "daily") -> Optional[List[Dict[str, Any]]]:
+        """
+        获取历史数据覆盖清单（首/末交易日、记录数、缺口）
+
+        Returns:
+            按数据源优先级排序的清单记录；MongoDB 未启用时返回 None
+        """
+        if not self.use_app_cache or self.db is None:
+            return None
+
+        try:
+            from .data_coverage import COVERAGE_COLLECTION
+            code6 = str(symbol).zfill(6)
+            priority_order = self._get_data_source_priority(symbol)
+            # 一次索引查询取出所有数据源的清单，再按优先级排序
+            docs = {
+                doc["data_source"]: doc
+                for doc in self.db[COVERAGE_COLLECTION].find(
+                    {"symbol": code6, "period": period, "data_source": {"$in": priority_order}},
+                    {"_id": 0},
+                )
+            }
+            return [docs[src] for src in priority_order if src in docs]
+
+        except Exception as e:
+            logger.warning(f"⚠️ 获取数据覆盖清单失败: {e}")
+            return None
+
     def get_historical_data(self, symbol: str, start_date: str = None, end_date: str = None,
                           period: str = "daily") -> Optional[pd.DataFrame]:
         """
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+财报累计值 -> TTM / 单季度 向量化计算
+
+A股利润表、现金流量表按报告期披露的是年初至今的累计值：
+- TTM = 去年年报 + (本期累计 - 去年同期累计)，年报期直接取年报值
+- 单季度 = 本期累计 - 同年上一季度累计，一季报即为单季度值
+
+所有字段一次计算完成；传入 group_col（如 ts_code）时可对全市场多只股票的报表一次性计算。
+缺少去年同期或去年年报时结果为 NaN（不做简单年化，季节性行业会失真）。
+"""
+
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# 同一年内上一季度的报告期（月日）
+_PREVIOUS_QUARTER = {"0630": "0331", "0930": "0630", "1231": "0930"}
+
+_GROUP = "_group"
+
+
+def _statement_frame(
+    statements: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+    fields: Sequence[str],
+    period_col: str,
+    group_col: Optional[str],
+) -> pd.DataFrame:
+    """
+    统一为 [分组, 报告期(YYYYMMDD), 年, 月日, 各字段数值]
+
+    同一分组同一报告期有多条记录时（如 Tushare 的更正公告）保留最先出现的一条
+    """
+    df = statements if isinstance(statements, pd.DataFrame) else pd.DataFrame(list(statements))
+    if df.empty or period_col not in df.columns:
+        return pd.DataFrame(columns=[_GROUP, period_col, "_year", "_md", *fields])
+
+    period = df[period_col].astype(str).str.replace("-", "", regex=False).str[:8]
+    frame = pd.DataFrame({
+        _GROUP: df[group_col].to_numpy() if group_col else 0,
+        period_col: period.to_numpy(),
+    })
+    for field in fields:
+        frame[field] = pd.to_numeric(df[field], errors="coerce").to_numpy() if field in df.columns else np.nan
+
+    frame = frame[frame[period_col].str.fullmatch(r"\d{8}")]
+    frame = frame.drop_duplicates(subset=[_GROUP, period_col], keep="first").reset_index(drop=True)
+    frame["_year"] = frame[period_col].str[:4].astype(int)
+    frame["_md"] = frame[period_col].str[4:8]
+    return frame
+
+
+def _lookup(frame: pd.DataFrame, fields: Sequence[str], years: pd.Series, mds: pd.Series) -> np.ndarray:
+    """按 (分组, 年, 月日) 取其他报告期的值，缺失为 NaN"""
+    indexed = frame.set_index([_GROUP, "_year", "_md"])[list(fields)]
+    keys = pd.MultiIndex.from_arrays([frame[_GROUP], years, mds])
+    return indexed.reindex(keys).to_numpy(dtype=float)
+
+
+def _result(frame: pd.DataFrame, values: np.ndarray, fields: Sequence[str],
+            period_col: str, group_col: Optional[str]) -> pd.DataFrame:
+    result = pd.DataFrame(values, columns=list(fields))
+    result.insert(0, period_col, frame[period_col].to_numpy())
+    if group_col:
+        result.insert(0, group_col, frame[_GROUP].to_numpy())
+    return result
+
+
+def ttm_values(
+    statements: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+    fields: Sequence[str],
+    period_col: str = "end_date",
+    group_col: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    计算每个报告期各字段的 TTM 值
+
+    Returns:
+        [group_col,] period_col, *fields 的 DataFrame，每个 (分组, 报告期) 一行
+    """
+    frame = _statement_frame(statements, fields, period_col, group_col)
+    current = frame[list(fields)].to_numpy(dtype=float)
+    last_year = frame["_year"] - 1
+    last_same = _lookup(frame, fields, last_year, frame["_md"])
+    last_annual = _lookup(frame, fields, last_year, pd.Series("1231", index=frame.index))
+
+    annual = (frame["_md"] == "1231").to_numpy()[:, None]
+    values = np.where(annual, current, last_annual + (current - last_same))
+    return _result(frame, values, fields, period_col, group_col)
+
+
+def single_quarter_values(
+    statements: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+    fields: Sequence[str],
+    period_col: str = "end_date",
+    group_col: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    计算每个报告期各字段的单季度值（本期累计 - 同年上一季度累计）
+
+    Returns:
+        与 ttm_values 相同形状的 DataFrame；非季末报告期为 NaN
+    """
+    frame = _statement_frame(statements, fields, period_col, group_col)
+    current = frame[list(fields)].to_numpy(dtype=float)
+    previous = _lookup(frame, fields, frame["_year"], frame["_md"].map(_PREVIOUS_QUARTER))
+
+    first_quarter = (frame["_md"] == "0331").to_numpy()[:, None]
+    quarter_end = frame["_md"].isin(["0331", *_PREVIOUS_QUARTER]).to_numpy()[:, None]
+    values = np.where(first_quarter, current, current - previous)
+    values = np.where(quarter_end, values, np.nan)
+    return _result(frame, values, fields, period_col, group_col)
+
+
+def latest_ttm(
+    statements: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+    fields: Sequence[str],
+    period_col: str = "end_date",
+) -> Dict[str, Optional[float]]:
+    """单只股票最新报告期各字段的 TTM 值，无法计算时为 None"""
+    ttm = ttm_values(statements, fields, period_col)
+    if ttm.empty:
+        return {field: None for field in fields}
+    latest = ttm.loc[ttm[period_col].idxmax()]
+    return {field: (float(latest[field]) if pd.notna(latest[field]) else None) for field in fields}
+
@@ -570,7 +570,7 @@ class RealtimeNewsAggregator:
 
     def _deduplicate_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
         """去重新闻"""
-        logger.info(f"[新闻去重] 开始对 {len(news_items)} 条新闻进行去重处理")
+        logger.debug("[新闻去重] 开始对 %d 条新闻进行去重处理", len(news_items))
         start_time = datetime.now(ZoneInfo(get_timezone_name()))
 
         seen_titles = set()
@@ -584,13 +584,13 @@ class RealtimeNewsAggregator:
 
             # 检查标题长度
             if len(title_key) <= 10:
-                logger.debug(f"[新闻去重] 跳过标题过短的新闻: '{item.title}'，来源: {item.source}")
+                logger.debug("[新闻去重] 跳过标题过短的新闻: '%s'，来源: %s", item.title, item.source)
                 short_title_count += 1
                 continue
 
             # 检查是否重复
             if title_key in seen_titles:
-                logger.debug(f"[新闻去重] 检测到重复新闻: '{item.title[:50]}...'，来源: {item.source}")
+                logger.debug("[新闻去重] 检测到重复新闻: '%.50s...'，来源: %s", item.title, item.source)
                 duplicate_count += 1
                 continue
 
@@ -600,8 +600,8 @@ class RealtimeNewsAggregator:
 
         # 记录去重结果
         time_taken = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
-        logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
-        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
+        logger.info("[新闻去重] 去重完成，原始新闻: %d条，去重后: %d条，去除重复: %d条，标题过短: %d条，耗时: %.2f秒",
+                    len(news_items), len(unique_news), duplicate_count, short_title_count, time_taken)
 
         return unique_news
 
@@ -1013,55 +1013,25 @@ class AKShareProvider(BaseStockDataProvider):
         try:
             logger.debug(f"💰 获取{code}财务数据...")
 
-            financial_data = {}
-
-            # 1. 获取主要财务指标
-            try:
-                def fetch_financial_abstract():
-                    return self.ak.stock_financial_abstract(symbol=code)
-
-                main_indicators = await asyncio.to_thread(fetch_financial_abstract)
-                if main_indicators is not None and not main_indicators.empty:
-                    financial_data['main_indicators'] = main_indicators.to_dict('records')
-                    logger.debug(f"✅ {code}主要财务指标获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}主要财务指标失败: {e}")
-
-            # 2. 获取资产负债表
-            try:
-                def fetch_balance_sheet():
-                    return self.ak.stock_balance_sheet_by_report_em(symbol=code)
-
-                balance_sheet = await asyncio.to_thread(fetch_balance_sheet)
-                if balance_sheet is not None and not balance_sheet.empty:
-                    financial_data['balance_sheet'] = balance_sheet.to_dict('records')
-                    logger.debug(f"✅ {code}资产负债表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}资产负债表失败: {e}")
-
-            # 3. 获取利润表
-            try:
-                def fetch_income_statement():
-                    return self.ak.stock_profit_sheet_by_report_em(symbol=code)
-
-                income_statement = await asyncio.to_thread(fetch_income_statement)
-                if income_statement is not None and not income_statement.empty:
-                    financial_data['income_statement'] = income_statement.to_dict('records')
-                    logger.debug(f"✅ {code}利润表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}利润表失败: {e}")
-
-            # 4. 获取现金流量表
-            try:
-                def fetch_cash_flow():
-                    return self.ak.stock_cash_flow_sheet_by_report_em(symbol=code)
+            # 主要财务指标、资产负债表、利润表、现金流量表四个接口互不依赖，并发获取
+            statements = {
+                'main_indicators': ('主要财务指标', self.ak.stock_financial_abstract),
+                'balance_sheet': ('资产负债表', self.ak.stock_balance_sheet_by_report_em),
+                'income_statement': ('利润表', self.ak.stock_profit_sheet_by_report_em),
+                'cash_flow': ('现金流量表', self.ak.stock_cash_flow_sheet_by_report_em),
+            }
+            results = await asyncio.gather(
+                *(asyncio.to_thread(fetch, symbol=code) for _, fetch in statements.values()),
+                return_exceptions=True
+            )
 
-                cash_flow = await asyncio.to_thread(fetch_cash_flow)
-                if cash_flow is not None and not cash_flow.empty:
-                    financial_data['cash_flow'] = cash_flow.to_dict('records')
-                    logger.debug(f"✅ {code}现金流量表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}现金流量表失败: {e}")
+            financial_data = {}
+            for (key, (label, _)), result in zip(statements.items(), results):
+                if isinstance(result, Exception):
+                    logger.debug(f"获取{code}{label}失败: {result}")
+                elif result is not None and not result.empty:
+                    financial_data[key] = result.to_dict('records')
+                    logger.debug(f"✅ {code}{label}获取成功")
 
             if financial_data:
                 logger.debug(f"✅ {code}财务数据获取完成: {len(financial_data)}个数据集")
@@ -9,6 +9,7 @@ import asyncio
 import logging
 
 from ..base_provider import BaseStockDataProvider
+from ...financial_ttm import latest_ttm
 from tradingagents.config.providers_config import get_provider_config
 
 # 尝试导入tushare
@@ -680,77 +681,31 @@ class TushareProvider(BaseStockDataProvider):
             if period:
                 query_params['period'] = period
 
-            financial_data = {}
-
-            # 1. 获取利润表数据 (income statement)
-            try:
-                income_df = await asyncio.to_thread(
-                    self.api.income,
-                    **query_params
-                )
-                if income_df is not None and not income_df.empty:
-                    financial_data['income_statement'] = income_df.to_dict('records')
-                    self.logger.debug(f"✅ {ts_code} 利润表数据获取成功: {len(income_df)} 条记录")
-                else:
-                    self.logger.debug(f"⚠️ {ts_code} 利润表数据为空")
-            except Exception as e:
-                self.logger.warning(f"❌ 获取{ts_code}利润表数据失败: {e}")
-
-            # 2. 获取资产负债表数据 (balance sheet)
-            try:
-                balance_df = await asyncio.to_thread(
-                    self.api.balancesheet,
-                    **query_params
-                )
-                if balance_df is not None and not balance_df.empty:
-                    financial_data['balance_sheet'] = balance_df.to_dict('records')
-                    self.logger.debug(f"✅ {ts_code} 资产负债表数据获取成功: {len(balance_df)} 条记录")
-                else:
-                    self.logger.debug(f"⚠️ {ts_code} 资产负债表数据为空")
-            except Exception as e:
-                self.logger.warning(f"❌ 获取{ts_code}资产负债表数据失败: {e}")
-
-            # 3. 获取现金流量表数据 (cash flow statement)
-            try:
-                cashflow_df = await asyncio.to_thread(
-                    self.api.cashflow,
-                    **query_params
-                )
-                if cashflow_df is not None and not cashflow_df.empty:
-                    financial_data['cashflow_statement'] = cashflow_df.to_dict('records')
-                    self.logger.debug(f"✅ {ts_code} 现金流量表数据获取成功: {len(cashflow_df)} 条记录")
-                else:
-                    self.logger.debug(f"⚠️ {ts_code} 现金流量表数据为空")
-            except Exception as e:
-                self.logger.warning(f"❌ 获取{ts_code}现金流量表数据失败: {e}")
-
-            # 4. 获取财务指标数据 (financial indicators)
-            try:
-                indicator_df = await asyncio.to_thread(
-                    self.api.fina_indicator,
-                    **query_params
-                )
-                if indicator_df is not None and not indicator_df.empty:
-                    financial_data['financial_indicators'] = indicator_df.to_dict('records')
-                    self.logger.debug(f"✅ {ts_code} 财务指标数据获取成功: {len(indicator_df)} 条记录")
-                else:
-                    self.logger.debug(f"⚠️ {ts_code} 财务指标数据为空")
-            except Exception as e:
-                self.logger.warning(f"❌ 获取{ts_code}财务指标数据失败: {e}")
+            # 利润表、资产负债表、现金流量表、财务指标、主营业务构成互不依赖，并发获取
+            statements = {
+                'income_statement': ('利润表', self.api.income),
+                'balance_sheet': ('资产负债表', self.api.balancesheet),
+                'cashflow_statement': ('现金流量表', self.api.cashflow),
+                'financial_indicators': ('财务指标', self.api.fina_indicator),
+                'main_business': ('主营业务构成', self.api.fina_mainbz),
+            }
+            results = await asyncio.gather(
+                *(asyncio.to_thread(fetch, **query_params) for _, fetch in statements.values()),
+                return_exceptions=True
+            )
 
-            # 5. 获取主营业务构成数据 (可选)
-            try:
-                mainbz_df = await asyncio.to_thread(
-                    self.api.fina_mainbz,
-                    **query_params
-                )
-                if mainbz_df is not None and not mainbz_df.empty:
-                    financial_data['main_business'] = mainbz_df.to_dict('records')
-                    self.logger.debug(f"✅ {ts_code} 主营业务构成数据获取成功: {len(mainbz_df)} 条记录")
+            financial_data = {}
+            for (key, (label, _)), result in zip(statements.items(), results):
+                if isinstance(result, Exception):
+                    if key == 'main_business':
+                        self.logger.debug(f"获取{ts_code}{label}数据失败: {result}")  # 主营业务数据不是必需的，保持debug级别
+                    else:
+                        self.logger.warning(f"❌ 获取{ts_code}{label}数据失败: {result}")
+                elif result is not None and not result.empty:
+                    financial_data[key] = result.to_dict('records')
+                    self.logger.debug(f"✅ {ts_code} {label}数据获取成功: {len(result)} 条记录")
                 else:
-                    self.logger.debug(f"⚠️ {ts_code} 主营业务构成数据为空")
-            except Exception as e:
-                self.logger.debug(f"获取{ts_code}主营业务构成数据失败: {e}")  # 主营业务数据不是必需的，保持debug级别
+                    self.logger.debug(f"⚠️ {ts_code} {label}数据为空")
 
             if financial_data:
                 # 标准化财务数据
@@ -1332,9 +1287,9 @@ class TushareProvider(BaseStockDataProvider):
             ann_date = latest_income.get('ann_date') or latest_balance.get('ann_date') or latest_cashflow.get('ann_date')
 
             # 计算 TTM 数据
-            income_statements = financial_data.get('income_statement', [])
-            revenue_ttm = self._calculate_ttm_from_tushare(income_statements, 'revenue')
-            net_profit_ttm = self._calculate_ttm_from_tushare(income_statements, 'n_income_attr_p')
+            ttm = latest_ttm(financial_data.get('income_statement', []), ['revenue', 'n_income_attr_p'])
+            revenue_ttm = ttm['revenue']
+            net_profit_ttm = ttm['n_income_attr_p']
 
             standardized_data = {
                 # 基础信息
@@ -1452,78 +1407,14 @@ class TushareProvider(BaseStockDataProvider):
         Returns:
             TTM 值，如果无法计算则返回 None
         """
-        if not income_statements or len(income_statements) < 1:
+        if not income_statements:
             return None
 
         try:
-            latest = income_statements[0]
-            latest_period = latest.get('end_date')
-            latest_value = self._safe_float(latest.get(field))
-
-            if not latest_period or latest_value is None:
-                return None
-
-            # 判断最新期的类型
-            month_day = latest_period[4:8]
-
-            # 如果最新期是年报（1231），直接使用
-            if month_day == '1231':
-                self.logger.debug(f"✅ TTM计算: 使用年报数据 {latest_period} = {latest_value:.2f}")
-                return latest_value
-
-            # 如果是季报/半年报，需要计算 TTM = 基准期 + (本期累计 - 去年同期累计)
-
-            # 1. 查找去年同期
-            latest_year = latest_period[:4]
-            last_year = str(int(latest_year) - 1)
-            last_year_same_period = last_year + latest_period[4:]
-
-            last_year_same = None
-            for stmt in income_statements:
-                if stmt.get('end_date') == last_year_same_period:
-                    last_year_same = stmt
-                    break
-
-            if not last_year_same:
-                # 缺少去年同期数据，无法准确计算 TTM
-                self.logger.warning(f"⚠️ TTM计算失败: 缺少去年同期数据（需要: {last_year_same_period}，最新期: {latest_period}）")
-                return None
-
-            last_year_value = self._safe_float(last_year_same.get(field))
-            if last_year_value is None:
-                self.logger.warning(f"⚠️ TTM计算失败: 去年同期数据值为空（{last_year_same_period}）")
-                return None
-
-            # 2. 查找"去年同期之后的最近年报"作为基准期
-            # 例如：如果最新期是 2025Q2，去年同期是 2024Q2，则查找 2024年报（20241231）
-            base_period = None
-            for stmt in income_statements:
-                period = stmt.get('end_date')
-                # 必须满足：在去年同期之后 且 是年报（1231）
-                if period and period > last_year_same_period and period[4:8] == '1231':
-                    base_period = stmt
-                    break
-
-            if not base_period:
-                # 没有找到合适的年报，无法计算
-                # 这种情况通常发生在：最新期是 2025Q1，但 2024年报还没公布
-                self.logger.warning(f"⚠️ TTM计算失败: 缺少基准年报（需要在 {last_year_same_period} 之后的年报，最新期: {latest_period}）")
-                return None
-
-            base_value = self._safe_float(base_period.get(field))
-            if base_value is None:
-                self.logger.warning(f"⚠️ TTM计算失败: 基准年报数据值为空（{base_period.get('end_date')}）")
-                return None
-
-            # 3. 计算 TTM = 基准年报 + (本期累计 - 去年同期累计)
-            ttm_value = base_value + (latest_value - last_year_value)
-
-            self.logger.debug(
-                f"✅ TTM计算: {base_period.get('end_date')}({base_value:.2f}) + "
-                f"({latest_period}({latest_value:.2f}) - {last_year_same_period}({last_year_value:.2f})) = {ttm_value:.2f}"
-            )
-
-            return ttm_value
+            value = latest_ttm(income_statements, [field])[field]
+            if value is None:
+                self.logger.warning(f"⚠️ TTM计算失败: 缺少去年同期或基准年报数据（字段: {field}）")
+            return value
 
         except Exception as e:
             self.logger.warning(f"❌ TTM计算异常: {e}")
@@ -9,6 +9,21 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def _sync_client(db_client):
+    """
+    异步客户端（Motor）转换为同步客户端
+
+    复用 app.core.database 中进程共享的同步 MongoClient（带连接池），
+    不再每次调用都新建客户端。
+    """
+    client_type = type(db_client).__name__
+    if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
+        from app.core.database import get_mongo_db_sync
+        logger.debug(f"检测到异步客户端 {client_type}，使用共享的同步客户端")
+        return get_mongo_db_sync().client
+    return db_client
+
+
 def calculate_realtime_pe_pb(
     symbol: str,
     db_client=None
@@ -41,6 +56,13 @@ def calculate_realtime_pe_pb(
         如果计算失败返回 None
     """
     try:
+        # 优先使用全市场估值快照（行情入库周期批量计算），过期或缺失时逐只计算
+        from tradingagents.dataflows.realtime_valuation import get_realtime_valuation_engine
+        snapshot = get_realtime_valuation_engine().get(symbol)
+        if snapshot:
+            logger.info(f"✅ [动态PE计算-快照] 股票 {str(symbol).zfill(6)}: PE_TTM={snapshot['pe_ttm']}倍, PB={snapshot['pb']}倍")
+            return snapshot
+
         # 获取数据库连接（确保是同步客户端）
         if db_client is None:
             from tradingagents.config.database_manager import get_database_manager
@@ -50,15 +72,8 @@ def calculate_realtime_pe_pb(
                 return None
             db_client = db_manager.get_mongodb_client()
 
-        # 检查是否是异步客户端（AsyncIOMotorClient）
-        # 如果是异步客户端，需要转换为同步客户端
-        client_type = type(db_client).__name__
-        if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
-            # 这是异步客户端，创建同步客户端
-            from pymongo import MongoClient
-            from app.core.config import settings
-            logger.debug(f"检测到异步客户端 {client_type}，转换为同步客户端")
-            db_client = MongoClient(settings.MONGO_URI)
+        # 如果是异步客户端（AsyncIOMotorClient），转换为同步客户端
+        db_client = _sync_client(db_client)
 
         db = db_client['tradingagents']
         code6 = str(symbol).zfill(6)
@@ -365,12 +380,7 @@ def get_pe_pb_with_fallback(
             db_client = db_manager.get_mongodb_client()
 
         # 检查是否是异步客户端
-        client_type = type(db_client).__name__
-        if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
-            from pymongo import MongoClient
-            from app.core.config import settings
-            logger.debug(f"检测到异步客户端 {client_type}，转换为同步客户端")
-            db_client = MongoClient(settings.MONGO_URI)
+        db_client = _sync_client(db_client)
 
     except Exception as e:
         logger.error(f"❌ [PE智能策略-失败] 数据库连接失败: {e}")
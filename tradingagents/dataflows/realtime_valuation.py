@@ -0,0 +1,291 @@
+"""
+全市场实时估值引擎
+
+calculate_realtime_pe_pb 逐只股票查询 market_quotes / stock_basic_info / stock_financial_data，
+适合单只股票详情，但无法用于全市场筛选。本模块用批量读取 + 列运算一次算出全市场的动态估值：
+- 行情：market_quotes 一次批量读取（code、close、pre_close、updated_at）
+- 基本面：stock_basic_info（Tushare）一次批量读取 + stock_financial_data 最新净资产聚合，
+  按 fundamentals_ttl 缓存（日内基本面不变，每个行情周期只需重新读取行情）
+- 计算：与 calculate_realtime_pe_pb 相同的口径（反推 TTM 净利润、实时市值、动态 PE_TTM、PB），
+  全部为 NumPy 列运算
+
+行情入库服务每个采集周期刷新一次快照并写入物化筛选表（筛选条件与排序基于实时估值）；
+基本面工具（get_pe_pb_with_fallback）优先读取快照，快照过期或缺少该股票时回退到逐只计算。
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, time as dtime
+from typing import Any, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_TZ = ZoneInfo("Asia/Shanghai")
+_MARKET_CLOSE = dtime(15, 0)
+
+QUOTE_PROJECTION = {"_id": 0, "code": 1, "close": 1, "pre_close": 1, "updated_at": 1}
+BASIC_PROJECTION = {
+    "_id": 0, "code": 1, "pe": 1, "pe_ttm": 1, "pb": 1,
+    "total_mv": 1, "total_share": 1, "updated_at": 1,
+}
+# 每只股票最新报告期的净资产（元）
+EQUITY_PIPELINE = [
+    {"$sort": {"code": 1, "report_period": -1}},
+    {"$group": {"_id": "$code", "total_equity": {"$first": "$total_equity"}}},
+]
+
+RESULT_COLUMNS = [
+    "pe", "pb", "pe_ttm", "price", "market_cap", "ttm_net_profit",
+    "total_shares", "yesterday_close", "tushare_pe_ttm", "tushare_pe",
+]
+
+
+def _frame(records: Iterable[Dict[str, Any]], columns: List[str]) -> pd.DataFrame:
+    df = pd.DataFrame(list(records or []))
+    for col in columns:
+        if col not in df.columns:
+            df[col] = None
+    df = df[columns]
+    df["code"] = df["code"].astype(str).str.zfill(6)
+    return df.drop_duplicates("code", keep="last")
+
+
+def _numeric(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+
+
+def _updated_after_close(values: Iterable[Any], now: datetime) -> np.ndarray:
+    """stock_basic_info 是否在今天收盘（15:00）后更新（此时 total_mv / pe_ttm 已是当日数据）"""
+    today = now.astimezone(_TZ).date()
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, datetime):
+            return False
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_TZ)
+        value = value.astimezone(_TZ)
+        return value.date() == today and value.time() >= _MARKET_CLOSE
+
+    return np.fromiter((check(v) for v in values), dtype=bool)
+
+
+def compute_valuations(
+    quotes: Iterable[Dict[str, Any]],
+    basics: Iterable[Dict[str, Any]],
+    equities: Iterable[Dict[str, Any]] = (),
+    now: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    按 calculate_realtime_pe_pb 的口径批量计算动态估值
+
+    Args:
+        quotes: market_quotes 文档（code、close、pre_close、updated_at）
+        basics: Tushare 的 stock_basic_info 文档（pe、pe_ttm、pb、total_mv 亿元、total_share 万股、updated_at）
+        equities: 最新净资产 [{"code", "total_equity"(元)}]，无记录的股票使用 Tushare PB
+        now: 当前时间（判断基础信息是否为收盘后数据）
+
+    Returns:
+        以 code 为索引的 DataFrame，列为 RESULT_COLUMNS + updated_at、source、is_realtime；
+        无法计算的股票不在结果中
+    """
+    now = now or datetime.now(_TZ)
+    q = _frame(quotes, ["code", "close", "pre_close", "updated_at"])
+    b = _frame(basics, ["code", "pe", "pe_ttm", "pb", "total_mv", "total_share", "updated_at"])
+    e = _frame(equities, ["code", "total_equity"])
+    e["has_financial"] = True
+
+    df = q.merge(b, on="code", how="inner", suffixes=("", "_basic"))
+    df = df.merge(e, on="code", how="left")
+
+    price = _numeric(df["close"])
+    pre_close = _numeric(df["pre_close"])
+    pe_t = _numeric(df["pe"])
+    pe_ttm_t = _numeric(df["pe_ttm"])
+    pb_t = _numeric(df["pb"])
+    total_mv = _numeric(df["total_mv"])
+    total_share = _numeric(df["total_share"])
+    equity = _numeric(df["total_equity"])
+    has_financial = df["has_financial"].eq(True).to_numpy()
+    latest = _updated_after_close(df["updated_at_basic"], now)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid_price = price > 0
+        has_pre_close = pre_close > 0
+        has_mv = total_mv > 0
+
+        # 总股本（万股）与昨日市值（亿元）：优先 total_share，其次用 pre_close / 实时价反推
+        by_share = total_share > 0
+        by_pre_close = ~by_share & has_pre_close & has_mv
+        by_price = ~by_share & ~by_pre_close & has_mv
+        shares = np.select(
+            [by_share, by_pre_close, by_price],
+            [total_share, total_mv * 10000 / pre_close, total_mv * 10000 / price],
+            np.nan,
+        )
+        yesterday_mv = np.select(
+            [by_share & has_pre_close, by_share & has_mv, by_pre_close | by_price],
+            [total_share * pre_close / 10000, total_mv, total_mv],
+            np.nan,
+        )
+
+        # TTM 净利润 = 昨日市值 / Tushare PE_TTM；亏损股（PE_TTM<=0）无法反推
+        ttm_profit = yesterday_mv / pe_ttm_t
+        realtime_mv = price * shares / 10000
+        dynamic_pe = realtime_mv / ttm_profit
+        pb = np.where(
+            has_financial,
+            np.where(equity > 0, realtime_mv / (equity / 1e8), np.nan),
+            np.where(pb_t != 0, pb_t, np.nan),
+        )
+        calculated = valid_price & ~latest & (pe_ttm_t > 0) & (yesterday_mv > 0)
+
+    def positive(values: np.ndarray) -> np.ndarray:
+        # 与逐只计算一致：0 / 缺失视为无数据
+        return np.where(np.nan_to_num(values) != 0, values, np.nan)
+
+    result = pd.DataFrame({
+        "code": df["code"].to_numpy(),
+        "pe": np.where(latest, positive(pe_t), dynamic_pe),
+        "pb": np.where(latest, positive(pb_t), pb),
+        "pe_ttm": np.where(latest, positive(pe_ttm_t), dynamic_pe),
+        "price": price,
+        "market_cap": np.where(latest, positive(total_mv), realtime_mv),
+        "ttm_net_profit": np.where(latest, np.nan, ttm_profit),
+        "total_shares": np.where(latest, np.nan, shares),
+        "yesterday_close": np.where(latest, np.nan, positive(pre_close)),
+        "tushare_pe_ttm": np.where(latest, np.nan, pe_ttm_t),
+        "tushare_pe": np.where(latest, np.nan, positive(pe_t)),
+        "updated_at": df["updated_at"].to_numpy(),
+        "is_realtime": ~latest,
+    })
+    result["source"] = np.where(latest, "stock_basic_info_latest", "realtime_calculated_from_market_quotes")
+    result[RESULT_COLUMNS] = result[RESULT_COLUMNS].round(2)
+    keep = valid_price & (latest | calculated)
+    return result[keep].set_index("code")
+
+
+def _plain(value: Any) -> Any:
+    """把 NumPy / pandas 标量转换为 Python 原生类型，NaN 转为 None"""
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class RealtimeValuationEngine:
+    """全市场动态估值快照（进程内共享，线程安全）"""
+
+    def __init__(self, max_age: float = 1200.0, fundamentals_ttl: float = 600.0):
+        """
+        Args:
+            max_age: 快照有效期（秒），超过后调用方回退到逐只计算
+            fundamentals_ttl: 基本面（基础信息 / 净资产）缓存时间（秒）
+        """
+        self.max_age = max_age
+        self.fundamentals_ttl = fundamentals_ttl
+        self._frame: Optional[pd.DataFrame] = None
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at = 0.0
+        self._basics: List[Dict[str, Any]] = []
+        self._equities: List[Dict[str, Any]] = []
+        self._fundamentals_at = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 刷新
+    # ------------------------------------------------------------------
+    def _fundamentals_stale(self) -> bool:
+        return not self._basics or time.monotonic() - self._fundamentals_at > self.fundamentals_ttl
+
+    def _set_fundamentals(self, basics: List[Dict[str, Any]], equities: List[Dict[str, Any]]) -> None:
+        self._basics = basics
+        self._equities = [{"code": d.get("_id"), "total_equity": d.get("total_equity")} for d in equities]
+        self._fundamentals_at = time.monotonic()
+
+    def load(self, quotes: Iterable[Dict[str, Any]], now: Optional[datetime] = None) -> int:
+        """用给定行情和已缓存的基本面重算快照，返回可用估值的股票数"""
+        start = time.time()
+        frame = compute_valuations(quotes, self._basics, self._equities, now=now)
+        records = {
+            code: {k: _plain(v) for k, v in row.items()}
+            for code, row in frame.to_dict("index").items()
+        }
+        with self._lock:
+            self._frame = frame
+            self._records = records
+            self._refreshed_at = time.monotonic()
+        logger.info(f"📈 [实时估值] 全市场快照已刷新: {len(records)} 只股票, 耗时 {time.time() - start:.2f}秒")
+        return len(records)
+
+    def refresh(self, db) -> int:
+        """从同步数据库（pymongo Database）批量读取并重算"""
+        if self._fundamentals_stale():
+            basics = list(db.stock_basic_info.find({"source": "tushare"}, BASIC_PROJECTION))
+            equities = list(db.stock_financial_data.aggregate(EQUITY_PIPELINE, allowDiskUse=True))
+            self._set_fundamentals(basics, equities)
+        quotes = list(db.market_quotes.find({}, QUOTE_PROJECTION))
+        return self.load(quotes)
+
+    async def arefresh(self, db) -> int:
+        """从异步数据库（Motor Database）批量读取并重算"""
+        if self._fundamentals_stale():
+            basics = await db.stock_basic_info.find({"source": "tushare"}, BASIC_PROJECTION).to_list(length=None)
+            equities = await db.stock_financial_data.aggregate(EQUITY_PIPELINE, allowDiskUse=True).to_list(length=None)
+            self._set_fundamentals(basics, equities)
+        quotes = await db.market_quotes.find({}, QUOTE_PROJECTION).to_list(length=None)
+        return self.load(quotes)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    @property
+    def is_fresh(self) -> bool:
+        return self._frame is not None and time.monotonic() - self._refreshed_at <= self.max_age
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """单只股票的估值（字段与 calculate_realtime_pe_pb 一致）；快照过期或无数据返回 None"""
+        if not self.is_fresh:
+            return None
+        record = self._records.get(str(code).zfill(6))
+        return dict(record) if record else None
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """批量查询，返回 {6位代码: 估值}"""
+        if not self.is_fresh:
+            return {}
+        records = self._records
+        found = {}
+        for code in codes:
+            key = str(code).zfill(6)
+            if key in records:
+                found[key] = dict(records[key])
+        return found
+
+    def snapshot(self) -> Optional[pd.DataFrame]:
+        """全市场估值 DataFrame（以 code 为索引），快照过期返回 None"""
+        return self._frame if self.is_fresh else None
+
+
+_engine: Optional[RealtimeValuationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_realtime_valuation_engine() -> RealtimeValuationEngine:
+    """获取进程内共享的实时估值引擎"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RealtimeValuationEngine(
+                    max_age=float(os.getenv("REALTIME_VALUATION_MAX_AGE", "1200")),
+                    fundamentals_ttl=float(os.getenv("REALTIME_VALUATION_FUNDAMENTALS_TTL", "600")),
+                )
+    return _engine
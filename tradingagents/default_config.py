@@ -16,7 +16,28 @@ DEFAULT_CONFIG = {
     # Debate and discussion settings
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
+    # 并发辩论：每一轮中各方基于同一状态快照并行发言（默认关闭，保持接力式辩论）
+    "parallel_investment_debate": os.getenv("PARALLEL_INVESTMENT_DEBATE", "false").lower() == "true",
+    "parallel_risk_debate": os.getenv("PARALLEL_RISK_DEBATE", "false").lower() == "true",
     "max_recur_limit": 100,
+    # LLM 响应缓存：off / readwrite / replay（replay 为严格回放，未命中即报错）
+    "llm_cache_mode": os.getenv("LLM_CACHE_MODE", "off").lower(),
+    "llm_cache_path": os.getenv("LLM_CACHE_PATH", ""),  # 为空时使用 data_cache_dir/llm_cache.sqlite
+    "llm_cache_max_mb": int(os.getenv("LLM_CACHE_MAX_MB", "512")),
+    # 数据预取：propagate() 开始时在后台并行获取各分析师首轮必调的数据（默认关闭）
+    "prefetch_data": os.getenv("PREFETCH_DATA_ENABLED", "false").lower() == "true",
+    "prefetch_wait_timeout": float(os.getenv("PREFETCH_WAIT_TIMEOUT_SECONDS", "120")),
+    # 市场级共享上下文：同市场、同交易日期的并发分析（如批量分析）共用大盘概览、宏观新闻等数据
+    "share_market_context": os.getenv("SHARE_MARKET_CONTEXT", "true").lower() == "true",
+    "market_context_ttl": float(os.getenv("MARKET_CONTEXT_TTL_SECONDS", "1800")),
+    # 辩论上下文预算：辩论历史超出各角色预算（估算 tokens）时，早期发言以滚动摘要代替；0 表示该角色不限制
+    "debate_context_budget_enabled": os.getenv("DEBATE_CONTEXT_BUDGET_ENABLED", "true").lower() == "true",
+    "researcher_context_tokens": int(os.getenv("RESEARCHER_CONTEXT_TOKENS", "6000")),
+    "risk_debator_context_tokens": int(os.getenv("RISK_DEBATOR_CONTEXT_TOKENS", "6000")),
+    "manager_context_tokens": int(os.getenv("MANAGER_CONTEXT_TOKENS", "12000")),
+    "debate_summary_tokens": int(os.getenv("DEBATE_SUMMARY_TOKENS", "1500")),
+    # 运行遥测：按节点记录 Token、LLM/工具耗时、缓存命中，写入 performance_metrics.telemetry 并汇总到 /metrics
+    "telemetry_enabled": os.getenv("TELEMETRY_ENABLED", "true").lower() == "true",
     # Tool settings - 从环境变量读取，提供默认值
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
@@ -0,0 +1,356 @@
+# TradingAgents/graph/backtest.py
+"""
+回测：在历史日期区间上重放 TradingAgentsGraph
+
+按 股票 × 交易日 逐一运行 propagate()，记录 SignalProcessor 解析出的决策、之后 N 个交易日的
+远期收益、各节点耗时和 Token 用量，结果写入列式文件（parquet，缺少 pyarrow 时退化为 csv）。
+
+- 时点数据（未实现）：图只收到分析日期 trade_date，行情类工具按 LLM 传入的日期区间取数；
+  基本面（最新财报/估值）和新闻数据源没有截至日期参数，本模块不做按 trade_date 截断，
+  可能包含分析日期之后才公布的信息，即存在前视偏差，回测结果应视为乐观估计。
+  用于计算远期收益的行情在回测开始前一次性加载，不会进入图。
+- 并行：开启记忆与反思时，同一股票的日期必须按顺序执行（反思结果会影响之后的分析），
+  不同股票并行；关闭记忆时所有 (股票, 日期) 组合并行。
+- 反思：某一天的远期收益要到 N 个交易日之后才“已知”，因此反思会延迟到回测推进到实现日期
+  时才执行，避免把未来信息写入记忆。
+- 记忆隔离：每次回测、每只股票使用独立的记忆集合（config["memory_namespace"]），
+  并行执行时进度较快的股票写入的反思不会被其他股票在更早的日期读到，
+  也不会读到回测之外（实时分析或之前的回测）写入的记忆。
+"""
+
+import re
+import threading
+import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tradingagents.default_config import DEFAULT_CONFIG
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+# 决策动作 -> 仓位方向
+ACTION_POSITIONS = {
+    "买入": 1, "buy": 1, "BUY": 1,
+    "持有": 0, "hold": 0, "HOLD": 0,
+    "卖出": -1, "sell": -1, "SELL": -1,
+}
+
+PriceLoader = Callable[[str, str, str], pd.DataFrame]
+
+
+class UsageTally(BaseCallbackHandler):
+    """统计一次运行中所有 LLM 调用的 Token 用量（按模型汇总）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.by_model: Dict[str, List[int]] = {}
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        input_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+        output_tokens = usage.get("completion_tokens") or usage.get("output_tokens") or 0
+        if not input_tokens and not output_tokens:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    input_tokens += metadata.get("input_tokens", 0)
+                    output_tokens += metadata.get("output_tokens", 0)
+        model = llm_output.get("model_name") or "unknown"
+        with self._lock:
+            self.calls += 1
+            totals = self.by_model.setdefault(model, [0, 0])
+            totals[0] += input_tokens
+            totals[1] += output_tokens
+
+    def summary(self, provider: str = "") -> Dict[str, Any]:
+        """汇总 Token 与成本（成本按 config/pricing.json 中的定价计算）"""
+        with self._lock:
+            by_model = {model: list(totals) for model, totals in self.by_model.items()}
+            calls = self.calls
+        cost = 0.0
+        try:
+            from tradingagents.config.config_manager import config_manager
+            for model, (input_tokens, output_tokens) in by_model.items():
+                cost += config_manager.calculate_cost(provider, model, input_tokens, output_tokens)[0]
+        except Exception as e:
+            logger.debug(f"⚠️ [回测] 成本计算失败: {e}")
+        return {
+            "llm_calls": calls,
+            "input_tokens": sum(t[0] for t in by_model.values()),
+            "output_tokens": sum(t[1] for t in by_model.values()),
+            "cost": round(cost, 6),
+        }
+
+
+def memory_namespace(run_id: str, symbol: str) -> str:
+    """回测中某只股票的记忆集合命名空间（ChromaDB 集合名只允许字母、数字、_-.）"""
+    return f"{run_id}_{re.sub(r'[^0-9A-Za-z]+', '_', symbol).strip('_')}"
+
+
+def load_local_prices(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """从本地缓存优先的数据源管理器加载日线（列：date, close, ...）"""
+    from tradingagents.dataflows.data_source_manager import get_data_source_manager
+    return get_data_source_manager().get_stock_dataframe(symbol, start_date, end_date)
+
+
+def forward_returns(prices: pd.DataFrame, trade_date: str, horizons: Sequence[int]) -> Dict[int, Optional[float]]:
+    """以分析日（或之前最近一个交易日）的收盘价为基准，计算之后 h 个交易日的收益"""
+    result: Dict[int, Optional[float]] = {h: None for h in horizons}
+    if prices is None or prices.empty:
+        return result
+    dates = prices["date"]
+    pos = int(dates.searchsorted(pd.Timestamp(trade_date), side="right")) - 1
+    if pos < 0:
+        return result
+    closes = prices["close"].to_numpy(dtype=float)
+    base = closes[pos]
+    for h in horizons:
+        if pos + h < len(closes) and base:
+            result[h] = float(closes[pos + h] / base - 1)
+    return result
+
+
+def realization_date(prices: pd.DataFrame, trade_date: str, horizon: int) -> Optional[pd.Timestamp]:
+    """h 个交易日后的日期：该日收盘后 trade_date 的远期收益才可知"""
+    if prices is None or prices.empty:
+        return None
+    pos = int(prices["date"].searchsorted(pd.Timestamp(trade_date), side="right")) - 1
+    if pos < 0 or pos + horizon >= len(prices):
+        return None
+    return prices["date"].iloc[pos + horizon]
+
+
+class BacktestRunner:
+    """TradingAgentsGraph 回测执行器"""
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        selected_analysts: Iterable[str] = ("market", "fundamentals"),
+        horizons: Sequence[int] = (1, 5, 20),
+        max_workers: int = 4,
+        reflect: bool = True,
+        price_loader: Optional[PriceLoader] = None,
+        graph_factory: Optional[Callable[[Dict[str, Any], List[Any]], Any]] = None,
+    ):
+        """
+        注意：数据层没有截至日期参数，基本面与新闻不会按 trade_date 截断（见模块说明）。
+
+        Args:
+            config: 图配置，默认 DEFAULT_CONFIG
+            selected_analysts: 参与分析的分析师
+            horizons: 远期收益的交易日跨度，第一个用于反思
+            max_workers: 并行线程数
+            reflect: 是否在收益实现后调用 reflect_and_remember（需开启记忆）
+            price_loader: (symbol, start, end) -> DataFrame，默认读取本地缓存
+            graph_factory: (config, callbacks) -> 图实例，默认创建 TradingAgentsGraph
+        """
+        self.config = deepcopy(config or DEFAULT_CONFIG)
+        self.selected_analysts = list(selected_analysts)
+        self.horizons = sorted(set(int(h) for h in horizons)) or [1]
+        self.reflect_horizon = int(list(horizons)[0]) if horizons else self.horizons[0]
+        self.max_workers = max(1, max_workers)
+        self.reflect = reflect and self.config.get("memory_enabled", True)
+        self.price_loader = price_loader or load_local_prices
+        self.graph_factory = graph_factory or self._default_graph_factory
+
+    def _default_graph_factory(self, config: Dict[str, Any], callbacks: List[Any]):
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        return TradingAgentsGraph(selected_analysts=self.selected_analysts, config=config, callbacks=callbacks)
+
+    # ------------------------------------------------------------------
+    # 数据准备
+    # ------------------------------------------------------------------
+    def _load_prices(self, symbols: Sequence[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        # 远期收益需要结束日之后的行情：按自然日多取一段
+        extended_end = (pd.Timestamp(end_date) + pd.Timedelta(days=max(self.horizons) * 2 + 10)).strftime("%Y-%m-%d")
+        prices = {}
+        for symbol in symbols:
+            try:
+                df = self.price_loader(symbol, start_date, extended_end)
+            except Exception as e:
+                logger.warning(f"⚠️ [回测] {symbol} 行情加载失败: {e}")
+                df = None
+            if df is None or df.empty or "close" not in df.columns:
+                prices[symbol] = pd.DataFrame(columns=["date", "close"])
+                continue
+            df = df.assign(date=pd.to_datetime(df["date"])).sort_values("date").reset_index(drop=True)
+            prices[symbol] = df[["date", "close"]]
+        return prices
+
+    @staticmethod
+    def _trading_dates(prices: pd.DataFrame, start_date: str, end_date: str) -> List[str]:
+        """有本地行情时以行情日期为交易日，否则退化为工作日"""
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        if prices is not None and not prices.empty:
+            dates = prices["date"][(prices["date"] >= start) & (prices["date"] <= end)]
+        else:
+            dates = pd.bdate_range(start, end)
+        return [d.strftime("%Y-%m-%d") for d in dates]
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+    def run(self, symbols: Sequence[str], start_date: str, end_date: str,
+            output_path: Optional[str] = None) -> pd.DataFrame:
+        """运行回测并返回每个 (股票, 日期) 一行的结果表；指定 output_path 时同时写入文件"""
+        symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+        started = time.time()
+        prices = self._load_prices(symbols, start_date, end_date)
+        plan = {s: self._trading_dates(prices[s], start_date, end_date) for s in symbols}
+        total = sum(len(d) for d in plan.values())
+        logger.info(f"🧪 [回测] {len(symbols)} 只股票, {start_date} ~ {end_date}, 共 {total} 次分析, "
+                    f"并行 {self.max_workers}, 反思={'开启' if self.reflect else '关闭'}")
+
+        run_id = f"bt{uuid.uuid4().hex[:8]}"
+        rows: List[Dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="backtest") as pool:
+            if self.reflect:
+                # 同一股票按日期顺序执行，不同股票并行；每只股票一组独立的记忆集合
+                lanes = [
+                    pool.submit(self._run_lane, s, plan[s], prices[s], memory_namespace(run_id, s))
+                    for s in symbols
+                ]
+                for lane in lanes:
+                    rows.extend(lane.result())
+            else:
+                local = threading.local()
+                futures = [
+                    pool.submit(self._run_one_pooled, local, s, d, prices[s], run_id)
+                    for s in symbols for d in plan[s]
+                ]
+                rows = [f.result() for f in futures]
+
+        frame = pd.DataFrame(rows)
+        if not frame.empty:
+            frame = frame.sort_values(["symbol", "trade_date"]).reset_index(drop=True)
+        logger.info(f"🧪 [回测] 完成 {len(frame)} 次分析，耗时 {time.time() - started:.1f}秒")
+        if output_path:
+            write_results(frame, output_path)
+        return frame
+
+    def _new_graph(self, namespace: str) -> Tuple[Any, UsageTally]:
+        tally = UsageTally()
+        config = deepcopy(self.config)
+        config["memory_namespace"] = namespace
+        return self.graph_factory(config, [tally]), tally
+
+    def _run_lane(self, symbol: str, dates: List[str], prices: pd.DataFrame,
+                  namespace: str) -> List[Dict[str, Any]]:
+        graph, tally = self._new_graph(namespace)
+        rows = []
+        # 待反思队列：(收益实现日期, 分析状态, 收益)
+        pending: List[Tuple[pd.Timestamp, Dict[str, Any], float]] = []
+        for trade_date in dates:
+            current = pd.Timestamp(trade_date)
+            ready = [p for p in pending if p[0] < current]
+            pending = [p for p in pending if p[0] >= current]
+            for _, state, returns in ready:
+                self._reflect(graph, state, returns)
+
+            row = self._run_one(graph, tally, symbol, trade_date, prices)
+            rows.append(row)
+            realized_on = realization_date(prices, trade_date, self.reflect_horizon)
+            returns = row.get(f"fwd_return_{self.reflect_horizon}d")
+            if row["state"] is not None and realized_on is not None and returns is not None:
+                pending.append((realized_on, row["state"], returns))
+            row.pop("state")
+        return rows
+
+    def _run_one_pooled(self, local: threading.local, symbol: str, trade_date: str,
+                        prices: pd.DataFrame, run_id: str) -> Dict[str, Any]:
+        # 图实例有运行状态，每个线程各用一个；不反思时记忆集合始终为空，本次运行共用一组
+        if not hasattr(local, "graph"):
+            local.graph, local.tally = self._new_graph(run_id)
+        row = self._run_one(local.graph, local.tally, symbol, trade_date, prices)
+        row.pop("state")
+        return row
+
+    @staticmethod
+    def _reflect(graph, state: Dict[str, Any], returns: float) -> None:
+        try:
+            graph.curr_state = state
+            graph.reflect_and_remember(returns)
+        except Exception as e:
+            logger.warning(f"⚠️ [回测] 反思失败: {e}")
+
+    def _run_one(self, graph, tally: UsageTally, symbol: str, trade_date: str,
+                 prices: pd.DataFrame) -> Dict[str, Any]:
+        tally.reset()
+        started = time.time()
+        row: Dict[str, Any] = {"symbol": symbol, "trade_date": trade_date, "state": None, "error": None}
+        try:
+            state, decision = graph.propagate(symbol, trade_date)
+            row["state"] = state
+            row.update({
+                "action": decision.get("action"),
+                "position": ACTION_POSITIONS.get(str(decision.get("action")).strip(), 0),
+                "target_price": decision.get("target_price"),
+                "confidence": decision.get("confidence"),
+                "risk_score": decision.get("risk_score"),
+            })
+            metrics = state.get("performance_metrics") or {}
+            for node, elapsed in (metrics.get("node_timings") or {}).items():
+                row[f"node_time:{node}"] = elapsed
+        except Exception as e:
+            logger.error(f"❌ [回测] {symbol} {trade_date} 分析失败: {e}")
+            row.update({"action": None, "position": 0, "error": str(e)})
+
+        row["elapsed"] = round(time.time() - started, 2)
+        row.update(tally.summary(self.config.get("llm_provider", "")))
+        for h, value in forward_returns(prices, trade_date, self.horizons).items():
+            row[f"fwd_return_{h}d"] = value
+            row[f"strategy_return_{h}d"] = None if value is None else row["position"] * value
+        return row
+
+
+def write_results(frame: pd.DataFrame, output_path: str) -> str:
+    """写入列式结果文件：.parquet 使用 pyarrow，不可用或其他后缀时写 csv"""
+    if output_path.endswith(".parquet"):
+        try:
+            frame.to_parquet(output_path, index=False)
+            logger.info(f"💾 [回测] 结果已写入 {output_path}")
+            return output_path
+        except ImportError:
+            output_path = output_path[: -len(".parquet")] + ".csv"
+            logger.warning(f"⚠️ [回测] 未安装 pyarrow，改为写入 {output_path}")
+    frame.to_csv(output_path, index=False, encoding="utf-8-sig")
+    logger.info(f"💾 [回测] 结果已写入 {output_path}")
+    return output_path
+
+
+def summarize(frame: pd.DataFrame, horizons: Sequence[int] = (1, 5, 20)) -> Dict[str, Any]:
+    """回测汇总：各跨度的平均策略收益与方向命中率、总 Token 与成本"""
+    summary: Dict[str, Any] = {"runs": len(frame)}
+    if frame.empty:
+        return summary
+    summary["errors"] = int(frame["error"].notna().sum())
+    for h in horizons:
+        column = f"strategy_return_{h}d"
+        if column not in frame:
+            continue
+        valid = frame[frame[column].notna() & (frame["position"] != 0)]
+        summary[f"avg_strategy_return_{h}d"] = float(valid[column].mean()) if len(valid) else None
+        summary[f"hit_rate_{h}d"] = float((valid[column] > 0).mean()) if len(valid) else None
+    for column in ("input_tokens", "output_tokens", "cost", "elapsed"):
+        summary[f"total_{column}"] = float(frame[column].sum())
+    return summary
+
+
+def run_backtest(symbols: Sequence[str], start_date: str, end_date: str,
+                 output_path: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """回测的便捷入口，参数同 BacktestRunner"""
+    return BacktestRunner(**kwargs).run(symbols, start_date, end_date, output_path)
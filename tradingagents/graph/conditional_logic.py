@@ -1,6 +1,9 @@
 # TradingAgents/graph/conditional_logic.py
 
+import logging
+
 from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.graph.parallel_debate import INVEST_DEBATE_ROUND_NODE, RISK_DEBATE_ROUND_NODE
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -31,16 +34,16 @@ class ConditionalLogic:
         market_report = state.get("market_report", "")
 
         logger.info(f"🔀 [条件判断] should_continue_market")
-        logger.info(f"🔀 [条件判断] - 消息数量: {len(messages)}")
-        logger.info(f"🔀 [条件判断] - 报告长度: {len(market_report)}")
-        logger.info(f"🔧 [死循环修复] - 工具调用次数: {tool_call_count}/{max_tool_calls}")
-        logger.info(f"🔀 [条件判断] - 最后消息类型: {type(last_message).__name__}")
-        logger.info(f"🔀 [条件判断] - 是否有tool_calls: {hasattr(last_message, 'tool_calls')}")
+        logger.debug("🔀 [条件判断] - 消息数量: %d", len(messages))
+        logger.debug("🔀 [条件判断] - 报告长度: %d", len(market_report))
+        logger.debug("🔧 [死循环修复] - 工具调用次数: %s/%s", tool_call_count, max_tool_calls)
+        logger.debug("🔀 [条件判断] - 最后消息类型: %s", type(last_message).__name__)
+        logger.debug("🔀 [条件判断] - 是否有tool_calls: %s", hasattr(last_message, 'tool_calls'))
         if hasattr(last_message, 'tool_calls'):
-            logger.info(f"🔀 [条件判断] - tool_calls数量: {len(last_message.tool_calls) if last_message.tool_calls else 0}")
+            logger.debug("🔀 [条件判断] - tool_calls数量: %d", len(last_message.tool_calls) if last_message.tool_calls else 0)
             if last_message.tool_calls:
                 for i, tc in enumerate(last_message.tool_calls):
-                    logger.info(f"🔀 [条件判断] - tool_call[{i}]: {tc.get('name', 'unknown')}")
+                    logger.debug("🔀 [条件判断] - tool_call[%d]: %s", i, tc.get('name', 'unknown'))
 
         # 死循环修复: 如果达到最大工具调用次数，强制结束
         if tool_call_count >= max_tool_calls:
@@ -76,9 +79,9 @@ class ConditionalLogic:
         sentiment_report = state.get("sentiment_report", "")
 
         logger.info(f"🔀 [条件判断] should_continue_social")
-        logger.info(f"🔀 [条件判断] - 消息数量: {len(messages)}")
-        logger.info(f"🔀 [条件判断] - 报告长度: {len(sentiment_report)}")
-        logger.info(f"🔧 [死循环修复] - 工具调用次数: {tool_call_count}/{max_tool_calls}")
+        logger.debug("🔀 [条件判断] - 消息数量: %d", len(messages))
+        logger.debug("🔀 [条件判断] - 报告长度: %d", len(sentiment_report))
+        logger.debug("🔧 [死循环修复] - 工具调用次数: %s/%s", tool_call_count, max_tool_calls)
 
         # 死循环修复: 如果达到最大工具调用次数，强制结束
         if tool_call_count >= max_tool_calls:
@@ -114,9 +117,9 @@ class ConditionalLogic:
         news_report = state.get("news_report", "")
 
         logger.info(f"🔀 [条件判断] should_continue_news")
-        logger.info(f"🔀 [条件判断] - 消息数量: {len(messages)}")
-        logger.info(f"🔀 [条件判断] - 报告长度: {len(news_report)}")
-        logger.info(f"🔧 [死循环修复] - 工具调用次数: {tool_call_count}/{max_tool_calls}")
+        logger.debug("🔀 [条件判断] - 消息数量: %d", len(messages))
+        logger.debug("🔀 [条件判断] - 报告长度: %d", len(news_report))
+        logger.debug("🔧 [死循环修复] - 工具调用次数: %s/%s", tool_call_count, max_tool_calls)
 
         # 死循环修复: 如果达到最大工具调用次数，强制结束
         if tool_call_count >= max_tool_calls:
@@ -152,32 +155,32 @@ class ConditionalLogic:
         fundamentals_report = state.get("fundamentals_report", "")
 
         logger.info(f"🔀 [条件判断] should_continue_fundamentals")
-        logger.info(f"🔀 [条件判断] - 消息数量: {len(messages)}")
-        logger.info(f"🔀 [条件判断] - 报告长度: {len(fundamentals_report)}")
-        logger.info(f"🔧 [死循环修复] - 工具调用次数: {tool_call_count}/{max_tool_calls}")
-        logger.info(f"🔀 [条件判断] - 最后消息类型: {type(last_message).__name__}")
+        logger.debug("🔀 [条件判断] - 消息数量: %d", len(messages))
+        logger.debug("🔀 [条件判断] - 报告长度: %d", len(fundamentals_report))
+        logger.debug("🔧 [死循环修复] - 工具调用次数: %s/%s", tool_call_count, max_tool_calls)
+        logger.debug("🔀 [条件判断] - 最后消息类型: %s", type(last_message).__name__)
         
         # 🔍 [调试日志] 打印最后一条消息的详细内容
-        logger.info(f"🤖 [条件判断] 最后一条消息详细内容:")
-        logger.info(f"🤖 [条件判断] - 消息类型: {type(last_message).__name__}")
-        if hasattr(last_message, 'content'):
+        logger.debug("🤖 [条件判断] 最后一条消息详细内容:")
+        logger.debug("🤖 [条件判断] - 消息类型: %s", type(last_message).__name__)
+        if hasattr(last_message, 'content') and logger.isEnabledFor(logging.DEBUG):
             content_preview = last_message.content[:300] + "..." if len(last_message.content) > 300 else last_message.content
-            logger.info(f"🤖 [条件判断] - 内容预览: {content_preview}")
+            logger.debug("🤖 [条件判断] - 内容预览: %s", content_preview)
         
         # 🔍 [调试日志] 打印tool_calls的详细信息
-        logger.info(f"🔀 [条件判断] - 是否有tool_calls: {hasattr(last_message, 'tool_calls')}")
+        logger.debug("🔀 [条件判断] - 是否有tool_calls: %s", hasattr(last_message, 'tool_calls'))
         if hasattr(last_message, 'tool_calls'):
-            logger.info(f"🔀 [条件判断] - tool_calls数量: {len(last_message.tool_calls) if last_message.tool_calls else 0}")
+            logger.debug("🔀 [条件判断] - tool_calls数量: %d", len(last_message.tool_calls) if last_message.tool_calls else 0)
             if last_message.tool_calls:
-                logger.info(f"🔧 [条件判断] 检测到 {len(last_message.tool_calls)} 个工具调用:")
+                logger.debug("🔧 [条件判断] 检测到 %d 个工具调用:", len(last_message.tool_calls))
                 for i, tc in enumerate(last_message.tool_calls):
-                    logger.info(f"🔧 [条件判断] - 工具调用 {i+1}: {tc.get('name', 'unknown')} (ID: {tc.get('id', 'unknown')})")
+                    logger.debug("🔧 [条件判断] - 工具调用 %d: %s (ID: %s)", i + 1, tc.get('name', 'unknown'), tc.get('id', 'unknown'))
                     if 'args' in tc:
-                        logger.info(f"🔧 [条件判断] - 参数: {tc['args']}")
+                        logger.debug("🔧 [条件判断] - 参数: %s", tc['args'])
             else:
-                logger.info(f"🔧 [条件判断] tool_calls为空列表")
+                logger.debug("🔧 [条件判断] tool_calls为空列表")
         else:
-            logger.info(f"🔧 [条件判断] 无tool_calls属性")
+            logger.debug("🔧 [条件判断] 无tool_calls属性")
 
         # ✅ 优先级1: 如果已经有报告内容，说明分析已完成，不再循环
         if fundamentals_report and len(fundamentals_report) > 100:
@@ -240,3 +243,27 @@ class ConditionalLogic:
 
         logger.info(f"🔄 [风险讨论控制] 继续讨论 -> {next_speaker}")
         return next_speaker
+
+    def should_continue_debate_round(self, state: AgentState) -> str:
+        """并发辩论模式：判断是否进入下一轮多空辩论"""
+        current_count = state["investment_debate_state"]["count"]
+        max_count = 2 * self.max_debate_rounds
+
+        if current_count >= max_count:
+            logger.info(f"✅ [投资辩论控制] 完成 {current_count // 2} 轮并发辩论 -> Research Manager")
+            return "Research Manager"
+
+        logger.info(f"🔄 [投资辩论控制] 继续并发辩论 ({current_count}/{max_count})")
+        return INVEST_DEBATE_ROUND_NODE
+
+    def should_continue_risk_round(self, state: AgentState) -> str:
+        """并发辩论模式：判断是否进入下一轮风险讨论"""
+        current_count = state["risk_debate_state"]["count"]
+        max_count = 3 * self.max_risk_discuss_rounds
+
+        if current_count >= max_count:
+            logger.info(f"✅ [风险讨论控制] 完成 {current_count // 3} 轮并发讨论 -> Risk Judge")
+            return "Risk Judge"
+
+        logger.info(f"🔄 [风险讨论控制] 继续并发讨论 ({current_count}/{max_count})")
+        return RISK_DEBATE_ROUND_NODE
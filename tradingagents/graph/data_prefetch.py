@@ -0,0 +1,102 @@
+# TradingAgents/graph/data_prefetch.py
+"""
+分析开始时的数据预取
+
+各分析师的第一次 LLM 调用几乎总是返回对统一数据工具的调用，且参数由提示词固定（股票代码 +
+交易日期）。开启预取后，propagate() 在创建初始状态时就把这些数据获取提交到后台线程池，
+结果登记到本次运行的备忘表（tradingagents/utils/prefetch_memo.py），工具执行时直接取用。
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from tradingagents.tools.unified_news_tool import UnifiedNewsAnalyzer, get_model_info
+from tradingagents.utils.prefetch_memo import PrefetchMemo, make_prefetch_key, run_as_prefetch
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+# 基本面分析师固定获取最近10天的数据（与 fundamentals_analyst 的提示词保持一致）
+FUNDAMENTALS_LOOKBACK_DAYS = 10
+# 新闻分析师调用统一新闻工具时使用的新闻条数
+NEWS_MAX_ITEMS = 10
+
+PrefetchJob = Tuple[str, Dict[str, Any], Callable[..., Any]]
+
+
+def build_prefetch_jobs(toolkit, llm, ticker: str, trade_date: str,
+                        selected_analysts: Iterable[str]) -> List[PrefetchJob]:
+    """
+    生成预取任务：(备忘表工具名, 完整参数, 执行函数)
+
+    参数必须与分析师提示词要求的调用参数完全一致，否则工具查表不会命中。
+    """
+    jobs: List[PrefetchJob] = []
+    selected = set(selected_analysts)
+
+    if "market" in selected:
+        # 市场分析师：start_date 与 end_date 都传分析日期，工具内部自动扩展回溯区间
+        jobs.append((
+            "get_stock_market_data_unified",
+            {"ticker": ticker, "start_date": trade_date, "end_date": trade_date},
+            toolkit.get_stock_market_data_unified.func,
+        ))
+
+    if "fundamentals" in selected:
+        try:
+            end_dt = datetime.strptime(trade_date, "%Y-%m-%d")
+        except ValueError:
+            logger.warning(f"⚠️ [数据预取] 无法解析交易日期 {trade_date}，跳过基本面预取")
+        else:
+            start_date = (end_dt - timedelta(days=FUNDAMENTALS_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+            jobs.append((
+                "get_stock_fundamentals_unified",
+                {"ticker": ticker, "start_date": start_date, "end_date": trade_date, "curr_date": trade_date},
+                toolkit.get_stock_fundamentals_unified.func,
+            ))
+
+    if "news" in selected:
+        # 新闻分析师直接调用统一新闻工具（预处理 / 强制获取路径），模型信息参与结果格式化
+        analyzer = UnifiedNewsAnalyzer(toolkit)
+        jobs.append((
+            "unified_news",
+            {"stock_code": ticker, "max_news": NEWS_MAX_ITEMS, "model_info": get_model_info(llm)},
+            analyzer.get_stock_news_unified,
+        ))
+
+    return jobs
+
+
+@contextmanager
+def data_prefetch(toolkit, llm, ticker: str, trade_date: str, selected_analysts: Iterable[str],
+                  wait_timeout: Optional[float] = None):
+    """
+    在上下文内启用数据预取：提交后台任务并把备忘表绑定到当前运行，退出时取消未开始的任务
+
+    Yields:
+        PrefetchMemo: 本次运行的备忘表
+    """
+    memo = PrefetchMemo(wait_timeout=wait_timeout)
+    jobs = build_prefetch_jobs(toolkit, llm, ticker, str(trade_date), selected_analysts)
+    if not jobs:
+        yield memo
+        return
+
+    executor = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="prefetch")
+    token = memo.activate()
+    try:
+        for tool_name, arguments, func in jobs:
+            future = executor.submit(contextvars.copy_context().run, run_as_prefetch, func, **arguments)
+            memo.register(make_prefetch_key(tool_name, arguments), future)
+        logger.info(f"⚡ [数据预取] {ticker} {trade_date}: 已提交 {len(jobs)} 个预取任务 "
+                    f"({', '.join(job[0] for job in jobs)})")
+        yield memo
+    finally:
+        memo.deactivate(token)
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"⚡ [数据预取] 本次运行命中 {memo.stats['hits']}/{memo.stats['registered']}，"
+                    f"回退 {memo.stats['fallbacks']}")
@@ -0,0 +1,113 @@
+# TradingAgents/graph/parallel_debate.py
+"""
+并发辩论轮次
+
+顺序模式下，每一轮辩论中各方依次发言（接力式调用 LLM）。并发模式把一轮中的所有发言者
+包装成一个图节点：各方基于同一份辩论状态快照并行生成观点，再按固定顺序合并进历史，
+然后进入下一轮或交给裁判节点。
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+# 并发轮次在图中的节点名称
+INVEST_DEBATE_ROUND_NODE = "Bull/Bear Researchers"
+RISK_DEBATE_ROUND_NODE = "Risky/Safe/Neutral Analysts"
+
+
+def _run_concurrently(calls: List[Tuple[str, Callable[[], dict]]]) -> Dict[str, dict]:
+    """并发执行一组节点调用，保持上下文变量（日志上下文、回调等）"""
+    with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="debate") as executor:
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, call)
+            for name, call in calls
+        }
+        # 任一发言者失败时直接抛出，与顺序模式下节点异常的行为一致
+        return {name: future.result() for name, future in futures.items()}
+
+
+def create_parallel_invest_debate_round(bull_node, bear_node):
+    """创建并发的多空辩论轮次节点（一轮 = 多头、空头各发言一次）"""
+
+    def invest_debate_round(state) -> dict:
+        snapshot = state["investment_debate_state"]
+
+        # 每一方看到的"对方最后论点"来自上一轮，而不是本轮的并发结果
+        bull_view = {**snapshot, "current_response": snapshot.get("current_bear_response", "")}
+        bear_view = {**snapshot, "current_response": snapshot.get("current_bull_response", "")}
+
+        logger.info(f"⚡ [并发投资辩论] 开始第 {snapshot.get('count', 0) // 2 + 1} 轮，多空双方并行发言")
+        start_time = time.time()
+        results = _run_concurrently([
+            ("bull", lambda: bull_node({**state, "investment_debate_state": bull_view})),
+            ("bear", lambda: bear_node({**state, "investment_debate_state": bear_view})),
+        ])
+        logger.info(f"⚡ [并发投资辩论] 本轮完成，耗时: {time.time() - start_time:.2f}秒")
+
+        bull_state = results["bull"]["investment_debate_state"]
+        bear_state = results["bear"]["investment_debate_state"]
+        bull_argument = bull_state["current_response"]
+        bear_argument = bear_state["current_response"]
+
+        return {
+            "investment_debate_state": {
+                "history": snapshot.get("history", "") + "\n" + bull_argument + "\n" + bear_argument,
+                "bull_history": bull_state.get("bull_history", ""),
+                "bear_history": bear_state.get("bear_history", ""),
+                # 保持顺序模式的语义：本轮最后发言者为空头
+                "current_response": bear_argument,
+                "current_bull_response": bull_argument,
+                "current_bear_response": bear_argument,
+                "judge_decision": snapshot.get("judge_decision", ""),
+                "count": snapshot.get("count", 0) + 2,
+            }
+        }
+
+    return invest_debate_round
+
+
+def create_parallel_risk_debate_round(risky_node, safe_node, neutral_node):
+    """创建并发的风险辩论轮次节点（一轮 = 激进、保守、中性各发言一次）"""
+
+    def risk_debate_round(state) -> dict:
+        snapshot = state["risk_debate_state"]
+
+        logger.info(f"⚡ [并发风险讨论] 开始第 {snapshot.get('count', 0) // 3 + 1} 轮，三方并行发言")
+        start_time = time.time()
+        results = _run_concurrently([
+            ("risky", lambda: risky_node(state)),
+            ("safe", lambda: safe_node(state)),
+            ("neutral", lambda: neutral_node(state)),
+        ])
+        logger.info(f"⚡ [并发风险讨论] 本轮完成，耗时: {time.time() - start_time:.2f}秒")
+
+        risky_state = results["risky"]["risk_debate_state"]
+        safe_state = results["safe"]["risk_debate_state"]
+        neutral_state = results["neutral"]["risk_debate_state"]
+        risky_argument = risky_state["current_risky_response"]
+        safe_argument = safe_state["current_safe_response"]
+        neutral_argument = neutral_state["current_neutral_response"]
+
+        return {
+            "risk_debate_state": {
+                "history": "\n".join([snapshot.get("history", ""), risky_argument, safe_argument, neutral_argument]),
+                "risky_history": risky_state.get("risky_history", ""),
+                "safe_history": safe_state.get("safe_history", ""),
+                "neutral_history": neutral_state.get("neutral_history", ""),
+                # 保持顺序模式的语义：本轮最后发言者为中性分析师
+                "latest_speaker": "Neutral",
+                "current_risky_response": risky_argument,
+                "current_safe_response": safe_argument,
+                "current_neutral_response": neutral_argument,
+                "judge_decision": snapshot.get("judge_decision", ""),
+                "count": snapshot.get("count", 0) + 3,
+            }
+        }
+
+    return risk_debate_round
@@ -8,8 +8,15 @@ from langgraph.prebuilt import ToolNode
 from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.agents.utils.debate_context import DebateContextBudget
 
 from .conditional_logic import ConditionalLogic
+from .parallel_debate import (
+    INVEST_DEBATE_ROUND_NODE,
+    RISK_DEBATE_ROUND_NODE,
+    create_parallel_invest_debate_round,
+    create_parallel_risk_debate_round,
+)
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -136,24 +143,27 @@ class GraphSetup:
             delete_nodes["fundamentals"] = create_msg_delete()
             tool_nodes["fundamentals"] = self.tool_nodes["fundamentals"]
 
+        # 辩论上下文预算：研究员、风险分析师、裁判共用一份滚动摘要缓存
+        context_budget = DebateContextBudget.from_config(self.quick_thinking_llm, self.config)
+
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
-            self.quick_thinking_llm, self.bull_memory
+            self.quick_thinking_llm, self.bull_memory, context_budget
         )
         bear_researcher_node = create_bear_researcher(
-            self.quick_thinking_llm, self.bear_memory
+            self.quick_thinking_llm, self.bear_memory, context_budget
         )
         research_manager_node = create_research_manager(
-            self.deep_thinking_llm, self.invest_judge_memory
+            self.deep_thinking_llm, self.invest_judge_memory, context_budget
         )
         trader_node = create_trader(self.quick_thinking_llm, self.trader_memory)
 
         # Create risk analysis nodes
-        risky_analyst = create_risky_debator(self.quick_thinking_llm)
-        neutral_analyst = create_neutral_debator(self.quick_thinking_llm)
-        safe_analyst = create_safe_debator(self.quick_thinking_llm)
+        risky_analyst = create_risky_debator(self.quick_thinking_llm, context_budget)
+        neutral_analyst = create_neutral_debator(self.quick_thinking_llm, context_budget)
+        safe_analyst = create_safe_debator(self.quick_thinking_llm, context_budget)
         risk_manager_node = create_risk_manager(
-            self.deep_thinking_llm, self.risk_manager_memory
+            self.deep_thinking_llm, self.risk_manager_memory, context_budget
         )
 
         # Create workflow
@@ -168,16 +178,34 @@ class GraphSetup:
             workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
-        workflow.add_node("Bull Researcher", bull_researcher_node)
-        workflow.add_node("Bear Researcher", bear_researcher_node)
+        parallel_invest = self.config.get("parallel_investment_debate", False)
+        parallel_risk = self.config.get("parallel_risk_debate", False)
+
+        if parallel_invest:
+            workflow.add_node(
+                INVEST_DEBATE_ROUND_NODE,
+                create_parallel_invest_debate_round(bull_researcher_node, bear_researcher_node),
+            )
+        else:
+            workflow.add_node("Bull Researcher", bull_researcher_node)
+            workflow.add_node("Bear Researcher", bear_researcher_node)
         workflow.add_node("Research Manager", research_manager_node)
         workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
+        if parallel_risk:
+            workflow.add_node(
+                RISK_DEBATE_ROUND_NODE,
+                create_parallel_risk_debate_round(risky_analyst, safe_analyst, neutral_analyst),
+            )
+        else:
+            workflow.add_node("Risky Analyst", risky_analyst)
+            workflow.add_node("Neutral Analyst", neutral_analyst)
+            workflow.add_node("Safe Analyst", safe_analyst)
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
+        research_entry = INVEST_DEBATE_ROUND_NODE if parallel_invest else "Bull Researcher"
+        risk_entry = RISK_DEBATE_ROUND_NODE if parallel_risk else "Risky Analyst"
+
         # Start with the first analyst
         first_analyst = selected_analysts[0]
         workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
@@ -201,51 +229,73 @@ class GraphSetup:
                 next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
                 workflow.add_edge(current_clear, next_analyst)
             else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+                workflow.add_edge(current_clear, research_entry)
 
         # Add remaining edges
-        workflow.add_conditional_edges(
-            "Bull Researcher",
-            self.conditional_logic.should_continue_debate,
-            {
-                "Bear Researcher": "Bear Researcher",
-                "Research Manager": "Research Manager",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Bear Researcher",
-            self.conditional_logic.should_continue_debate,
-            {
-                "Bull Researcher": "Bull Researcher",
-                "Research Manager": "Research Manager",
-            },
-        )
+        if parallel_invest:
+            # 并发模式：每轮多空双方并行发言，合并后进入下一轮或研究经理
+            workflow.add_conditional_edges(
+                INVEST_DEBATE_ROUND_NODE,
+                self.conditional_logic.should_continue_debate_round,
+                {
+                    INVEST_DEBATE_ROUND_NODE: INVEST_DEBATE_ROUND_NODE,
+                    "Research Manager": "Research Manager",
+                },
+            )
+        else:
+            workflow.add_conditional_edges(
+                "Bull Researcher",
+                self.conditional_logic.should_continue_debate,
+                {
+                    "Bear Researcher": "Bear Researcher",
+                    "Research Manager": "Research Manager",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Bear Researcher",
+                self.conditional_logic.should_continue_debate,
+                {
+                    "Bull Researcher": "Bull Researcher",
+                    "Research Manager": "Research Manager",
+                },
+            )
         workflow.add_edge("Research Manager", "Trader")
-        workflow.add_edge("Trader", "Risky Analyst")
-        workflow.add_conditional_edges(
-            "Risky Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Safe Analyst": "Safe Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Safe Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Neutral Analyst": "Neutral Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Neutral Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Risky Analyst": "Risky Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
+        workflow.add_edge("Trader", risk_entry)
+        if parallel_risk:
+            # 并发模式：每轮三方基于同一快照并行发言，合并后进入下一轮或风险经理
+            workflow.add_conditional_edges(
+                RISK_DEBATE_ROUND_NODE,
+                self.conditional_logic.should_continue_risk_round,
+                {
+                    RISK_DEBATE_ROUND_NODE: RISK_DEBATE_ROUND_NODE,
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+        else:
+            workflow.add_conditional_edges(
+                "Risky Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Safe Analyst": "Safe Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Safe Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Neutral Analyst": "Neutral Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Neutral Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Risky Analyst": "Risky Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
 
         workflow.add_edge("Risk Judge", END)
 
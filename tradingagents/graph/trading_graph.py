@@ -1,16 +1,19 @@
 # TradingAgents/graph/trading_graph.py
 
 import os
+import inspect
 from pathlib import Path
 import json
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 import time
+from contextlib import contextmanager, nullcontext
 
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from tradingagents.llm_adapters import ChatDashScopeOpenAI, ChatGoogleOpenAI
+from tradingagents.llm_adapters.response_cache import apply_llm_response_cache
 
 from langgraph.prebuilt import ToolNode
 
@@ -36,6 +39,9 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .data_prefetch import data_prefetch
+from tradingagents.utils.market_context import shared_market_context
+from tradingagents.utils.telemetry import RunTelemetry
 
 
 def create_llm_by_provider(provider: str, model: str, backend_url: str, temperature: float, max_tokens: int, timeout: int, api_key: str = None):
@@ -190,6 +196,39 @@ def create_llm_by_provider(provider: str, model: str, backend_url: str, temperat
         )
 
 
+class _NodeTimer:
+    """按 stream chunk 的节点切换记录每个节点的执行时间"""
+
+    def __init__(self):
+        self.node_timings: Dict[str, float] = {}
+        self.total_start_time = time.time()
+        self.current_node_name = None
+        self.current_node_start = None
+
+    def observe(self, chunk) -> None:
+        for node_name in chunk.keys():
+            if not node_name.startswith('__'):
+                # 如果有上一个节点，记录其结束时间
+                if self.current_node_name and self.current_node_start:
+                    elapsed = time.time() - self.current_node_start
+                    self.node_timings[self.current_node_name] = elapsed
+                    logger.info(f"⏱️ [{self.current_node_name}] 耗时: {elapsed:.2f}秒")
+
+                # 开始新节点计时
+                self.current_node_name = node_name
+                self.current_node_start = time.time()
+                break
+
+    def finish(self) -> Dict[str, float]:
+        # 记录最后一个节点的时间
+        if self.current_node_name and self.current_node_start:
+            elapsed = time.time() - self.current_node_start
+            self.node_timings[self.current_node_name] = elapsed
+            logger.info(f"⏱️ [{self.current_node_name}] 耗时: {elapsed:.2f}秒")
+            self.current_node_name = None
+        return self.node_timings
+
+
 class TradingAgentsGraph:
     """Main class that orchestrates the trading agents framework."""
 
@@ -198,6 +237,7 @@ class TradingAgentsGraph:
         selected_analysts=["market", "social", "news", "fundamentals"],
         debug=False,
         config: Dict[str, Any] = None,
+        callbacks: Optional[List[Any]] = None,
     ):
         """Initialize the trading agents graph and components.
 
@@ -205,9 +245,11 @@ class TradingAgentsGraph:
             selected_analysts: List of analyst types to include
             debug: Whether to run in debug mode
             config: Configuration dictionary. If None, uses default config
+            callbacks: LangChain callback handlers attached to every graph run (e.g. token usage tally)
         """
         self.debug = debug
         self.config = config or DEFAULT_CONFIG
+        self.callbacks = list(callbacks or [])
 
         # Update the interface's config
         set_config(self.config)
@@ -752,17 +794,25 @@ class TradingAgentsGraph:
 
             logger.info(f"✅ [自定义厂家 {provider_name}] 已配置自定义端点并应用用户配置的模型参数")
         
+        # LLM 响应缓存 / 严格回放模式（默认关闭）
+        self.llm_cache = apply_llm_response_cache(
+            [self.deep_thinking_llm, self.quick_thinking_llm], self.config
+        )
+
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
         memory_enabled = self.config.get("memory_enabled", True)
         if memory_enabled:
             # 使用单例ChromaDB管理器，避免并发创建冲突
-            self.bull_memory = FinancialSituationMemory("bull_memory", self.config)
-            self.bear_memory = FinancialSituationMemory("bear_memory", self.config)
-            self.trader_memory = FinancialSituationMemory("trader_memory", self.config)
-            self.invest_judge_memory = FinancialSituationMemory("invest_judge_memory", self.config)
-            self.risk_manager_memory = FinancialSituationMemory("risk_manager_memory", self.config)
+            # memory_namespace 用于隔离记忆集合（如回测时每次运行、每只股票各用一组）
+            namespace = self.config.get("memory_namespace")
+            suffix = f"_{namespace}" if namespace else ""
+            self.bull_memory = FinancialSituationMemory(f"bull_memory{suffix}", self.config)
+            self.bear_memory = FinancialSituationMemory(f"bear_memory{suffix}", self.config)
+            self.trader_memory = FinancialSituationMemory(f"trader_memory{suffix}", self.config)
+            self.invest_judge_memory = FinancialSituationMemory(f"invest_judge_memory{suffix}", self.config)
+            self.risk_manager_memory = FinancialSituationMemory(f"risk_manager_memory{suffix}", self.config)
         else:
             # 创建空的内存对象
             self.bull_memory = None
@@ -809,6 +859,7 @@ class TradingAgentsGraph:
         self.log_states_dict = {}  # date to full state dict
 
         # Set up the graph
+        self.selected_analysts = list(selected_analysts)
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
@@ -878,7 +929,83 @@ class TradingAgentsGraph:
             progress_callback: Optional callback function for progress updates
             task_id: Optional task ID for tracking performance data
         """
+        with self._telemetry_scope(), self._market_context(company_name, trade_date), \
+                self._data_prefetch(company_name, trade_date):
+            return self._propagate(company_name, trade_date, progress_callback, task_id)
+
+    @contextmanager
+    def _telemetry_scope(self):
+        """为本次运行创建遥测回调（按节点记录 Token、耗时、工具与缓存命中），失败的运行计入错误数"""
+        if not self.config.get("telemetry_enabled", True):
+            self._run_telemetry = None
+            yield None
+            return
+        telemetry = RunTelemetry(provider=self.config.get("llm_provider", ""))
+        self._run_telemetry = telemetry
+        token = telemetry.activate()
+        try:
+            yield telemetry
+        except BaseException:
+            telemetry.registry.runs.inc("error")
+            raise
+        finally:
+            telemetry.deactivate(token)
+
+    def _market_context(self, company_name, trade_date):
+        """开启共享时绑定 (市场, 交易日期) 的市场级共享上下文，同市场同日期的并发分析复用大盘/宏观数据"""
+        if not self.config.get("share_market_context", False):
+            return nullcontext()
+        from tradingagents.utils.stock_utils import StockUtils
+        market = StockUtils.get_market_info(company_name)["market"]
+        return shared_market_context(market, str(trade_date), ttl=self.config.get("market_context_ttl", 1800))
+
+    def _data_prefetch(self, company_name, trade_date):
+        """开启预取时返回预取上下文（后台获取分析师首轮数据），否则返回空上下文"""
+        if not self.config.get("prefetch_data", False):
+            return nullcontext()
+        return data_prefetch(
+            self.toolkit,
+            self.quick_thinking_llm,
+            company_name,
+            str(trade_date),
+            self.selected_analysts,
+            wait_timeout=self.config.get("prefetch_wait_timeout"),
+        )
+
+    async def apropagate(self, company_name, trade_date, progress_callback=None, task_id=None):
+        """propagate 的异步版本：使用 LangGraph astream 驱动图执行
 
+        计时、进度回调和返回值与 propagate 一致；progress_callback 可以是普通函数或协程函数。
+        同步节点由 LangGraph 按节点放到线程中执行，整个分析不再独占一个线程；
+        LLM 适配器实现了 _agenerate，异步节点可以直接 await 模型调用。
+        """
+        with self._telemetry_scope(), self._market_context(company_name, trade_date), \
+                self._data_prefetch(company_name, trade_date):
+            init_agent_state, args = self._prepare_propagation(company_name, trade_date, task_id, progress_callback)
+            timer = _NodeTimer()
+            final_state = None
+            async for chunk in self.graph.astream(init_agent_state, **args):
+                messages = []
+                final_state = self._consume_chunk(
+                    chunk, init_agent_state, final_state, timer, args,
+                    messages.append if progress_callback else None,
+                )
+                for message in messages:
+                    result = progress_callback(message)
+                    if inspect.isawaitable(result):
+                        await result
+            return self._finish_propagation(company_name, trade_date, final_state, timer)
+
+    def _propagate(self, company_name, trade_date, progress_callback=None, task_id=None):
+        init_agent_state, args = self._prepare_propagation(company_name, trade_date, task_id, progress_callback)
+        timer = _NodeTimer()
+        final_state = None
+        for chunk in self.graph.stream(init_agent_state, **args):
+            final_state = self._consume_chunk(chunk, init_agent_state, final_state, timer, args, progress_callback)
+        return self._finish_propagation(company_name, trade_date, final_state, timer)
+
+    def _prepare_propagation(self, company_name, trade_date, task_id, progress_callback):
+        """创建初始状态和图执行参数"""
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
         logger.debug(f"🔍 [GRAPH DEBUG] 接收到的company_name: '{company_name}' (类型: {type(company_name)})")
@@ -896,126 +1023,47 @@ class TradingAgentsGraph:
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
 
-        # 初始化计时器
-        node_timings = {}  # 记录每个节点的执行时间
-        total_start_time = time.time()  # 总体开始时间
-        current_node_start = None  # 当前节点开始时间
-        current_node_name = None  # 当前节点名称
-
         # 保存task_id用于后续保存性能数据
         self._current_task_id = task_id
 
         # 根据是否有进度回调选择不同的stream_mode
         args = self.propagator.get_graph_args(use_progress_callback=bool(progress_callback))
-
-        if self.debug:
-            # Debug mode with tracing and progress updates
-            trace = []
-            final_state = None
-            for chunk in self.graph.stream(init_agent_state, **args):
-                # 记录节点计时
-                for node_name in chunk.keys():
-                    if not node_name.startswith('__'):
-                        # 如果有上一个节点，记录其结束时间
-                        if current_node_name and current_node_start:
-                            elapsed = time.time() - current_node_start
-                            node_timings[current_node_name] = elapsed
-                            logger.info(f"⏱️ [{current_node_name}] 耗时: {elapsed:.2f}秒")
-
-                        # 开始新节点计时
-                        current_node_name = node_name
-                        current_node_start = time.time()
-                        break
-
-                # 在 updates 模式下，chunk 格式为 {node_name: state_update}
-                # 在 values 模式下，chunk 格式为完整的状态
-                if progress_callback and args.get("stream_mode") == "updates":
-                    # updates 模式：chunk = {"Market Analyst": {...}}
-                    self._send_progress_update(chunk, progress_callback)
-                    # 累积状态更新
-                    if final_state is None:
-                        final_state = init_agent_state.copy()
-                    for node_name, node_update in chunk.items():
-                        if not node_name.startswith('__'):
-                            final_state.update(node_update)
-                else:
-                    # values 模式：chunk = {"messages": [...], ...}
-                    if len(chunk.get("messages", [])) > 0:
-                        chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
-                    final_state = chunk
-
-            if not trace and final_state:
-                # updates 模式下，使用累积的状态
-                pass
-            elif trace:
-                final_state = trace[-1]
-        else:
-            # Standard mode without tracing but with progress updates
-            if progress_callback:
-                # 使用 updates 模式以便获取节点级别的进度
-                trace = []
-                final_state = None
-                for chunk in self.graph.stream(init_agent_state, **args):
-                    # 记录节点计时
-                    for node_name in chunk.keys():
-                        if not node_name.startswith('__'):
-                            # 如果有上一个节点，记录其结束时间
-                            if current_node_name and current_node_start:
-                                elapsed = time.time() - current_node_start
-                                node_timings[current_node_name] = elapsed
-                                logger.info(f"⏱️ [{current_node_name}] 耗时: {elapsed:.2f}秒")
-                                logger.info(f"🔍 [TIMING] 节点切换: {current_node_name} → {node_name}")
-
-                            # 开始新节点计时
-                            current_node_name = node_name
-                            current_node_start = time.time()
-                            logger.info(f"🔍 [TIMING] 开始计时: {node_name}")
-                            break
-
-                    self._send_progress_update(chunk, progress_callback)
-                    # 累积状态更新
-                    if final_state is None:
-                        final_state = init_agent_state.copy()
-                    for node_name, node_update in chunk.items():
-                        if not node_name.startswith('__'):
-                            final_state.update(node_update)
-            else:
-                # 原有的invoke模式（也需要计时）
-                logger.info("⏱️ 使用 invoke 模式执行分析（无进度回调）")
-                # 使用stream模式以便计时，但不发送进度更新
-                trace = []
-                final_state = None
-                for chunk in self.graph.stream(init_agent_state, **args):
-                    # 记录节点计时
-                    for node_name in chunk.keys():
-                        if not node_name.startswith('__'):
-                            # 如果有上一个节点，记录其结束时间
-                            if current_node_name and current_node_start:
-                                elapsed = time.time() - current_node_start
-                                node_timings[current_node_name] = elapsed
-                                logger.info(f"⏱️ [{current_node_name}] 耗时: {elapsed:.2f}秒")
-
-                            # 开始新节点计时
-                            current_node_name = node_name
-                            current_node_start = time.time()
-                            break
-
-                    # 累积状态更新
-                    if final_state is None:
-                        final_state = init_agent_state.copy()
-                    for node_name, node_update in chunk.items():
-                        if not node_name.startswith('__'):
-                            final_state.update(node_update)
-
-        # 记录最后一个节点的时间
-        if current_node_name and current_node_start:
-            elapsed = time.time() - current_node_start
-            node_timings[current_node_name] = elapsed
-            logger.info(f"⏱️ [{current_node_name}] 耗时: {elapsed:.2f}秒")
+        callbacks = list(getattr(self, "callbacks", None) or [])
+        if getattr(self, "_run_telemetry", None) is not None:
+            callbacks.append(self._run_telemetry)
+        if callbacks:
+            args["config"] = {**args.get("config", {}), "callbacks": callbacks}
+        if not progress_callback:
+            logger.info("⏱️ 使用 invoke 模式执行分析（无进度回调）")
+        return init_agent_state, args
+
+    def _consume_chunk(self, chunk, init_agent_state, final_state, timer, args, progress_callback):
+        """处理一个 stream chunk：节点计时、进度回调、累积状态，返回最新的最终状态"""
+        timer.observe(chunk)
+
+        if self.debug and args.get("stream_mode") != "updates":
+            # Debug 模式 values 输出：chunk 为完整状态
+            if len(chunk.get("messages", [])) > 0:
+                chunk["messages"][-1].pretty_print()
+            return chunk
+
+        # 在 updates 模式下，chunk 格式为 {node_name: state_update}
+        if progress_callback:
+            self._send_progress_update(chunk, progress_callback)
+        # 累积状态更新
+        if final_state is None:
+            final_state = init_agent_state.copy()
+        for node_name, node_update in chunk.items():
+            if not node_name.startswith('__'):
+                final_state.update(node_update)
+        return final_state
+
+    def _finish_propagation(self, company_name, trade_date, final_state, timer):
+        """汇总计时、记录状态并处理最终决策"""
+        node_timings = timer.finish()
 
         # 计算总时间
-        total_elapsed = time.time() - total_start_time
+        total_elapsed = time.time() - timer.total_start_time
 
         # 调试日志
         logger.info(f"🔍 [TIMING DEBUG] 节点计时数量: {len(node_timings)}")
@@ -1030,6 +1078,11 @@ class TradingAgentsGraph:
         # 构建性能数据
         performance_data = self._build_performance_data(node_timings, total_elapsed)
 
+        # 按节点汇总 Token、LLM/工具耗时、缓存命中和成本
+        run_telemetry = getattr(self, "_run_telemetry", None)
+        if run_telemetry is not None:
+            performance_data["telemetry"] = run_telemetry.finish(node_timings)
+
         # 将性能数据添加到状态中
         final_state['performance_metrics'] = performance_data
 
@@ -1111,6 +1164,7 @@ class TradingAgentsGraph:
                 # 研究员节点
                 'Bull Researcher': "🐂 看涨研究员",
                 'Bear Researcher': "🐻 看跌研究员",
+                'Bull/Bear Researchers': "🐂🐻 多空辩论（并发）",
                 'Research Manager': "👔 研究经理",
                 # 交易员节点
                 'Trader': "💼 交易员决策",
@@ -1118,6 +1172,7 @@ class TradingAgentsGraph:
                 'Risky Analyst': "🔥 激进风险评估",
                 'Safe Analyst': "🛡️ 保守风险评估",
                 'Neutral Analyst': "⚖️ 中性风险评估",
+                'Risky/Safe/Neutral Analysts': "⚖️ 风险评估（并发）",
                 'Risk Judge': "🎯 风险经理",
             }
 
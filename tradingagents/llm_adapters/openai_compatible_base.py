@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Union
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -174,6 +174,21 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         return result
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（使用 AsyncOpenAI 客户端，不占用线程），并记录token使用量
+        """
+        start_time = time.time()
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        self._track_token_usage(result, kwargs, start_time)
+        return result
+
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """记录token使用量并输出日志"""
         if not TOKEN_TRACKING_ENABLED:
@@ -355,6 +370,17 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
         # 调用父类的_generate方法
         return super()._generate(truncated_messages, stop, run_manager, **kwargs)
 
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """异步生成聊天响应，包含千帆模型的token截断逻辑"""
+        truncated_messages = self._truncate_messages(messages)
+        return await super()._agenerate(truncated_messages, stop, run_manager, **kwargs)
+
 
 class ChatZhipuOpenAI(OpenAICompatibleBase):
     """智谱AI GLM OpenAI兼容适配器"""
@@ -0,0 +1,243 @@
+"""
+LLM 响应缓存与回放模式
+
+基于 LangChain 的 BaseCache 扩展点：聊天模型在调用 _generate 之前会用
+(序列化的模型配置 + 调用参数, 规范化后的消息) 查询缓存，因此所有适配器
+（OpenAI 兼容基类、DashScope、DeepSeek、Google 等）无需改动即可复用。
+
+缓存键覆盖 提供商（模型类）、模型名、温度等模型参数、绑定的工具（调用参数）和消息内容；
+消息中的运行时字段（消息 id、response_metadata、usage_metadata）在计算键之前被剔除。
+
+模式：
+- off:       不启用（默认）
+- readwrite: 命中则直接返回缓存结果，未命中则调用模型并写入缓存
+- replay:    严格回放，只读缓存，未命中时抛出 LLMCacheMissError（用于离线、可复现的测试/回测）
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.telemetry import record_cache_hit
+logger = get_logger('agents')
+
+CACHE_MODES = ("off", "readwrite", "replay")
+
+# 剔除后再计算缓存键的消息字段：每次调用都会变化，但不影响模型输出
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class LLMCacheMissError(RuntimeError):
+    """严格回放模式下缓存未命中"""
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """剔除消息中的运行时字段，生成稳定的消息表示"""
+    try:
+        messages = json.loads(prompt)
+    except (TypeError, ValueError):
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for field in _VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+    return json.dumps(messages, sort_keys=True, ensure_ascii=False)
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """计算缓存键：sha256(模型配置与调用参数 + 规范化消息)"""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(_normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _serialize_generations(generations: Sequence[Generation]) -> str:
+    items = []
+    for gen in generations:
+        if isinstance(gen, ChatGeneration):
+            items.append({"message": message_to_dict(gen.message), "generation_info": gen.generation_info})
+        else:
+            items.append({"text": gen.text, "generation_info": gen.generation_info})
+    return json.dumps(items, ensure_ascii=False, default=str)
+
+
+def _deserialize_generations(value: str) -> list:
+    generations = []
+    for item in json.loads(value):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=item.get("generation_info")))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=item.get("generation_info")))
+    return generations
+
+
+class LLMResponseCache(BaseCache):
+    """SQLite 存储的 LLM 响应缓存，按总大小淘汰最久未访问的条目"""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, replay: bool = False):
+        """
+        Args:
+            path: SQLite 数据库文件路径
+            max_bytes: 缓存内容总大小上限（字节），超出后淘汰最久未访问的条目至上限的 90%
+            replay: 严格回放模式，未命中时抛出 LLMCacheMissError，且不写入新条目
+        """
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._query_total_bytes()
+
+    # ------------------------------------------------------------------
+    # BaseCache 接口
+    # ------------------------------------------------------------------
+    def lookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        key = make_cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+
+        if row is None:
+            self.stats["misses"] += 1
+            if self.replay:
+                raise LLMCacheMissError(f"LLM回放模式缓存未命中 (key={key[:12]}...)，请先在 readwrite 模式下录制")
+            return None
+
+        try:
+            generations = _deserialize_generations(row[0])
+        except Exception as e:
+            logger.warning(f"⚠️ [LLM缓存] 缓存条目损坏，忽略: {e}")
+            if self.replay:
+                raise LLMCacheMissError(f"LLM回放模式缓存条目损坏 (key={key[:12]}...)") from e
+            return None
+        self.stats["hits"] += 1
+        logger.debug("💾 [LLM缓存] 命中 key=%.12s", key)
+        record_cache_hit()
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.replay:
+            return
+        key = make_cache_key(prompt, llm_string)
+        value = _serialize_generations(return_val)
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._total_bytes += size - (row[0] if row else 0)
+            self.stats["writes"] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    def _query_total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        """淘汰最久未访问的条目，直到总大小降到上限的 90%（调用方持有锁）"""
+        # 其他进程可能也在写同一个文件，淘汰前以数据库中的实际大小为准
+        self._total_bytes = self._query_total_bytes()
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        if evicted:
+            self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+            self.stats["evicted"] += len(evicted)
+            logger.info(f"🧹 [LLM缓存] 超出容量上限，淘汰 {len(evicted)} 条最久未访问的响应")
+
+
+# ----------------------------------------------------------------------
+# 全局实例
+# ----------------------------------------------------------------------
+_caches: Dict[Tuple[str, bool], LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_response_cache(path: str, max_bytes: int, replay: bool = False) -> LLMResponseCache:
+    """同一文件、同一模式在进程内共享一个缓存实例"""
+    cache_id = (os.path.abspath(path), replay)
+    with _caches_lock:
+        cache = _caches.get(cache_id)
+        if cache is None:
+            cache = LLMResponseCache(path, max_bytes=max_bytes, replay=replay)
+            _caches[cache_id] = cache
+        return cache
+
+
+def apply_llm_response_cache(llms: Iterable[Any], config: Dict[str, Any]) -> Optional[LLMResponseCache]:
+    """
+    按配置为模型实例挂载响应缓存（只影响传入的实例，不修改 LangChain 的全局缓存）
+
+    配置项：llm_cache_mode / llm_cache_path / llm_cache_max_mb
+    """
+    mode = str(config.get("llm_cache_mode") or "off").lower()
+    if mode not in CACHE_MODES:
+        logger.warning(f"⚠️ [LLM缓存] 未知的缓存模式 '{mode}'，可选值: {', '.join(CACHE_MODES)}，已禁用缓存")
+        return None
+    if mode == "off":
+        return None
+
+    path = config.get("llm_cache_path") or os.path.join(config.get("data_cache_dir", "."), "llm_cache.sqlite")
+    max_bytes = int(float(config.get("llm_cache_max_mb", 512)) * 1024 * 1024)
+    cache = get_llm_response_cache(path, max_bytes=max_bytes, replay=(mode == "replay"))
+
+    for llm in llms:
+        if llm is not None:
+            llm.cache = cache
+    logger.info(f"💾 [LLM缓存] 已启用 {mode} 模式: {path}")
+    return cache
@@ -9,6 +9,8 @@ import logging
 from datetime import datetime
 import re
 
+from tradingagents.utils.prefetch_memo import prefetchable
+
 logger = logging.getLogger(__name__)
 
 class UnifiedNewsAnalyzer:
@@ -549,10 +551,21 @@ class UnifiedNewsAnalyzer:
         return formatted_result.strip()
 
 
+def get_model_info(llm) -> str:
+    """生成统一新闻工具使用的模型信息字符串（用于针对特定模型的格式处理）"""
+    try:
+        if hasattr(llm, 'model_name'):
+            return f"{llm.__class__.__name__}:{llm.model_name}"
+        return llm.__class__.__name__
+    except Exception:
+        return "Unknown"
+
+
 def create_unified_news_tool(toolkit):
     """创建统一新闻工具函数"""
     analyzer = UnifiedNewsAnalyzer(toolkit)
     
+    @prefetchable("unified_news")
     def get_stock_news_unified(stock_code: str, max_news: int = 100, model_info: str = ""):
         """
         统一新闻获取工具
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+后台批量审计写入器
+
+操作日志、Token 使用记录这类"写多读少"的审计数据不需要在请求/LLM 调用的关键路径上同步落库。
+AuditWriter 把记录放进内存缓冲区，由后台线程按 数量阈值 / 时间阈值 批量写入：
+- 有 sink（例如 MongoDB collection.insert_many）时批量写入 sink
+- sink 不可用或写入失败时，追加写入 JSONL 回退文件（只追加，不重写整个文件）；
+  部分写入失败时只回退失败的记录
+- 配置了 replay_decoder 时，后台线程启动时及之后每次 flush（按间隔节流）把回退文件重放回 sink
+- 进程退出 / 应用关闭时自动 flush，保证不丢记录
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+# 批量写入函数：接收一批记录（dict 列表），失败时抛出异常
+AuditSink = Callable[[List[Dict[str, Any]]], None]
+
+
+class AuditSinkUnavailable(Exception):
+    """sink 当前不可用（例如未启用 MongoDB），直接写入回退文件，不记录告警"""
+
+
+class AuditPartialWrite(Exception):
+    """sink 只写入了部分记录：failed 中的记录需要回退，其余已写入"""
+
+    def __init__(self, failed: List[Dict[str, Any]], message: str = ""):
+        super().__init__(message or f"{len(failed)} 条记录写入失败")
+        self.failed = failed
+
+
+# MongoDB 重复键错误码：重放时记录已存在（此前已写入成功），视为成功
+_DUPLICATE_KEY = 11000
+
+# 回退文件被某个进程认领重放后的文件名后缀；超过该时长仍未删除的认领文件视为进程崩溃遗留，可被重新认领
+_REPLAY_SUFFIX = ".replay-"
+_STALE_REPLAY_SECONDS = 600
+
+
+DEFAULT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "2.0"))
+DEFAULT_MAX_BUFFER = int(os.getenv("AUDIT_MAX_BUFFER", "10000"))
+DEFAULT_REPLAY_INTERVAL = float(os.getenv("AUDIT_REPLAY_INTERVAL_SECONDS", "60"))
+
+
+def insert_many_unordered(collection, documents: List[Dict[str, Any]]) -> None:
+    """
+    无序批量插入，部分失败时只把失败的文档交给写入器回退
+
+    重复键错误视为已写入（记录带客户端生成的 _id，重放回退文件时可能已经存在）
+    """
+    from pymongo.errors import BulkWriteError
+
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        failed = sorted({
+            err["index"] for err in e.details.get("writeErrors", [])
+            if err.get("code") != _DUPLICATE_KEY
+        })
+        if failed:
+            raise AuditPartialWrite([documents[i] for i in failed]) from e
+
+
+class AuditWriter:
+    """后台批量审计写入器"""
+
+    def __init__(
+        self,
+        name: str,
+        sink: Optional[AuditSink] = None,
+        fallback_file: Optional[Union[str, Path]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+        replay_decoder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        replay_interval: float = DEFAULT_REPLAY_INTERVAL,
+    ):
+        """
+        Args:
+            name: 写入器名称（用于日志）
+            sink: 批量写入函数，为 None 时只写 JSONL 回退文件
+            fallback_file: JSONL 回退文件路径
+            batch_size: 缓冲区达到该数量时立即触发 flush
+            flush_interval: 最长 flush 间隔（秒）
+            max_buffer: 缓冲区上限，达到上限时在调用方线程同步 flush（背压，不丢弃记录）
+            replay_decoder: 把回退文件中的 JSON 记录还原为 sink 可写入的文档（如 _id、时间字段）；
+                为 None 时不重放（回退文件本身就是存储，例如未启用 MongoDB 时的 usage.jsonl）
+            replay_interval: 两次重放检查之间的最短间隔（秒）
+        """
+        self.name = name
+        self.sink = sink
+        self.fallback_file = Path(fallback_file) if fallback_file else None
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.05, flush_interval)
+        self.max_buffer = max(self.batch_size, max_buffer)
+        self.replay_decoder = replay_decoder
+        self.replay_interval = max(0.0, replay_interval)
+        self._last_replay = 0.0
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # 串行化 flush，保证批次写入顺序与提交顺序一致
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {"submitted": 0, "flushed": 0, "fallback": 0, "failed": 0, "replayed": 0}
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+    def submit(self, record: Dict[str, Any]) -> None:
+        """提交一条记录（非阻塞，缓冲区满时同步 flush）"""
+        if self._stopped.is_set():
+            # 已关闭：直接同步写入，避免记录丢失
+            self._write_batch([record])
+            return
+
+        self._ensure_started()
+        with self._lock:
+            self._buffer.append(record)
+            self.stats["submitted"] += 1
+            size = len(self._buffer)
+
+        if size >= self.max_buffer:
+            self.flush()
+        elif size >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """立即写出缓冲区中的全部记录，返回写出的条数"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._write_batch(batch)
+            return len(batch)
+
+    def pending(self) -> int:
+        """缓冲区中尚未写出的记录数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """停止后台线程并写出剩余记录"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"audit-writer-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        # 启动时先重放上次遗留在回退文件中的记录
+        self._maybe_replay(force=True)
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:  # 后台线程不能因单次失败退出
+                logger.error(f"❌ [AuditWriter:{self.name}] 后台flush异常: {e}")
+            self._maybe_replay()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        if self.sink is not None:
+            try:
+                self.sink(batch)
+                self.stats["flushed"] += len(batch)
+                logger.debug(f"📝 [AuditWriter:{self.name}] 批量写入 {len(batch)} 条")
+                return
+            except AuditPartialWrite as e:
+                self.stats["flushed"] += len(batch) - len(e.failed)
+                logger.warning(f"⚠️ [AuditWriter:{self.name}] 部分写入失败，{len(e.failed)} 条回退到JSONL文件: {e.__cause__ or e}")
+                batch = e.failed
+            except AuditSinkUnavailable:
+                pass
+            except Exception as e:
+                logger.warning(f"⚠️ [AuditWriter:{self.name}] 批量写入失败，回退到JSONL文件: {e}")
+
+        self._append_fallback(batch)
+
+    # ------------------------------------------------------------------
+    # 回退文件重放
+    # ------------------------------------------------------------------
+    def _maybe_replay(self, force: bool = False) -> None:
+        if self.sink is None or self.fallback_file is None or self.replay_decoder is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_replay < self.replay_interval:
+            return
+        self._last_replay = now
+        try:
+            replayed = self.replay_fallback()
+            if replayed:
+                logger.info(f"♻️ [AuditWriter:{self.name}] 已从回退文件重放 {replayed} 条记录")
+        except Exception as e:
+            logger.warning(f"⚠️ [AuditWriter:{self.name}] 重放回退文件失败: {e}")
+
+    def replay_fallback(self) -> int:
+        """
+        把回退文件中的记录重新写入 sink，返回写入条数
+
+        先把回退文件原子改名为本进程的认领文件（多进程只有一个能认领成功），逐批写入；
+        sink 仍不可用时把未写入的记录追加回回退文件，等待下次重放
+        """
+        if self.sink is None or self.fallback_file is None or self.replay_decoder is None:
+            return 0
+
+        replayed = 0
+        for path in self._replay_candidates():
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+            records = [self.replay_decoder(r) for r in read_jsonl(claimed)]
+            done, failed, interrupted = self._replay_records(records)
+            if failed:
+                self._append_fallback(failed)
+            claimed.unlink()
+            replayed += done
+            if interrupted:
+                # sink 仍不可用，其余文件留待下次
+                break
+        self.stats["replayed"] += replayed
+        return replayed
+
+    def _replay_records(self, records: List[Dict[str, Any]]):
+        """逐批写入，返回 (写入条数, 需要继续回退的记录, 是否因 sink 不可用而中断)"""
+        done = 0
+        failed: List[Dict[str, Any]] = []
+        for i in range(0, len(records), self.batch_size):
+            chunk = records[i:i + self.batch_size]
+            try:
+                self.sink(chunk)
+                done += len(chunk)
+            except AuditPartialWrite as e:
+                done += len(chunk) - len(e.failed)
+                failed.extend(e.failed)
+            except Exception:
+                failed.extend(records[i:])
+                return done, failed, True
+        return done, failed, False
+
+    def _replay_candidates(self) -> List[Path]:
+        stale_before = time.time() - _STALE_REPLAY_SECONDS
+        directory = self.fallback_file.parent
+        candidates = [
+            p for p in directory.glob(self.fallback_file.name + _REPLAY_SUFFIX + "*")
+            if p.stat().st_mtime < stale_before
+        ]
+        if self.fallback_file.exists() and self.fallback_file.stat().st_size > 0:
+            candidates.append(self.fallback_file)
+        return candidates
+
+    def _claim(self, path: Path) -> Optional[Path]:
+        target = path.with_name(f"{self.fallback_file.name}{_REPLAY_SUFFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        try:
+            path.rename(target)
+            os.utime(target)
+            return target
+        except FileNotFoundError:
+            # 已被其他进程认领
+            return None
+
+    def _append_fallback(self, batch: List[Dict[str, Any]]) -> None:
+        if self.fallback_file is None:
+            self.stats["failed"] += len(batch)
+            logger.error(f"❌ [AuditWriter:{self.name}] 无可用写入目标，丢弃 {len(batch)} 条记录")
+            return
+        try:
+            self.fallback_file.parent.mkdir(parents=True, exist_ok=True)
+            lines = "".join(
+                json.dumps(_strip_mongo_id(r), ensure_ascii=False, default=str) + "\n" for r in batch
+            )
+            with open(self.fallback_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.stats["fallback"] += len(batch)
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            logger.error(f"❌ [AuditWriter:{self.name}] 写入JSONL回退文件失败: {e}")
+
+
+def _strip_mongo_id(record: Dict[str, Any]) -> Dict[str, Any]:
+    """insert_many 会原地写入 _id，回退文件中保留为字符串即可"""
+    if "_id" in record:
+        record = dict(record)
+        record["_id"] = str(record["_id"])
+    return record
+
+
+def read_jsonl(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """读取 JSONL 回退文件，跳过损坏的行（例如进程崩溃时写了一半的最后一行）"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+# ----------------------------------------------------------------------
+# 全局注册表
+# ----------------------------------------------------------------------
+_writers: Dict[str, AuditWriter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_audit_writer(name: str, **kwargs) -> AuditWriter:
+    """获取（或创建）指定名称的全局审计写入器，kwargs 仅在首次创建时生效"""
+    writer = _writers.get(name)
+    if writer is not None:
+        return writer
+    with _registry_lock:
+        writer = _writers.get(name)
+        if writer is None:
+            writer = AuditWriter(name, **kwargs)
+            _writers[name] = writer
+        return writer
+
+
+def shutdown_audit_writers(timeout: float = 5.0) -> None:
+    """关闭全部审计写入器并写出剩余记录（应用关闭 / 进程退出时调用）"""
+    with _registry_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        try:
+            writer.close(timeout)
+        except Exception as e:
+            logger.error(f"❌ [AuditWriter:{writer.name}] 关闭失败: {e}")
+
+
+atexit.register(shutdown_audit_writers)
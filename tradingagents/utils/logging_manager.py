@@ -4,10 +4,14 @@
 提供项目级别的日志配置和管理功能
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union
@@ -33,8 +37,9 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        # 添加颜色
+        # 添加颜色（复制记录，避免污染同一条记录在其他处理器中的 levelname）
         if hasattr(record, 'levelname') and record.levelname in self.COLORS:
+            record = logging.makeLogRecord(record.__dict__)
             record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
         
         return super().format(record)
@@ -69,6 +74,90 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    进程内队列处理器
+
+    标准 QueueHandler.prepare 会在调用线程中执行完整的 Formatter.format（时间戳、JSON 序列化等），
+    这里只合并消息参数，其余格式化与文件 I/O 全部交给 QueueListener 后台线程中的处理器完成。
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    日志器级别的采样 / 限流过滤器
+
+    只作用于 max_level 及以下级别（默认 INFO），WARNING 及以上始终输出：
+    - sample_every: 每 N 条只保留 1 条
+    - max_per_second: 每秒最多输出的条数，超出部分丢弃，并在下一条输出的日志前注明丢弃数量
+    """
+
+    def __init__(self, max_per_second: float = 0, sample_every: int = 1,
+                 max_level: Union[int, str] = logging.INFO):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.sample_every = max(1, int(sample_every))
+        self.max_level = max_level if isinstance(max_level, int) else getattr(logging, str(max_level).upper())
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        with self._lock:
+            self._seen += 1
+            if self.sample_every > 1 and (self._seen - 1) % self.sample_every:
+                return False
+
+            if self.max_per_second > 0:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                if self._window_count >= self.max_per_second:
+                    self._suppressed += 1
+                    return False
+                self._window_count += 1
+
+            suppressed, self._suppressed = self._suppressed, 0
+
+        if suppressed:
+            record.msg = f"[限流丢弃 {suppressed} 条] {record.msg}"
+        return True
+
+
+# 文件处理器后台写入线程（全局唯一，重新初始化日志系统时替换）
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_queue_listener():
+    """停止后台日志线程并写出队列中剩余的日志"""
+    global _queue_listener
+    if _queue_listener is not None:
+        try:
+            _queue_listener.stop()
+        except Exception:
+            pass
+        for handler in _queue_listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
 class TradingAgentsLogger:
     """TradingAgents统一日志管理器"""
     
@@ -133,7 +222,12 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
-            }
+            },
+            'performance': {
+                # 文件处理器通过 QueueHandler/QueueListener 在后台线程格式化和写入
+                'async_handlers': os.getenv('TRADINGAGENTS_LOG_ASYNC', 'true').lower() == 'true'
+            },
+            'sampling': {}
         }
 
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
@@ -179,6 +273,7 @@ class TradingAgentsLogger:
                 'stdout_only': logging_config.get('docker', {}).get('stdout_only', True)
             },
             'performance': logging_config.get('performance', {}),
+            'sampling': logging_config.get('sampling', {}),
             'security': logging_config.get('security', {}),
             'business': logging_config.get('business', {})
         }
@@ -194,20 +289,47 @@ class TradingAgentsLogger:
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, self.config['level']))
         
-        # 清除现有处理器
+        # 清除现有处理器（并停止上一次初始化创建的后台写入线程）
         root_logger.handlers.clear()
+        _stop_queue_listener()
         
         # 添加处理器
         self._add_console_handler(root_logger)
 
         if not self.config['docker']['enabled'] or not self.config['docker']['stdout_only']:
-            self._add_file_handler(root_logger)
-            self._add_error_handler(root_logger)  # 🔧 添加错误日志处理器
+            # 文件处理器先挂到临时日志器上，再决定同步挂载还是交给后台线程
+            file_logger = logging.Logger('tradingagents.file_handlers')
+            self._add_file_handler(file_logger)
+            self._add_error_handler(file_logger)  # 🔧 添加错误日志处理器
             if self.config['handlers']['structured']['enabled']:
-                self._add_structured_handler(root_logger)
+                self._add_structured_handler(file_logger)
+            self._attach_file_handlers(root_logger, file_logger.handlers)
         
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _attach_file_handlers(self, logger: logging.Logger, handlers: list):
+        """挂载文件处理器：默认经由队列在后台线程写入，避免日志 I/O 阻塞分析/请求线程"""
+        global _queue_listener
+        if not handlers:
+            return
+
+        performance = self.config.get('performance', {})
+        if not performance.get('async_handlers', True):
+            for handler in handlers:
+                logger.addHandler(handler)
+            return
+
+        log_queue: queue.Queue = queue.Queue(-1)
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _queue_listener.start()
+
+        queue_handler = LazyQueueHandler(log_queue)
+        # 队列处理器本身不过滤级别，由各文件处理器自行判断
+        queue_handler.setLevel(min(h.level for h in handlers))
+        logger.addHandler(queue_handler)
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
@@ -307,6 +429,17 @@ class TradingAgentsLogger:
             logger = logging.getLogger(logger_name)
             level = getattr(logging, logger_config['level'])
             logger.setLevel(level)
+
+        # 噪声较大的日志器：采样 / 限流（只作用于该日志器直接输出的记录）
+        for logger_name, sampling_config in self.config.get('sampling', {}).items():
+            logger = logging.getLogger(logger_name)
+            for existing in [f for f in logger.filters if isinstance(f, RateLimitFilter)]:
+                logger.removeFilter(existing)
+            logger.addFilter(RateLimitFilter(
+                max_per_second=sampling_config.get('max_per_second', 0),
+                sample_every=sampling_config.get('sample_every', 1),
+                max_level=sampling_config.get('max_level', 'INFO'),
+            ))
     
     def _parse_size(self, size_str: str) -> int:
         """解析大小字符串（如'10MB'）为字节数"""
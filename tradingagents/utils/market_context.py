@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+市场级共享上下文
+
+批量分析（自选股、批量提交）时，每只股票的分析都会获取同一批市场级数据：大盘概览、宏观/全球新闻等。
+这些数据只与 (市场, 交易日期) 有关，与个股无关。
+
+本模块为每个 (市场, 交易日期) 维护一份进程内共享的上下文：被 @market_shared 装饰的市场级工具
+在执行前先查当前绑定的上下文，同一组参数只真正执行一次，并发的其他分析等待同一个结果（single-flight）。
+上下文在 TTL 到期后失效，避免长期运行的进程使用过时的市场数据。
+
+上下文通过 ContextVar 绑定到当前运行（与 prefetch_memo 相同），未绑定时工具照常执行。
+"""
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.prefetch_memo import PrefetchKey, make_prefetch_key
+
+logger = get_logger('agents')
+
+ContextKey = Tuple[str, str]
+
+# 共享上下文的默认有效期（秒）
+DEFAULT_CONTEXT_TTL = 1800
+
+_current_context: contextvars.ContextVar[Optional["MarketContext"]] = contextvars.ContextVar(
+    "market_context", default=None
+)
+
+
+class MarketContext:
+    """单个 (市场, 交易日期) 的市场级数据共享表"""
+
+    def __init__(self, market: str, trade_date: str, ttl: float = DEFAULT_CONTEXT_TTL):
+        self.market = market
+        self.trade_date = trade_date
+        self.expires_at = time.monotonic() + ttl
+        self._futures: Dict[PrefetchKey, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "hits": 0, "failures": 0}
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def get_or_compute(self, key: PrefetchKey, compute: Callable[[], Any]) -> Any:
+        """同一 key 只执行一次 compute；其他调用者等待并复用结果。失败不缓存，等待者各自重试"""
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._futures[key] = future
+
+        if not owner:
+            try:
+                result = future.result()
+            except Exception:
+                return compute()
+            self.stats["hits"] += 1
+            logger.info(f"🌐 [市场上下文] {key[0]} 复用 {self.market} {self.trade_date} 的共享结果")
+            return result
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._futures.pop(key, None)
+                self.stats["failures"] += 1
+            future.set_exception(e)
+            raise
+        self.stats["computed"] += 1
+        future.set_result(result)
+        return result
+
+    def activate(self) -> contextvars.Token:
+        """把共享上下文绑定到当前上下文，返回用于 deactivate 的 token"""
+        return _current_context.set(self)
+
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        _current_context.reset(token)
+
+
+# 进程内的共享上下文注册表：(市场, 交易日期) -> MarketContext
+_contexts: Dict[ContextKey, MarketContext] = {}
+_contexts_lock = threading.Lock()
+
+
+def get_market_context(market: str, trade_date: str, ttl: float = DEFAULT_CONTEXT_TTL) -> MarketContext:
+    """获取 (市场, 交易日期) 的共享上下文，不存在或已过期时新建"""
+    key = (market, str(trade_date))
+    with _contexts_lock:
+        for stale in [k for k, ctx in _contexts.items() if ctx.expired]:
+            _contexts.pop(stale, None)
+        context = _contexts.get(key)
+        if context is None:
+            context = MarketContext(market, str(trade_date), ttl)
+            _contexts[key] = context
+            logger.info(f"🌐 [市场上下文] 新建共享上下文: {market} {trade_date}")
+        return context
+
+
+def clear_market_contexts() -> None:
+    with _contexts_lock:
+        _contexts.clear()
+
+
+def get_current_market_context() -> Optional[MarketContext]:
+    return _current_context.get()
+
+
+@contextmanager
+def shared_market_context(market: str, trade_date: str, ttl: float = DEFAULT_CONTEXT_TTL):
+    """
+    在上下文内绑定 (市场, 交易日期) 的共享上下文
+
+    Yields:
+        MarketContext: 共享上下文（同一进程内同市场、同日期的分析共用一份）
+    """
+    context = get_market_context(market, trade_date, ttl)
+    token = context.activate()
+    try:
+        yield context
+    finally:
+        context.deactivate(token)
+
+
+def market_shared(tool_name: str):
+    """
+    市场级工具装饰器：绑定了共享上下文时，同一组参数在 (市场, 交易日期) 内只执行一次
+
+    只用于结果与个股无关的工具（大盘概览、宏观/全球新闻等）。
+
+    Args:
+        tool_name: 共享表中的工具名
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            context = _current_context.get()
+            if context is None or context.expired:
+                return func(*args, **kwargs)
+
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+            except TypeError:
+                return func(*args, **kwargs)
+
+            key = make_prefetch_key(tool_name, dict(bound.arguments))
+            return context.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
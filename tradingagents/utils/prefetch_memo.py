@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+数据预取备忘表
+
+一次分析运行开始时，图可以提前在后台线程池中发起各分析师首轮必调的数据工具（见
+tradingagents/graph/data_prefetch.py），结果以 Future 的形式登记在本次运行的备忘表中。
+被 @prefetchable 装饰的工具在执行前先查表：命中则等待预取结果，未命中（参数不同、未开启预取）
+则照常执行。这样数据获取的耗时与分析师的首次 LLM 调用重叠，而不是排在它之后。
+
+备忘表通过 ContextVar 绑定到当前运行，LangGraph 与 ToolNode 在执行节点/工具时会复制上下文，
+因此同一进程内并发的多个分析互不干扰。
+"""
+
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+PrefetchKey = Tuple[Any, ...]
+
+# 当前运行的备忘表；预取线程自身执行工具时置为 True，避免等待自己登记的 Future
+_current_memo: contextvars.ContextVar[Optional["PrefetchMemo"]] = contextvars.ContextVar(
+    "prefetch_memo", default=None
+)
+_prefetching: contextvars.ContextVar[bool] = contextvars.ContextVar("prefetching", default=False)
+
+
+def make_prefetch_key(tool_name: str, arguments: Dict[str, Any]) -> PrefetchKey:
+    """按工具名 + 完整参数（含默认值）生成备忘表键"""
+    normalized = tuple(
+        (name, value.strip() if isinstance(value, str) else value)
+        for name, value in sorted(arguments.items())
+    )
+    return (tool_name,) + normalized
+
+
+class PrefetchMemo:
+    """单次分析运行的预取结果表"""
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        """
+        Args:
+            wait_timeout: 工具等待预取结果的最长时间（秒），超时后回退为直接执行；None 表示一直等待
+        """
+        self.wait_timeout = wait_timeout
+        self._futures: Dict[PrefetchKey, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"registered": 0, "hits": 0, "fallbacks": 0}
+
+    def register(self, key: PrefetchKey, future: Future) -> None:
+        with self._lock:
+            self._futures[key] = future
+            self.stats["registered"] += 1
+
+    def get(self, key: PrefetchKey) -> Optional[Future]:
+        with self._lock:
+            return self._futures.get(key)
+
+    def activate(self) -> contextvars.Token:
+        """把备忘表绑定到当前上下文，返回用于 deactivate 的 token"""
+        return _current_memo.set(self)
+
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        _current_memo.reset(token)
+
+
+def get_current_memo() -> Optional[PrefetchMemo]:
+    return _current_memo.get()
+
+
+def run_as_prefetch(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """在预取线程中执行工具：跳过备忘表查询，直接获取数据"""
+    _prefetching.set(True)
+    return func(*args, **kwargs)
+
+
+def prefetchable(tool_name: str):
+    """
+    工具预取装饰器：执行前先查当前运行的备忘表
+
+    放在 @log_tool_call 之下，命中时仍会记录一次工具调用日志。
+
+    Args:
+        tool_name: 备忘表中的工具名，需与预取端登记时使用的名称一致
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            memo = _current_memo.get()
+            if memo is None or _prefetching.get():
+                return func(*args, **kwargs)
+
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+            except TypeError:
+                return func(*args, **kwargs)
+
+            future = memo.get(make_prefetch_key(tool_name, dict(bound.arguments)))
+            if future is None:
+                return func(*args, **kwargs)
+
+            try:
+                result = future.result(timeout=memo.wait_timeout)
+                memo.stats["hits"] += 1
+                logger.info(f"⚡ [数据预取] {tool_name} 命中预取结果")
+                return result
+            except FutureTimeoutError:
+                logger.warning(f"⚠️ [数据预取] {tool_name} 等待预取结果超时，改为直接获取")
+            except Exception as e:
+                logger.warning(f"⚠️ [数据预取] {tool_name} 预取失败，改为直接获取: {e}")
+            memo.stats["fallbacks"] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -631,7 +631,14 @@ class StockDataPreparer:
                     "message": "MongoDB缓存未启用"
                 }
 
-            # 查询数据库中的历史数据
+            # 优先使用覆盖清单：一次索引查询即可判断，无需加载整个回溯窗口
+            coverage_entries = adapter.get_data_coverage(stock_code)
+            if coverage_entries:
+                from tradingagents.dataflows.cache.data_coverage import evaluate_coverage
+                results = [evaluate_coverage(entry, start_date, end_date) for entry in coverage_entries]
+                return next((r for r in results if r["has_data"]), results[0])
+
+            # 尚无清单（清单建立前同步的数据）：查询数据库中的历史数据
             df = adapter.get_historical_data(stock_code, start_date, end_date)
 
             if df is None or df.empty:
@@ -643,50 +650,24 @@ class StockDataPreparer:
                     "message": "数据库中没有数据"
                 }
 
-            # 检查数据量
-            record_count = len(df)
-
-            # 获取最新数据日期
-            if 'trade_date' in df.columns:
-                latest_date = df['trade_date'].max()
-            elif 'date' in df.columns:
-                latest_date = df['date'].max()
-            else:
-                latest_date = None
-
-            # 检查是否包含最近的交易日
-            from datetime import datetime, timedelta
-            today = datetime.now()
-
-            # 获取最近的交易日（考虑周末）
-            recent_trade_date = today
-            for i in range(5):  # 最多回溯5天
-                check_date = today - timedelta(days=i)
-                if check_date.weekday() < 5:  # 周一到周五
-                    recent_trade_date = check_date
-                    break
-
-            recent_trade_date_str = recent_trade_date.strftime('%Y-%m-%d')
-
-            # 判断数据是否最新（允许1天的延迟）
-            is_latest = False
-            if latest_date:
-                latest_date_str = str(latest_date)[:10]  # 取前10个字符 YYYY-MM-DD
-                latest_dt = datetime.strptime(latest_date_str, '%Y-%m-%d')
-                days_diff = (recent_trade_date - latest_dt).days
-                is_latest = days_diff <= 1  # 允许1天延迟
-
-            message = f"找到{record_count}条记录，最新日期: {latest_date}"
-            if not is_latest:
-                message += f"（需要更新到{recent_trade_date_str}）"
+            # 检查数据量与最新日期，按交易日历判断是否最新
+            date_column = next((c for c in ('trade_date', 'date') if c in df.columns), None)
+            if date_column is None:
+                return {
+                    "has_data": True,
+                    "is_latest": False,
+                    "record_count": len(df),
+                    "latest_date": None,
+                    "message": f"找到{len(df)}条记录，最新日期: None"
+                }
 
-            return {
-                "has_data": True,
-                "is_latest": is_latest,
-                "record_count": record_count,
-                "latest_date": str(latest_date) if latest_date else None,
-                "message": message
-            }
+            from tradingagents.dataflows.cache.data_coverage import evaluate_coverage
+            dates = df[date_column].astype(str)
+            return evaluate_coverage(
+                {"first_date": dates.min(), "last_date": dates.max(), "row_count": len(df)},
+                start_date,
+                end_date,
+            )
 
         except Exception as e:
             logger.error(f"❌ [数据检查] 检查数据库数据失败: {e}")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+图运行遥测
+
+按图节点、按 LLM 调用记录：输入/输出 Token、首 Token 时间、调用总耗时、工具执行耗时、
+LLM 响应缓存命中、错误与重试。数据有两种去向：
+
+- 进程级指标注册表（直方图 / 计数器），由 /metrics 以 Prometheus 文本格式导出
+- 单次运行的汇总（RunTelemetry.summary），写入 performance_metrics.telemetry 并随任务文档保存
+
+LLM 与工具调用通过 LangChain 回调采集；节点名来自 LangGraph 写入回调元数据的 langgraph_node。
+节点内部直接调用 llm.invoke() 时，LangChain 会从当前节点的运行配置继承回调，无需修改各个智能体。
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+LabelValues = Tuple[str, ...]
+
+# 秒级耗时的直方图分桶
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+# 单次调用 Token 数的直方图分桶
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """带标签的累加计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(tuple(str(v) for v in label_values), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_number(v)}" for key, v in items]
+
+
+class Histogram:
+    """带标签的累积直方图（Prometheus 语义：每个桶统计 <= 上界的观测数）"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数..., 总数, 总和]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self, *label_values: str) -> Dict[str, float]:
+        series = self._series.get(tuple(str(v) for v in label_values))
+        if not series:
+            return {"count": 0, "sum": 0.0}
+        return {"count": series[-2], "sum": series[-1]}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            for i, upper in enumerate(self.buckets):
+                labels = _format_labels(self.labels, key, f'le="{_format_number(upper)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_number(series[i])}")
+            inf_labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {_format_number(series[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_number(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_number(series[-2])}")
+        return lines
+
+
+class TelemetryRegistry:
+    """进程级遥测指标"""
+
+    def __init__(self):
+        self.llm_latency = Histogram(
+            "tradingagents_llm_call_seconds", "LLM 调用总耗时", ("node", "model"))
+        self.llm_ttft = Histogram(
+            "tradingagents_llm_first_token_seconds", "LLM 首 Token 时间（非流式调用等于总耗时）", ("node", "model"))
+        self.llm_prompt_tokens = Histogram(
+            "tradingagents_llm_prompt_tokens", "单次 LLM 调用的输入 Token 数", ("node", "model"), TOKEN_BUCKETS)
+        self.llm_tokens = Counter(
+            "tradingagents_llm_tokens_total", "LLM Token 累计用量", ("node", "model", "kind"))
+        self.llm_errors = Counter(
+            "tradingagents_llm_errors_total", "LLM 调用失败次数", ("node", "model"))
+        self.llm_retries = Counter(
+            "tradingagents_llm_retries_total", "LLM 调用重试次数", ("node",))
+        self.llm_cache_hits = Counter(
+            "tradingagents_llm_cache_hits_total", "LLM 响应缓存命中次数", ("node",))
+        self.llm_cost = Counter(
+            "tradingagents_llm_cost_total", "LLM 调用累计成本（按定价配置的货币单位）", ("model",))
+        self.tool_latency = Histogram(
+            "tradingagents_tool_seconds", "工具执行耗时", ("node", "tool"))
+        self.node_latency = Histogram(
+            "tradingagents_node_seconds", "图节点耗时", ("node",))
+        self.runs = Counter(
+            "tradingagents_graph_runs_total", "图运行次数", ("status",))
+
+    @property
+    def metrics(self) -> Iterable[Any]:
+        return (value for value in vars(self).values() if isinstance(value, (Counter, Histogram)))
+
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[TelemetryRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_telemetry() -> TelemetryRegistry:
+    """获取进程级遥测注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TelemetryRegistry()
+    return _registry
+
+
+# 当前运行的遥测，供 LLM 响应缓存等非回调路径记录事件
+_current_run: contextvars.ContextVar[Optional["RunTelemetry"]] = contextvars.ContextVar(
+    "run_telemetry", default=None
+)
+
+
+def current_node(default: str = "unknown") -> str:
+    """当前 LangGraph 节点名（从 LangChain 运行配置的元数据读取）"""
+    try:
+        from langchain_core.runnables.config import var_child_runnable_config
+        config = var_child_runnable_config.get() or {}
+        return (config.get("metadata") or {}).get("langgraph_node") or default
+    except Exception:
+        return default
+
+
+def record_cache_hit() -> None:
+    """记录一次 LLM 响应缓存命中（由缓存层调用）"""
+    node = current_node()
+    get_telemetry().llm_cache_hits.inc(node)
+    run = _current_run.get()
+    if run is not None:
+        run.add(node, cache_hits=1)
+
+
+class RunTelemetry(BaseCallbackHandler):
+    """单次图运行的遥测：LangChain 回调，同时写入进程级注册表"""
+
+    def __init__(self, provider: str = "", registry: Optional[TelemetryRegistry] = None):
+        self.provider = provider
+        self.registry = registry or get_telemetry()
+        self._lock = threading.Lock()
+        # run_id -> (节点, 模型/工具名, 开始时间, 首 Token 时间)
+        self._pending: Dict[UUID, List[Any]] = {}
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self.models: Dict[str, List[int]] = {}
+
+    # ------------------------------------------------------------------
+    # 绑定到当前上下文
+    # ------------------------------------------------------------------
+    def activate(self) -> contextvars.Token:
+        return _current_run.set(self)
+
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        _current_run.reset(token)
+
+    def add(self, node: str, **values: float) -> None:
+        with self._lock:
+            stats = self.nodes.setdefault(node, {
+                "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_seconds": 0.0,
+                "first_token_seconds": 0.0, "tool_calls": 0, "tool_seconds": 0.0,
+                "cache_hits": 0, "errors": 0, "retries": 0,
+            })
+            for key, value in values.items():
+                stats[key] = stats.get(key, 0) + value
+
+    # ------------------------------------------------------------------
+    # LLM 回调
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _node(metadata: Optional[Dict[str, Any]]) -> str:
+        return (metadata or {}).get("langgraph_node") or current_node()
+
+    @staticmethod
+    def _model(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> str:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        if not model and serialized:
+            model = (serialized.get("kwargs") or {}).get("model_name") or (serialized.get("kwargs") or {}).get("model")
+        return str(model or "unknown")
+
+    def _start(self, run_id: UUID, node: str, name: str) -> None:
+        with self._lock:
+            self._pending[run_id] = [node, name, time.monotonic(), None]
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs) -> None:
+        self._start(run_id, self._node(metadata), self._model(serialized, kwargs))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        self._start(run_id, self._node(metadata), self._model(serialized, kwargs))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        with self._lock:
+            pending = self._pending.get(run_id)
+            if pending is not None and pending[3] is None:
+                pending[3] = time.monotonic()
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        node, model, started, first_token = pending
+        now = time.monotonic()
+        latency = now - started
+        ttft = (first_token or now) - started
+
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name") or model
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or usage.get("output_tokens") or 0
+        if not prompt_tokens and not completion_tokens:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += metadata.get("input_tokens", 0)
+                    completion_tokens += metadata.get("output_tokens", 0)
+
+        registry = self.registry
+        registry.llm_latency.observe(latency, node, model)
+        registry.llm_ttft.observe(ttft, node, model)
+        registry.llm_prompt_tokens.observe(prompt_tokens, node, model)
+        registry.llm_tokens.inc(node, model, "prompt", amount=prompt_tokens)
+        registry.llm_tokens.inc(node, model, "completion", amount=completion_tokens)
+
+        self.add(node, llm_calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                 llm_seconds=latency, first_token_seconds=ttft)
+        with self._lock:
+            totals = self.models.setdefault(model, [0, 0])
+            totals[0] += prompt_tokens
+            totals[1] += completion_tokens
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        self.registry.llm_errors.inc(pending[0], pending[1])
+        self.add(pending[0], errors=1)
+
+    def on_retry(self, retry_state, *, run_id, metadata=None, **kwargs) -> None:
+        node = self._node(metadata)
+        self.registry.llm_retries.inc(node)
+        self.add(node, retries=1)
+
+    # ------------------------------------------------------------------
+    # 工具回调
+    # ------------------------------------------------------------------
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs) -> None:
+        self._start(run_id, self._node(metadata), (serialized or {}).get("name") or "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._finish_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id: UUID, error: bool = False) -> None:
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        node, tool, started, _ = pending
+        elapsed = time.monotonic() - started
+        self.registry.tool_latency.observe(elapsed, node, tool)
+        self.add(node, tool_calls=1, tool_seconds=elapsed, errors=1 if error else 0)
+
+    # ------------------------------------------------------------------
+    # 汇总
+    # ------------------------------------------------------------------
+    def finish(self, node_timings: Dict[str, float], status: str = "success") -> Dict[str, Any]:
+        """记录节点耗时与成本到注册表，返回写入任务文档的汇总"""
+        for node, elapsed in node_timings.items():
+            self.registry.node_latency.observe(elapsed, node)
+        self.registry.runs.inc(status)
+
+        summary = self.summary()
+        for model, cost in summary["cost_by_model"].items():
+            if cost:
+                self.registry.llm_cost.inc(model, amount=cost)
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            nodes = {node: dict(stats) for node, stats in self.nodes.items()}
+            models = {model: list(tokens) for model, tokens in self.models.items()}
+
+        cost_by_model: Dict[str, float] = {}
+        currency = "CNY"
+        try:
+            from tradingagents.config.config_manager import config_manager
+            for model, (prompt_tokens, completion_tokens) in models.items():
+                cost_by_model[model], currency = config_manager.calculate_cost(
+                    self.provider, model, prompt_tokens, completion_tokens)
+        except Exception as e:
+            logger.debug(f"⚠️ [遥测] 成本计算失败: {e}")
+
+        for stats in nodes.values():
+            for key in ("llm_seconds", "first_token_seconds", "tool_seconds"):
+                stats[key] = round(stats[key], 3)
+
+        return {
+            "nodes": nodes,
+            "models": {m: {"prompt_tokens": t[0], "completion_tokens": t[1]} for m, t in models.items()},
+            "totals": {
+                "llm_calls": sum(s["llm_calls"] for s in nodes.values()),
+                "prompt_tokens": sum(s["prompt_tokens"] for s in nodes.values()),
+                "completion_tokens": sum(s["completion_tokens"] for s in nodes.values()),
+                "tool_calls": sum(s["tool_calls"] for s in nodes.values()),
+                "cache_hits": sum(s["cache_hits"] for s in nodes.values()),
+                "cost": round(sum(cost_by_model.values()), 6),
+                "currency": currency,
+            },
+            "cost_by_model": cost_by_model,
+        }
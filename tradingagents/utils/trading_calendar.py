@@ -0,0 +1,412 @@
+"""
+交易所交易日历
+
+按市场（CN 沪深 / HK 港交所 / US 美股）维护一段日期范围内的交易日位图（NumPy bool 数组），
+并预先计算累计交易日数与前后最近交易日索引，提供 O(1) 的：
+- is_trading_day：是否交易日（区分周末 / 节假日）
+- prev_trading_day / next_trading_day：前后最近交易日
+- trading_days_between：区间内交易日数量
+- next_close_after / is_session_open：收盘对齐的缓存过期判断
+
+日历保存在本地文件（TRADING_CALENDAR_FILE，默认 ./data/trading_calendar.json），由
+refresh_trading_calendar 从 Tushare trade_cal / hk_tradecal / us_tradecal 刷新；文件更新后各进程按
+修改时间自动重新加载。没有日历文件或日期超出范围时按工作日（周一至周五）估算。
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("default")
+
+DateLike = Union[date, datetime, str]
+
+CALENDAR_FILE_VERSION = 1
+
+# 市场 -> (时区, 开盘时间, 收盘时间)
+MARKET_SESSIONS: Dict[str, Tuple[str, dtime, dtime]] = {
+    "CN": ("Asia/Shanghai", dtime(9, 30), dtime(15, 0)),
+    "HK": ("Asia/Hong_Kong", dtime(9, 30), dtime(16, 0)),
+    "US": ("America/New_York", dtime(9, 30), dtime(16, 0)),
+}
+
+# 收盘后数据源发布日线所需的缓冲时间（与行情入库的收盘后缓冲期一致）
+CLOSE_SETTLE_MINUTES = 30
+
+_MARKET_ALIASES = {
+    "cn": "CN", "a股": "CN", "china": "CN", "china_a": "CN", "sse": "CN", "szse": "CN",
+    "hk": "HK", "港股": "HK", "hong_kong": "HK", "hkex": "HK",
+    "us": "US", "美股": "US", "nyse": "US", "nasdaq": "US",
+}
+
+
+def normalize_market(market: Optional[str]) -> str:
+    """把各处使用的市场名称（CN/A股/china/港股/us ...）统一为 CN/HK/US"""
+    if not market:
+        return "CN"
+    return _MARKET_ALIASES.get(str(market).strip().lower(), str(market).upper())
+
+
+def to_date(value: DateLike) -> date:
+    """date / datetime / 'YYYY-MM-DD' / 'YYYYMMDD' -> date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()[:10]
+    if len(text) == 8 and text.isdigit():
+        return datetime.strptime(text, "%Y%m%d").date()
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+class ExchangeCalendar:
+    """单个市场的交易日历（日期范围内为位图，范围外按工作日估算）"""
+
+    def __init__(self, market: str, start: date, open_days: np.ndarray, source: str = "weekday"):
+        """
+        Args:
+            market: CN / HK / US
+            start: 位图第一天
+            open_days: bool 数组，open_days[i] 表示 start + i 天是否交易日
+            source: 日历来源（tushare / weekday）
+        """
+        self.market = normalize_market(market)
+        self.source = source
+        self.start = start
+        self.end = start + timedelta(days=max(len(open_days) - 1, 0))
+        self._origin = start.toordinal()
+        self._open = np.asarray(open_days, dtype=bool)
+
+        index = np.arange(len(self._open))
+        # 截至每一天（含）的累计交易日数
+        self._cumulative = np.cumsum(self._open, dtype=np.int64)
+        # 每一天（含）之前 / 之后最近交易日的索引；不存在时为 -1 / len
+        self._prev = np.maximum.accumulate(np.where(self._open, index, -1)) if len(index) else index
+        self._next = (
+            np.minimum.accumulate(np.where(self._open, index, len(index))[::-1])[::-1] if len(index) else index
+        )
+
+        tz_name, self.open_time, self.close_time = MARKET_SESSIONS.get(self.market, MARKET_SESSIONS["CN"])
+        self.tz = ZoneInfo(tz_name)
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+    @classmethod
+    def weekdays(cls, market: str, start: DateLike, end: DateLike) -> "ExchangeCalendar":
+        """按工作日估算的日历（无节假日信息）"""
+        start_d, end_d = to_date(start), to_date(end)
+        days = np.arange(np.datetime64(start_d), np.datetime64(end_d) + 1)
+        return cls(market, start_d, np.is_busday(days), source="weekday")
+
+    @classmethod
+    def from_open_dates(
+        cls, market: str, open_dates: Iterable[DateLike], start: DateLike, end: DateLike, source: str = "tushare"
+    ) -> "ExchangeCalendar":
+        """由交易日列表构建"""
+        start_d, end_d = to_date(start), to_date(end)
+        bits = np.zeros((end_d - start_d).days + 1, dtype=bool)
+        for value in open_dates:
+            offset = (to_date(value) - start_d).days
+            if 0 <= offset < len(bits):
+                bits[offset] = True
+        return cls(market, start_d, bits, source=source)
+
+    def to_bits(self) -> str:
+        return "".join("1" if v else "0" for v in self._open)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    def _offset(self, day: date) -> Optional[int]:
+        offset = day.toordinal() - self._origin
+        return offset if 0 <= offset < len(self._open) else None
+
+    def is_trading_day(self, value: DateLike) -> bool:
+        day = to_date(value)
+        offset = self._offset(day)
+        if offset is None:
+            return day.weekday() < 5
+        return bool(self._open[offset])
+
+    def prev_trading_day(self, value: DateLike, inclusive: bool = False) -> date:
+        """之前最近的交易日（inclusive=True 时当天是交易日则返回当天）"""
+        day = to_date(value)
+        if not inclusive:
+            day -= timedelta(days=1)
+        offset = self._offset(day)
+        if offset is not None:
+            found = int(self._prev[offset])
+            if found >= 0:
+                return date.fromordinal(self._origin + found)
+            day = self.start - timedelta(days=1)
+        # 超出日历范围：按工作日回溯
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_trading_day(self, value: DateLike, inclusive: bool = False) -> date:
+        """之后最近的交易日（inclusive=True 时当天是交易日则返回当天）"""
+        day = to_date(value)
+        if not inclusive:
+            day += timedelta(days=1)
+        offset = self._offset(day)
+        if offset is not None:
+            found = int(self._next[offset])
+            if found < len(self._open):
+                return date.fromordinal(self._origin + found)
+            day = self.end + timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def trading_days_between(self, start: DateLike, end: DateLike) -> int:
+        """[start, end] 闭区间内的交易日数量"""
+        start_d, end_d = to_date(start), to_date(end)
+        if start_d > end_d:
+            return 0
+        count = 0
+        # 日历范围之前 / 之后的部分按工作日计数
+        if start_d < self.start:
+            before_end = min(end_d, self.start - timedelta(days=1))
+            count += int(np.busday_count(np.datetime64(start_d), np.datetime64(before_end) + 1))
+        if end_d > self.end:
+            after_start = max(start_d, self.end + timedelta(days=1))
+            count += int(np.busday_count(np.datetime64(after_start), np.datetime64(end_d) + 1))
+        lo = self._offset(max(start_d, self.start))
+        hi = self._offset(min(end_d, self.end))
+        if lo is not None and hi is not None and lo <= hi:
+            count += int(self._cumulative[hi] - (self._cumulative[lo - 1] if lo > 0 else 0))
+        return count
+
+    def trading_days(self, start: DateLike, end: DateLike) -> List[date]:
+        """[start, end] 闭区间内的交易日列表"""
+        start_d, end_d = to_date(start), to_date(end)
+        days = []
+        day = self.next_trading_day(start_d, inclusive=True)
+        while day <= end_d:
+            days.append(day)
+            day = self.next_trading_day(day)
+        return days
+
+    # ------------------------------------------------------------------
+    # 交易时段
+    # ------------------------------------------------------------------
+    def _local(self, moment: Optional[datetime]) -> datetime:
+        moment = moment or datetime.now(self.tz)
+        if moment.tzinfo is None:
+            moment = moment.astimezone()  # 无时区的时间视为本机时间
+        return moment.astimezone(self.tz)
+
+    def session_close(self, value: DateLike) -> datetime:
+        """某交易日收盘后（含数据发布缓冲）的时间点"""
+        close = datetime.combine(to_date(value), self.close_time, tzinfo=self.tz)
+        return close + timedelta(minutes=CLOSE_SETTLE_MINUTES)
+
+    def is_session_open(self, moment: Optional[datetime] = None) -> bool:
+        """是否处于交易时段（开盘至收盘后缓冲期结束）"""
+        local = self._local(moment)
+        if not self.is_trading_day(local.date()):
+            return False
+        opened = datetime.combine(local.date(), self.open_time, tzinfo=self.tz)
+        return opened <= local < self.session_close(local.date())
+
+    def next_close_after(self, moment: Optional[datetime] = None) -> datetime:
+        """moment 之后的第一个收盘时间点（之后会有新的日线数据）"""
+        local = self._local(moment)
+        day = self.next_trading_day(local.date(), inclusive=True)
+        if self.session_close(day) <= local:
+            day = self.next_trading_day(day)
+        return self.session_close(day)
+
+    def last_closed_trading_day(self, moment: Optional[datetime] = None) -> date:
+        """最近一个已收盘（日线数据已可获取）的交易日"""
+        local = self._local(moment)
+        day = self.prev_trading_day(local.date(), inclusive=True)
+        if self.session_close(day) > local:
+            day = self.prev_trading_day(day)
+        return day
+
+    def plan_sync_range(
+        self, start: DateLike, end: DateLike, moment: Optional[datetime] = None
+    ) -> Optional[Tuple[str, str]]:
+        """
+        把增量同步区间收缩到实际可获取日线的交易日
+
+        Returns:
+            (起始交易日, 截止交易日)，YYYY-MM-DD；区间内没有已收盘的交易日时返回 None
+        """
+        first = self.next_trading_day(start, inclusive=True)
+        last = min(self.prev_trading_day(end, inclusive=True), self.last_closed_trading_day(moment))
+        if first > last:
+            return None
+        return first.isoformat(), last.isoformat()
+
+
+# ----------------------------------------------------------------------
+# 日历文件与进程内缓存
+# ----------------------------------------------------------------------
+_calendars: Dict[str, ExchangeCalendar] = {}
+_loaded_mtime: Optional[float] = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+# 文件修改时间的检查间隔（秒）
+_RELOAD_CHECK_SECONDS = 60.0
+
+
+def calendar_file() -> Path:
+    return Path(os.getenv("TRADING_CALENDAR_FILE", "./data/trading_calendar.json"))
+
+
+def _fallback_calendar(market: str) -> ExchangeCalendar:
+    today = date.today()
+    return ExchangeCalendar.weekdays(market, date(today.year - 10, 1, 1), date(today.year + 1, 12, 31))
+
+
+def _load_file(path: Path) -> Dict[str, ExchangeCalendar]:
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    calendars = {}
+    for market, item in (payload.get("markets") or {}).items():
+        bits = np.frombuffer(item["bits"].encode("ascii"), dtype=np.uint8) == ord("1")
+        calendars[normalize_market(market)] = ExchangeCalendar(
+            market, to_date(item["start"]), bits, source=item.get("source", "tushare")
+        )
+    return calendars
+
+
+def _maybe_reload(force: bool = False) -> None:
+    global _calendars, _loaded_mtime, _last_check
+    now = time.monotonic()
+    if not force and now - _last_check < _RELOAD_CHECK_SECONDS:
+        return
+    _last_check = now
+    path = calendar_file()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return
+    if not force and mtime == _loaded_mtime:
+        return
+    try:
+        calendars = _load_file(path)
+    except Exception as e:
+        logger.warning(f"⚠️ [交易日历] 读取日历文件失败 {path}: {e}")
+        return
+    _calendars = calendars
+    _loaded_mtime = mtime
+    logger.info(f"📅 [交易日历] 已加载 {path}: {', '.join(f'{m}({c.start}~{c.end})' for m, c in calendars.items())}")
+
+
+def get_trading_calendar(market: Optional[str] = "CN") -> ExchangeCalendar:
+    """获取市场交易日历（优先日历文件，缺失时按工作日估算）"""
+    market = normalize_market(market)
+    with _lock:
+        _maybe_reload()
+        calendar = _calendars.get(market)
+        if calendar is None:
+            calendar = _fallback_calendar(market)
+            _calendars[market] = calendar
+        return calendar
+
+
+def save_trading_calendars(calendars: Dict[str, ExchangeCalendar], path: Optional[Path] = None) -> Path:
+    """写入日历文件（先写临时文件再原子替换）"""
+    path = Path(path or calendar_file())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": CALENDAR_FILE_VERSION,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "markets": {
+            market: {"start": cal.start.isoformat(), "source": cal.source, "bits": cal.to_bits()}
+            for market, cal in calendars.items()
+        },
+    }
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    with _lock:
+        _maybe_reload(force=True)
+    return path
+
+
+def _fetch_tushare_open_dates(api, market: str, start: str, end: str) -> Tuple[List[str], Optional[str], Optional[str]]:
+    """
+    Returns:
+        (交易日列表, 返回的最早日期, 返回的最晚日期)；最早/最晚日期包含非交易日记录，
+        表示 Tushare 已发布日历的范围
+    """
+    if market == "CN":
+        df = api.trade_cal(exchange="SSE", start_date=start, end_date=end, fields="cal_date,is_open")
+    elif market == "HK":
+        df = api.hk_tradecal(start_date=start, end_date=end, fields="cal_date,is_open")
+    else:
+        df = api.us_tradecal(start_date=start, end_date=end, fields="cal_date,is_open")
+    if df is None or df.empty:
+        return [], None, None
+    cal_dates = df["cal_date"].astype(str)
+    return cal_dates[df["is_open"].astype(int) == 1].tolist(), cal_dates.min(), cal_dates.max()
+
+
+def refresh_trading_calendar(
+    markets: Iterable[str] = ("CN", "HK", "US"),
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+) -> Dict[str, int]:
+    """
+    从 Tushare 刷新交易日历并写入日历文件
+
+    默认范围为前 10 年至明年年底；某个市场获取失败时保留文件中已有的日历。
+    位图只覆盖 Tushare 实际返回的日期范围（尚未发布的未来日期不能当作休市日），
+    范围之外按工作日估算。
+
+    Returns:
+        {市场: 交易日数量}
+    """
+    from tradingagents.dataflows.providers.china.tushare import get_tushare_provider
+
+    api = get_tushare_provider().api
+    if api is None:
+        raise RuntimeError("Tushare 未连接，无法刷新交易日历")
+
+    today = date.today()
+    start_d = to_date(start) if start else date(today.year - 10, 1, 1)
+    end_d = to_date(end) if end else date(today.year + 1, 12, 31)
+
+    with _lock:
+        _maybe_reload(force=True)
+        calendars = {m: c for m, c in _calendars.items() if c.source != "weekday"}
+
+    counts = {}
+    for market in markets:
+        market = normalize_market(market)
+        try:
+            open_dates, first, last = _fetch_tushare_open_dates(
+                api, market, start_d.strftime("%Y%m%d"), end_d.strftime("%Y%m%d")
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [交易日历] {market} 获取失败，保留已有日历: {e}")
+            continue
+        if not open_dates:
+            logger.warning(f"⚠️ [交易日历] {market} 未返回交易日，保留已有日历")
+            continue
+        calendars[market] = ExchangeCalendar.from_open_dates(
+            market, open_dates, max(start_d, to_date(first)), min(end_d, to_date(last))
+        )
+        counts[market] = len(open_dates)
+
+    if counts:
+        path = save_trading_calendars(calendars)
+        logger.info(f"✅ [交易日历] 已刷新 {counts} -> {path}")
+    return counts